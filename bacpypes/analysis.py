@@ -21,7 +21,7 @@ try:
 except:
     pass
 
-from .debugging import btox, xtob
+from .debugging import DEBUG, btox, xtob
 
 from .link import PDU, Address
 from .bvll import BVLPDU, bvl_pdu_types, ForwardedNPDU, \
@@ -31,7 +31,6 @@ from .apdu import APDU, apdu_types, confirmed_request_types, unconfirmed_request
     ConfirmedRequestPDU, UnconfirmedRequestPDU, SimpleAckPDU, ComplexAckPDU, SegmentAckPDU, ErrorPDU, RejectPDU, AbortPDU
 
 # some debugging
-DEBUG = False
 _logger = logging.getLogger(__name__)
 
 # protocol map
@@ -92,7 +92,7 @@ class APDU(APCI, PDUData):
 
     def decode(self, pdu):
         APCI.decode(self, pdu)
-        self.pduData = pdu.get_data(len(pdu.pduData))
+        self.share_data(pdu)
 
     def apdu_contents(self, use_dict=None, as_class=dict):
         return PDUData.pdudata_contents(self, use_dict=use_dict, as_class=as_class)
@@ -128,7 +128,7 @@ class _APDU(APDU):
 
     def decode(self, pdu):
         APCI.update(self, pdu)
-        self.pduData = pdu.get_data(len(pdu.pduData))
+        self.share_data(pdu)
 
     def set_context(self, context):
         self.pduUserData = context.pduUserData
@@ -193,7 +193,6 @@ class ConfirmedRequestPDU(_APDU):
             apci.apduSeq = pdu.get()
             apci.apduWin = pdu.get()
         apci.apduService = pdu.get()
-        apci.pduData = pdu.pduData
 
 
 @register_apdu_type
@@ -216,7 +215,6 @@ class UnconfirmedRequestPDU(_APDU):
     @staticmethod
     def decode_pdu(apci, pdu, buff):
         apci.apduService = pdu.get()
-        apci.pduData = pdu.pduData
 
     @staticmethod
     def get_service_name(apdu_servive: int):
@@ -297,7 +295,6 @@ class ComplexAckPDU(_APDU):
             apci.apduSeq = pdu.get()
             apci.apduWin = pdu.get()
         apci.apduService = pdu.get()
-        apci.pduData = pdu.pduData
 
     @staticmethod
     def get_service_name(apdu_servive: int):
@@ -374,7 +371,6 @@ class ErrorPDU(_APDU):
     def decode_pdu(apci, pdu, buff):
         apci.apduInvokeID = pdu.get()
         apci.apduService = pdu.get()
-        apci.pduData = pdu.pduData
 
     @staticmethod
     def get_service_name(apdu_servive: int):
@@ -484,7 +480,6 @@ class AbortPDU(_APDU):
         apci.apduSrv = ((buff & 0x01) != 0)
         apci.apduInvokeID = pdu.get()
         apci.apduAbortRejectReason = pdu.get()
-        apci.pduData = pdu.pduData
 
     @staticmethod
     def get_service_name(apdu_servive: int):
@@ -0,0 +1,260 @@
+"""
+Value Decoders
+
+Turning a property value into a Python value means looking up the datatype of
+the property from the object type, the property identifier and the vendor,
+and then decoding the tags of the value as that datatype.  The decoders here
+resolve the datatype once for each (object type, property identifier, vendor
+identifier) and keep the result.  An atomic value is converted straight from
+its application tag to an int, float, str or bool, and every other value is
+left to Any.cast_out().
+
+The decoder table is filled as properties are seen, call
+clear_value_decoders() after registering an object type that changes the
+datatype of a property that has already been decoded.
+"""
+
+import logging
+import struct
+
+from ..comm import PDUData
+from ..constructeddata import Any, AnyAtomic, Array
+from ..debugging import DEBUG
+from ..errors import InvalidTag
+from ..object import get_datatype
+from ..primitivedata import Atomic, Boolean, CharacterString, Double, Enumerated, Integer, ObjectIdentifier, Real, \
+    Tag, TagList, Unsigned, decode_tag_header, direct_codec, expand_enumerations
+
+_logger = logging.getLogger(__name__)
+__all__ = ['ValueDecoder', 'get_value_decoder', 'clear_value_decoders']
+
+_real_struct = struct.Struct('>f')
+_double_struct = struct.Struct('>d')
+_long_struct = struct.Struct('>L')
+
+
+def _xlate_table(cls):
+    """Return the translate table of an enumeration class."""
+    table = cls.__dict__.get('_xlate_table')
+    if table is None:
+        table = expand_enumerations(cls)._xlate_table
+    return table
+
+
+def _boolean_converter(cls):
+    def convert(lvt, data, offset):
+        # application tagged boolean has its value in the LVT
+        if lvt > 1:
+            raise InvalidTag("invalid tag value")
+        return bool(lvt)
+    return convert
+
+
+def _unsigned_converter(cls):
+    def convert(lvt, data, offset):
+        if not lvt:
+            raise InvalidTag("invalid tag length")
+        return int.from_bytes(data[offset:offset + lvt], 'big')
+    return convert
+
+
+def _integer_converter(cls):
+    def convert(lvt, data, offset):
+        if not lvt:
+            raise InvalidTag("invalid tag length")
+        return int.from_bytes(data[offset:offset + lvt], 'big', signed=True)
+    return convert
+
+
+def _real_converter(cls):
+    unpack_from = _real_struct.unpack_from
+
+    def convert(lvt, data, offset):
+        if lvt != 4:
+            raise InvalidTag("invalid tag length")
+        return unpack_from(data, offset)[0]
+    return convert
+
+
+def _double_converter(cls):
+    unpack_from = _double_struct.unpack_from
+
+    def convert(lvt, data, offset):
+        if lvt != 8:
+            raise InvalidTag("invalid tag length")
+        return unpack_from(data, offset)[0]
+    return convert
+
+
+def _character_string_converter(cls):
+    def convert(lvt, data, offset):
+        # only UTF-8, the other character sets are left to the class
+        if (not lvt) or data[offset]:
+            return None
+        return str(data[offset + 1:offset + lvt], 'utf-8')
+    return convert
+
+
+def _enumerated_converter(cls):
+    table = _xlate_table(cls)
+
+    def convert(lvt, data, offset):
+        if not lvt:
+            raise InvalidTag("invalid tag length")
+        value = int.from_bytes(data[offset:offset + lvt], 'big')
+        return table.get(value, value)
+    return convert
+
+
+def _object_identifier_converter(cls):
+    table = _xlate_table(cls.objectTypeClass)
+    unpack_from = _long_struct.unpack_from
+
+    def convert(lvt, data, offset):
+        if lvt != 4:
+            raise InvalidTag("invalid tag length")
+        value = unpack_from(data, offset)[0]
+        obj_type = (value >> 22) & 0x03FF
+        return (table.get(obj_type) or obj_type, value & 0x003FFFFF)
+    return convert
+
+
+# a function for each atomic class that returns the converter of the class, a
+# converter is called with the LVT, the buffer and the offset of the tag data
+# and returns the value, or None when the class has to decode it
+_converters = (
+    (Boolean, _boolean_converter),
+    (Unsigned, _unsigned_converter),
+    (Integer, _integer_converter),
+    (Real, _real_converter),
+    (Double, _double_converter),
+    (CharacterString, _character_string_converter),
+    (Enumerated, _enumerated_converter),
+    (ObjectIdentifier, _object_identifier_converter),
+)
+
+# the converter of each application tag number, for AnyAtomic values
+_app_tag_converters = {cls._app_tag: converter(cls) for cls, converter in _converters}
+
+
+def _atomic_converter(cls):
+    """Return the converter of an atomic class, or None if the class has to
+    decode its values itself."""
+    # Double has no direct codec, it is only converted when it is not a subclass
+    if (cls is not Double) and not direct_codec(cls):
+        return None
+    for base, converter in _converters:
+        if issubclass(cls, base):
+            return converter(cls)
+    return None
+
+
+class ValueDecoder:
+    """
+    Decodes the values of one property.  The value is what Any.cast_out()
+    returns for the datatype, except that a native decoder returns the value
+    of the atomic value of an AnyAtomic property rather than the atomic
+    object.
+    """
+    __slots__ = ('datatype', 'native', '_app_tag', '_convert', '_converter')
+
+    def __init__(self, datatype, native=False):
+        self.datatype = datatype
+        self.native = native
+        # application tag number and converter of an atomic value
+        self._app_tag = None
+        self._convert = None
+        self._converter = None
+        if issubclass(datatype, AnyAtomic):
+            if native:
+                self._convert = self._any_atomic_convert
+        elif issubclass(datatype, Atomic):
+            self._app_tag = datatype._app_tag
+            self._convert = self._atomic_convert
+            self._converter = _atomic_converter(datatype)
+            if not self._converter:
+                self._convert = None
+
+    def _atomic_convert(self, tnum, lvt, data, offset):
+        if tnum != self._app_tag:
+            return None
+        return self._converter(lvt, data, offset)
+
+    @staticmethod
+    def _any_atomic_convert(tnum, lvt, data, offset):
+        convert = _app_tag_converters.get(tnum)
+        if not convert:
+            return None
+        return convert(lvt, data, offset)
+
+    def _cast_out(self, value):
+        value = value.cast_out(self.datatype)
+        if self.native and issubclass(self.datatype, AnyAtomic):
+            # the atomic object of an AnyAtomic property
+            value = value.value
+        return value
+
+    def decode(self, data, start, end):
+        """Return the value encoded in a buffer between two offsets."""
+        if self._convert:
+            tclass, tnum, lvt, offset = decode_tag_header(data, start)
+            if tclass == Tag.applicationTagClass:
+                if tnum == Tag.booleanAppTag:
+                    value = self._convert(tnum, lvt, data, offset) if offset == end else None
+                elif offset + lvt == end:
+                    value = self._convert(tnum, lvt, data, offset)
+                else:
+                    value = None
+                if value is not None:
+                    return value
+        value = Any()
+        value.tagList = TagList(PDUData(data[start:end]))
+        return self._cast_out(value)
+
+    def decode_any(self, value):
+        """Return the value of an Any."""
+        if self._convert and (len(value.tagList) == 1):
+            tag = value.tagList[0]
+            if tag.tagClass == Tag.applicationTagClass:
+                result = self._convert(tag.tagNumber, tag.tagLVT, tag.tagData, 0)
+                if result is not None:
+                    return result
+        return self._cast_out(value)
+
+
+# decoders by (object type, property identifier, vendor identifier, array
+# index kind, native), None for a property without a known datatype
+_value_decoders = {}
+
+
+def get_value_decoder(object_type, property_identifier, array_index=None, vendor_id=0, native=False):
+    """
+    Return the ValueDecoder of a property, or of an element of an array
+    property when there is an array index.  Raise TypeError when the datatype
+    of the property is not known.
+    """
+    # the length of an array, an element or the whole value
+    kind = None if array_index is None else (array_index != 0)
+    key = (object_type, property_identifier, vendor_id, kind, native)
+    try:
+        decoder = _value_decoders[key]
+    except KeyError:
+        decoder = _value_decoders[key] = _resolve(object_type, property_identifier, kind, vendor_id, native)
+    if decoder is None:
+        raise TypeError('unknown data_type')
+    return decoder
+
+
+def _resolve(object_type, property_identifier, kind, vendor_id, native):
+    if DEBUG: _logger.debug('resolve %r %r %r vendor_id=%r', object_type, property_identifier, kind, vendor_id)
+    datatype = get_datatype(object_type, property_identifier, vendor_id)
+    if not datatype:
+        return None
+    if (kind is not None) and issubclass(datatype, Array):
+        datatype = datatype.subtype if kind else Unsigned
+    return ValueDecoder(datatype, native)
+
+
+def clear_value_decoders():
+    """Forget the resolved decoders."""
+    _value_decoders.clear()
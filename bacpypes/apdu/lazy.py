@@ -0,0 +1,275 @@
+"""
+Lazy Complex Acks
+
+Decoding a large ReadPropertyMultiple-ACK or ReadRange-ACK builds sequences,
+Any and TagList objects for every value in it even when the application only
+wants a few of them.  The classes here keep the encoded service parameters,
+find where each value is with a pass over the tag headers and decode a value
+when it is asked for.
+
+The application service access point builds them in place of the complete
+ACKs when its `lazy_acks` attribute is set.
+"""
+
+import logging
+
+from ..basetypes import ErrorType, PropertyIdentifier, ResultFlags
+from ..comm import PDUData
+from ..constructeddata import Any, AnyAtomic
+from ..debugging import DEBUG
+from ..errors import InvalidTag
+from ..object import get_datatype
+from ..primitivedata import Atomic, ObjectIdentifier, Tag, TagList, Unsigned, decode_tag_header, decode_tagged
+from .apdu import ComplexAckPDU
+from .decoders import get_value_decoder
+
+_logger = logging.getLogger(__name__)
+__all__ = ['LazyReadPropertyMultipleACK', 'LazyReadRangeACK', 'lazy_complex_ack_types']
+
+# a dictionary of complex ack choices and lazy classes
+lazy_complex_ack_types = {}
+
+
+def register_lazy_complex_ack_type(cls):
+    lazy_complex_ack_types[cls.serviceChoice] = cls
+    return cls
+
+
+def _skip_group(data, offset, tag_number):
+    """Return the offset of the closing tag of the group whose contents start
+    at an offset, and the offset following it.  The group must be closed
+    with the tag number it was opened with."""
+    depth = 0
+    while True:
+        tclass, tnum, tlvt, next_offset = decode_tag_header(data, offset)
+        if tclass == Tag.openingTagClass:
+            depth += 1
+        elif tclass == Tag.closingTagClass:
+            if not depth:
+                if tnum != tag_number:
+                    raise InvalidTag("closing tag %d expected" % (tag_number,))
+                return offset, next_offset
+            depth -= 1
+        elif (tclass != Tag.applicationTagClass) or (tnum != Tag.booleanAppTag):
+            next_offset += tlvt
+        offset = next_offset
+
+
+def _expect_tag(data, offset, tag_class, tag_number):
+    """Check the tag at an offset and return the offset following it."""
+    tclass, tnum, tlvt, next_offset = decode_tag_header(data, offset)
+    if (tclass != tag_class) or (tnum != tag_number):
+        raise InvalidTag("tag class %d number %d expected" % (tag_class, tag_number))
+    return next_offset
+
+
+@register_lazy_complex_ack_type
+class LazyReadPropertyMultipleACK(ComplexAckPDU):
+    """
+    A ReadPropertyMultiple-ACK that decodes the values when they are asked
+    for.  The results are in the order of the ACK and are found by (object
+    identifier, property identifier, array index).  The value of a property
+    that could not be read is its property access error, an ErrorType.
+
+    Iterating yields (object identifier, property identifier, array index,
+    value) for each result, reading the ACK as it goes.
+    """
+    serviceChoice = 14
+
+    def __init__(self, *args, **kwargs):
+        super(LazyReadPropertyMultipleACK, self).__init__(*args, choice=self.serviceChoice, **kwargs)
+        self._service_data = b''
+        # results in the order of the ACK, built on demand
+        self._results = None
+        # result position by (object identifier, property identifier, array index)
+        self._positions = None
+
+    def encode(self, apdu):
+        apdu.update(self)
+        apdu.put_data(self._service_data)
+
+    def decode(self, apdu):
+        self.update(apdu)
+        self._service_data = apdu.get_remaining()
+        self._results = None
+        self._positions = None
+
+    def _scan(self):
+        """Yield (object identifier, property identifier, array index, start,
+        end, error) for each result, the value is between the start and end
+        offsets and it is a property access error if error is true."""
+        data = self._service_data
+        offset = 0
+        end = len(data)
+        while offset < end:
+            object_identifier, offset = decode_tagged(data, offset, ObjectIdentifier, 0)
+            offset = _expect_tag(data, offset, Tag.openingTagClass, 1)
+            while True:
+                tclass, tnum, tlvt, next_offset = decode_tag_header(data, offset)
+                if tclass == Tag.closingTagClass:
+                    if tnum != 1:
+                        raise InvalidTag("closing tag 1 expected")
+                    offset = next_offset
+                    break
+                property_identifier, offset = decode_tagged(data, offset, PropertyIdentifier, 2)
+                tclass, tnum, tlvt, next_offset = decode_tag_header(data, offset)
+                array_index = None
+                if (tclass == Tag.contextTagClass) and (tnum == 3):
+                    array_index, offset = decode_tagged(data, offset, Unsigned, 3)
+                    tclass, tnum, tlvt, next_offset = decode_tag_header(data, offset)
+                if (tclass != Tag.openingTagClass) or (tnum not in (4, 5)):
+                    raise InvalidTag("property value or access error expected")
+                value_end, offset = _skip_group(data, next_offset, tnum)
+                yield object_identifier, property_identifier, array_index, next_offset, value_end, tnum == 5
+
+    def _get_results(self):
+        if self._results is None:
+            self._results = list(self._scan())
+            if DEBUG: _logger.debug('scanned %d results', len(self._results))
+        return self._results
+
+    def _decode_result(self, result, vendor_id=0, native=False):
+        object_identifier, property_identifier, array_index, start, end, error = result
+        data = self._service_data
+        if error:
+            error_type = ErrorType()
+            error_type.decode(TagList(PDUData(data[start:end])))
+            return error_type
+        decoder = get_value_decoder(object_identifier[0], property_identifier, array_index, vendor_id, native)
+        return decoder.decode(data, start, end)
+
+    def __len__(self):
+        return len(self._get_results())
+
+    def __iter__(self):
+        return self.iter_values()
+
+    def iter_values(self, vendor_id=0, native=False):
+        """Yield (object identifier, property identifier, array index, value)
+        for each result, the datatypes are those of the vendor and a native
+        value of an AnyAtomic property is the value of its atomic object."""
+        results = self._results if self._results is not None else self._scan()
+        for result in results:
+            yield result[0], result[1], result[2], self._decode_result(result, vendor_id, native)
+
+    def keys(self):
+        """Return the list of (object identifier, property identifier, array
+        index) of the results, in order."""
+        return [result[:3] for result in self._get_results()]
+
+    def value_at(self, position, vendor_id=0, native=False):
+        """Return the value of the result at a position."""
+        return self._decode_result(self._get_results()[position], vendor_id, native)
+
+    def get_value(self, object_identifier, property_identifier, array_index=None):
+        """Return the value of a property, raise KeyError if it is not in the
+        ACK."""
+        if self._positions is None:
+            self._positions = {result[:3]: position for position, result in enumerate(self._get_results())}
+        position = self._positions[(tuple(object_identifier), property_identifier, array_index)]
+        return self.value_at(position)
+
+
+@register_lazy_complex_ack_type
+class LazyReadRangeACK(ComplexAckPDU):
+    """
+    A ReadRange-ACK that decodes the items when they are asked for.  The
+    header fields are decoded right away, the items are decoded in order as
+    far as needed and the position of each item is kept so it is decoded only
+    once.  Iterating yields the items.
+    """
+    serviceChoice = 26
+
+    def __init__(self, *args, **kwargs):
+        super(LazyReadRangeACK, self).__init__(*args, choice=self.serviceChoice, **kwargs)
+        self._service_data = b''
+        self.objectIdentifier = None
+        self.propertyIdentifier = None
+        self.propertyArrayIndex = None
+        self.resultFlags = None
+        self.itemCount = None
+        self.firstSequenceNumber = None
+        # tags of the items, decoded on demand
+        self._item_tags = None
+        self._item_type = None
+        # decoded items and the read position after the last one
+        self._items = []
+        self._item_mark = 0
+
+    def encode(self, apdu):
+        apdu.update(self)
+        apdu.put_data(self._service_data)
+
+    def decode(self, apdu):
+        self.update(apdu)
+        data = self._service_data = apdu.get_remaining()
+        self.objectIdentifier, offset = decode_tagged(data, 0, ObjectIdentifier, 0)
+        self.propertyIdentifier, offset = decode_tagged(data, offset, PropertyIdentifier, 1)
+        tclass, tnum, tlvt, next_offset = decode_tag_header(data, offset)
+        self.propertyArrayIndex = None
+        if (tclass == Tag.contextTagClass) and (tnum == 2):
+            self.propertyArrayIndex, offset = decode_tagged(data, offset, Unsigned, 2)
+        self.resultFlags, offset = decode_tagged(data, offset, ResultFlags, 3)
+        self.itemCount, offset = decode_tagged(data, offset, Unsigned, 4)
+        self._items_start = _expect_tag(data, offset, Tag.openingTagClass, 5)
+        self._items_end, offset = _skip_group(data, self._items_start, 5)
+        self.firstSequenceNumber = None
+        if offset < len(data):
+            self.firstSequenceNumber, offset = decode_tagged(data, offset, Unsigned, 6)
+        self._item_tags = None
+        self._items = []
+        self._item_mark = 0
+
+    def _get_item_type(self):
+        if self._item_type is None:
+            datatype = get_datatype(self.objectIdentifier[0], self.propertyIdentifier)
+            if not datatype:
+                raise TypeError('unknown data_type')
+            if self.propertyArrayIndex is not None:
+                raise TypeError('cannot read a range of an array element')
+            if getattr(datatype, 'subtype', None) is None:
+                raise TypeError('%s is not a list or array' % (datatype.__name__,))
+            self._item_type = datatype.subtype
+        return self._item_type
+
+    def _decode_item(self):
+        """Decode the next item, return False if there are no more."""
+        if self._item_tags is None:
+            self._item_tags = TagList(PDUData(self._service_data[self._items_start:self._items_end]))
+        tags = self._item_tags
+        tags.reset(self._item_mark)
+        if not len(tags):
+            return False
+        item_type = self._get_item_type()
+        if issubclass(item_type, (Atomic, AnyAtomic)):
+            # an atomic value is one tag
+            value = Any()
+            value.tagList.append(tags.Pop())
+            item = value.cast_out(item_type)
+        else:
+            item = item_type()
+            item.decode(tags)
+        self._items.append(item)
+        self._item_mark = tags.mark()
+        return True
+
+    def __len__(self):
+        # the items that are there, the item count is what the device says
+        while self._decode_item():
+            pass
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        while (len(self._items) <= index) and self._decode_item():
+            pass
+        return self._items[index]
+
+    def __iter__(self):
+        index = 0
+        while True:
+            if (index >= len(self._items)) and not self._decode_item():
+                return
+            yield self._items[index]
+            index += 1
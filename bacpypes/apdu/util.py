@@ -1,11 +1,18 @@
 
 import logging
+from array import array
 from .apdu import ReadPropertyACK, ReadPropertyMultipleACK, ReadAccessResultElement
-from ..object import get_datatype
-from ..primitivedata import Unsigned
-from ..constructeddata import Array
+from .decoders import get_value_decoder
+from .lazy import LazyReadPropertyMultipleACK, LazyReadRangeACK
+from ..debugging import DEBUG
+from ..errors import InvalidTag
 
 _logger = logging.getLogger(__name__)
+_numeric_types = (float, int, bool)
+_nan = float('nan')
+# what decoding a single value can raise
+_value_errors = (TypeError, ValueError, InvalidTag)
+__all__ = ['get_apdu_value', 'get_apdu_values', 'ValueColumns', 'iter_read_access_results', 'get_result_value']
 
 
 def get_apdu_value(apdu):
@@ -15,21 +22,44 @@ def get_apdu_value(apdu):
     :return:
     """
     if isinstance(apdu, ReadPropertyACK):
-        return _get_value_from_result(apdu, apdu.objectIdentifier[0])
+        return get_result_value(apdu, apdu.objectIdentifier[0])
     elif isinstance(apdu, ReadPropertyMultipleACK):
         values = {}
-        for result in apdu.listOfReadAccessResults:
+        for object_identifier, element in iter_read_access_results(apdu):
             # here is the object identifier
-            object_type, object_id = result.objectIdentifier
-            _logger.debug('multi objectIdentifier %s %r', type(result.objectIdentifier), result.objectIdentifier)
-            _v = values[f'{object_type}{object_id}'] = {}
-            for element in result.listOfResults:
-                _v[element.propertyIdentifier] = _get_value_from_result(element, object_type)
+            object_type, object_id = object_identifier
+            _v = values.setdefault(f'{object_type}{object_id}', {})
+            _v[element.propertyIdentifier] = get_result_value(element, object_type)
         return values
+    elif isinstance(apdu, LazyReadPropertyMultipleACK):
+        values = {}
+        for (object_type, object_id), property_identifier, array_index, value in apdu:
+            values.setdefault(f'{object_type}{object_id}', {})[property_identifier] = value
+        return values
+    elif isinstance(apdu, LazyReadRangeACK):
+        return list(apdu)
     raise ValueError('Unsupported apdu %r', apdu)
 
 
-def _get_value_from_result(element, object_type):
+def iter_read_access_results(apdu):
+    """
+    Yield the object identifier and the result element of every property in a
+    ReadPropertyMultipleACK, in the order they are in the ack
+    :param apdu: ReadPropertyMultipleACK
+    """
+    for result in apdu.listOfReadAccessResults:
+        if DEBUG: _logger.debug('multi objectIdentifier %s %r', type(result.objectIdentifier), result.objectIdentifier)
+        for element in result.listOfResults:
+            yield result.objectIdentifier, element
+
+
+def get_result_value(element, object_type):
+    """
+    Return the value of a ReadPropertyACK or of a ReadAccessResultElement as
+    primitive python type, or the property access error of the element
+    :param element: ReadPropertyACK or ReadAccessResultElement
+    :param object_type: the type of the object the property belongs to
+    """
     if isinstance(element, ReadAccessResultElement):
         prop_value = element.readResult.propertyValue
         if element.readResult.propertyAccessError:
@@ -39,13 +69,92 @@ def _get_value_from_result(element, object_type):
         prop_value = element.propertyValue
     else:
         raise ValueError('Unsupported result element %r', element)
-    data_type = get_datatype(object_type, element.propertyIdentifier)
-    if not data_type:
-        raise TypeError('unknown data_type')
-    # special case for array parts, others are managed by cast_out
-    if issubclass(data_type, Array) and (element.propertyArrayIndex is not None):
-        if element.propertyArrayIndex == 0:
-            return prop_value.cast_out(Unsigned)
+    decoder = get_value_decoder(object_type, element.propertyIdentifier, element.propertyArrayIndex)
+    return decoder.decode_any(prop_value)
+
+
+class ValueColumns:
+    """
+    The values of an ack as parallel columns, one row for each property.  The
+    numeric column has the value as a float when it is a number or a boolean
+    and NaN otherwise, ready to be handed over in bulk.
+    """
+
+    def __init__(self, rows=()):
+        rows = list(rows)
+        self.object_types = [row[0][0] for row in rows]
+        self.instances = array('L', [row[0][1] for row in rows])
+        self.property_identifiers = [row[1] for row in rows]
+        self.array_indexes = [row[2] for row in rows]
+        self.values = [row[3] for row in rows]
+        self.numeric = array('d', [
+            value if type(value) in _numeric_types else _nan for value in self.values
+        ])
+
+    def __len__(self):
+        return len(self.values)
+
+
+def _iter_apdu_values(apdu, vendor_id):
+    """Yield (object identifier, property identifier, array index, value)
+    for each property in an ack, values are native.  A value that cannot be
+    decoded, for example of a property without a known datatype, is the
+    exception."""
+    if isinstance(apdu, LazyReadPropertyMultipleACK):
+        for position, (object_identifier, property_identifier, array_index) in enumerate(apdu.keys()):
+            try:
+                value = apdu.value_at(position, vendor_id, native=True)
+            except _value_errors as err:
+                value = err
+            yield object_identifier, property_identifier, array_index, value
+        return
+    if isinstance(apdu, ReadPropertyACK):
+        results = ((apdu.objectIdentifier, apdu),)
+    elif isinstance(apdu, ReadPropertyMultipleACK):
+        results = iter_read_access_results(apdu)
+    else:
+        raise ValueError('Unsupported apdu %r', apdu)
+    for object_identifier, element in results:
+        property_identifier = element.propertyIdentifier
+        array_index = element.propertyArrayIndex
+        if isinstance(element, ReadPropertyACK):
+            value = element.propertyValue
+        elif element.readResult.propertyAccessError:
+            yield object_identifier, property_identifier, array_index, element.readResult.propertyAccessError
+            continue
+        else:
+            value = element.readResult.propertyValue
+        try:
+            decoder = get_value_decoder(object_identifier[0], property_identifier, array_index, vendor_id, True)
+            value = decoder.decode_any(value)
+        except _value_errors as err:
+            value = err
+        yield object_identifier, property_identifier, array_index, value
+
+
+def get_apdu_values(apdu, vendor_id=0, columns=False):
+    """
+    Return the values of a ReadPropertyACK or of a complete or lazy
+    ReadPropertyMultipleACK as native python values.  The values are in a dict
+    by (object type, instance) of dicts by property identifier, or by
+    (property identifier, array index) for an element of an array, or in a
+    ValueColumns when `columns` is true.  Properties that could not be read
+    have the property access error as value, and values that cannot be
+    decoded, like those of a proprietary property without a known datatype,
+    the exception.
+    :param apdu: the ack
+    :param vendor_id: the vendor identifier of the device for proprietary datatypes
+    :param columns: return a ValueColumns
+    """
+    if columns:
+        return ValueColumns(_iter_apdu_values(apdu, vendor_id))
+    values = {}
+    for object_identifier, property_identifier, array_index, value in _iter_apdu_values(apdu, vendor_id):
+        properties = values.get(object_identifier)
+        if properties is None:
+            properties = values[object_identifier] = {}
+        if array_index is None:
+            properties[property_identifier] = value
         else:
-            return prop_value.cast_out(data_type.subtype)
-    return prop_value.cast_out(data_type)
+            properties[(property_identifier, array_index)] = value
+    return values
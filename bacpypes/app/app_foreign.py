@@ -20,7 +20,8 @@ class BIPForeignApplication(ApplicationIOController, WhoIsIAmServices, ReadWrite
     """
     BIPForeignApplication
     """
-    def __init__(self, local_device, local_address, bbmd_address, bbmd_ttl, deviceInfoCache=None, aseID=None):
+    def __init__(self, local_device, local_address, bbmd_address, bbmd_ttl, deviceInfoCache=None, aseID=None,
+                 broadcast_filter=None):
         ApplicationIOController.__init__(self, local_device, local_address, deviceInfoCache, aseID=aseID)
         # local address might be useful for subclasses
         if isinstance(local_address, Address):
@@ -47,13 +48,18 @@ class BIPForeignApplication(ApplicationIOController, WhoIsIAmServices, ReadWrite
         self.bip = BIPForeign(bbmd_address, bbmd_ttl)
         self.annexj = AnnexJCodec()
         self.mux = UDPMultiplexer(self.localAddress, no_broadcast=True)
-        # bind the bottom layers
-        bind(self.bip, self.annexj, self.mux.annexJ)
+        # bind the bottom layers, maybe with a BroadcastFilter in between
+        self.broadcast_filter = broadcast_filter
+        if broadcast_filter is not None:
+            bind(self.bip, self.annexj, broadcast_filter, self.mux.annexJ)
+        else:
+            bind(self.bip, self.annexj, self.mux.annexJ)
         # bind the NSAP to the stack, no network number
         self.nsap.bind(self.bip)
 
-    async def create_endoint(self):
-        await self.mux.create_endpoint()
+    async def create_endoint(self, **kwargs):
+        # director_class picks the UDP director, see UDPMultiplexer.create_endpoint()
+        await self.mux.create_endpoint(**kwargs)
 
     def close_endpoint(self):
         # pass to the multiplexer, then down to the sockets
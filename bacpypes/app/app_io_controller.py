@@ -1,50 +1,95 @@
 
 import asyncio
 import logging
+from collections import deque
 from ..comm import IOQController, IOCB
 from ..apdu import UnconfirmedRequestPDU, SimpleAckPDU, ComplexAckPDU, ErrorPDU, RejectPDU, AbortPDU
 from ..apdu.util import get_apdu_value
+from ..basetypes import ErrorType
+from ..errors import ExecutionError
 from .app import Application
+from .read_planner import ReadBatch, plan_reads, split_read_results
 
 _logger = logging.getLogger(__name__)
 __all__ = ['ApplicationIOController']
 
+# results that are errors rather than values, a property that could not be
+# read in a ReadPropertyMultipleRequest has its property access error
+_error_results = (Exception, ErrorPDU, RejectPDU, AbortPDU, ErrorType)
+
+
+def _raise_error(result):
+    """Raise an error result, a property access error as an ExecutionError."""
+    if isinstance(result, ErrorType):
+        raise ExecutionError(result.errorClass, result.errorCode)
+    raise result
+
 
 class ApplicationIOController(IOQController, Application):
     """
     Application IO Controller.
-    This IO Controller has queues IO requests so that there is only one request running
-    for every unique destination address.
+    This IO Controller queues IO requests so that there is only a limited number of
+    requests running for every unique destination address.  The window is one unless
+    a different one is given, or the device information of the destination has a
+    `maxConcurrentRequests` value.
     """
-    def __init__(self, *args, **kwargs):
-        IOQController.__init__(self)
+    # the size of an APDU a device accepts when there is no device information
+    default_max_apdu = 480
+    # the most segments a planned ReadPropertyMultiple response may need
+    max_read_segments = 16
+    # abort reasons of a ReadPropertyMultipleRequest that are retried as single reads,
+    # bufferOverflow, segmentationNotSupported and apduTooLong
+    _read_multiple_abort_reasons = (1, 4, 11)
+
+    def __init__(self, *args, window=1, **kwargs):
+        IOQController.__init__(self, window=window)
         Application.__init__(self, *args, **kwargs)
-        # We have to keep track of all the active IOCBs so that
-        # confirmations can be assigned to the requesting iocb
+        # We have to keep track of all the active IOCBs so that confirmations
+        # can be assigned to the requesting iocb, by (address, invoke ID)
         self.active_iocbs = {}
+        # devices that have rejected a ReadPropertyMultipleRequest
+        self.read_multiple_unsupported = set()
+
+    def get_window(self, destination_address):
+        device_info = self.deviceInfoCache.get_device_info(destination_address)
+        return getattr(device_info, 'maxConcurrentRequests', None) or self.window
 
     def _process_io(self, iocb: IOCB):
         self.active_io(iocb)
         self.request(iocb.request)
+        # the invoke ID of a confirmed request is usually assigned on its way
+        # down the stack, file the iocb under it so the response can find it
+        request = iocb.request
+        key = (request.pduDestination, None)
+        if (request.apduInvokeID is not None) and (self.active_iocbs.get(key) is iocb):
+            del self.active_iocbs[key]
+            self.active_iocbs[(request.pduDestination, request.apduInvokeID)] = iocb
 
     def active_io(self, iocb: IOCB):
-        self.active_iocbs[iocb.request.pduDestination] = iocb
+        self.active_iocbs[(iocb.request.pduDestination, iocb.request.apduInvokeID)] = iocb
         IOQController.active_io(self, iocb)
 
+    def _remove_active(self, iocb: IOCB):
+        request = iocb.request
+        for key in ((request.pduDestination, request.apduInvokeID), (request.pduDestination, None)):
+            if self.active_iocbs.get(key) is iocb:
+                del self.active_iocbs[key]
+                break
+
     def complete_io(self, iocb: IOCB, msg):
-        self.active_iocbs.pop(iocb.request.pduDestination)
+        self._remove_active(iocb)
         IOQController.complete_io(self, iocb, msg)
 
     def abort_io(self, iocb: IOCB, err):
-        self.active_iocbs.pop(iocb.request.pduDestination)
+        self._remove_active(iocb)
         IOQController.abort_io(self, iocb, err)
 
     def _app_complete(self, address, apdu):
-        # look up the queue
-        iocb = self.active_iocbs.get(address)
+        # look up the request by the invoke ID of the response
+        iocb = self.active_iocbs.get((address, apdu.apduInvokeID if apdu is not None else None))
         # make sure it has an active iocb
         if not iocb:
-            _logger.info('no active request for %r %r', address, self.active_iocbs)
+            _logger.info('no active request for %r %r', address, apdu)
             return
         # this request is complete
         if isinstance(apdu, (None.__class__, SimpleAckPDU, ComplexAckPDU)):
@@ -92,12 +137,133 @@ class ApplicationIOController(IOQController, Application):
                 raise iocb.io_error
             return iocb.io_error
 
-    async def execute_requests(self, requests, throw_on_error=False):
-        iocbs = [IOCB(request) for request in requests]
-        for iocb in iocbs:
-            self.request_io(iocb)
-        results = []
-        for iocb in iocbs:
-            await iocb.wait()
-            results.append(get_apdu_value(iocb.io_response))
+    async def execute_requests(self, requests, throw_on_error=False, batch_reads=True):
+        """
+        Execute the given requests and return the results when all are finished.
+        ReadPropertyRequests for the same device are combined into as few
+        ReadPropertyMultipleRequests as fit the device, unless `batch_reads` is False.
+        :param requests: list of APDU request instances
+        :param throw_on_error: Raise the first error instead of returning it as the result
+        :param batch_reads: Combine ReadPropertyRequests into ReadPropertyMultipleRequests
+        :return: list of result values in the order of the requests
+        """
+        results = [None] * len(requests)
+        async for index, result in self.execute_requests_as_completed(
+                requests, max_in_flight=None, batch_reads=batch_reads):
+            results[index] = result
+        if throw_on_error:
+            for result in results:
+                if isinstance(result, _error_results):
+                    _raise_error(result)
         return results
+
+    async def execute_requests_as_completed(self, requests, max_in_flight=1000, throw_on_error=False,
+                                            batch_reads=True):
+        """
+        Execute the given requests and yield the results as they arrive, so a
+        slow device does not hold up the results of the others.
+        ReadPropertyRequests for the same device are combined into as few
+        ReadPropertyMultipleRequests as fit the device, unless `batch_reads` is False.
+        :param requests: list of APDU request instances
+        :param max_in_flight: Most requests given to the controller at a time, None is no limit
+        :param throw_on_error: Raise the first error instead of yielding it as the result
+        :param batch_reads: Combine ReadPropertyRequests into ReadPropertyMultipleRequests
+        :return: async iterator of (index of the request, result value)
+        """
+        if batch_reads:
+            batches = plan_reads(requests, self.get_read_budget, self.read_multiple_supported)
+        else:
+            batches = [ReadBatch(request, [index]) for index, request in enumerate(requests)]
+        pending = deque(batches)
+        finished = deque()
+        in_flight = 0
+        waiter = None
+
+        def complete(iocb, batch):
+            finished.append((batch, iocb))
+            if (waiter is not None) and not waiter.done():
+                waiter.set_result(None)
+
+        while True:
+            # keep as many going as allowed
+            while pending and ((max_in_flight is None) or (in_flight < max_in_flight)):
+                batch = pending.popleft()
+                iocb = IOCB(batch.request)
+                iocb.add_callback(complete, batch)
+                in_flight += 1
+                self.request_io(iocb)
+            if not finished:
+                if not in_flight:
+                    break
+                # wait for the next one to finish
+                waiter = asyncio.get_running_loop().create_future()
+                await waiter
+                waiter = None
+                continue
+            batch, iocb = finished.popleft()
+            in_flight -= 1
+            for index, result in self._batch_results(requests, batch, iocb, pending):
+                if throw_on_error and isinstance(result, _error_results):
+                    _raise_error(result)
+                yield index, result
+
+    def _batch_results(self, requests, batch, iocb: IOCB, pending):
+        """
+        Return the (index, result) pairs of a finished batch, a failed
+        ReadPropertyMultipleRequest that can be read one by one is added to
+        the pending batches instead.
+        """
+        if not batch.is_multiple:
+            return [(batch.indexes[0], self._get_result(iocb))]
+        if iocb.io_response:
+            try:
+                return list(split_read_results(batch, iocb.io_response))
+            except ValueError as err:
+                _logger.warning('unexpected ReadPropertyMultipleACK: %r', err)
+        elif not self._read_multiple_failed(iocb):
+            return [(index, iocb.io_error) for index in batch.indexes]
+        # read the properties one by one
+        pending.extend(ReadBatch(requests[index], [index]) for index in batch.indexes)
+        return []
+
+    def _get_result(self, iocb: IOCB):
+        if iocb.io_response:
+            return get_apdu_value(iocb.io_response)
+        return iocb.io_error
+
+    def get_read_budget(self, destination_address):
+        """
+        Return the size of the largest ReadPropertyMultipleRequest the device can
+        accept and the largest response it can send back.
+        :param destination_address: the address of the device
+        """
+        device_info = self.deviceInfoCache.get_device_info(destination_address)
+        max_apdu = getattr(device_info, 'maxApduLengthAccepted', None) or self.default_max_apdu
+        response_budget = max_apdu
+        # the response can be segmented if the device can send it and we can take it
+        if getattr(device_info, 'segmentationSupported', None) in ('segmentedTransmit', 'segmentedBoth'):
+            local_device = getattr(self, 'localDevice', None)
+            if getattr(local_device, 'segmentationSupported', None) in ('segmentedReceive', 'segmentedBoth'):
+                max_segments = getattr(local_device, 'maxSegmentsAccepted', None) or 1
+                response_budget = max_apdu * min(max_segments, self.max_read_segments)
+        return max_apdu, response_budget
+
+    def read_multiple_supported(self, destination_address):
+        """Return False if the device has rejected a ReadPropertyMultipleRequest."""
+        return destination_address not in self.read_multiple_unsupported
+
+    def _read_multiple_failed(self, iocb: IOCB):
+        """
+        Return True if a ReadPropertyMultipleRequest failed in a way that reading the
+        properties one at a time can work around, and remember the devices that
+        do not support the service.
+        """
+        err = iocb.io_error
+        if isinstance(err, RejectPDU) or (isinstance(err, ErrorPDU) and (getattr(err, 'errorClass', None) == 'services')):
+            _logger.info('%s does not support ReadPropertyMultiple', iocb.request.pduDestination)
+            self.read_multiple_unsupported.add(iocb.request.pduDestination)
+            return True
+        if isinstance(err, AbortPDU) and (err.apduAbortRejectReason in self._read_multiple_abort_reasons):
+            # the response was too big after all
+            return True
+        return False
@@ -14,7 +14,7 @@ class BIPNetworkApplication(NetworkServiceElement):
     """
     BIPNetworkApplication
     """
-    def __init__(self, local_address, eID=None):
+    def __init__(self, local_address, eID=None, broadcast_filter=None):
         NetworkServiceElement.__init__(self, eID)
         # allow the address to be cast to the correct type
         if isinstance(local_address, Address):
@@ -30,7 +30,11 @@ class BIPNetworkApplication(NetworkServiceElement):
         self.bip = BIPSimple()
         self.annexj = AnnexJCodec()
         self.mux = UDPMultiplexer(self.localAddress)
-        # bind the bottom layers
-        bind(self.bip, self.annexj, self.mux.annexJ)
+        # bind the bottom layers, maybe with a BroadcastFilter in between
+        self.broadcast_filter = broadcast_filter
+        if broadcast_filter is not None:
+            bind(self.bip, self.annexj, broadcast_filter, self.mux.annexJ)
+        else:
+            bind(self.bip, self.annexj, self.mux.annexJ)
         # bind the NSAP to the stack, no network number
         self.nsap.bind(self.bip)
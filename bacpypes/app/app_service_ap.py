@@ -8,11 +8,12 @@ import logging
 from ..comm import ServiceAccessPoint, ApplicationServiceElement
 from ..apdu import AbortPDU, ComplexAckPDU, ConfirmedRequestPDU, Error, ErrorPDU, RejectPDU, SimpleAckPDU, \
     UnconfirmedRequestPDU, unconfirmed_request_types, confirmed_request_types, complex_ack_types, error_types
+from ..apdu.lazy import lazy_complex_ack_types
 from ..errors import RejectException, AbortException, UnrecognizedService
+from ..debugging import DEBUG
 
 _logger = logging.getLogger(__name__)
 __all__ = ['ApplicationServiceAccessPoint']
-_debug = False
 
 
 class ApplicationServiceAccessPoint(ApplicationServiceElement, ServiceAccessPoint):
@@ -20,9 +21,11 @@ class ApplicationServiceAccessPoint(ApplicationServiceElement, ServiceAccessPoin
     ApplicationServiceAccessPoint
     """
 
-    def __init__(self, aseID=None, sapID=None):
+    def __init__(self, aseID=None, sapID=None, lazy_acks=False):
         ApplicationServiceElement.__init__(self, aseID)
         ServiceAccessPoint.__init__(self, sapID)
+        # decode ReadPropertyMultiple and ReadRange acks on demand
+        self.lazy_acks = lazy_acks
 
     def indication(self, apdu):
         # assume no errors found
@@ -33,31 +36,31 @@ class ApplicationServiceAccessPoint(ApplicationServiceElement, ServiceAccessPoin
             if not atype:
                 # no confirmed request decoder
                 error_found = UnrecognizedService()
-                # no error so far, keep going
-                if not error_found:
-                    try:
-                        xpdu = atype()
-                        xpdu.decode(apdu)
-                    except RejectException as err:
-                        _logger.debug("    - decoding reject: %r", err)
-                        error_found = err
-                    except AbortException as err:
-                        _logger.debug("    - decoding abort: %r", err)
-                        error_found = err
+            # no error so far, keep going
+            if not error_found:
+                try:
+                    xpdu = atype()
+                    xpdu.decode(apdu)
+                except RejectException as err:
+                    if DEBUG: _logger.debug("    - decoding reject: %r", err)
+                    error_found = err
+                except AbortException as err:
+                    if DEBUG: _logger.debug("    - decoding abort: %r", err)
+                    error_found = err
 
-                # no error so far, keep going
-                if not error_found:
-                    if _debug: _logger.debug("    - no decoding error")
+            # no error so far, keep going
+            if not error_found:
+                if DEBUG: _logger.debug("    - no decoding error")
 
-                    try:
-                        # forward the decoded packet
-                        self.sap_request(xpdu)
-                    except RejectException as err:
-                        _logger.debug("    - execution reject: %r", err)
-                        error_found = err
-                    except AbortException as err:
-                        _logger.debug("    - execution abort: %r", err)
-                        error_found = err
+                try:
+                    # forward the decoded packet
+                    self.sap_request(xpdu)
+                except RejectException as err:
+                    if DEBUG: _logger.debug("    - execution reject: %r", err)
+                    error_found = err
+                except AbortException as err:
+                    if DEBUG: _logger.debug("    - execution abort: %r", err)
+                    error_found = err
             # if there was an error, send it back to the client
             if isinstance(error_found, RejectException):
                 # reject exception
@@ -122,7 +125,11 @@ class ApplicationServiceAccessPoint(ApplicationServiceElement, ServiceAccessPoin
         if isinstance(apdu, SimpleAckPDU):
             xpdu = apdu
         elif isinstance(apdu, ComplexAckPDU):
-            atype = complex_ack_types.get(apdu.apduService)
+            atype = None
+            if self.lazy_acks:
+                atype = lazy_complex_ack_types.get(apdu.apduService)
+            if not atype:
+                atype = complex_ack_types.get(apdu.apduService)
             if not atype:
                 # no complex ack decoder
                 return
@@ -1,8 +1,10 @@
 
+import time
 import logging
 from ..apdu import AbortPDU, AbortReason, ComplexAckPDU, ConfirmedRequestPDU, ErrorPDU, RejectPDU, SegmentAckPDU, SimpleAckPDU
 from .ssm import SSM
 from .ssm_states import *
+from ..debugging import DEBUG
 
 _logger = logging.getLogger(__name__)
 __all__ = ['ClientSSM']
@@ -11,6 +13,11 @@ __all__ = ['ClientSSM']
 class ClientSSM(SSM):
     """
     ClientSSM - Client Segmentation State Machine
+
+    The timeouts come from the round trip time estimate for the device in
+    the device information cache, the configured ones are used until there
+    is one.  The round trip time of a request that was only sent once is a
+    new sample for the estimate.
     """
 
     def __init__(self, sap, pdu_address):
@@ -20,6 +27,15 @@ class ClientSSM(SSM):
         # acquire the device info
         if self.device_info:
             self.ssmSAP.deviceInfoCache.acquire(self.device_info)
+        # timeouts for this device
+        self.timing = sap.deviceInfoCache.get_timing(pdu_address)
+        self.apduTimeout = self.timing.apdu_timeout(self.apduTimeout)
+        # the request that finds out if an offline device is back is sent once
+        self.probe = self.timing.probing
+        if self.probe:
+            self.numberOfApduRetries = 0
+        self.sentTime = None
+        self.answered = False
 
     def set_state(self, new_state, timer=0):
         """This function is called when the client wants to change state."""
@@ -27,10 +43,13 @@ class ClientSSM(SSM):
         SSM.set_state(self, new_state, timer)
         # when completed or aborted, remove tracking
         if (new_state == COMPLETED) or (new_state == ABORTED):
-            self.ssmSAP.clientTransactions.remove(self)
+            del self.ssmSAP.clientTransactions[(self.pdu_address, self.invokeID)]
             # release the device info
             if self.device_info:
                 self.ssmSAP.deviceInfoCache.release(self.device_info)
+            # a probe that ended some other way, the next request probes
+            if self.probe:
+                self.timing.probing = False
 
     def request(self, apdu):
         """
@@ -83,7 +102,7 @@ class ClientSSM(SSM):
                 self.response(abort)
                 return
             if not self.device_info:
-                _logger.debug("    - no server info for segmentation support")
+                if DEBUG: _logger.debug("    - no server info for segmentation support")
             elif self.device_info.segmentationSupported not in ('segmentedReceive', 'segmentedBoth'):
                 abort = self.abort(AbortReason.segmentationNotSupported)
                 self.response(abort)
@@ -92,11 +111,11 @@ class ClientSSM(SSM):
             # make sure we dont exceed the number of segments in our request
             # that the server said it was willing to accept
             if not self.device_info:
-                _logger.debug("    - no server info for maximum number of segments")
+                if DEBUG: _logger.debug("    - no server info for maximum number of segments")
             elif not self.device_info.maxSegmentsAccepted:
-                _logger.debug("    - server doesn't say maximum number of segments")
+                if DEBUG: _logger.debug("    - server doesn't say maximum number of segments")
             elif self.segmentCount > self.device_info.maxSegmentsAccepted:
-                _logger.debug("    - server can't receive enough segments")
+                if DEBUG: _logger.debug("    - server can't receive enough segments")
                 abort = self.abort(AbortReason.apduTooLong)
                 self.response(abort)
                 return
@@ -112,12 +131,12 @@ class ClientSSM(SSM):
             self.sentAllSegments = False
             self.retryCount = 0
             self.segmentRetryCount = 0
-            self.initialSequenceNumber = 0
-            self.actualWindowSize = None    # segment ack will set value
+            self.start_send_window()
             self.set_state(SEGMENTED_REQUEST, self.segmentTimeout)
 
 
         # deliver to the device
+        self.sentTime = time.monotonic()
         self.request(self.get_segment(0))
 
     def response(self, apdu):
@@ -134,6 +153,15 @@ class ClientSSM(SSM):
         """
         This function is called by the device for all upstream messages related to the transaction.
         """
+        # the device is there, the round trip time is good if nothing was sent again
+        if not self.answered:
+            self.answered = True
+            if (self.retryCount == 0) and not self.segmentRetryCount:
+                rtt = (time.monotonic() - self.sentTime) * 1000.0
+            else:
+                rtt = None
+            if DEBUG: _logger.debug("    - answered, rtt: %r", rtt)
+            self.ssmSAP.deviceInfoCache.response_received(self.pdu_address, rtt)
         if self.state == SEGMENTED_REQUEST:
             self.segmented_request(apdu)
         elif self.state == AWAIT_CONFIRMATION:
@@ -162,6 +190,9 @@ class ClientSSM(SSM):
 
     def abort(self, reason):
         """This function is called when the transaction should be aborted."""
+        # the device never answered
+        if (reason == AbortReason.noResponse) and not self.answered:
+            self.ssmSAP.deviceInfoCache.no_response(self.pdu_address)
         # change the state to aborted
         self.set_state(ABORTED)
         # build an abort PDU to return
@@ -174,23 +205,10 @@ class ClientSSM(SSM):
         """
         # server is ready for the next segment
         if apdu.apduType == SegmentAckPDU.pduType:
-            # actual window size is provided by server
-            self.actualWindowSize = apdu.apduWin
-            # duplicate ack received?
-            if not self.in_window(apdu.apduSeq, self.initialSequenceNumber):
-                # not in window
-                self.restart_timer(self.segmentTimeout)
             # final ack received?
-            elif self.sentAllSegments:
+            if self.segment_ack(apdu):
                 # all done sending request
                 self.set_state(AWAIT_CONFIRMATION, self.apduTimeout)
-            else:
-                # more segments to send
-                self.initialSequenceNumber = (apdu.apduSeq + 1) % 256
-
-                self.segmentRetryCount = 0
-                self.fill_window(self.initialSequenceNumber)
-                self.restart_timer(self.segmentTimeout)
 
         # simple ack
         elif apdu.apduType == SimpleAckPDU.pduType:
@@ -215,18 +233,18 @@ class ClientSSM(SSM):
             else:
                 # set the segmented response context
                 self.set_segmentation_context(apdu)
-                # minimum of what the server is proposing and this client proposes
-                self.actualWindowSize = min(apdu.apduWin, self.proposedWindowSize)
-                self.lastSequenceNumber = 0
-                self.initialSequenceNumber = 0
-                self.set_state(SEGMENTED_CONFIRMATION, self.segmentTimeout)
+                # no more than what the server is proposing and this client proposes
+                self.start_receive_window(apdu.apduWin)
+                self.set_state(SEGMENTED_CONFIRMATION, self.segmentTimeout * 4)
+                # send back a segment ack
+                segack = SegmentAckPDU(0, 0, self.invokeID, self.initialSequenceNumber, self.actualWindowSize)
+                self.request(segack)
 
         # some kind of problem
         elif (apdu.apduType == ErrorPDU.pduType) or (apdu.apduType == RejectPDU.pduType) or (
                 apdu.apduType == AbortPDU.pduType):
             # error/reject/abort
             self.set_state(COMPLETED)
-            self.response = apdu
             self.response(apdu)
         else:
             raise RuntimeError('invalid APDU (2)')
@@ -237,67 +255,65 @@ class ClientSSM(SSM):
             # retry segmented request
             self.segmentRetryCount += 1
             self.start_timer(self.segmentTimeout)
-            self.fill_window(self.initialSequenceNumber)
+            self.segment_timeout()
         else:
             # abort, no response from the device
             abort = self.abort(AbortReason.noResponse)
             self.response(abort)
 
     def await_confirmation(self, apdu):
-        _logger.debug("await_confirmation %r", apdu)
+        if DEBUG: _logger.debug("await_confirmation %r", apdu)
 
         if (apdu.apduType == AbortPDU.pduType):
-            _logger.debug("    - server aborted")
+            if DEBUG: _logger.debug("    - server aborted")
 
             self.set_state(ABORTED)
             self.response(apdu)
 
         elif (apdu.apduType == SimpleAckPDU.pduType) or (apdu.apduType == ErrorPDU.pduType) or (
                 apdu.apduType == RejectPDU.pduType):
-            _logger.debug("    - simple ack, error, or reject")
+            if DEBUG: _logger.debug("    - simple ack, error, or reject")
 
             self.set_state(COMPLETED)
             self.response(apdu)
 
         elif (apdu.apduType == ComplexAckPDU.pduType):
-            _logger.debug("    - complex ack")
+            if DEBUG: _logger.debug("    - complex ack")
 
             # if the response is not segmented, we're done
             if not apdu.apduSeg:
-                _logger.debug("    - unsegmented")
+                if DEBUG: _logger.debug("    - unsegmented")
 
                 self.set_state(COMPLETED)
                 self.response(apdu)
 
             elif self.segmentationSupported not in ('segmentedReceive', 'segmentedBoth'):
-                _logger.debug("    - local device can't receive segmented messages")
+                if DEBUG: _logger.debug("    - local device can't receive segmented messages")
                 abort = self.abort(AbortReason.segmentationNotSupported)
                 self.response(abort)
 
             elif apdu.apduSeq == 0:
-                _logger.debug("    - segmented response")
+                if DEBUG: _logger.debug("    - segmented response")
 
                 # set the segmented response context
                 self.set_segmentation_context(apdu)
 
-                self.actualWindowSize = apdu.apduWin
-                self.lastSequenceNumber = 0
-                self.initialSequenceNumber = 0
-                self.set_state(SEGMENTED_CONFIRMATION, self.segmentTimeout)
+                self.start_receive_window(apdu.apduWin)
+                self.set_state(SEGMENTED_CONFIRMATION, self.segmentTimeout * 4)
 
                 # send back a segment ack
                 segack = SegmentAckPDU(0, 0, self.invokeID, self.initialSequenceNumber, self.actualWindowSize)
                 self.request(segack)
 
             else:
-                _logger.debug("    - invalid APDU in this state")
+                if DEBUG: _logger.debug("    - invalid APDU in this state")
 
                 abort = self.abort(AbortReason.invalidApduInThisState)
                 self.request(abort)  # send it to the device
                 self.response(abort)  # send it to the application
 
         elif (apdu.apduType == SegmentAckPDU.pduType):
-            _logger.debug("    - segment ack(!?)")
+            if DEBUG: _logger.debug("    - segment ack(!?)")
 
             self.restart_timer(self.segmentTimeout)
 
@@ -305,10 +321,10 @@ class ClientSSM(SSM):
             raise RuntimeError("invalid APDU (3)")
 
     def await_confirmation_timeout(self):
-        _logger.debug("await_confirmation_timeout")
+        if DEBUG: _logger.debug("await_confirmation_timeout")
 
         if self.retryCount < self.numberOfApduRetries:
-            _logger.debug("    - no response, try again (%d < %d)", self.retryCount,
+            if DEBUG: _logger.debug("    - no response, try again (%d < %d)", self.retryCount,
                 self.numberOfApduRetries)
             self.retryCount += 1
 
@@ -318,7 +334,7 @@ class ClientSSM(SSM):
             self.indication(self.segmentAPDU)
             self.retryCount = saveCount
         else:
-            _logger.debug("    - retry count exceeded")
+            if DEBUG: _logger.debug("    - retry count exceeded")
             abort = self.abort(AbortReason.noResponse)
             self.response(abort)
 
@@ -340,37 +356,14 @@ class ClientSSM(SSM):
             self.response(abort)
             return
 
-        # proper segment number
-        if apdu.apduSeq != (self.lastSequenceNumber + 1) % 256:
-            # segment received out of order
-            self.restart_timer(self.segmentTimeout)
-            segack = SegmentAckPDU(1, 0, self.invokeID, self.lastSequenceNumber, self.actualWindowSize)
+        done, segack = self.segment_received(apdu, 0)
+        if segack:
             self.request(segack)
-            return
-        # add the data
-        self.append_segment(apdu)
-        # update the sequence number
-        self.lastSequenceNumber = (self.lastSequenceNumber + 1) % 256
         # last segment received
-        if not apdu.apduMor:
-            # no more follows
-            # send a final ack
-            segack = SegmentAckPDU(0, 0, self.invokeID, self.lastSequenceNumber, self.actualWindowSize)
-            self.request(segack)
+        if done:
             self.set_state(COMPLETED)
             self.response(self.segmentAPDU)
 
-        elif apdu.apduSeq == ((self.initialSequenceNumber + self.actualWindowSize) % 256):
-            # last segment in the group
-            self.initialSequenceNumber = self.lastSequenceNumber
-            self.restart_timer(self.segmentTimeout)
-            segack = SegmentAckPDU(0, 0, self.invokeID, self.lastSequenceNumber, self.actualWindowSize)
-            self.request(segack)
-
-        else:
-            # wait for more segments
-            self.restart_timer(self.segmentTimeout)
-
     def segmented_confirmation_timeout(self):
         abort = self.abort(AbortReason.noResponse)
         self.response(abort)
@@ -9,13 +9,20 @@ the following:
   segmented requests and/or responses and the maximum size of an APDU
 * The vendor of the device to know what additional vendor specific objects,
   properties, and other datatypes are available
+* The round trip time to the device, so a request is not waiting longer than
+  it has to for an answer or sent at all to a device that is offline
 """
 
-from ..debugging import DebugContents
+import json
+import os
+import time
+from collections import OrderedDict
+
+from ..debugging import DebugContents, btox, xtob
 from ..link import Address
 from ..apdu import IAmRequest
 
-__all__ = ['DeviceInfo', 'DeviceInfoCache']
+__all__ = ['DeviceInfo', 'DeviceTiming', 'DeviceInfoCache']
 
 
 class DeviceInfo(DebugContents):
@@ -30,6 +37,17 @@ class DeviceInfo(DebugContents):
         'vendorID',
         'maxNpduLength',
         'maxSegmentsAccepted',
+        'maxConcurrentRequests',
+    )
+
+    # the fields that are saved in a snapshot of the cache
+    _snapshot_contents = (
+        'maxApduLengthAccepted',
+        'segmentationSupported',
+        'vendorID',
+        'maxNpduLength',
+        'maxSegmentsAccepted',
+        'maxConcurrentRequests',
     )
 
     def __init__(self, device_identifier, address):
@@ -41,6 +59,80 @@ class DeviceInfo(DebugContents):
         self.maxSegmentsAccepted = None                 # None if no segmentation
         self.vendorID = None                            # vendor identifier
         self.maxNpduLength = None                       # maximum we can send in transit
+        self.maxConcurrentRequests = None               # None for the controller window
+
+
+class DeviceTiming(DebugContents):
+    """
+    The round trip time estimate for a device address and whether it is
+    online, this is kept for every address requests are sent to whether or
+    not there is a DeviceInfo for it.
+
+    The estimate is the smoothed round trip time and its variation like TCP
+    keeps them (RFC 6298), in milliseconds, and the APDU timeout is the
+    smoothed time plus four times the variation, no less than min_timeout
+    or half of the configured timeout and no more than max_timeout, so a
+    device that answers quickly most of the time is still given a while
+    when it is busy.  The send and receive windows are the segmentation
+    window sizes that worked the last time a segmented message was sent to
+    it and received from it, the two directions are kept apart because the
+    buffers and the path in each direction can be very different.
+    """
+    _debug_contents = ('srtt', 'rttvar', 'failures', 'offline_until', 'probing', 'send_window', 'receive_window')
+
+    # bounds of the APDU timeout in milliseconds
+    min_timeout = 1000
+    max_timeout = 30000
+
+    def __init__(self):
+        self.srtt = None            # smoothed round trip time
+        self.rttvar = None          # round trip time variation
+        self.failures = 0           # transactions in a row without a response
+        self.offline_until = None   # time the next request may probe the device
+        self.probe_interval = None  # time between probes
+        self.probing = False        # a request is finding out if it is back
+        self.send_window = None     # segmentation window size sending to it
+        self.receive_window = None  # segmentation window size receiving from it
+
+    def apdu_timeout(self, default):
+        """Return the APDU timeout, the default until there is an estimate."""
+        if self.srtt is None:
+            return default
+        floor = max(self.min_timeout, default / 2)
+        return int(min(max(self.srtt + 4 * self.rttvar, floor), self.max_timeout))
+
+    def sample(self, rtt):
+        """Update the estimate with a round trip time."""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+
+def _same_key(key, other):
+    """Return true if two cache keys are the same, an address is never
+    compared with a device instance because Address.__eq__ would try to turn
+    the instance into an address."""
+    if (key is None) or (other is None):
+        return key is other
+    if isinstance(key, Address) != isinstance(other, Address):
+        return False
+    return key == other
+
+
+def _encode_address(address):
+    """Return a JSON friendly form of a station address."""
+    return [address.addrNet, btox(address.addrAddr)]
+
+
+def _decode_address(value):
+    """Return the station address from its JSON friendly form."""
+    net, addr = value
+    if net is None:
+        return Address(xtob(addr))
+    return Address(net, xtob(addr))
 
 
 class DeviceInfoCache:
@@ -55,18 +147,149 @@ class DeviceInfoCache:
     :class:`Application` is provided a reference to an instance of this class
     or a derived class, and multiple application instances may share a cache,
     if that's appropriate.
+
+    Records are kept by device instance, or by address when the instance is
+    not known, and there is an index from the address of a device to its
+    record.  When `max_size` is given the least recently used records are
+    evicted to stay within it, when `ttl` is given a record that has not been
+    updated for `ttl` seconds is dropped the next time it is looked up.
+    Records in use by a segmentation state machine are never dropped.
+
+    The cache can be saved to a JSON snapshot with :meth:`save` and reloaded
+    with :meth:`load` so a restarted application knows the devices without
+    asking for them again.
+
+    The cache also keeps a :class:`DeviceTiming` for each address the client
+    state machines send requests to, the last `max_timings` of them.  When
+    `offline_after` is given, after that many transactions in a row get no
+    response the device is offline and requests fail right away, except for
+    one every `probe_interval` seconds that finds out if it is back.  The
+    interval doubles each time the probe fails, up to `max_probe_interval`.
+    By default requests are always sent.
     """
-    def __init__(self, device_info_class=DeviceInfo):
+    def __init__(self, device_info_class=DeviceInfo, max_size=None, ttl=None, max_timings=4096, offline_after=None,
+                 probe_interval=30.0, max_probe_interval=300.0):
         # a little error checking
         if not issubclass(device_info_class, DeviceInfo):
             raise ValueError("not a DeviceInfo subclass: %r" % (device_info_class,))
-        self.cache = {}
+        # records by device instance (or address) in least recently used order
+        self.cache = OrderedDict()
+        # device instance (or address) by address
+        self.address_index = {}
         # class for new records
         self.device_info_class = device_info_class
+        self.max_size = max_size
+        self.ttl = ttl
+        # round trip times and online state by address
+        self.timings = OrderedDict()
+        self.max_timings = max_timings
+        self.offline_after = offline_after
+        self.probe_interval = probe_interval
+        self.max_probe_interval = max_probe_interval
+        # statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.offline_failures = 0
+
+    def __len__(self):
+        return len(self.cache)
+
+    def get_stats(self):
+        """Return the cache statistics as a dict."""
+        return {
+            'size': len(self.cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'offline': sum(1 for timing in self.timings.values() if timing.offline_until is not None),
+            'offline_failures': self.offline_failures,
+        }
+
+    def _find(self, key):
+        """Return the record for a device instance or an address, or None if
+        it is not in the cache or it has expired."""
+        if isinstance(key, Address):
+            cache_key = self.address_index.get(key, None)
+            if cache_key is None:
+                return None
+        else:
+            cache_key = key
+        device_info = self.cache.get(cache_key, None)
+        if (device_info is not None) and (self.ttl is not None) \
+                and (time.monotonic() - device_info._updated > self.ttl) \
+                and not getattr(device_info, '_ref_count', 0):
+            self._remove(device_info)
+            self.expirations += 1
+            return None
+        return device_info
+
+    def _remove(self, device_info):
+        """Remove a record and its address index entry."""
+        cache_key, cache_address = device_info._cache_keys
+        if self.cache.get(cache_key, None) is device_info:
+            del self.cache[cache_key]
+        if (cache_address is not None) and _same_key(self.address_index.get(cache_address, None), cache_key):
+            del self.address_index[cache_address]
+
+    def _evict(self):
+        """Evict the least recently used records that are not in use until the
+        cache is within its size."""
+        if self.max_size is None:
+            return
+        while len(self.cache) > self.max_size:
+            for device_info in self.cache.values():
+                if not getattr(device_info, '_ref_count', 0):
+                    break
+            else:
+                # everything is in use
+                return
+            self._remove(device_info)
+            self.evictions += 1
+
+    def _put(self, device_info, updated):
+        """Add or update a record in the cache."""
+        # give this a reference count if it doesn't have one
+        if not hasattr(device_info, '_ref_count'):
+            device_info._ref_count = 0
+
+        # get the current keys and the new ones
+        cache_key, cache_address = getattr(device_info, '_cache_keys', (None, None))
+        new_key = device_info.deviceIdentifier
+        if new_key is None:
+            new_key = device_info.address
+        new_address = device_info.address
+
+        # remove the old references
+        if (cache_key is not None) and not _same_key(cache_key, new_key):
+            if self.cache.get(cache_key, None) is device_info:
+                del self.cache[cache_key]
+        if (cache_address is not None) and not _same_key(cache_address, new_address):
+            if _same_key(self.address_index.get(cache_address, None), cache_key):
+                del self.address_index[cache_address]
+
+        # a different record for the same device is replaced
+        other = self.cache.get(new_key, None)
+        if (other is not None) and (other is not device_info):
+            self._remove(other)
+
+        # add the new ones
+        self.cache[new_key] = device_info
+        self.cache.move_to_end(new_key)
+        if new_address is not None:
+            self.address_index[new_address] = new_key
+
+        # update the keys
+        device_info._cache_keys = (new_key, new_address)
+        device_info._updated = updated
+
+        self._evict()
 
     def has_device_info(self, key):
         """Return true if cache has information about the device."""
-        return key in self.cache
+        return self._find(key) is not None
 
     def iam_device_info(self, apdu):
         """Create a device information record based on the contents of an
@@ -79,11 +302,11 @@ class DeviceInfoCache:
         device_instance = apdu.iAmDeviceIdentifier[1]
 
         # get the existing cache record if it exists
-        device_info = self.cache.get(device_instance, None)
+        device_info = self._find(device_instance)
 
         # maybe there is a record for this address
         if not device_info:
-            device_info = self.cache.get(apdu.pduSource, None)
+            device_info = self._find(apdu.pduSource)
 
         # make a new one using the class provided
         if not device_info:
@@ -100,8 +323,13 @@ class DeviceInfoCache:
         self.update_device_info(device_info)
 
     def get_device_info(self, key):
-        # get the info if it's there
-        device_info = self.cache.get(key, None)
+        """Return the record for a device instance or an address, or None."""
+        device_info = self._find(key)
+        if device_info is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.cache.move_to_end(device_info._cache_keys[0])
         return device_info
 
     def update_device_info(self, device_info):
@@ -109,32 +337,33 @@ class DeviceInfoCache:
         information record and the cache needs to be updated to reflect the
         changes.  If this is a cached version of a persistent record then this
         is the opportunity to update the database."""
-        # give this a reference count if it doesn't have one
-        if not hasattr(device_info, '_ref_count'):
-            device_info._ref_count = 0
-
-        # get the current keys
-        cache_id, cache_address = getattr(device_info, '_cache_keys', (None, None))
-
-        if (cache_id is not None) and (device_info.deviceIdentifier != cache_id):
-            # remove the old reference, add the new one
-            del self.cache[cache_id]
-            self.cache[device_info.deviceIdentifier] = device_info
-
-        if (cache_address is not None) and (device_info.address != cache_address):
-            # remove the old reference, add the new one
-            del self.cache[cache_address]
-            self.cache[device_info.address] = device_info
-
-        # update the keys
-        device_info._cache_keys = (device_info.deviceIdentifier, device_info.address)
+        self._put(device_info, time.monotonic())
+
+    def purge_expired(self):
+        """Remove all of the expired records that are not in use, return the
+        number removed."""
+        if self.ttl is None:
+            return 0
+        deadline = time.monotonic() - self.ttl
+        expired = [
+            device_info for device_info in self.cache.values()
+            if (device_info._updated < deadline) and not device_info._ref_count
+        ]
+        for device_info in expired:
+            self._remove(device_info)
+        self.expirations += len(expired)
+        return len(expired)
 
     def acquire(self, key):
         """Return the known information about the device.  If the key is the
         address of an unknown device, build a generic device information record
         add put it in the cache."""
-        if isinstance(key, int):
-            device_info = self.cache.get(key, None)
+        if isinstance(key, DeviceInfo):
+            # the segmentation state machines already have the record
+            device_info = key
+
+        elif isinstance(key, int):
+            device_info = self._find(key)
 
         elif not isinstance(key, Address):
             raise TypeError("key must be integer or an address")
@@ -143,10 +372,10 @@ class DeviceInfoCache:
             raise TypeError("address must be a local or remote station")
 
         else:
-            device_info = self.cache.get(key, None)
+            device_info = self._find(key)
 
         if device_info:
-            device_info._ref_count += 1
+            device_info._ref_count = getattr(device_info, '_ref_count', 0) + 1
 
         return device_info
 
@@ -159,3 +388,101 @@ class DeviceInfoCache:
 
         # decrement the reference count
         device_info._ref_count -= 1
+
+        # records in use are not evicted, catch up now
+        if not device_info._ref_count:
+            self._evict()
+
+    def save(self, path):
+        """Save a snapshot of the cache to a JSON file, the file is replaced
+        in one step so a reader never sees half of it."""
+        now = time.monotonic()
+        wall_clock = time.time()
+        records = []
+        for device_info in self.cache.values():
+            record = {
+                'deviceIdentifier': device_info.deviceIdentifier,
+                'address': None if device_info.address is None else _encode_address(device_info.address),
+                'updated': wall_clock - (now - device_info._updated),
+            }
+            for attr in device_info._snapshot_contents:
+                record[attr] = getattr(device_info, attr, None)
+            records.append(record)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': 1, 'devices': records}, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Load the records from a snapshot saved with :meth:`save`, records
+        that have expired since are skipped.  Return the number of records
+        loaded."""
+        with open(path) as f:
+            snapshot = json.load(f)
+        if snapshot.get('version') != 1:
+            raise ValueError(f"unsupported snapshot version: {snapshot.get('version')!r}")
+        now = time.monotonic()
+        wall_clock = time.time()
+        count = 0
+        # oldest first so the least recently used order is kept
+        for record in sorted(snapshot['devices'], key=lambda r: r['updated']):
+            age = max(0.0, wall_clock - record['updated'])
+            if (self.ttl is not None) and (age > self.ttl):
+                continue
+            address = record['address']
+            device_info = self.device_info_class(
+                record['deviceIdentifier'], None if address is None else _decode_address(address)
+            )
+            for attr in device_info._snapshot_contents:
+                if attr in record:
+                    setattr(device_info, attr, record[attr])
+            self._put(device_info, now - age)
+            count += 1
+        return count
+
+    def get_timing(self, address):
+        """Return the DeviceTiming for an address, make one if necessary."""
+        timing = self.timings.get(address, None)
+        if timing is None:
+            timing = self.timings[address] = DeviceTiming()
+            if len(self.timings) > self.max_timings:
+                self.timings.popitem(last=False)
+        else:
+            self.timings.move_to_end(address)
+        return timing
+
+    def is_offline(self, address):
+        """Return true if a request to the address should fail right away.
+        When it is time to probe the device this returns false once and the
+        request that follows is the probe."""
+        timing = self.timings.get(address, None)
+        if (timing is None) or (timing.offline_until is None):
+            return False
+        if timing.probing or (time.monotonic() < timing.offline_until):
+            self.offline_failures += 1
+            return True
+        timing.probing = True
+        return False
+
+    def response_received(self, address, rtt=None):
+        """The device answered, rtt is the round trip time in milliseconds
+        when it is a good sample (the request was only sent once)."""
+        timing = self.get_timing(address)
+        if rtt is not None:
+            timing.sample(rtt)
+        timing.failures = 0
+        timing.offline_until = timing.probe_interval = None
+        timing.probing = False
+
+    def no_response(self, address):
+        """A transaction with the device ran out of retries."""
+        timing = self.get_timing(address)
+        timing.failures += 1
+        if (self.offline_after is None) or (timing.failures < self.offline_after):
+            return
+        if timing.probe_interval is None:
+            timing.probe_interval = self.probe_interval
+        elif timing.probing:
+            timing.probe_interval = min(timing.probe_interval * 2, self.max_probe_interval)
+        timing.offline_until = time.monotonic() + timing.probe_interval
+        timing.probing = False
@@ -0,0 +1,215 @@
+"""
+Read Planner
+
+The planner coalesces ReadPropertyRequests for the same device into
+ReadPropertyMultipleRequests that are small enough for the device to accept
+and for the response to fit in what the device can send, and splits the
+ReadPropertyMultipleACK back into the results of the original requests.
+
+The size of a response is not known before it arrives so it is estimated
+from the datatype of each property, properties that can be arbitrarily
+large, like an entire array or list, are always read on their own.
+"""
+
+import logging
+from ..apdu import ReadPropertyRequest, ReadPropertyMultipleRequest, ReadAccessSpecification
+from ..apdu.lazy import LazyReadPropertyMultipleACK
+from ..apdu.util import iter_read_access_results, get_result_value
+from ..basetypes import PropertyReference
+from ..constructeddata import Array, List
+from ..errors import InvalidTag
+from ..object import get_datatype
+from ..primitivedata import BitString, Boolean, CharacterString, Date, Double, Enumerated, Integer, Null, \
+    ObjectIdentifier, OctetString, Real, Time, Unsigned
+from ..debugging import DEBUG
+
+_logger = logging.getLogger(__name__)
+__all__ = ['ReadBatch', 'plan_reads', 'split_read_results']
+
+# estimated size of an application tagged value of each datatype
+_value_sizes = (
+    (Null, 1),
+    (Boolean, 1),
+    (Unsigned, 5),
+    (Integer, 5),
+    (Enumerated, 5),
+    (Real, 5),
+    (Double, 10),
+    (ObjectIdentifier, 5),
+    (Date, 5),
+    (Time, 5),
+    (BitString, 6),
+    (CharacterString, 66),
+    (OctetString, 66),
+)
+# estimated size of a value when nothing more is known
+_default_value_size = 64
+# an error in place of a value, opening and closing tag, class and code
+_error_size = 7
+# object identifier, opening and closing tag of the list of results
+_object_overhead = 7
+# complex ack header, a segmented one is a little longer
+_ack_header_size = 5
+# confirmed request header
+_request_header_size = 4
+
+# these properties expand into more than one result
+_special_properties = ('all', 'required', 'optional', 8, 105, 80)
+
+
+def _value_size(object_type, property_identifier, array_index):
+    """Return the estimated size of a property value, or None if it could
+    be too large to estimate."""
+    datatype = get_datatype(object_type, property_identifier)
+    if datatype is None:
+        return _default_value_size
+    if issubclass(datatype, Array):
+        if array_index is None:
+            return None
+        if array_index == 0:
+            return 5
+        datatype = datatype.subtype
+    elif issubclass(datatype, List):
+        return None
+    for cls, size in _value_sizes:
+        if issubclass(datatype, cls):
+            return size
+    return _default_value_size
+
+
+class ReadBatch:
+    """
+    A request to send and the indexes of the requests it answers, in the
+    order the answers are in the response.  When the batch has a single
+    member the request is the original one.
+    """
+
+    def __init__(self, request, indexes):
+        self.request = request
+        self.indexes = indexes
+
+    @property
+    def is_multiple(self):
+        return isinstance(self.request, ReadPropertyMultipleRequest) and (len(self.indexes) > 1)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.request.__class__.__name__} {self.indexes}>'
+
+
+def _build_batch(requests, members):
+    """Return a ReadBatch for the members of a batch, a list of indexes of
+    the requests grouped by object identifier."""
+    indexes = [index for group in members.values() for index in group]
+    if len(indexes) == 1:
+        return ReadBatch(requests[indexes[0]], indexes)
+    specs = []
+    for object_identifier, group in members.items():
+        specs.append(ReadAccessSpecification(
+            objectIdentifier=object_identifier,
+            listOfPropertyReferences=[
+                PropertyReference(
+                    propertyIdentifier=requests[index].propertyIdentifier,
+                    propertyArrayIndex=requests[index].propertyArrayIndex,
+                )
+                for index in group
+            ],
+        ))
+    request = ReadPropertyMultipleRequest(listOfReadAccessSpecs=specs)
+    request.pduDestination = requests[indexes[0]].pduDestination
+    return ReadBatch(request, indexes)
+
+
+def plan_reads(requests, get_budget, batchable=None):
+    """
+    Return a list of ReadBatch that together answer all the requests.
+    :param requests: list of request APDUs, only ReadPropertyRequests are combined
+    :param get_budget: function called with a destination address that returns
+        the size of the largest request and the largest response for the device
+    :param batchable: optional function called with a destination address that
+        returns False if the requests for it should not be combined
+    """
+    batches = []
+    # ReadPropertyRequest indexes by destination, in order
+    by_destination = {}
+    for index, request in enumerate(requests):
+        if isinstance(request, ReadPropertyRequest) and (request.propertyIdentifier not in _special_properties):
+            by_destination.setdefault(request.pduDestination, []).append(index)
+        else:
+            batches.append(ReadBatch(request, [index]))
+
+    for destination, indexes in by_destination.items():
+        if (len(indexes) == 1) or (batchable and not batchable(destination)):
+            batches.extend(ReadBatch(requests[index], [index]) for index in indexes)
+            continue
+        request_budget, response_budget = get_budget(destination)
+        if DEBUG: _logger.debug('plan %d reads for %s, budget %d/%d', len(indexes), destination, request_budget,
+                                response_budget)
+        # indexes of the current batch grouped by object identifier
+        members = {}
+        request_size = _request_header_size
+        response_size = _ack_header_size
+        for index in indexes:
+            request = requests[index]
+            object_identifier = request.objectIdentifier
+            value_size = _value_size(object_identifier[0], request.propertyIdentifier, request.propertyArrayIndex)
+            if value_size is None:
+                # too big to guess, read it on its own
+                batches.append(ReadBatch(request, [index]))
+                continue
+            # property identifier, array index, opening and closing tag
+            reference_size = 4 + (3 if request.propertyArrayIndex is not None else 0)
+            result_size = reference_size + 2 + max(value_size, _error_size)
+            if object_identifier not in members:
+                reference_size += _object_overhead
+                result_size += _object_overhead
+            elif (request_size + reference_size > request_budget) \
+                    or (response_size + result_size > response_budget):
+                # the next batch starts with a new specification for the object
+                reference_size += _object_overhead
+                result_size += _object_overhead
+            if members and ((request_size + reference_size > request_budget) or (response_size + result_size > response_budget)):
+                batches.append(_build_batch(requests, members))
+                members = {}
+                request_size = _request_header_size
+                response_size = _ack_header_size
+            members.setdefault(object_identifier, []).append(index)
+            request_size += reference_size
+            response_size += result_size
+        if members:
+            batches.append(_build_batch(requests, members))
+
+    return batches
+
+
+def split_read_results(batch, ack):
+    """
+    Return a list of (index, value) for the members of a batch from the
+    ReadPropertyMultipleACK that answers it.  Properties that could not be read
+    have the property access error as value.
+    """
+    if isinstance(ack, LazyReadPropertyMultipleACK):
+        try:
+            count = len(ack)
+        except InvalidTag as err:
+            raise ValueError(f'invalid ack: {err}')
+        if count != len(batch.indexes):
+            raise ValueError(f'expected {len(batch.indexes)} results, got {count}')
+        values = []
+        for position, index in enumerate(batch.indexes):
+            try:
+                value = ack.value_at(position)
+            except (TypeError, ValueError, InvalidTag) as err:
+                value = err
+            values.append((index, value))
+        return values
+    results = list(iter_read_access_results(ack))
+    if len(results) != len(batch.indexes):
+        raise ValueError(f'expected {len(batch.indexes)} results, got {len(results)}')
+    values = []
+    for index, (object_identifier, element) in zip(batch.indexes, results):
+        try:
+            value = get_result_value(element, object_identifier[0])
+        except (TypeError, ValueError) as err:
+            value = err
+        values.append((index, value))
+    return values
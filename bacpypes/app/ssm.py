@@ -1,8 +1,10 @@
 
 import logging
 from ..debugging import DebugContents
-from ..task import call_later
-from ..apdu import ComplexAckPDU, ConfirmedRequestPDU, encode_max_segments_accepted, encode_max_apdu_length_accepted
+from ..task import call_later_coarse
+from ..debugging import DEBUG
+from ..apdu import ComplexAckPDU, ConfirmedRequestPDU, SegmentAckPDU, encode_max_segments_accepted, \
+    encode_max_apdu_length_accepted
 from .ssm_states import *
 
 _logger = logging.getLogger(__name__)
@@ -12,6 +14,22 @@ __all__ = ['SSM']
 class SSM(DebugContents):
     """
     SSM - Segmentation State Machine
+
+    The segments of a message being sent are memoryview slices of the one
+    encoded APDU, they are built once and sent again as they are when a
+    window is retransmitted.
+
+    The window is negotiated up to proposedWindowSize, at most 127.  The
+    receiving side starts with the window that worked with the device the
+    last time, or initialWindowSize, doubles it after every whole window
+    that arrives in order and halves it when a segment is missed and it
+    sends a negative Segment-ACK, after that it only grows by one.  The
+    sending side follows the window in the Segment-ACKs, it remembers the
+    last one when the message has been sent and half of it when a window
+    times out, and proposes twice that for the next message.  The windows
+    for sending to and receiving from a device are kept apart.  The receiving
+    side waits four times the segment timeout for the next segment so the
+    sending side has a chance to send a window again.
     """
     transactionLabels = [
         'IDLE', 'SEGMENTED_REQUEST', 'AWAIT_CONFIRMATION', 'AWAIT_RESPONSE',
@@ -21,7 +39,7 @@ class SSM(DebugContents):
     _debug_contents = (
         'ssmSAP', 'localDevice', 'device_info', 'invokeID', 'state', 'segmentAPDU', 'segmentSize', 'segmentCount',
         'maxSegmentsAccepted', 'retryCount', 'segmentRetryCount', 'sentAllSegments', 'lastSequenceNumber',
-        'initialSequenceNumber', 'actualWindowSize', 'proposedWindowSize'
+        'initialSequenceNumber', 'initialSegment', 'actualWindowSize', 'proposedWindowSize', 'windowLimit'
     )
 
     def __init__(self, sap, pdu_address):
@@ -40,7 +58,16 @@ class SSM(DebugContents):
         self.sentAllSegments = None
         self.lastSequenceNumber = None
         self.initialSequenceNumber = None
+        self.initialSegment = None  # index of the first segment in the window being sent
+        self.segmentsSent = None  # index of the first segment not sent yet
         self.actualWindowSize = None
+        self.windowLimit = None  # largest window while receiving
+        self.windowNak = False  # a segment was missed, the window grows slowly
+        self.windowTimeout = False  # a window was sent again, keep the smaller one
+        self.nakSent = False  # waiting for the missed segment
+        self.lastDuplicate = None  # last segment received again
+        self.segmentBuffer = None  # the encoded APDU being sent
+        self.segments = None  # the segments of it that have been built
         # local device object provides these or SAP provides defaults, make
         # copies here so they are consistent throughout the transaction but
         # they could change from one transaction to the next
@@ -51,6 +78,8 @@ class SSM(DebugContents):
         self.segmentTimeout = getattr(sap.localDevice, 'segmentTimeout', sap.segmentTimeout)
         self.maxSegmentsAccepted = getattr(sap.localDevice, 'maxSegmentsAccepted', sap.maxSegmentsAccepted)
         self.maxApduLengthAccepted = getattr(sap.localDevice, 'maxApduLengthAccepted', sap.maxApduLengthAccepted)
+        self.proposedWindowSize = min(sap.proposedWindowSize, 127)
+        self.initialWindowSize = sap.initialWindowSize
         self.timer_handle = None
 
     def start_timer(self, msecs):
@@ -58,7 +87,7 @@ class SSM(DebugContents):
         if self.timer_handle:
             self.timer_handle.cancel()
         # now install this
-        self.timer_handle = call_later(msecs / 1000.0, self.handle_timeout)
+        self.timer_handle = call_later_coarse(msecs / 1000.0, self.handle_timeout)
 
     def stop_timer(self):
         # if this is active, pull it
@@ -94,6 +123,8 @@ class SSM(DebugContents):
         """This function is called to set the segmentation context."""
         # set the context
         self.segmentAPDU = apdu
+        self.segmentBuffer = None
+        self.segments = None
 
     def get_segment(self, indx):
         """
@@ -106,6 +137,11 @@ class SSM(DebugContents):
         # check for invalid segment number
         if indx >= self.segmentCount:
             raise RuntimeError(f'invalid segment number {indx}, APDU has {self.segmentCount} segments')
+        # built already?
+        if self.segments is not None:
+            seg_apdu = self.segments[indx]
+            if seg_apdu is not None:
+                return seg_apdu
 
         if self.segmentAPDU.apduType == ConfirmedRequestPDU.pduType:
             seg_apdu = ConfirmedRequestPDU(self.segmentAPDU.apduService)
@@ -135,12 +171,18 @@ class SSM(DebugContents):
                 seg_apdu.apduWin = self.proposedWindowSize
             else:
                 seg_apdu.apduWin = self.actualWindowSize
+            # the content is a slice of the whole thing
+            if self.segments is None:
+                self.segmentBuffer = memoryview(bytes(self.segmentAPDU.pduData))
+                self.segments = [None] * self.segmentCount
+            offset = indx * self.segmentSize
+            seg_apdu.pduData = self.segmentBuffer[offset:offset + self.segmentSize]
+            self.segments[indx] = seg_apdu
         else:
             seg_apdu.apduSeg = False
             seg_apdu.apduMor = False
-        # add the content
-        offset = indx * self.segmentSize
-        seg_apdu.put_data(self.segmentAPDU.pduData[offset:offset + self.segmentSize])
+            # the content is all of it
+            seg_apdu.pduData = self.segmentAPDU.pduData
         # success
         return seg_apdu
 
@@ -152,24 +194,170 @@ class SSM(DebugContents):
         # check for no context
         if not self.segmentAPDU:
             raise RuntimeError('no segmentation context established')
-        # append the data
+        # append the data, the first segment may have an immutable buffer
+        data = self.segmentAPDU.pduData
+        if not isinstance(data, bytearray):
+            self.segmentAPDU.pduData = bytearray(data)
         self.segmentAPDU.put_data(apdu.pduData)
 
     def in_window(self, seqA, seqB):
         rslt = ((seqA - seqB + 256) % 256) < self.actualWindowSize
         return rslt
 
-    def fill_window(self, seqNum):
+    def fill_window(self, indx):
         """This function sends all of the packets necessary to fill
-        out the segmentation window."""
-
-        for ix in range(self.actualWindowSize):
-            apdu = self.get_segment(seqNum + ix)
+        out the segmentation window starting with segment indx."""
+        end = min(indx + self.actualWindowSize, self.segmentCount)
+        for ix in range(indx, end):
+            apdu = self.get_segment(ix)
+            if ix:
+                apdu.apduWin = self.actualWindowSize
 
             # send the message
             self.ssmSAP.request(apdu)
 
-            # check for no more follows
-            if not apdu.apduMor:
-                self.sentAllSegments = True
-                break
+        # check for no more follows
+        self.segmentsSent = max(self.segmentsSent, end)
+        self.sentAllSegments = (end == self.segmentCount)
+
+    def get_timing(self):
+        """Return the timing of the device, None if there is none."""
+        return self.ssmSAP.deviceInfoCache.timings.get(self.pdu_address)
+
+    def remember_send_window(self, window):
+        """Save the window that worked sending to the device for the next message."""
+        if DEBUG: _logger.debug("remember_send_window %r", window)
+        self.ssmSAP.deviceInfoCache.get_timing(self.pdu_address).send_window = window
+
+    def remember_receive_window(self, window):
+        """Save the window that worked receiving from the device for the next message."""
+        if DEBUG: _logger.debug("remember_receive_window %r", window)
+        self.ssmSAP.deviceInfoCache.get_timing(self.pdu_address).receive_window = window
+
+    def start_send_window(self):
+        """Called before the first segment of a message is sent, propose
+        a window that is twice the one that worked the last time."""
+        timing = self.get_timing()
+        if timing and timing.send_window:
+            self.proposedWindowSize = min(self.proposedWindowSize, 2 * timing.send_window)
+        self.initialSegment = 0
+        self.segmentsSent = 1
+        self.windowTimeout = False
+        self.actualWindowSize = None  # segment ack will set value
+
+    def segment_ack(self, apdu):
+        """
+        This function is called with a Segment-ACK while sending a segmented
+        message, it sends the next window and returns True when all of the
+        segments have been acknowledged.
+        """
+        if DEBUG: _logger.debug("segment_ack %r", apdu)
+        # which segment is it for, the sequence numbers wrap around and the
+        # receiver may be past the window when it got the rest of a bigger
+        # one that was sent before
+        sent = min(max(self.segmentsSent - self.initialSegment, self.actualWindowSize or 1), 128)
+        offset = (apdu.apduSeq - self.initialSegment) % 256
+        if offset < sent:
+            indx = self.initialSegment + offset
+        elif apdu.apduNak and (offset == 255):
+            # the first segment of the window was missed
+            indx = self.initialSegment - 1
+        else:
+            if DEBUG: _logger.debug("    - not in window")
+            self.restart_timer(self.segmentTimeout)
+            return False
+
+        # actual window size is provided by the receiver
+        self.actualWindowSize = min(max(apdu.apduWin, 1), self.proposedWindowSize)
+
+        # final ack received?
+        if indx == self.segmentCount - 1:
+            if DEBUG: _logger.debug("    - all segments acknowledged")
+            if not self.windowTimeout:
+                self.remember_send_window(self.actualWindowSize)
+            return True
+
+        # more segments to send, a negative ack starts over after the last
+        # one received in order
+        self.initialSegment = indx + 1
+        self.segmentRetryCount = 0
+        self.fill_window(self.initialSegment)
+        self.restart_timer(self.segmentTimeout)
+        return False
+
+    def segment_timeout(self):
+        """Called when a window that was sent has not been acknowledged,
+        send it again and use a smaller one with the device next time."""
+        if DEBUG: _logger.debug("segment_timeout")
+        if self.actualWindowSize:
+            self.windowTimeout = True
+            self.remember_send_window(max(self.actualWindowSize // 2, 1))
+            self.fill_window(self.initialSegment)
+        else:
+            self.ssmSAP.request(self.get_segment(0))
+
+    def start_receive_window(self, proposed):
+        """Called with the window proposed in the first segment of a message
+        being received, start with the one that worked the last time."""
+        timing = self.get_timing()
+        window = (timing and timing.receive_window) or self.initialWindowSize
+        self.windowLimit = max(min(proposed, self.proposedWindowSize), 1)
+        self.actualWindowSize = min(window, self.windowLimit)
+        self.windowNak = self.nakSent = False
+        self.lastDuplicate = None
+        self.lastSequenceNumber = 0
+        self.initialSequenceNumber = 0
+        if DEBUG: _logger.debug("    - window: %r, limit: %r", self.actualWindowSize, self.windowLimit)
+
+    def segment_received(self, apdu, srv):
+        """
+        This function is called with each segment after the first one of a
+        message being received.  It returns (done, segack) where done is True
+        when it was the last segment and segack is the Segment-ACK to send or
+        None.
+        """
+        seq = apdu.apduSeq
+        expected = (self.lastSequenceNumber + 1) % 256
+        if seq != expected:
+            self.restart_timer(self.segmentTimeout * 4)
+            # one that was sent again and already received, the ack may
+            # have been lost so send it again once each time they are sent
+            if (expected - seq) % 256 < 128:
+                if DEBUG: _logger.debug("    - duplicate segment %d", seq)
+                last_duplicate, self.lastDuplicate = self.lastDuplicate, seq
+                if (last_duplicate is not None) and (0 < (seq - last_duplicate) % 256 < 128):
+                    return False, None
+                return False, SegmentAckPDU(0, srv, self.invokeID, self.lastSequenceNumber, self.actualWindowSize)
+            # missed one, ask for it once and shrink the window
+            if self.nakSent:
+                return False, None
+            if DEBUG: _logger.debug("    - segment %d received out of order, should be %d", seq, expected)
+            self.nakSent = self.windowNak = True
+            self.actualWindowSize = max(self.actualWindowSize // 2, 1)
+            self.initialSequenceNumber = self.lastSequenceNumber
+            return False, SegmentAckPDU(1, srv, self.invokeID, self.lastSequenceNumber, self.actualWindowSize)
+
+        # add the data
+        self.append_segment(apdu)
+        self.lastSequenceNumber = seq
+        self.nakSent = False
+        self.lastDuplicate = None
+
+        # last segment received
+        if not apdu.apduMor:
+            self.remember_receive_window(self.actualWindowSize)
+            return True, SegmentAckPDU(0, srv, self.invokeID, seq, self.actualWindowSize)
+
+        # last segment in the window, grow it
+        if seq == (self.initialSequenceNumber + self.actualWindowSize) % 256:
+            if self.windowNak:
+                self.actualWindowSize = min(self.actualWindowSize + 1, self.windowLimit)
+            else:
+                self.actualWindowSize = min(self.actualWindowSize * 2, self.windowLimit)
+            self.initialSequenceNumber = seq
+            self.restart_timer(self.segmentTimeout * 4)
+            return False, SegmentAckPDU(0, srv, self.invokeID, seq, self.actualWindowSize)
+
+        # wait for more segments
+        self.restart_timer(self.segmentTimeout * 4)
+        return False, None
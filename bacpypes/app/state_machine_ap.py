@@ -1,7 +1,9 @@
 import logging
+from collections import OrderedDict
+from ..core import deferred
 from ..comm import Client, ServiceAccessPoint
 from ..link import Address
-from ..apdu import AbortPDU, ComplexAckPDU, ConfirmedRequestPDU, ErrorPDU, RejectPDU, SegmentAckPDU, \
+from ..apdu import AbortPDU, AbortReason, ComplexAckPDU, ConfirmedRequestPDU, ErrorPDU, RejectPDU, SegmentAckPDU, \
     SimpleAckPDU, UnconfirmedRequestPDU, apdu_types
 from .client_ssm import ClientSSM
 from .server_ssm import ServerSSM
@@ -22,11 +24,15 @@ class StateMachineAccessPoint(Client, ServiceAccessPoint):
         # save a reference to the device information cache
         self.localDevice = localDevice
         self.deviceInfoCache = device_info_cache
-        # client settings
-        self.nextInvokeID = 1
-        self.clientTransactions = []
+        # client settings, the next invoke ID to try is kept for each peer
+        # so a busy device does not use up the invoke IDs of the others, for
+        # the last maxInvokeIDPeers of them in least recently used order
+        self.nextInvokeID = OrderedDict()
+        self.maxInvokeIDPeers = 4096
+        # transactions are found by (address, invoke ID)
+        self.clientTransactions = {}
         # server settings
-        self.serverTransactions = []
+        self.serverTransactions = {}
         # confirmed request defaults
         self.numberOfApduRetries = 3
         self.apduTimeout = 3000
@@ -35,7 +41,8 @@ class StateMachineAccessPoint(Client, ServiceAccessPoint):
         self.segmentationSupported = 'noSegmentation'
         self.segmentTimeout = 1500
         self.maxSegmentsAccepted = 2
-        self.proposedWindowSize = 2
+        self.proposedWindowSize = 127
+        self.initialWindowSize = 8
         # device communication control
         self.dccEnableDisable = 'enable'
 
@@ -44,19 +51,20 @@ class StateMachineAccessPoint(Client, ServiceAccessPoint):
         self.applicationTimeout = 3000
 
     def get_next_invoke_id(self, addr):
-        """Called by clients to get an unused invoke ID."""
-        initial_id = self.nextInvokeID
-        while True:
-            invoke_id = self.nextInvokeID
-            self.nextInvokeID = (self.nextInvokeID + 1) % 256
+        """Called by clients to get an unused invoke ID for a peer."""
+        next_invoke_ids = self.nextInvokeID
+        invoke_id = initial_id = next_invoke_ids.get(addr, 1)
+        while (addr, invoke_id) in self.clientTransactions:
+            invoke_id = (invoke_id + 1) % 256
             # see if we've checked for them all
-            if initial_id == self.nextInvokeID:
+            if invoke_id == initial_id:
                 raise RuntimeError('no available invoke ID')
-            for tr in self.clientTransactions:
-                if (invoke_id == tr.invokeID) and (addr == tr.pdu_address):
-                    break
-            else:
-                break
+        next_invoke_ids[addr] = (invoke_id + 1) % 256
+        next_invoke_ids.move_to_end(addr)
+        # a peer that is forgotten starts again from 1, the IDs of its open
+        # transactions are still skipped
+        if len(next_invoke_ids) > self.maxInvokeIDPeers:
+            next_invoke_ids.popitem(last=False)
         return invoke_id
 
     def confirmation(self, pdu):
@@ -91,16 +99,13 @@ class StateMachineAccessPoint(Client, ServiceAccessPoint):
         apdu.decode(pdu)
         if isinstance(apdu, ConfirmedRequestPDU):
             # find duplicates of this request
-            for tr in self.serverTransactions:
-                if (apdu.apduInvokeID == tr.invokeID) and (apdu.pduSource == tr.pdu_address):
-                    break
-            else:
-                # find the remote device information
-                remote_device = self.deviceInfoCache.get_device_info(apdu.pduSource)
+            key = (apdu.pduSource, apdu.apduInvokeID)
+            tr = self.serverTransactions.get(key)
+            if tr is None:
                 # build a server transaction
                 tr = ServerSSM(self, apdu.pduSource)
                 # add it to our transactions to track it
-                self.serverTransactions.append(tr)
+                self.serverTransactions[key] = tr
             # let it run with the apdu
             tr.indication(apdu)
         elif isinstance(apdu, UnconfirmedRequestPDU):
@@ -111,46 +116,36 @@ class StateMachineAccessPoint(Client, ServiceAccessPoint):
                 or isinstance(apdu, ErrorPDU) \
                 or isinstance(apdu, RejectPDU):
             # find the client transaction this is acking
-            for tr in self.clientTransactions:
-                if (apdu.apduInvokeID == tr.invokeID) and (apdu.pduSource == tr.pdu_address):
-                    break
-            else:
+            tr = self.clientTransactions.get((apdu.pduSource, apdu.apduInvokeID))
+            if tr is None:
                 return
             # send the packet on to the transaction
             tr.confirmation(apdu)
         elif isinstance(apdu, AbortPDU):
             # find the transaction being aborted
             if apdu.apduSrv:
-                for tr in self.clientTransactions:
-                    if (apdu.apduInvokeID == tr.invokeID) and (apdu.pduSource == tr.pdu_address):
-                        break
-                else:
+                tr = self.clientTransactions.get((apdu.pduSource, apdu.apduInvokeID))
+                if tr is None:
                     return
                 # send the packet on to the transaction
                 tr.confirmation(apdu)
             else:
-                for tr in self.serverTransactions:
-                    if (apdu.apduInvokeID == tr.invokeID) and (apdu.pduSource == tr.pdu_address):
-                        break
-                else:
+                tr = self.serverTransactions.get((apdu.pduSource, apdu.apduInvokeID))
+                if tr is None:
                     return
                 # send the packet on to the transaction
                 tr.indication(apdu)
         elif isinstance(apdu, SegmentAckPDU):
             # find the transaction being aborted
             if apdu.apduSrv:
-                for tr in self.clientTransactions:
-                    if (apdu.apduInvokeID == tr.invokeID) and (apdu.pduSource == tr.pdu_address):
-                        break
-                else:
+                tr = self.clientTransactions.get((apdu.pduSource, apdu.apduInvokeID))
+                if tr is None:
                     return
                 # send the packet on to the transaction
                 tr.confirmation(apdu)
             else:
-                for tr in self.serverTransactions:
-                    if (apdu.apduInvokeID == tr.invokeID) and (apdu.pduSource == tr.pdu_address):
-                        break
-                else:
+                tr = self.serverTransactions.get((apdu.pduSource, apdu.apduInvokeID))
+                if tr is None:
                     return
 
                 # send the packet on to the transaction
@@ -186,19 +181,22 @@ class StateMachineAccessPoint(Client, ServiceAccessPoint):
                 apdu.apduInvokeID = self.get_next_invoke_id(apdu.pduDestination)
             else:
                 # verify the invoke ID isn't already being used
-                for tr in self.clientTransactions:
-                    if (apdu.apduInvokeID == tr.invokeID) and (apdu.pduDestination == tr.pdu_address):
-                        raise RuntimeError('invoke ID in use')
+                if (apdu.pduDestination, apdu.apduInvokeID) in self.clientTransactions:
+                    raise RuntimeError('invoke ID in use')
             # warning for bogus requests
             if (apdu.pduDestination.addrType != Address.localStationAddr) and (
                     apdu.pduDestination.addrType != Address.remoteStationAddr):
                 _logger.warning('%s is not a local or remote station', apdu.pduDestination)
-            # find the remote device information
-            remote_device = self.deviceInfoCache.get_device_info(apdu.pduDestination)
+            # fail right away when the device is offline
+            if self.deviceInfoCache.is_offline(apdu.pduDestination):
+                abort = AbortPDU(False, apdu.apduInvokeID, AbortReason.noResponse)
+                abort.pduSource = apdu.pduDestination
+                deferred(self.sap_response, abort)
+                return
             # create a client transaction state machine
             tr = ClientSSM(self, apdu.pduDestination)
             # add it to our transactions to track it
-            self.clientTransactions.append(tr)
+            self.clientTransactions[(apdu.pduDestination, apdu.apduInvokeID)] = tr
             # let it run
             tr.indication(apdu)
         else:
@@ -215,10 +213,8 @@ class StateMachineAccessPoint(Client, ServiceAccessPoint):
                 or isinstance(apdu, RejectPDU) \
                 or isinstance(apdu, AbortPDU):
             # find the appropriate server transaction
-            for tr in self.serverTransactions:
-                if (apdu.apduInvokeID == tr.invokeID) and (apdu.pduDestination == tr.pdu_address):
-                    break
-            else:
+            tr = self.serverTransactions.get((apdu.pduDestination, apdu.apduInvokeID))
+            if tr is None:
                 return
             # pass control to the transaction
             tr.confirmation(apdu)
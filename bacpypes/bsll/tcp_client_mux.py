@@ -3,7 +3,7 @@ import logging
 
 from ..comm import Client, bind
 from ..transport import TCPClientDirector
-from ..link import Address, PDU, unpack_ip_addr
+from ..link import PDU, intern_address, unpack_ip_addr
 from .registry import bsl_pdu_types, hash_functions
 from .constants import *
 from .bslci import *
@@ -55,7 +55,7 @@ class TCPClientMultiplexer(Client):
 
     def confirmation(self, pdu):
         # recast from a comm.PDU to a BACpypes PDU
-        pdu = PDU(pdu, source=Address(pdu.pduSource))
+        pdu = PDU(pdu, source=intern_address(pdu.pduSource))
         # interpret as a BSLL PDU
         bslpdu = BSLPDU()
         bslpdu.decode(pdu)
@@ -4,7 +4,7 @@ import logging
 
 from ..comm import Client, bind
 from ..transport import TCPServerDirector
-from ..link import Address, PDU, unpack_ip_addr
+from ..link import Address, PDU, intern_address, unpack_ip_addr
 from .registry import bsl_pdu_types, hash_functions
 from .constants import *
 from .bslci import *
@@ -70,7 +70,7 @@ class TCPServerMultiplexer(Client):
 
     def confirmation(self, pdu):
         # recast from a comm.PDU to a BACpypes PDU
-        pdu = PDU(pdu, source=Address(pdu.pduSource))
+        pdu = PDU(pdu, source=intern_address(pdu.pduSource))
         # interpret as a BSLL PDU
         bslpdu = BSLPDU()
         bslpdu.decode(pdu)
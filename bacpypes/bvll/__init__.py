@@ -4,6 +4,7 @@ from .bip_bbmd import *
 from .bip_foreign import *
 from .bip_sap import *
 from .bip_simple import *
+from .broadcast_filter import *
 from .btr import *
 from .bvlci import *
 from .bvllservice import *
@@ -3,8 +3,8 @@ import logging
 from ..comm import Client, Server
 from ..link import PDU
 from .bvlpdu import BVLPDU, bvl_pdu_types
+from ..debugging import DEBUG
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['AnnexJCodec']
 
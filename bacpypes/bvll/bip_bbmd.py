@@ -1,21 +1,37 @@
+import math
+import asyncio
 import logging
-from ..debugging import DebugContents
-from ..task import RecurringTask
+from ..debugging import DEBUG, DebugContents
+from ..task import call_later_coarse
 from ..comm import Client, Server
-from ..link import Address, LocalBroadcast, LocalStation, PDU
+from ..link import Address, LocalBroadcast, LocalStation, PDU, intern_address
 from .bvlpdu import DeleteForeignDeviceTableEntry, DistributeBroadcastToNetwork, FDTEntry, ForwardedNPDU, \
     OriginalBroadcastNPDU, OriginalUnicastNPDU, ReadBroadcastDistributionTable, ReadBroadcastDistributionTableAck, \
     ReadForeignDeviceTable, ReadForeignDeviceTableAck, RegisterForeignDevice, Result, WriteBroadcastDistributionTable
 from .bip_sap import BIPSAP
+from .upd_multiplexer import UDPFanout, _MultiplexServer
 
-DEBUG = True
 _logger = logging.getLogger(__name__)
 __all__ = ['BIPBBMD']
 
+# seconds a foreign device registration is kept past its time-to-live
+FD_GRACE_PERIOD = 5
+
 
 class BIPBBMD(BIPSAP, Client, Server, DebugContents):
     """
     A BBMD node.
+
+    The foreign device table is a dict of FDTEntry by address, each
+    registration expires on the shared timer wheel at its deadline.  The
+    addresses that broadcasts are forwarded to, the directed broadcast
+    address of each peer and each foreign device, are kept in
+    bbmd_destinations and updated as the tables change.
+
+    A Forwarded-NPDU is sent down once with a UDPFanout of the socket
+    addresses as its destination, so it is encoded once and the multiplexer
+    sends the same datagram to all of them.  When the stack below does not
+    end in a UDPMultiplexer it is sent to each of them in turn.
     """
     _debug_contents = ('bbmdAddress', 'bbmdBDT+', 'bbmdFDT+')
 
@@ -26,9 +42,13 @@ class BIPBBMD(BIPSAP, Client, Server, DebugContents):
         Server.__init__(self, sid)
         self.bbmdAddress = addr
         self.bbmdBDT = []
-        self.bbmdFDT = []
-        self.recurring_task = RecurringTask(interval=1000.0, func=self.process_task)
-        self.recurring_task.start()
+        self.bbmdFDT = {}                   # address -> FDTEntry
+        self.bbmd_local = False             # this BBMD is the first entry in the BDT
+        self.bbmd_peers = {}                # BDT entry -> its directed broadcast address
+        self.bbmd_destinations = {}         # peer broadcast and foreign device address -> socket address
+        self._fd_timers = {}                # address -> WheelTimer
+        self._fanout = None                 # UDPFanout of bbmd_destinations, built when needed
+        self._fd_fanout = None              # UDPFanout of the foreign devices
 
     def indication(self, pdu):
         if DEBUG: _logger.debug('indication %r', pdu)
@@ -51,17 +71,8 @@ class BIPBBMD(BIPSAP, Client, Server, DebugContents):
             # make a forwarded PDU
             xpdu = ForwardedNPDU(self.bbmdAddress, pdu, user_data=pdu.pduUserData)
             if DEBUG: _logger.debug('    - forwarded xpdu: %r', xpdu)
-            # send it to the peers
-            for bdte in self.bbmdBDT:
-                if bdte != self.bbmdAddress:
-                    xpdu.pduDestination = Address(((bdte.addrIP | ~bdte.addrMask), bdte.addrPort))
-                    _logger.debug('        - sending to peer: %r', xpdu.pduDestination)
-                    self.request(xpdu)
-            # send it to the registered foreign devices
-            for fdte in self.bbmdFDT:
-                xpdu.pduDestination = fdte.fdAddress
-                if DEBUG: _logger.debug('        - sending to foreign device: %r', xpdu.pduDestination)
-                self.request(xpdu)
+            # send it to the peers and the registered foreign devices
+            self.fan_out(xpdu, self.get_fanout())
         else:
             _logger.warning('invalid destination address: %r', pdu.pduDestination)
 
@@ -89,7 +100,7 @@ class BIPBBMD(BIPSAP, Client, Server, DebugContents):
             self.sap_response(pdu)
         elif isinstance(pdu, ForwardedNPDU):
             # build a PDU with the source from the real source
-            xpdu = PDU(pdu.pduData, source=pdu.bvlciAddress, destination=LocalBroadcast(), user_data=pdu.pduUserData)
+            xpdu = PDU(pdu, source=pdu.bvlciAddress, destination=LocalBroadcast(), user_data=pdu.pduUserData)
             if DEBUG: _logger.debug('    - upstream xpdu: %r', xpdu)
             # send it upstream
             self.response(xpdu)
@@ -97,15 +108,12 @@ class BIPBBMD(BIPSAP, Client, Server, DebugContents):
             xpdu = ForwardedNPDU(pdu.bvlciAddress, pdu, destination=None, user_data=pdu.pduUserData)
             if DEBUG: _logger.debug('    - forwarded xpdu: %r', xpdu)
             # look for self as first entry in the BDT
-            if self.bbmdBDT and (self.bbmdBDT[0] == self.bbmdAddress):
+            if self.bbmd_local:
                 xpdu.pduDestination = LocalBroadcast()
                 if DEBUG: _logger.debug('        - local broadcast')
                 self.request(xpdu)
             # send it to the registered foreign devices
-            for fdte in self.bbmdFDT:
-                xpdu.pduDestination = fdte.fdAddress
-                if DEBUG: _logger.debug('        - sending to foreign device: %r', xpdu.pduDestination)
-                self.request(xpdu)
+            self.fan_out(xpdu, self.get_fanout(foreign_devices_only=True))
         elif isinstance(pdu, RegisterForeignDevice):
             # process the request
             stat = self.register_foreign_device(pdu.pduSource, pdu.bvlciTimeToLive)
@@ -116,7 +124,8 @@ class BIPBBMD(BIPSAP, Client, Server, DebugContents):
             self.request(xpdu)
         elif isinstance(pdu, ReadForeignDeviceTable):
             # build a response
-            xpdu = ReadForeignDeviceTableAck(self.bbmdFDT, destination=pdu.pduSource, user_data=pdu.pduUserData)
+            xpdu = ReadForeignDeviceTableAck(self.read_foreign_device_table(), destination=pdu.pduSource,
+                                             user_data=pdu.pduUserData)
             if DEBUG: _logger.debug('    - xpdu: %r', xpdu)
             # send it downstream
             self.request(xpdu)
@@ -134,58 +143,78 @@ class BIPBBMD(BIPSAP, Client, Server, DebugContents):
             self.request(xpdu)
         elif isinstance(pdu, DistributeBroadcastToNetwork):
             # build a PDU with a local broadcast address
-            xpdu = PDU(pdu.pduData, source=pdu.pduSource, destination=LocalBroadcast(), user_data=pdu.pduUserData)
+            xpdu = PDU(pdu, source=pdu.pduSource, destination=LocalBroadcast(), user_data=pdu.pduUserData)
             if DEBUG: _logger.debug('    - upstream xpdu: %r', xpdu)
             # send it upstream
             self.response(xpdu)
             # build a forwarded NPDU to send out
             xpdu = ForwardedNPDU(pdu.pduSource, pdu, user_data=pdu.pduUserData)
             if DEBUG: _logger.debug('    - forwarded xpdu: %r', xpdu)
-            # send it to the peers
-            for bdte in self.bbmdBDT:
-                if bdte == self.bbmdAddress:
-                    xpdu.pduDestination = LocalBroadcast()
-                    if DEBUG: _logger.debug('        - local broadcast')
-                    self.request(xpdu)
-                else:
-                    xpdu.pduDestination = Address(((bdte.addrIP | ~bdte.addrMask), bdte.addrPort))
-                    if DEBUG: _logger.debug('        - sending to peer: %r', xpdu.pduDestination)
-                    self.request(xpdu)
-            # send it to the other registered foreign devices
-            for fdte in self.bbmdFDT:
-                if fdte.fdAddress != pdu.pduSource:
-                    xpdu.pduDestination = fdte.fdAddress
-                    if DEBUG: _logger.debug('        - sending to foreign device: %r', xpdu.pduDestination)
-                    self.request(xpdu)
+            # broadcast it locally
+            if self.bbmd_local:
+                xpdu.pduDestination = LocalBroadcast()
+                if DEBUG: _logger.debug('        - local broadcast')
+                self.request(xpdu)
+            # send it to the peers and the other registered foreign devices
+            self.fan_out(xpdu, self.get_fanout(exclude=pdu.pduSource))
         elif isinstance(pdu, OriginalUnicastNPDU):
             # build a vanilla PDU
-            xpdu = PDU(pdu.pduData, source=pdu.pduSource, destination=pdu.pduDestination, user_data=pdu.pduUserData)
+            xpdu = PDU(pdu, source=pdu.pduSource, destination=pdu.pduDestination, user_data=pdu.pduUserData)
             if DEBUG: _logger.debug('    - upstream xpdu: %r', xpdu)
             # send it upstream
             self.response(xpdu)
         elif isinstance(pdu, OriginalBroadcastNPDU):
             # build a PDU with a local broadcast address
-            xpdu = PDU(pdu.pduData, source=pdu.pduSource, destination=LocalBroadcast(), user_data=pdu.pduUserData)
+            xpdu = PDU(pdu, source=pdu.pduSource, destination=LocalBroadcast(), user_data=pdu.pduUserData)
             if DEBUG: _logger.debug('    - upstream xpdu: %r', xpdu)
             # send it upstream
             self.response(xpdu)
             # make a forwarded PDU
             xpdu = ForwardedNPDU(pdu.pduSource, pdu, user_data=pdu.pduUserData)
             if DEBUG: _logger.debug('    - forwarded xpdu: %r', xpdu)
-            # send it to the peers
-            for bdte in self.bbmdBDT:
-                if bdte != self.bbmdAddress:
-                    xpdu.pduDestination = Address(((bdte.addrIP | ~bdte.addrMask), bdte.addrPort))
-                    if DEBUG: _logger.debug('        - sending to peer: %r', xpdu.pduDestination)
-                    self.request(xpdu)
-            # send it to the registered foreign devices
-            for fdte in self.bbmdFDT:
-                xpdu.pduDestination = fdte.fdAddress
-                if DEBUG: _logger.debug('        - sending to foreign device: %r', xpdu.pduDestination)
-                self.request(xpdu)
+            # send it to the peers and the registered foreign devices
+            self.fan_out(xpdu, self.get_fanout())
         else:
             _logger.warning('invalid pdu type: %s', type(pdu))
 
+    def fan_out(self, xpdu, fanout):
+        """Send a PDU down once for all of the destinations in a UDPFanout."""
+        if not fanout:
+            return
+        if DEBUG: _logger.debug('        - sending to %d destinations', len(fanout))
+        if self._lower_fans_out():
+            xpdu.pduDestination = fanout
+            self.request(xpdu)
+            return
+        # only the multiplexer knows what to do with a UDPFanout
+        for sock_addr in fanout:
+            xpdu.pduDestination = intern_address(sock_addr)
+            self.request(xpdu)
+
+    def _lower_fans_out(self):
+        """Return True if the PDUs sent down get to a UDPMultiplexer."""
+        server = self.clientPeer
+        while server is not None:
+            if isinstance(server, _MultiplexServer):
+                return True
+            # the codec and filters in between are clients of the next one down
+            server = getattr(server, 'clientPeer', None)
+        return False
+
+    def get_fanout(self, foreign_devices_only=False, exclude=None):
+        """Return the socket addresses broadcasts are forwarded to."""
+        if exclude is not None:
+            return UDPFanout(
+                sock_addr for addr, sock_addr in self.bbmd_destinations.items() if addr != exclude
+            )
+        if foreign_devices_only:
+            if self._fd_fanout is None:
+                self._fd_fanout = UDPFanout(self.bbmd_destinations[addr] for addr in self.bbmdFDT)
+            return self._fd_fanout
+        if self._fanout is None:
+            self._fanout = UDPFanout(self.bbmd_destinations.values())
+        return self._fanout
+
     def register_foreign_device(self, addr, ttl):
         '''Add a foreign device to the FDT.'''
         if DEBUG: _logger.debug('register_foreign_device %r %r', addr, ttl)
@@ -196,15 +225,17 @@ class BIPBBMD(BIPSAP, Client, Server, DebugContents):
             addr = LocalStation(addr)
         else:
             raise TypeError('addr must be a string or an Address')
-        for fdte in self.bbmdFDT:
-            if addr == fdte.fdAddress:
-                break
-        else:
-            fdte = FDTEntry()
+        fdte = self.bbmdFDT.get(addr)
+        if fdte is None:
+            fdte = self.bbmdFDT[addr] = FDTEntry()
             fdte.fdAddress = addr
-            self.bbmdFDT.append(fdte)
+            self.bbmd_destinations[addr] = addr.addrTuple
+            self._fanout = self._fd_fanout = None
+        else:
+            self._fd_timers.pop(addr).cancel()
         fdte.fdTTL = ttl
-        fdte.fdRemain = ttl + 5
+        fdte.fdRemain = ttl + FD_GRACE_PERIOD
+        self._fd_timers[addr] = call_later_coarse(fdte.fdRemain, self.foreign_device_expired, addr)
         # return success
         return 0
 
@@ -218,25 +249,35 @@ class BIPBBMD(BIPSAP, Client, Server, DebugContents):
         else:
             raise TypeError('addr must be a string or an Address')
         # find it and delete it
-        stat = 0
-        for i in range(len(self.bbmdFDT) - 1, -1, -1):
-            if addr == self.bbmdFDT[i].fdAddress:
-                del self.bbmdFDT[i]
-                break
-        else:
-            stat = 99  ### entry not found
-        # return status
-        return stat
+        if addr not in self.bbmdFDT:
+            return 99  ### entry not found
+        self._fd_timers.pop(addr).cancel()
+        self._remove_foreign_device(addr)
+        return 0
+
+    def foreign_device_expired(self, addr):
+        if DEBUG: _logger.debug('foreign device expired: %r', addr)
+        del self._fd_timers[addr]
+        self._remove_foreign_device(addr)
 
-    def process_task(self):
-        # look for foreign device registrations that have expired
-        for i in range(len(self.bbmdFDT) - 1, -1, -1):
-            fdte = self.bbmdFDT[i]
-            fdte.fdRemain -= 1
-            # delete it if it expired
-            if fdte.fdRemain <= 0:
-                if DEBUG: _logger.debug('foreign device expired: %r', fdte.fdAddress)
-                del self.bbmdFDT[i]
+    def _remove_foreign_device(self, addr):
+        del self.bbmdFDT[addr]
+        # a peer with the same address still gets broadcasts
+        if addr not in self.bbmd_peers.values():
+            del self.bbmd_destinations[addr]
+        self._fanout = self._fd_fanout = None
+
+    def read_foreign_device_table(self):
+        """Return a copy of the FDT with the seconds remaining as of now."""
+        now = asyncio.get_event_loop().time()
+        fdt = []
+        for addr, fdte in list(self.bbmdFDT.items()):
+            entry = FDTEntry()
+            entry.fdAddress = addr
+            entry.fdTTL = fdte.fdTTL
+            entry.fdRemain = max(0, math.ceil(self._fd_timers[addr].when() - now))
+            fdt.append(entry)
+        return fdt
 
     def add_peer(self, addr):
         if DEBUG: _logger.debug('add_peer %r', addr)
@@ -251,11 +292,16 @@ class BIPBBMD(BIPSAP, Client, Server, DebugContents):
         if self.bbmdBDT and (addr == self.bbmdAddress):
             raise RuntimeError('add self to BDT as first address')
         # see if it's already there
-        for bdte in self.bbmdBDT:
-            if addr == bdte:
-                break
+        if addr in self.bbmdBDT:
+            return
+        self.bbmdBDT.append(addr)
+        if addr == self.bbmdAddress:
+            self.bbmd_local = True
         else:
-            self.bbmdBDT.append(addr)
+            # broadcasts go to the directed broadcast address of its subnet
+            destination = self.bbmd_peers[addr] = Address(((addr.addrIP | ~addr.addrMask), addr.addrPort))
+            self.bbmd_destinations[destination] = destination.addrTuple
+            self._fanout = None
 
     def delete_peer(self, addr):
         if DEBUG: _logger.debug('delete_peer %r', addr)
@@ -267,9 +313,14 @@ class BIPBBMD(BIPSAP, Client, Server, DebugContents):
         else:
             raise TypeError('addr must be a string or an Address')
         # look for the peer address
-        for i in range(len(self.bbmdBDT) - 1, -1, -1):
-            if addr == self.bbmdBDT[i]:
-                del self.bbmdBDT[i]
-                break
+        if addr not in self.bbmdBDT:
+            return
+        self.bbmdBDT.remove(addr)
+        if addr == self.bbmdAddress:
+            self.bbmd_local = False
         else:
-            pass
+            destination = self.bbmd_peers.pop(addr)
+            # another peer or a foreign device with the same address still gets broadcasts
+            if (destination not in self.bbmd_peers.values()) and (destination not in self.bbmdFDT):
+                del self.bbmd_destinations[destination]
+                self._fanout = None
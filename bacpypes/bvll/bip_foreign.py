@@ -1,5 +1,5 @@
 import logging
-from ..debugging import DebugContents
+from ..debugging import DEBUG, DebugContents
 from ..task import call_later
 from ..comm import Client, Server
 from ..link import Address, LocalBroadcast, PDU
@@ -8,7 +8,6 @@ from .bvlpdu import DistributeBroadcastToNetwork, ForwardedNPDU, OriginalUnicast
     ReadBroadcastDistributionTable, ReadForeignDeviceTable, DeleteForeignDeviceTableEntry
 from .bip_sap import BIPSAP
 
-DEBUG = True
 _logger = logging.getLogger(__name__)
 __all__ = ['BIPForeign']
 
@@ -79,7 +78,7 @@ class BIPForeign(BIPSAP, Client, Server, DebugContents):
             return
         elif isinstance(pdu, OriginalUnicastNPDU):
             # build a vanilla PDU
-            xpdu = PDU(pdu.pduData, source=pdu.pduSource, destination=pdu.pduDestination, user_data=pdu.pduUserData)
+            xpdu = PDU(pdu, source=pdu.pduSource, destination=pdu.pduDestination, user_data=pdu.pduUserData)
             # send it upstream
             self.response(xpdu)
             return
@@ -95,7 +94,7 @@ class BIPForeign(BIPSAP, Client, Server, DebugContents):
             self.sap_response(pdu)
         elif isinstance(pdu, ForwardedNPDU):
             # build a PDU with the source from the real source
-            xpdu = PDU(pdu.pduData, source=pdu.bvlciAddress, destination=LocalBroadcast(), user_data=pdu.pduUserData)
+            xpdu = PDU(pdu, source=pdu.bvlciAddress, destination=LocalBroadcast(), user_data=pdu.pduUserData)
             # send it upstream
             self.response(xpdu)
         elif isinstance(pdu, WriteBroadcastDistributionTable):
@@ -1,7 +1,7 @@
 import logging
+from ..debugging import DEBUG
 
 _logger = logging.getLogger(__name__)
-DEBUG = False
 
 
 class BIPNAT(BIPSAP, Client, Server, RecurringTask, DebugContents):
@@ -80,7 +80,7 @@ def confirmation(self, pdu):
     elif isinstance(pdu, ForwardedNPDU):
         ###TODO verify this is from a peer
         # build a PDU with the source from the real source
-        xpdu = PDU(pdu.pduData, source=pdu.bvlciAddress, destination=LocalBroadcast(), user_data=pdu.pduUserData)
+        xpdu = PDU(pdu, source=pdu.bvlciAddress, destination=LocalBroadcast(), user_data=pdu.pduUserData)
         if DEBUG: _logger.debug("    - upstream xpdu: %r", xpdu)
         # send it upstream
         self.response(xpdu)
@@ -124,7 +124,7 @@ def confirmation(self, pdu):
     elif isinstance(pdu, DistributeBroadcastToNetwork):
         ###TODO verify this is from a registered foreign device
         # build a PDU with a local broadcast address
-        xpdu = PDU(pdu.pduData, source=pdu.pduSource, destination=LocalBroadcast(), user_data=pdu.pduUserData)
+        xpdu = PDU(pdu, source=pdu.pduSource, destination=LocalBroadcast(), user_data=pdu.pduUserData)
         if DEBUG: _logger.debug("    - upstream xpdu: %r", xpdu)
         # send it upstream
         self.response(xpdu)
@@ -148,7 +148,7 @@ def confirmation(self, pdu):
     elif isinstance(pdu, OriginalUnicastNPDU):
         ###TODO verify this is from a peer
         # build a vanilla PDU
-        xpdu = PDU(pdu.pduData, source=pdu.pduSource, destination=pdu.pduDestination, user_data=pdu.pduUserData)
+        xpdu = PDU(pdu, source=pdu.pduSource, destination=pdu.pduDestination, user_data=pdu.pduUserData)
         if DEBUG: _logger.debug("    - upstream xpdu: %r", xpdu)
         # send it upstream
         self.response(xpdu)
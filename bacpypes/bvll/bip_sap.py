@@ -1,8 +1,8 @@
 
 import logging
 from ..comm import ServiceAccessPoint
+from ..debugging import DEBUG
 
-DEBUG = True
 _logger = logging.getLogger(__name__)
 __all__ = ['BIPSAP']
 
@@ -5,8 +5,8 @@ from .bvlpdu import ForwardedNPDU, OriginalBroadcastNPDU, OriginalUnicastNPDU, R
     ReadForeignDeviceTableAck, Result, WriteBroadcastDistributionTable, ReadBroadcastDistributionTable, \
     RegisterForeignDevice, ReadForeignDeviceTable, DeleteForeignDeviceTableEntry, DistributeBroadcastToNetwork
 from .bip_sap import BIPSAP
+from ..debugging import DEBUG
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['BIPSimple']
 
@@ -53,19 +53,19 @@ class BIPSimple(BIPSAP, Client, Server):
             self.sap_response(pdu)
         elif isinstance(pdu, OriginalUnicastNPDU):
             # build a vanilla PDU
-            xpdu = PDU(pdu.pduData, source=pdu.pduSource, destination=pdu.pduDestination, user_data=pdu.pduUserData)
+            xpdu = PDU(pdu, source=pdu.pduSource, destination=pdu.pduDestination, user_data=pdu.pduUserData)
             if DEBUG: _logger.debug('    - xpdu: %r', xpdu)
             # send it upstream
             self.response(xpdu)
         elif isinstance(pdu, OriginalBroadcastNPDU):
             # build a PDU with a local broadcast address
-            xpdu = PDU(pdu.pduData, source=pdu.pduSource, destination=LocalBroadcast(), user_data=pdu.pduUserData)
+            xpdu = PDU(pdu, source=pdu.pduSource, destination=LocalBroadcast(), user_data=pdu.pduUserData)
             if DEBUG: _logger.debug('    - xpdu: %r', xpdu)
             # send it upstream
             self.response(xpdu)
         elif isinstance(pdu, ForwardedNPDU):
             # build a PDU with the source from the real source
-            xpdu = PDU(pdu.pduData, source=pdu.bvlciAddress, destination=LocalBroadcast(), user_data=pdu.pduUserData)
+            xpdu = PDU(pdu, source=pdu.bvlciAddress, destination=LocalBroadcast(), user_data=pdu.pduUserData)
             if DEBUG: _logger.debug('    - xpdu: %r', xpdu)
             # send it upstream
             self.response(xpdu)
@@ -0,0 +1,133 @@
+#!/usr/bin/python
+
+"""
+Broadcast Filter
+"""
+
+import time
+import logging
+from collections import OrderedDict
+
+from ..debugging import DEBUG, DebugContents
+from ..comm import Client, Server
+from .bvlci import BVLCI
+
+_logger = logging.getLogger(__name__)
+__all__ = ['BroadcastFilter']
+
+
+def _npdu_source(npdu):
+    """Return (SNET, SADR) of an NPDU that has them, None if it does not."""
+    if (len(npdu) < 2) or not (npdu[1] & 0x08):
+        return None
+    offset = 2
+    # skip the destination
+    if npdu[1] & 0x20:
+        if len(npdu) < 5:
+            return None
+        offset += 3 + npdu[4]
+    if len(npdu) < offset + 3:
+        return None
+    slen = npdu[offset + 2]
+    return int.from_bytes(npdu[offset:offset + 2], 'big'), bytes(npdu[offset + 3:offset + 3 + slen])
+
+
+class BroadcastFilter(Client, Server, DebugContents):
+    """
+    An optional stage between the AnnexJCodec and the UDPMultiplexer that
+    drops broadcasts before they are decoded:
+
+        bind(bip, annexj, BroadcastFilter(), mux.annexJ)
+
+    A broadcast is an Original-Broadcast-NPDU, a Forwarded-NPDU or a
+    Distribute-Broadcast-To-Network, its origin is the source address or the
+    original source in a Forwarded-NPDU.  The same NPDU from the same origin
+    seen again within window seconds is a duplicate, the last history of them
+    are remembered.  Each source may send rate broadcasts per second with
+    bursts of up to burst, the last max_sources sources are remembered.  The
+    source is the network and address in the NPDU when it has them, so the
+    devices behind a router do not share the bucket of the router, otherwise
+    it is the origin.  A window or a rate of None turns that check off.
+
+    The counters passed, duplicates and rate_limited are the broadcasts that
+    went up and the ones that were dropped.
+    """
+
+    _debug_contents = ('window', 'rate', 'burst', 'passed', 'duplicates', 'rate_limited')
+
+    def __init__(self, window=0.5, history=256, rate=20.0, burst=40, max_sources=1024, cid=None, sid=None):
+        if DEBUG: _logger.debug('__init__ window=%r rate=%r burst=%r', window, rate, burst)
+        Client.__init__(self, cid)
+        Server.__init__(self, sid)
+        self.window = window
+        self.history = history
+        self.rate = rate
+        self.burst = burst
+        self.max_sources = max_sources
+
+        self._seen = OrderedDict()      # origin and NPDU octets -> time first seen
+        self._buckets = OrderedDict()   # (SNET, SADR) or origin -> [tokens, time of the last update]
+
+        self.passed = 0
+        self.duplicates = 0
+        self.rate_limited = 0
+
+    def reset_counters(self):
+        self.passed = self.duplicates = self.rate_limited = 0
+
+    def indication(self, pdu):
+        # nothing to do going down
+        self.request(pdu)
+
+    def confirmation(self, pdu):
+        data = pdu.pduData
+        if len(data) < 4:
+            self.response(pdu)
+            return
+        # find the origin and the NPDU of the broadcasts
+        function = data[1]
+        if function == BVLCI.forwardedNPDU:
+            origin, npdu = bytes(data[4:10]), bytes(data[10:])
+        elif (function == BVLCI.originalBroadcastNPDU) or (function == BVLCI.distributeBroadcastToNetwork):
+            origin, npdu = pdu.pduSource.addrAddr, bytes(data[4:])
+        else:
+            self.response(pdu)
+            return
+        now = time.monotonic()
+
+        # drop it if it has been seen recently
+        if self.window is not None:
+            # the origin is always six octets
+            key = origin + npdu
+            seen = self._seen
+            first_seen = seen.get(key)
+            if (first_seen is not None) and (now - first_seen < self.window):
+                if DEBUG: _logger.debug('    - duplicate from %r', origin)
+                self.duplicates += 1
+                return
+            seen[key] = now
+            seen.move_to_end(key)
+            if len(seen) > self.history:
+                seen.popitem(last=False)
+
+        # take a token from the source's bucket
+        if self.rate is not None:
+            source = _npdu_source(npdu) or origin
+            buckets = self._buckets
+            bucket = buckets.get(source)
+            if bucket is None:
+                bucket = buckets[source] = [self.burst, now]
+                if len(buckets) > self.max_sources:
+                    buckets.popitem(last=False)
+            else:
+                buckets.move_to_end(source)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                if DEBUG: _logger.debug('    - rate limited %r', source)
+                self.rate_limited += 1
+                return
+            bucket[0] -= 1
+
+        self.passed += 1
+        self.response(pdu)
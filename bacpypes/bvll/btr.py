@@ -1,10 +1,9 @@
 
 import logging
-from ..debugging import DebugContents
+from ..debugging import DEBUG, DebugContents
 from ..comm import Client, Server
 from ..link import Address, PDU
 
-DEBUG = True
 _logger = logging.getLogger(__name__)
 __all__ = ['BTR']
 
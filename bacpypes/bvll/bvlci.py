@@ -1,6 +1,6 @@
 import logging
 from ..errors import EncodingError, DecodingError
-from ..debugging import DebugContents
+from ..debugging import DEBUG, DebugContents
 from ..link import PCI
 
 # some debugging
@@ -28,7 +28,7 @@ class BVLCI(PCI, DebugContents):
     originalBroadcastNPDU = 0x0B
 
     def __init__(self, *args, **kwargs):
-        _logger.debug("__init__ %r %r", args, kwargs)
+        if DEBUG: _logger.debug("__init__ %r %r", args, kwargs)
         super(BVLCI, self).__init__(*args, **kwargs)
 
         self.bvlciType = 0x81
@@ -43,7 +43,7 @@ class BVLCI(PCI, DebugContents):
 
     def encode(self, pdu):
         """encode the contents of the BVLCI into the PDU."""
-        _logger.debug('encode %s', str(pdu))
+        if DEBUG: _logger.debug('encode %s', str(pdu))
 
         # copy the basics
         PCI.update(pdu, self)
@@ -58,7 +58,7 @@ class BVLCI(PCI, DebugContents):
 
     def decode(self, pdu):
         """decode the contents of the PDU into the BVLCI."""
-        _logger.debug('decode %s', str(pdu))
+        if DEBUG: _logger.debug('decode %s', str(pdu))
 
         # copy the basics
         PCI.update(self, pdu)
@@ -70,12 +70,12 @@ class BVLCI(PCI, DebugContents):
         self.bvlciFunction = pdu.get()
         self.bvlciLength = pdu.get_short()
 
-        if self.bvlciLength != len(pdu.pduData) + 4:
+        if self.bvlciLength != pdu.remaining() + 4:
             raise DecodingError('invalid BVLCI length')
 
     def bvlci_contents(self, use_dict=None, as_class=dict):
         """Return the contents of an object as a dict."""
-        _logger.debug('bvlci_contents use_dict=%r as_class=%r', use_dict, as_class)
+        if DEBUG: _logger.debug('bvlci_contents use_dict=%r as_class=%r', use_dict, as_class)
 
         # make/extend the dictionary of content
         if use_dict is None:
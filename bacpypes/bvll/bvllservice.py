@@ -6,8 +6,8 @@ BACnet Virtual Link Layer Service
 
 import logging
 from ..comm import ApplicationServiceElement
+from ..debugging import DEBUG
 
-DEBUG = True
 _logger = logging.getLogger(__name__)
 __all__ = ['BVLLServiceElement']
 
@@ -1,7 +1,7 @@
 import logging
-from ..debugging import DebugContents
+from ..debugging import DEBUG, DebugContents
 from ..comm import PDUData
-from ..link import Address, unpack_ip_addr
+from ..link import Address, intern_address, unpack_ip_addr
 from .bvlci import BVLCI
 
 _logger = logging.getLogger(__name__)
@@ -22,7 +22,7 @@ def register_bvlpdu_type(cls):
 
 def key_value_contents(use_dict=None, as_class=dict, key_values=()):
     """Return the contents of an object as a dict."""
-    _logger.debug('key_value_contents use_dict=%r as_class=%r key_values=%r', use_dict, as_class, key_values)
+    if DEBUG: _logger.debug('key_value_contents use_dict=%r as_class=%r key_values=%r', use_dict, as_class, key_values)
     # make/extend the dictionary of content
     if use_dict is None:
         use_dict = as_class()
@@ -42,7 +42,7 @@ class BVLPDU(BVLCI, PDUData):
     """
 
     def __init__(self, *args, **kwargs):
-        _logger.debug('__init__ %r %r', args, kwargs)
+        if DEBUG: _logger.debug('__init__ %r %r', args, kwargs)
         super(BVLPDU, self).__init__(*args, **kwargs)
 
     def encode(self, pdu):
@@ -51,14 +51,14 @@ class BVLPDU(BVLCI, PDUData):
 
     def decode(self, pdu):
         BVLCI.decode(self, pdu)
-        self.pduData = pdu.get_data(len(pdu.pduData))
+        self.share_data(pdu)
 
     def bvlpdu_contents(self, use_dict=None, as_class=dict):
         return PDUData.pdudata_contents(self, use_dict=use_dict, as_class=as_class)
 
     def dict_contents(self, use_dict=None, as_class=dict, key_values=()):
         """Return the contents of an object as a dict."""
-        _logger.debug('dict_contents use_dict=%r as_class=%r key_values=%r', use_dict, as_class, key_values)
+        if DEBUG: _logger.debug('dict_contents use_dict=%r as_class=%r key_values=%r', use_dict, as_class, key_values)
         # make/extend the dictionary of content
         if use_dict is None:
             use_dict = as_class()
@@ -122,9 +122,8 @@ class WriteBroadcastDistributionTable(BVLPDU):
     def decode(self, bvlpdu):
         BVLCI.update(self, bvlpdu)
         self.bvlciBDT = []
-        while bvlpdu.pduData:
-            bdte = Address(unpack_ip_addr(bvlpdu.get_data(6)))
-            bdte.addrMask = bvlpdu.get_long()
+        while bvlpdu.remaining():
+            bdte = Address(unpack_ip_addr(bvlpdu.get_data(6))).with_mask(bvlpdu.get_long())
             self.bvlciBDT.append(bdte)
 
     def bvlpdu_contents(self, use_dict=None, as_class=dict):
@@ -196,9 +195,8 @@ class ReadBroadcastDistributionTableAck(BVLPDU):
 
         # decode the table
         self.bvlciBDT = []
-        while bvlpdu.pduData:
-            bdte = Address(unpack_ip_addr(bvlpdu.get_data(6)))
-            bdte.addrMask = bvlpdu.get_long()
+        while bvlpdu.remaining():
+            bdte = Address(unpack_ip_addr(bvlpdu.get_data(6))).with_mask(bvlpdu.get_long())
             self.bvlciBDT.append(bdte)
 
     def bvlpdu_contents(self, use_dict=None, as_class=dict):
@@ -242,9 +240,9 @@ class ForwardedNPDU(BVLPDU):
     def decode(self, bvlpdu):
         BVLCI.update(self, bvlpdu)
         # get the address
-        self.bvlciAddress = Address(unpack_ip_addr(bvlpdu.get_data(6)))
+        self.bvlciAddress = intern_address(bvlpdu.get_data(6))
         # get the rest of the data
-        self.pduData = bvlpdu.get_data(len(bvlpdu.pduData))
+        self.share_data(bvlpdu)
 
     def bvlpdu_contents(self, use_dict=None, as_class=dict):
         """Return the contents of an object as a dict."""
@@ -378,7 +376,7 @@ class ReadForeignDeviceTableAck(BVLPDU):
     def decode(self, bvlpdu):
         BVLCI.update(self, bvlpdu)
         self.bvlciFDT = []
-        while bvlpdu.pduData:
+        while bvlpdu.remaining():
             fdte = FDTEntry()
             fdte.fdAddress = Address(unpack_ip_addr(bvlpdu.get_data(6)))
             fdte.fdTTL = bvlpdu.get_short()
@@ -420,7 +418,7 @@ class DeleteForeignDeviceTableEntry(BVLPDU):
 
     def decode(self, bvlpdu):
         BVLCI.update(self, bvlpdu)
-        self.bvlciAddress = Address(unpack_ip_addr(bvlpdu.get_data(6)))
+        self.bvlciAddress = intern_address(bvlpdu.get_data(6))
 
     def bvlpdu_contents(self, use_dict=None, as_class=dict):
         """Return the contents of an object as a dict."""
@@ -453,7 +451,7 @@ class DistributeBroadcastToNetwork(BVLPDU):
 
     def decode(self, bvlpdu):
         BVLCI.update(self, bvlpdu)
-        self.pduData = bvlpdu.get_data(len(bvlpdu.pduData))
+        self.share_data(bvlpdu)
 
     def bvlpdu_contents(self, use_dict=None, as_class=dict):
         """Return the contents of an object as a dict."""
@@ -492,7 +490,7 @@ class OriginalUnicastNPDU(BVLPDU):
 
     def decode(self, bvlpdu):
         BVLCI.update(self, bvlpdu)
-        self.pduData = bvlpdu.get_data(len(bvlpdu.pduData))
+        self.share_data(bvlpdu)
 
     def bvlpdu_contents(self, use_dict=None, as_class=dict):
         """Return the contents of an object as a dict."""
@@ -531,7 +529,7 @@ class OriginalBroadcastNPDU(BVLPDU):
 
     def decode(self, bvlpdu):
         BVLCI.update(self, bvlpdu)
-        self.pduData = bvlpdu.get_data(len(bvlpdu.pduData))
+        self.share_data(bvlpdu)
 
     def bvlpdu_contents(self, use_dict=None, as_class=dict):
         """Return the contents of an object as a dict."""
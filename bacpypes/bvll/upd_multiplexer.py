@@ -1,15 +1,25 @@
 import sys
-import asyncio
 import logging
 
 from ..transport import UDPDirector
 from ..comm import Client, Server, bind
 
-from ..link import Address, LocalBroadcast, PDU, unpack_ip_addr
+from ..link import Address, LocalBroadcast, PDU, intern_address, unpack_ip_addr
+from ..debugging import DEBUG
 
-DEBUG = True
 _logger = logging.getLogger(__name__)
-__all__ = ['UDPMultiplexer']
+__all__ = ['UDPMultiplexer', 'UDPFanout']
+
+# addresses are immutable, every broadcast can share the same destination
+_local_broadcast = LocalBroadcast()
+
+
+class UDPFanout(tuple):
+    """
+    A tuple of socket addresses used as a PDU destination, the multiplexer
+    sends the same datagram to each of them.
+    """
+    __slots__ = ()
 
 
 class _MultiplexClient(Client):
@@ -76,35 +86,39 @@ class UDPMultiplexer:
         self.annexH = _MultiplexServer(self)
         self.annexJ = _MultiplexServer(self)
 
-    async def create_endpoint(self):
-        loop = asyncio.get_event_loop()
-        transport, protocol = await loop.create_datagram_endpoint(
-            UDPDirector, local_addr=self.addrTuple, allow_broadcast=True
-        )
-        self.protocol = protocol
-        bind(self.direct, protocol)
+    async def create_endpoint(self, director_class=UDPDirector):
+        """
+        Create the socket(s), director_class is UDPDirector or a drop-in
+        replacement like UDPBatchDirector.
+        """
+        self.protocol = await director_class.create_endpoint(local_addr=self.addrTuple, allow_broadcast=True)
+        bind(self.direct, self.protocol)
         # create and bind the broadcast address for non-Windows
         if self.special_broadcast and (not self.no_broadcast) and sys.platform in ('linux', 'darwin'):
             self.broadcast = _MultiplexClient(self)
-            transport, protocol = await loop.create_datagram_endpoint(
-                UDPDirector, remote_addr=self.addrBroadcastTuple, reuse_address=True
+            self.broadcast_protocol = await director_class.create_endpoint(
+                remote_addr=self.addrBroadcastTuple, reuse_address=True
             )
-            self.broadcast_protocol = protocol
             bind(self.direct, self.broadcast_protocol)
 
     def close_endpoint(self):
         if DEBUG: _logger.debug('close_socket')
         # pass along the close to the director(s)
-        self.protocol.close_endpoint()
+        self.protocol.close_socket()
         if self.broadcast_protocol:
-            self.broadcast_protocol.close_endpoint()
+            self.broadcast_protocol.close_socket()
 
     def indication(self, server, pdu):
         if DEBUG: _logger.debug('indication %r %r', server, pdu)
         if not self.protocol:
             raise RuntimeError('UDPMultiplexer.protocol is not set')
+        # check for the same datagram to many destinations
+        if type(pdu.pduDestination) is UDPFanout:
+            if DEBUG: _logger.debug('    - requesting fan out to %d destinations', len(pdu.pduDestination))
+            self.protocol.fan_out(pdu.pduData, pdu.pduDestination)
+            return
         # check for a broadcast message
-        if pdu.pduDestination.addrType == Address.localBroadcastAddr:
+        elif pdu.pduDestination.addrType == Address.localBroadcastAddr:
             dest = self.addrBroadcastTuple
             if DEBUG: _logger.debug('    - requesting local broadcast: %r', dest)
             # interface might not support broadcasts
@@ -123,13 +137,13 @@ class UDPMultiplexer:
         if pdu.pduSource == self.addrTuple:
             if DEBUG: _logger.debug('    - from us!')
             return
-        # the PDU source is a tuple, convert it to an Address instance
-        src = Address(pdu.pduSource)
+        # the PDU source is a tuple, use the interned Address for this peer
+        src = intern_address(pdu.pduSource)
         # match the destination in case the stack needs it
         if client is self.direct:
             dest = self.address
         elif client is self.broadcast:
-            dest = LocalBroadcast()
+            dest = _local_broadcast
         else:
             raise RuntimeError('confirmation mismatch')
         # must have at least one octet
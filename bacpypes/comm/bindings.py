@@ -3,8 +3,8 @@ Communications Module
 """
 
 import logging
+from ..debugging import DEBUG
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 
 # prevent short/long struct overflow
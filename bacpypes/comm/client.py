@@ -3,8 +3,8 @@ import logging
 
 from .bindings import bind, server_map, client_map
 from ..errors import DecodingError, ConfigurationError
+from ..debugging import DEBUG
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['Client']
 
@@ -2,6 +2,7 @@
 import logging
 from .ioq_controller import IOQController
 from .client import Client
+from ..debugging import DEBUG
 
 _logger = logging.getLogger(__name__)
 __all__ = ['IOQController']
@@ -21,22 +22,22 @@ class ClientController(Client, IOQController):
     request then subsequent requests are queued.
     """
     def __init__(self):
-        _logger.debug('__init__')
+        if DEBUG: _logger.debug('__init__')
         Client.__init__(self)
         IOQController.__init__(self)
 
     def _process_io(self, iocb):
-        _logger.debug('process_io %r', iocb)
+        if DEBUG: _logger.debug('process_io %r', iocb)
         # this is now an active request
         self.active_io(iocb)
         # send the PDU downstream
         self.request(iocb.args[0])
 
     def confirmation(self, pdu):
-        _logger.debug('confirmation %r', pdu)
+        if DEBUG: _logger.debug('confirmation %r', pdu)
         # make sure it has an active iocb
         if not self.active_iocb:
-            _logger.debug('no active request')
+            if DEBUG: _logger.debug('no active request')
             return
         # look for exceptions
         if isinstance(pdu, Exception):
@@ -2,6 +2,7 @@
 import logging
 from .iocb_states import *
 from .iocb import IOCB
+from ..debugging import DEBUG
 
 _logger = logging.getLogger(__name__)
 __all__ = ['IOController']
@@ -19,7 +20,7 @@ class IOController(object):
     """
     def __init__(self, name=None):
         """Initialize a controller."""
-        _logger.debug('__init__ name=%r', name)
+        if DEBUG: _logger.debug('__init__ name=%r', name)
         # save the name
         self.name = name
 
@@ -37,7 +38,7 @@ class IOController(object):
         This method is called by the application requesting the service of a controller.
         :param iocb: the IOCB to be processed
         """
-        _logger.debug('request_io %r', iocb)
+        if DEBUG: _logger.debug('request_io %r', iocb)
         # check that the parameter is an IOCB
         if not isinstance(iocb, IOCB):
             raise TypeError('IOCB expected')
@@ -72,7 +73,7 @@ class IOController(object):
         to other types of applications that the IOCB is being processed.
         :param iocb: the IOCB being processed
         """
-        _logger.debug('active_io %r', iocb)
+        if DEBUG: _logger.debug('active_io %r', iocb)
         # requests should be idle or pending before coming active
         if (iocb.io_state != IDLE) and (iocb.io_state != PENDING):
             raise RuntimeError(f'invalid state transition (currently {iocb.io_state})')
@@ -89,7 +90,7 @@ class IOController(object):
         :param iocb: the IOCB to be processed
         :param msg: the message to be returned
         """
-        _logger.debug('complete_io %r %r', iocb, msg)
+        if DEBUG: _logger.debug('complete_io %r %r', iocb, msg)
         if iocb.io_state == COMPLETED:
             # if it completed, leave it alone
             pass
@@ -113,7 +114,7 @@ class IOController(object):
         :param iocb: the IOCB to be processed
         :param err: the error to be returned
         """
-        _logger.debug('abort_io %r %r', iocb, err)
+        if DEBUG: _logger.debug('abort_io %r %r', iocb, err)
         if iocb.io_state == COMPLETED:
             # if it completed, leave it alone
             pass
@@ -42,16 +42,13 @@ and `add_callback()` functions and can be otherwise treated as an IOCB.
 """
 
 import logging
-import threading
 import asyncio
 
-from ..debugging import DebugContents
-from ..task import call_later
+from ..debugging import DEBUG, DebugContents
+from ..task import call_later_coarse
 from .iocb_states import *
 
 _logger = logging.getLogger(__name__)
-_ident_next = 1
-_ident_lock = threading.Lock()
 __all__ = ['IOCB']
 
 
@@ -59,14 +56,12 @@ class IOCB(DebugContents):
     """
     IOCB - Input Output Control Block
 
-    The IOCB contains a unique identifier, references to the arguments and
-    keyword arguments used when it was constructed, and placeholders for
-    processing results or errors.
-    Every IOCB has a unique identifier that persists for the lifetime of
-    the block.  Similar to the Invoke ID for confirmed services, it can be used
-    to synchronize communications and related functions.
-    The default identifier value is a thread safe monotonically increasing
-    value.
+    The IOCB contains an optional identifier, a reference to the request it
+    was constructed with, and placeholders for processing results or errors.
+    There is one for every request so it is kept small, it has slots rather
+    than a dictionary, the identifier is only there when one is given, and
+    the completion is an asyncio.Future that is only created when something
+    waits for the block.
     The ioState of an IOCB is the state of processing for the block.
         * *idle* - an IOCB is idle when it is first constructed and before it has been given to a controller.
         * *pending* - the IOCB has been given to a controller but the processing of the request has not started.
@@ -74,21 +69,18 @@ class IOCB(DebugContents):
         * *completed* - the processing of the IOCB has completed and the positive results have been stored in `ioResponse`.
         * *aborted* - the processing of the IOCB has encountered an error of some kind and the error condition has been stored in `ioError`.
     """
+    __slots__ = (
+        'io_id', 'request', 'io_state', 'io_response', 'io_error', 'io_controller', 'io_callback', 'io_priority',
+        'io_timeout', 'io_future',
+    )
     _debug_contents = (
-        'io_state', 'io_response-', 'io_error', 'io_controller', 'io_complete', 'io_callback+', 'io_priority',
+        'io_id', 'io_state', 'io_response-', 'io_error', 'io_controller', 'io_callback+', 'io_priority',
         'io_timeout',
     )
 
-    def __init__(self, request, priority=0):
-        # lock the identity sequence number
-        with _ident_lock:
-            # generate a unique identity for this block
-            global _ident_next
-            io_id = _ident_next
-            _ident_next += 1
-        # debugging postponed until ID acquired
-        _logger.debug('__init__(%d) request=%r prio=%s', io_id, request, priority)
-        # save the ID
+    def __init__(self, request, priority=0, io_id=None):
+        if DEBUG: _logger.debug('__init__(%r) request=%r prio=%s', io_id, request, priority)
+        # an identifier for the application, like an Invoke ID
         self.io_id = io_id
         # save the request parameters
         self.request = request
@@ -98,13 +90,13 @@ class IOCB(DebugContents):
         self.io_error = None
         # blocks are bound to a controller
         self.io_controller = None
-        # each block gets a completion event
-        self.io_complete = asyncio.Event()
-        # applications can set a callback functions
-        self.io_callback = []
+        # applications can set callback functions
+        self.io_callback = None
         self.io_priority = priority
         # request has no timeout
         self.io_timeout = None
+        # completion for the ones waiting, made when needed
+        self.io_future = None
 
     def add_callback(self, fn, *args, **kwargs):
         """
@@ -119,52 +111,59 @@ class IOCB(DebugContents):
         will be called immediately.  Callback functions are typically added
         to an IOCB before it is given to a controller.
         """
-        _logger.debug('add_callback(%d) %r %r %r', self.io_id, fn, args, kwargs)
+        if DEBUG: _logger.debug('add_callback(%r) %r %r %r', self.io_id, fn, args, kwargs)
+        # already complete?
+        if self.io_state >= COMPLETED:
+            fn(self, *args, **kwargs)
+            return
         # store it
+        if self.io_callback is None:
+            self.io_callback = []
         self.io_callback.append((fn, args, kwargs))
-        # already complete?
-        if self.io_complete.is_set():
-            self.trigger()
 
     def wait(self, timeout=None):
         """
-        COROUTINE
-        Block until the IO operation is complete and the positive or negative
-        result has been placed in the ICOB.
+        Return an awaitable that is done when the IO operation is complete and
+        the positive or negative result has been placed in the IOCB, the
+        result is the IOCB.
         :param timeout: optional timeout in seconds
         """
-        _logger.debug('wait(%d)', self.io_id)
-        coro = self.io_complete.wait()
+        if DEBUG: _logger.debug('wait(%r)', self.io_id)
+        future = self.io_future
+        if future is None:
+            future = self.io_future = asyncio.get_event_loop().create_future()
+            if self.io_state >= COMPLETED:
+                future.set_result(self)
         if timeout:
-            return asyncio.wait_for(coro, timeout)
-        else:
-            return coro
+            # the other ones waiting are not cancelled
+            return asyncio.wait_for(asyncio.shield(future), timeout)
+        return future
 
     def trigger(self):
         """
         This method is called by complete() or abort() after the positive or
         negative result has been stored in the IOCB.
         """
-        _logger.debug('trigger(%d)', self.io_id)
-        # Set the completion event and make the callback(s).
+        if DEBUG: _logger.debug('trigger(%r)', self.io_id)
         # if there's a timer, cancel it
         if self.io_timeout:
-            _logger.debug('    - cancel timeout')
             self.io_timeout.cancel()
-        # set the completion event
-        self.io_complete.set()
-        _logger.debug('    - complete event set')
+            self.io_timeout = None
+        # wake up the ones waiting
+        future = self.io_future
+        if (future is not None) and not future.done():
+            future.set_result(self)
         # make the callback(s)
-        for fn, args, kwargs in self.io_callback:
-            _logger.debug('    - callback fn: %r %r %r', fn, args, kwargs)
-            fn(self, *args, **kwargs)
+        if self.io_callback:
+            for fn, args, kwargs in self.io_callback:
+                fn(self, *args, **kwargs)
 
     def complete(self, msg):
         """
         Called to complete a transaction, usually when ProcessIO has
         shipped the IOCB off to some other thread or function.
         """
-        _logger.debug('complete(%d) %r', self.io_id, msg)
+        if DEBUG: _logger.debug('complete(%r) %r', self.io_id, msg)
         if self.io_controller:
             # pass to controller
             self.io_controller.complete_io(self, msg)
@@ -179,7 +178,7 @@ class IOCB(DebugContents):
         Called by a client to abort a transaction.
         :param msg: negative results of request
         """
-        _logger.debug('abort(%d) %r', self.io_id, err)
+        if DEBUG: _logger.debug('abort(%r) %r', self.io_id, err)
         if self.io_controller:
             # pass to controller
             self.io_controller.abort_io(self, err)
@@ -196,20 +195,17 @@ class IOCB(DebugContents):
         :param delay: the time limit for processing the IOCB in seconds
         :param err: the error to use when the IOCB is aborted
         """
-        _logger.debug('set_timeout(%d) %s err=%r', self.io_id, delay, err)
+        if DEBUG: _logger.debug('set_timeout(%r) %s err=%r', self.io_id, delay, err)
         # if one has already been created, cancel it
         if self.io_timeout:
             self.io_timeout.cancel()
-        self.io_timeout = call_later(delay, self.abort, err)
+        self.io_timeout = call_later_coarse(delay, self.abort, err)
 
     def __repr__(self):
-        return f'<{self.__module__}.{self.__class__.__name__} instance ({self.io_id})>'
+        io_id = hex(id(self)) if self.io_id is None else self.io_id
+        return f'<{self.__module__}.{self.__class__.__name__} instance ({io_id})>'
 
     def __lt__(self, other):
         """Instances have to be comparable with < to work with Priority Queue."""
         assert isinstance(other, IOCB)
-        # ToDo: check order of priority
-        if self.io_priority != other.io_priority:
-            return self.io_priority < other.io_priority
-        else:
-            return self.io_id < other.io_id
+        return self.io_priority < other.io_priority
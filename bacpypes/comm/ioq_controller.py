@@ -2,9 +2,11 @@
 import asyncio
 import logging
 from collections import defaultdict
+from itertools import count
 from .iocb_states import *
 from .io_controller import IOController
 from .iocb import IOCB
+from ..debugging import DEBUG
 
 _logger = logging.getLogger(__name__)
 __all__ = ['IOQController']
@@ -14,25 +16,42 @@ class IOQController(IOController):
     """
     Queued IO Controller
     An `IOQController` has an identical interface as the `IOContoller`,
-    but provides additional hooks to make sure that only one IOCB is
-    being processed at a time for each destination address.
+    but provides additional hooks to make sure that only a limited number of
+    IOCBs, the window, are being processed at a time for each destination
+    address.  The default window is one.  IOCBs with the same priority are
+    processed in the order they were requested.
     """
 
-    def __init__(self, name=None):
+    def __init__(self, name=None, window=1):
         """Initialize a queue controller."""
-        _logger.debug('__init__ name=%r', name)
+        if DEBUG: _logger.debug('__init__ name=%r window=%r', name, window)
         IOController.__init__(self, name)
         # queues for each destination
         self.address_queues = defaultdict(lambda: asyncio.PriorityQueue())
+        # the consumer of each queue is woken when there is more to do
+        self.address_wakeups = {}
+        # how many IOCBs can be processed at the same time for a destination
+        self.window = window
+        # orders the IOCBs with the same priority in the queues
+        self._sequence = count()
+
+    def get_window(self, destination_address):
+        """
+        Return the number of IOCBs that can be processed at the same time for
+        a destination, derived classes can have a different window for each one.
+        :param destination_address: the destination of the requests
+        """
+        return self.window
 
     def request_io(self, iocb: IOCB):
         """
         This method is called by the application requesting the service of a
-        controller.  If the controller is already busy processing a request,
-        this IOCB is queued until the current processing is complete.
+        controller.  If the controller is already busy processing as many
+        requests as the window allows, this IOCB is queued until one of them
+        is complete.
         :param iocb: the IOCB to be processed
         """
-        _logger.debug('request_io %r', iocb)
+        if DEBUG: _logger.debug('request_io %r', iocb)
         if not isinstance(iocb, IOCB):
             raise TypeError('IOCB expected')
         iocb.io_controller = self
@@ -43,30 +62,47 @@ class IOQController(IOController):
         destination_address = iocb.request.pduDestination
         # if there is no queue for this address yet, it will be constructed by the defaultdict
         queue = self.address_queues[destination_address]
-        if queue.empty():
-            _logger.debug('start new IO Queue Consumer for %r', destination_address)
+        queue.put_nowait((iocb.io_priority, next(self._sequence), iocb))
+        wakeup = self.address_wakeups.get(destination_address)
+        if wakeup is None:
+            if DEBUG: _logger.debug('start new IO Queue Consumer for %r', destination_address)
+            self.address_wakeups[destination_address] = asyncio.Event()
             asyncio.get_event_loop().create_task(self._process_queue(destination_address))
-        queue.put_nowait(iocb)
+        else:
+            wakeup.set()
 
     async def _process_queue(self, destination_address):
         """
-        Sequentially process IOCBs from the address queue.
+        Process IOCBs from the address queue, no more than the window at a time.
         """
         queue = self.address_queues[destination_address]
-        while True:
-            iocb = await queue.get()
+        wakeup = self.address_wakeups[destination_address]
+        active = set()
+
+        def finished(iocb):
+            active.discard(iocb)
+            wakeup.set()
+
+        while active or not queue.empty():
+            if queue.empty() or (len(active) >= self.get_window(destination_address)):
+                # wait for a request to finish or a new one to be queued
+                wakeup.clear()
+                await wakeup.wait()
+                continue
+            _, _, iocb = queue.get_nowait()
             if iocb.io_state != ABORTED:
+                active.add(iocb)
+                iocb.add_callback(finished)
                 try:
                     # let derived class figure out how to process this
                     self._process_io(iocb)
-                    await iocb.wait()
                 except Exception as e:
                     # if there was an error, abort the request
                     self.abort_io(iocb, e)
             queue.task_done()
-            if queue.empty():
-                _logger.debug('exiting IO Queue Consumer for %r', destination_address)
-                break
+        if DEBUG: _logger.debug('exiting IO Queue Consumer for %r', destination_address)
+        del self.address_wakeups[destination_address]
+        del self.address_queues[destination_address]
 
     def _process_io(self, iocb: IOCB):
         """Figure out how to respond to this request.  This must be provided by the derived class."""
@@ -1,7 +1,7 @@
 
 import logging
+from ..debugging import DEBUG
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['PCI']
 
@@ -15,25 +15,15 @@ class PCI:
     """
     _debug_contents = ('pduUserData+', 'pduSource', 'pduDestination')
 
-    def __init__(self, *args, **kwargs):
-        if DEBUG: _logger.debug('PCI.__init__ %r %r', args, kwargs)
-        # split out the keyword arguments that belong to this class
-        my_kwargs = {}
-        other_kwargs = {}
-        for element in ('user_data', 'source', 'destination'):
-            if element in kwargs:
-                my_kwargs[element] = kwargs[element]
-        for kw in kwargs:
-            if kw not in my_kwargs:
-                other_kwargs[kw] = kwargs[kw]
-        if DEBUG: _logger.debug('    - my_kwargs: %r', my_kwargs)
-        if DEBUG: _logger.debug('    - other_kwargs: %r', other_kwargs)
-        # call some superclass, if there is one
-        super(PCI, self).__init__(*args, **other_kwargs)
+    def __init__(self, *args, user_data=None, source=None, destination=None, **kwargs):
+        if DEBUG: _logger.debug('PCI.__init__ %r user_data=%r source=%r destination=%r %r', args, user_data, source, destination, kwargs)
+        # call some superclass, if there is one, with the keyword arguments
+        # that do not belong to this class
+        super(PCI, self).__init__(*args, **kwargs)
         # pick up some optional kwargs
-        self.pduUserData = my_kwargs.get('user_data', None)
-        self.pduSource = my_kwargs.get('source', None)
-        self.pduDestination = my_kwargs.get('destination', None)
+        self.pduUserData = user_data
+        self.pduSource = source
+        self.pduDestination = destination
 
     def update(self, pci):
         """Copy the PCI fields."""
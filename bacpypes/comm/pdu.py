@@ -1,10 +1,9 @@
 
 import logging
-from ..debugging import btox
+from ..debugging import DEBUG, btox
 from .pci import PCI
 from .pdu_data import PDUData
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['PDU']
 
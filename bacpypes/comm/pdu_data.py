@@ -4,9 +4,8 @@ import logging
 from copy import copy as _copy
 
 from ..errors import DecodingError
-from ..debugging import btox
+from ..debugging import DEBUG, btox
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['PDUData']
 
@@ -14,6 +13,10 @@ __all__ = ['PDUData']
 _short_mask = 0xFFFF
 _long_mask = 0xFFFFFFFF
 
+# precompiled struct formats for the cursor reads
+_short_struct = struct.Struct('>H')
+_long_struct = struct.Struct('>L')
+
 
 class PDUData:
     """
@@ -21,6 +24,16 @@ class PDUData:
     of the data octet string, or append information to the end.  These are helper
     functions but may not be applicable for higher layer protocols which may
     be passing significantly more complex data.
+
+    Reading is done with a cursor into the buffer rather than deleting octets
+    from the front, so decoding a packet is linear in its length.  The octets
+    that have already been consumed are only dropped when the pduData attribute
+    is accessed, which keeps the attribute compatible with code that expects
+    it to be the unread remainder of the packet.
+
+    Immutable (bytes) buffers are never copied, they are shared along with the
+    read offset when a PDU is copied or decoded into the next layer up, so an
+    incoming datagram is parsed in one pass from the link layer to the APCI.
     """
 
     def __init__(self, data=None, *args, **kwargs):
@@ -28,62 +41,133 @@ class PDUData:
         # this call will fail if there are args or kwargs, but not if there
         # is another class in the __mro__ of this thing being constructed
         super(PDUData, self).__init__(*args, **kwargs)
-        from .pdu import PDU
         # function acts like a copy constructor
         if data is None:
             self.pduData = bytearray()
-        elif isinstance(data, (bytes, bytearray)):
+        elif isinstance(data, bytes):
+            self.pduData = data
+        elif isinstance(data, (bytearray, memoryview)):
             self.pduData = bytearray(data)
-        elif isinstance(data, PDUData) or isinstance(data, PDU):
-            self.pduData = _copy(data.pduData)
+        elif isinstance(data, PDUData):
+            if isinstance(data._pdu_data, (bytes, memoryview)):
+                # immutable, share the buffer and the read position
+                self._pdu_data = data._pdu_data
+                self._pdu_offset = data._pdu_offset
+            else:
+                self.pduData = _copy(data.pduData)
         else:
             raise TypeError('bytes or bytearray expected')
 
+    @property
+    def pduData(self):
+        """The unread part of the data, consumed octets are dropped first."""
+        offset = self._pdu_offset
+        if offset:
+            data = self._pdu_data
+            if isinstance(data, bytearray):
+                del data[:offset]
+            else:
+                self._pdu_data = data[offset:]
+            self._pdu_offset = 0
+        return self._pdu_data
+
+    @pduData.setter
+    def pduData(self, data):
+        self._pdu_data = data
+        self._pdu_offset = 0
+
+    def remaining(self):
+        """Return the number of octets that have not been read."""
+        return len(self._pdu_data) - self._pdu_offset
+
     def get(self):
-        if len(self.pduData) == 0:
+        offset = self._pdu_offset
+        try:
+            octet = self._pdu_data[offset]
+        except IndexError:
             raise DecodingError('no more packet data')
-        octet = self.pduData[0]
-        del self.pduData[0]
+        self._pdu_offset = offset + 1
         return octet
 
     def get_data(self, dlen):
-        if len(self.pduData) < dlen:
+        offset = self._pdu_offset
+        end = offset + dlen
+        data = self._pdu_data
+        if len(data) < end:
+            raise DecodingError('no more packet data')
+        self._pdu_offset = end
+        return data[offset:end]
+
+    def get_view(self, dlen):
+        """Like get_data() but return a memoryview rather than a copy, the
+        buffer cannot be extended while the view is held."""
+        offset = self._pdu_offset
+        end = offset + dlen
+        data = self._pdu_data
+        if len(data) < end:
             raise DecodingError('no more packet data')
-        data = self.pduData[:dlen]
-        del self.pduData[:dlen]
-        return data
+        self._pdu_offset = end
+        return memoryview(data)[offset:end]
+
+    def get_remaining(self):
+        """Return the rest of the unread data and consume it."""
+        offset = self._pdu_offset
+        data = self._pdu_data
+        self._pdu_offset = len(data)
+        return data[offset:]
+
+    def share_data(self, pdu):
+        """Make the unread data of another PDU the data of this one and
+        consume it, an immutable buffer is shared rather than copied."""
+        data = pdu._pdu_data
+        if isinstance(data, (bytes, memoryview)):
+            self._pdu_data = data
+            self._pdu_offset = pdu._pdu_offset
+            pdu._pdu_offset = len(data)
+        else:
+            self.pduData = pdu.get_remaining()
 
     def get_short(self):
-        return struct.unpack('>H', self.get_data(2))[0]
+        offset = self._pdu_offset
+        if len(self._pdu_data) < offset + 2:
+            raise DecodingError('no more packet data')
+        self._pdu_offset = offset + 2
+        return _short_struct.unpack_from(self._pdu_data, offset)[0]
 
     def get_long(self):
-        return struct.unpack('>L', self.get_data(4))[0]
+        offset = self._pdu_offset
+        if len(self._pdu_data) < offset + 4:
+            raise DecodingError('no more packet data')
+        self._pdu_offset = offset + 4
+        return _long_struct.unpack_from(self._pdu_data, offset)[0]
 
     def put(self, n):
         # pduData is a bytearray
-        self.pduData += bytes([n])
+        self._pdu_data += bytes([n])
 
     def put_data(self, data):
         if isinstance(data, bytes):
             pass
         elif isinstance(data, bytearray):
             pass
+        elif isinstance(data, memoryview):
+            pass
         elif isinstance(data, list):
             data = bytes(data)
         else:
             raise TypeError('data must be bytes, bytearray, or a list')
         # regular append works
-        self.pduData += data
+        self._pdu_data += data
 
     def put_short(self, n):
-        self.pduData += struct.pack('>H', n & _short_mask)
+        self._pdu_data += _short_struct.pack(n & _short_mask)
 
     def put_long(self, n):
-        self.pduData += struct.pack('>L', n & _long_mask)
+        self._pdu_data += _long_struct.pack(n & _long_mask)
 
     def debug_contents(self, indent=1, file=sys.stdout, _ids=None):
         tab = '    ' * indent
-        if isinstance(self.pduData, bytearray):
+        if isinstance(self.pduData, (bytes, bytearray)):
             if len(self.pduData) > 20:
                 hexed = btox(self.pduData[:20], '.') + '...'
             else:
@@ -102,7 +186,7 @@ class PDUData:
         # add the data if it is not None
         v = self.pduData
         if v is not None:
-            if isinstance(v, bytearray):
+            if isinstance(v, (bytes, bytearray)):
                 v = btox(v)
             elif hasattr(v, 'dict_contents'):
                 v = v.dict_contents(as_class=as_class)
@@ -3,8 +3,8 @@ import logging
 
 from .bindings import bind, server_map, client_map
 from ..errors import ConfigurationError
+from ..debugging import DEBUG
 
-DEBUG = True
 _logger = logging.getLogger(__name__)
 __all__ = ['Server']
 
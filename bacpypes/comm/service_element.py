@@ -3,8 +3,8 @@ import logging
 
 from .bindings import bind, element_map, service_map
 from ..errors import ConfigurationError
+from ..debugging import DEBUG
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['ApplicationServiceElement', 'NullServiceElement', 'DebugServiceElement']
 
@@ -3,6 +3,7 @@ import logging
 from .io_controller import IOController
 from .sieve_queue import SieveQueue
 from .client import Client
+from ..debugging import DEBUG
 
 _logger = logging.getLogger(__name__)
 __all__ = ['SieveClientController']
@@ -21,7 +22,7 @@ class SieveClientController(Client, IOController):
     associate this response with the correct request.
     """
     def __init__(self, queue_class=SieveQueue):
-        _logger.debug('__init__')
+        if DEBUG: _logger.debug('__init__')
         Client.__init__(self)
         IOController.__init__(self)
         # make sure it's the correct class
@@ -32,39 +33,39 @@ class SieveClientController(Client, IOController):
         self.queue_class = queue_class
 
     def _process_io(self, iocb):
-        _logger.debug('process_io %r', iocb)
+        if DEBUG: _logger.debug('process_io %r', iocb)
         # get the destination address from the pdu
         destination_address = iocb.args[0].pduDestination
-        _logger.debug('    - destination_address: %r', destination_address)
+        if DEBUG: _logger.debug('    - destination_address: %r', destination_address)
         # look up the queue
         queue = self.queues.get(destination_address, None)
         if not queue:
-            _logger.debug('    - new queue')
+            if DEBUG: _logger.debug('    - new queue')
             queue = self.queue_class(self, destination_address)
             self.queues[destination_address] = queue
-        _logger.debug('    - queue: %r', queue)
+        if DEBUG: _logger.debug('    - queue: %r', queue)
         # ask the queue to process the request
         queue.request_io(iocb)
 
     def request(self, pdu):
-        _logger.debug('request %r', pdu)
+        if DEBUG: _logger.debug('request %r', pdu)
         # send it downstream
         super(SieveClientController, self).request(pdu)
 
     def confirmation(self, pdu):
-        _logger.debug('confirmation %r', pdu)
+        if DEBUG: _logger.debug('confirmation %r', pdu)
         # get the source address
         source_address = pdu.pduSource
-        _logger.debug('    - source_address: %r', source_address)
+        if DEBUG: _logger.debug('    - source_address: %r', source_address)
         # look up the queue
         queue = self.queues.get(source_address, None)
         if not queue:
-            _logger.debug('    - no queue: %r' % (source_address,))
+            if DEBUG: _logger.debug('    - no queue: %r' % (source_address,))
             return
-        _logger.debug('    - queue: %r', queue)
+        if DEBUG: _logger.debug('    - queue: %r', queue)
         # make sure it has an active iocb
         if not queue.active_iocb:
-            _logger.debug('    - no active request')
+            if DEBUG: _logger.debug('    - no active request')
             return
         # complete the request
         if isinstance(pdu, Exception):
@@ -73,5 +74,5 @@ class SieveClientController(Client, IOController):
             queue.complete_io(queue.active_iocb, pdu)
         # if the queue is empty and idle, forget about the controller
         if not queue.io_queue.queue and not queue.active_iocb:
-            _logger.debug('    - queue is empty')
+            if DEBUG: _logger.debug('    - queue is empty')
             del self.queues[source_address]
@@ -10,9 +10,9 @@ from .errors import DecodingError, \
     MissingRequiredParameter, InvalidParameterDatatype, InvalidTag
 
 from .primitivedata import Atomic, ClosingTag, OpeningTag, Tag, TagList, \
-    Unsigned
+    Unsigned, direct_codec, direct_tag
+from .debugging import DEBUG
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 
 
@@ -37,11 +37,309 @@ class Element:
         return desc
 
 
+#
+#   Codec Plans
+#
+#   The encoding and decoding of each element of a Sequence or Choice only
+#   depends on the class of the element, its context and whether it is
+#   optional, so the type checks are done once per class and the result is
+#   a list of closures that do the work.  Atomic elements with a direct codec
+#   go between the value and the tag without building a helper.
+#
+
+# returned by a choice element decoder when the tag does not match
+_no_match = object()
+
+
+def _element_kind(element):
+    """Return 'list', 'anyatomic', 'atomic' or 'structure' for an element."""
+    if (element.cls in _sequence_of_classes) or (element.cls in _list_of_classes):
+        return 'list'
+    elif issubclass(element.cls, AnyAtomic):
+        return 'anyatomic'
+    elif issubclass(element.cls, Atomic):
+        return 'atomic'
+    else:
+        return 'structure'
+
+
+def _element_encoder(element, kind, type_error):
+    """Return a function that encodes the value of an element into a tag list."""
+    cls = element.cls
+    context = element.context
+    if kind == 'list':
+        if context is None:
+            def encode(value, taglist):
+                cls(value).encode(taglist)
+        else:
+            def encode(value, taglist):
+                taglist.append(OpeningTag(context))
+                cls(value).encode(taglist)
+                taglist.append(ClosingTag(context))
+    elif kind in ('atomic', 'anyatomic'):
+        if context is None:
+            def encode(value, taglist):
+                # a helper cooperates between the atomic value and the tag
+                tag = Tag()
+                cls(value).encode(tag)
+                taglist.append(tag)
+        else:
+            def encode(value, taglist):
+                tag = Tag()
+                cls(value).encode(tag)
+                taglist.append(tag.app_to_context(context))
+    else:
+        def encode(value, taglist):
+            if not isinstance(value, cls):
+                raise TypeError(type_error)
+            if context is not None:
+                taglist.append(OpeningTag(context))
+            value.encode(taglist)
+            if context is not None:
+                taglist.append(ClosingTag(context))
+
+    codec = direct_codec(cls) if kind == 'atomic' else None
+    if codec:
+        encode_data = codec[0]
+        helper_encode = encode
+        if context is None:
+            tclass, tnum = Tag.applicationTagClass, cls._app_tag
+        else:
+            tclass, tnum = Tag.contextTagClass, context
+
+        def encode(value, taglist):
+            tdata = encode_data(cls, value)
+            if tdata is None:
+                # not a plain value, let the helper sort it out
+                helper_encode(value, taglist)
+            else:
+                taglist.append(direct_tag(tclass, tnum, tdata))
+    return encode
+
+
+def _atomic_value_decoder(cls, context):
+    """Return a function that returns the value of an atomic class from an
+    application tag, or a context tag when there is a context."""
+    codec = direct_codec(cls)
+    if codec:
+        decode_value = codec[1]
+        return lambda tag: decode_value(cls, tag)
+    if context is None:
+        return lambda tag: cls(tag).value
+    app_tag = getattr(cls, '_app_tag', None)
+    return lambda tag: cls(tag.context_to_app(app_tag)).value
+
+
+def _sequence_element_decoder(element, kind):
+    """Return a function that decodes an element of a sequence from a tag list
+    and sets the attribute, the tag is the one at the front of the list and is
+    neither missing nor a closing tag."""
+    name = element.name
+    cls = element.cls
+    context = element.context
+    optional = element.optional
+
+    if kind == 'list':
+        if element.cls not in _sequence_of_classes:
+            # a ListOf is decoded like a structure
+            return _sequence_element_decoder(element, 'structure')
+
+        def decode(obj, tag, taglist):
+            # check for context encoding
+            if context is not None:
+                if tag.tagClass != Tag.openingTagClass or tag.tagNumber != context:
+                    if not optional:
+                        raise MissingRequiredParameter("%s expected opening tag %d" % (name, context))
+                    # omitted optional element
+                    setattr(obj, name, [])
+                    return
+                taglist.Pop()
+            helper = cls()
+            helper.decode(taglist)
+            setattr(obj, name, helper.value)
+            # check for context closing tag
+            if context is not None:
+                tag = taglist.Pop()
+                if tag.tagClass != Tag.closingTagClass or tag.tagNumber != context:
+                    raise InvalidTag("%s expected closing tag %d" % (name, context))
+
+    elif kind == 'anyatomic':
+        def decode(obj, tag, taglist):
+            if context is not None:
+                raise InvalidTag("%s any atomic with context tag %d" % (name, context))
+            if tag.tagClass != Tag.applicationTagClass:
+                if not optional:
+                    raise InvalidParameterDatatype("%s expected any atomic application tag" % (name,))
+                setattr(obj, name, None)
+                return
+            taglist.Pop()
+            setattr(obj, name, cls(tag).value)
+
+    elif kind == 'atomic':
+        app_tag = cls._app_tag
+        decode_value = _atomic_value_decoder(cls, context)
+        if context is not None:
+            def decode(obj, tag, taglist):
+                if tag.tagClass != Tag.contextTagClass or tag.tagNumber != context:
+                    if not optional:
+                        raise InvalidTag("%s expected context tag %d" % (name, context))
+                    setattr(obj, name, None)
+                    return
+                taglist.Pop()
+                setattr(obj, name, decode_value(tag))
+        else:
+            def decode(obj, tag, taglist):
+                if tag.tagClass != Tag.applicationTagClass or tag.tagNumber != app_tag:
+                    if not optional:
+                        raise InvalidParameterDatatype("%s expected application tag %s" % (
+                            name, Tag._app_tag_name[app_tag]))
+                    setattr(obj, name, None)
+                    return
+                taglist.Pop()
+                setattr(obj, name, decode_value(tag))
+
+    else:
+        # only an optional element without a context needs to be able to
+        # put back what a partial decode consumed
+        restore = (context is None) and optional
+
+        def decode(obj, tag, taglist):
+            if context is not None:
+                if tag.tagClass != Tag.openingTagClass or tag.tagNumber != context:
+                    if not optional:
+                        raise InvalidTag("%s expected opening tag %d" % (name, context))
+                    setattr(obj, name, None)
+                    return
+                taglist.Pop()
+            if restore:
+                # make a backup of the tag list in case the structure manages to
+                # decode some content but not all of it.  This is not supposed to
+                # happen if the ASN.1 has been formed correctly.
+                backup = taglist.mark()
+                try:
+                    value = cls()
+                    value.decode(taglist)
+                except (DecodingError, InvalidTag):
+                    # omitted optional element
+                    value = None
+                    taglist.reset(backup)
+            else:
+                value = cls()
+                value.decode(taglist)
+            setattr(obj, name, value)
+            if context is not None:
+                tag = taglist.Pop()
+                if (not tag) or tag.tagClass != Tag.closingTagClass or tag.tagNumber != context:
+                    raise InvalidTag("%s expected closing tag %d" % (name, context))
+
+    return decode
+
+
+def _choice_element_decoder(element, kind):
+    """Return a function that decodes an element of a choice from a tag list,
+    or returns _no_match if the tag at the front of the list is not for it."""
+    name = element.name
+    cls = element.cls
+    context = element.context
+
+    if kind == 'list':
+        def decode(tag, taglist):
+            # check for context encoding
+            if context is None:
+                raise NotImplementedError("choice of a SequenceOf must be context encoded")
+            if tag.tagClass != Tag.contextTagClass or tag.tagNumber != context:
+                return _no_match
+            taglist.Pop()
+            helper = cls()
+            helper.decode(taglist)
+            # check for context closing tag
+            tag = taglist.Pop()
+            if tag.tagClass != Tag.closingTagClass or tag.tagNumber != context:
+                raise InvalidTag("%s expected closing tag %d" % (name, context))
+            return helper.value
+
+    elif kind in ('atomic', 'anyatomic'):
+        app_tag = getattr(cls, '_app_tag', None)
+        decode_value = _atomic_value_decoder(cls, context)
+        if context is not None:
+            def decode(tag, taglist):
+                if tag.tagClass != Tag.contextTagClass or tag.tagNumber != context:
+                    return _no_match
+                taglist.Pop()
+                return decode_value(tag)
+        else:
+            def decode(tag, taglist):
+                if tag.tagClass != Tag.applicationTagClass or tag.tagNumber != app_tag:
+                    return _no_match
+                taglist.Pop()
+                return decode_value(tag)
+
+    else:
+        def decode(tag, taglist):
+            if context is None:
+                raise NotImplementedError("choice of non-atomic data must be context encoded")
+            if tag.tagClass != Tag.openingTagClass or tag.tagNumber != context:
+                return _no_match
+            taglist.Pop()
+            value = cls()
+            value.decode(taglist)
+            # check for the correct closing tag
+            tag = taglist.Pop()
+            if tag.tagClass != Tag.closingTagClass or tag.tagNumber != context:
+                raise InvalidTag("%s expected closing tag %d" % (name, context))
+            return value
+
+    return decode
+
+
+def _compile_sequence_plan(cls):
+    """Build the codec plan for a Sequence class."""
+    encoders = []
+    decoders = []
+    for element in cls.sequenceElements:
+        kind = _element_kind(element)
+        encoders.append((
+            element.name,
+            element.optional,
+            _element_encoder(element, kind, "%s must be of type %s" % (element.name, element.cls.__name__)),
+        ))
+        decoders.append((
+            element.name,
+            element.optional,
+            kind == 'list',
+            _sequence_element_decoder(element, kind),
+        ))
+    cls._sequence_plan = (cls.sequenceElements, encoders, decoders)
+    return cls._sequence_plan
+
+
+def _compile_choice_plan(cls):
+    """Build the codec plan for a Choice class."""
+    encoders = []
+    decoders = []
+    for element in cls.choiceElements:
+        kind = _element_kind(element)
+        if kind == 'list':
+            # not special cased when encoding, the value has to be an instance
+            encode_kind = 'structure'
+        else:
+            encode_kind = kind
+        encoders.append((
+            element.name,
+            _element_encoder(element, encode_kind, "%s must be a %s" % (element.name, element.cls.__name__)),
+        ))
+        decoders.append((element.name, _choice_element_decoder(element, kind)))
+    cls._choice_plan = (cls.choiceElements, encoders, decoders)
+    return cls._choice_plan
+
+
 class Sequence(object):
     """
     Sequence
     """
     sequenceElements = []
+    # (sequenceElements, encoders, decoders) built by _compile_sequence_plan()
+    _sequence_plan = (None, None, None)
 
     def __init__(self, *args, **kwargs):
         """
@@ -63,208 +361,61 @@ class Sequence(object):
         for element in self.sequenceElements:
             setattr(self, element.name, my_kwargs.get(element.name, None))
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _compile_sequence_plan(cls)
+
     def encode(self, taglist):
         """
         """
         if DEBUG: _logger.debug(f"encode {taglist}")
-        global _sequence_of_classes, _list_of_classes
         # make sure we're dealing with a tag list
         if not isinstance(taglist, TagList):
             raise TypeError("TagList expected")
-        for element in self.sequenceElements:
-            value = getattr(self, element.name, None)
-            if element.optional and value is None:
-                continue
-            if not element.optional and value is None:
+        elements, encoders, decoders = self._sequence_plan
+        if elements is not self.sequenceElements:
+            elements, encoders, decoders = _compile_sequence_plan(self.__class__)
+        for name, optional, encoder in encoders:
+            value = getattr(self, name, None)
+            if value is None:
+                if optional:
+                    continue
                 raise MissingRequiredParameter(
-                    "%s is a missing required element of %s" % (element.name, self.__class__.__name__))
-            if (element.cls in _sequence_of_classes) or (element.cls in _list_of_classes):
-                # might need to encode an opening tag
-                if element.context is not None:
-                    taglist.append(OpeningTag(element.context))
-                if DEBUG: _logger.debug("    - build sequence helper: %r %r", element.cls, value)
-                helper = element.cls(value)
-                # encode the value
-                helper.encode(taglist)
-                # might need to encode a closing tag
-                if element.context is not None:
-                    taglist.append(ClosingTag(element.context))
-            elif issubclass(element.cls, (Atomic, AnyAtomic)):
-                # a helper cooperates between the atomic value and the tag
-                if DEBUG: _logger.debug("    - build helper: %r %r", element.cls, value)
-                helper = element.cls(value)
-                # build a tag and encode the data into it
-                tag = Tag()
-                helper.encode(tag)
-                # convert it to context encoding iff necessary
-                if element.context is not None:
-                    tag = tag.app_to_context(element.context)
-                # now append the tag
-                taglist.append(tag)
-            elif isinstance(value, element.cls):
-                # might need to encode an opening tag
-                if element.context is not None:
-                    taglist.append(OpeningTag(element.context))
-                # encode the value
-                value.encode(taglist)
-                # might need to encode a closing tag
-                if element.context is not None:
-                    taglist.append(ClosingTag(element.context))
-            else:
-                raise TypeError("%s must be of type %s" % (element.name, element.cls.__name__))
+                    "%s is a missing required element of %s" % (name, self.__class__.__name__))
+            encoder(value, taglist)
 
     def decode(self, taglist):
         if DEBUG: _logger.debug("decode %r", taglist)
-        global _sequence_of_classes, _list_of_classes
         # make sure we're dealing with a tag list
         if not isinstance(taglist, TagList):
             raise TypeError("TagList expected")
-        for element in self.sequenceElements:
+        elements, encoders, decoders = self._sequence_plan
+        if elements is not self.sequenceElements:
+            elements, encoders, decoders = _compile_sequence_plan(self.__class__)
+        closing_tag_class = Tag.closingTagClass
+        for name, optional, is_list, decoder in decoders:
             tag = taglist.Peek()
-            if DEBUG: _logger.debug("    - element, tag: %r, %r", element, tag)
+            if DEBUG: _logger.debug("    - element, tag: %r, %r", name, tag)
             # no more elements
             if tag is None:
-                if element.optional:
+                if optional:
                     # omitted optional element
-                    setattr(self, element.name, None)
-                elif (element.cls in _sequence_of_classes) or (element.cls in _list_of_classes):
+                    setattr(self, name, None)
+                elif is_list:
                     # empty list
-                    setattr(self, element.name, [])
+                    setattr(self, name, [])
                 else:
                     raise MissingRequiredParameter(
-                        "%s is a missing required element of %s" % (element.name, self.__class__.__name__))
+                        "%s is a missing required element of %s" % (name, self.__class__.__name__))
             # we have been enclosed in a context
-            elif tag.tagClass == Tag.closingTagClass:
-                if not element.optional:
+            elif tag.tagClass == closing_tag_class:
+                if not optional:
                     raise MissingRequiredParameter(
-                        "%s is a missing required element of %s" % (element.name, self.__class__.__name__))
+                        "%s is a missing required element of %s" % (name, self.__class__.__name__))
                 # omitted optional element
-                setattr(self, element.name, None)
-            # check for a sequence element
-            elif element.cls in _sequence_of_classes:
-                # check for context encoding
-                if element.context is not None:
-                    if tag.tagClass != Tag.openingTagClass or tag.tagNumber != element.context:
-                        if not element.optional:
-                            raise MissingRequiredParameter(
-                                "%s expected opening tag %d" % (element.name, element.context))
-                        else:
-                            # omitted optional element
-                            setattr(self, element.name, [])
-                            continue
-                    taglist.Pop()
-                # a helper cooperates between the atomic value and the tag
-                helper = element.cls()
-                helper.decode(taglist)
-                # now save the value
-                setattr(self, element.name, helper.value)
-                # check for context closing tag
-                if element.context is not None:
-                    tag = taglist.Pop()
-                    if tag.tagClass != Tag.closingTagClass or tag.tagNumber != element.context:
-                        raise InvalidTag("%s expected closing tag %d" % (element.name, element.context))
-            # check for an atomic element
-
-            elif issubclass(element.cls, AnyAtomic):
-                # convert it to application encoding
-                if element.context is not None:
-                    raise InvalidTag("%s any atomic with context tag %d" % (element.name, element.context))
-                if tag.tagClass != Tag.applicationTagClass:
-                    if not element.optional:
-                        raise InvalidParameterDatatype("%s expected any atomic application tag" % (element.name,))
-                    else:
-                        setattr(self, element.name, None)
-                        continue
-                # consume the tag
-                taglist.Pop()
-                # a helper cooperates between the atomic value and the tag
-                helper = element.cls(tag)
-                # now save the value
-                setattr(self, element.name, helper.value)
-            # check for specific kind of atomic element, or the context says what kind
-            elif issubclass(element.cls, Atomic):
-                # convert it to application encoding
-                if element.context is not None:
-                    if tag.tagClass != Tag.contextTagClass or tag.tagNumber != element.context:
-                        if not element.optional:
-                            raise InvalidTag("%s expected context tag %d" % (element.name, element.context))
-                        else:
-                            setattr(self, element.name, None)
-                            continue
-                    tag = tag.context_to_app(element.cls._app_tag)
-                else:
-                    if tag.tagClass != Tag.applicationTagClass or tag.tagNumber != element.cls._app_tag:
-                        if not element.optional:
-                            raise InvalidParameterDatatype("%s expected application tag %s" % (
-                            element.name, Tag._app_tag_name[element.cls._app_tag]))
-                        else:
-                            setattr(self, element.name, None)
-                            continue
-                # consume the tag
-                taglist.Pop()
-                # a helper cooperates between the atomic value and the tag
-                helper = element.cls(tag)
-                # now save the value
-                setattr(self, element.name, helper.value)
-            # check for an AnyAtomic element
-            elif issubclass(element.cls, AnyAtomic):
-                # convert it to application encoding
-                if element.context is not None:
-                    if tag.tagClass != Tag.contextTagClass or tag.tagNumber != element.context:
-                        if not element.optional:
-                            raise InvalidTag("%s expected context tag %d" % (element.name, element.context))
-                        else:
-                            setattr(self, element.name, None)
-                            continue
-                    tag = tag.context_to_app(element.cls._app_tag)
-                else:
-                    if tag.tagClass != Tag.applicationTagClass:
-                        if not element.optional:
-                            raise InvalidParameterDatatype("%s expected application tag" % (element.name,))
-                        else:
-                            setattr(self, element.name, None)
-                            continue
-                # consume the tag
-                taglist.Pop()
-                # a helper cooperates between the atomic value and the tag
-                helper = element.cls(tag)
-                # now save the value
-                setattr(self, element.name, helper.value)
-            # some kind of structure
+                setattr(self, name, None)
             else:
-                if element.context is not None:
-                    if tag.tagClass != Tag.openingTagClass or tag.tagNumber != element.context:
-                        if not element.optional:
-                            raise InvalidTag("%s expected opening tag %d" % (element.name, element.context))
-                        else:
-                            setattr(self, element.name, None)
-                            continue
-                    taglist.Pop()
-                try:
-                    # make a backup of the tag list in case the structure manages to
-                    # decode some content but not all of it.  This is not supposed to
-                    # happen if the ASN.1 has been formed correctly.
-                    backup = taglist.tagList[:]
-
-                    # build a value and decode it
-                    value = element.cls()
-                    value.decode(taglist)
-                    # save the result
-                    setattr(self, element.name, value)
-                except (DecodingError, InvalidTag) as err:
-                    # if the context tag was matched, the substructure has to be decoded
-                    # correctly.
-                    if element.context is None and element.optional:
-                        # omitted optional element
-                        setattr(self, element.name, None)
-                        # restore the backup
-                        taglist.tagList = backup
-                    else:
-                        raise
-                if element.context is not None:
-                    tag = taglist.Pop()
-                    if (not tag) or tag.tagClass != Tag.closingTagClass or tag.tagNumber != element.context:
-                        raise InvalidTag("%s expected closing tag %d" % (element.name, element.context))
+                decoder(self, tag, taglist)
 
     def debug_contents(self, indent=1, file=sys.stdout, _ids=None):
         global _sequence_of_classes, _list_of_classes
@@ -321,6 +472,56 @@ class Sequence(object):
         return use_dict
 
 
+def _encode_list_items(subtype, atomic, values, taglist):
+    """Encode the items of a SequenceOf, ListOf or ArrayOf into a tag list."""
+    append = taglist.append
+    if atomic:
+        codec = direct_codec(subtype)
+        encode_data = codec[0] if codec else None
+        for value in values:
+            if encode_data:
+                tdata = encode_data(subtype, value)
+                if tdata is not None:
+                    append(direct_tag(Tag.applicationTagClass, subtype._app_tag, tdata))
+                    continue
+            # a helper cooperates between the atomic value and the tag
+            tag = Tag()
+            subtype(value).encode(tag)
+            append(tag)
+    else:
+        for value in values:
+            if not isinstance(value, subtype):
+                raise TypeError("%s must be a %s" % (value, subtype.__name__))
+            # it must have its own encoder
+            value.encode(taglist)
+
+
+def _decode_list_items(subtype, atomic, values, taglist):
+    """Decode items from a tag list and append them to values, up to the end
+    of the list or a closing tag."""
+    closing_tag_class = Tag.closingTagClass
+    codec = direct_codec(subtype) if atomic else None
+    while len(taglist) != 0:
+        tag = taglist.Peek()
+        if tag.tagClass == closing_tag_class:
+            return
+        if codec:
+            taglist.Pop()
+            if (tag.tagClass != Tag.applicationTagClass) or (tag.tagNumber != subtype._app_tag):
+                # let the class complain about it
+                subtype(tag)
+            values.append(codec[1](subtype, tag))
+        elif atomic:
+            taglist.Pop()
+            # a helper cooperates between the atomic value and the tag
+            values.append(subtype(tag).value)
+        else:
+            # build an element and let it decode itself
+            value = subtype()
+            value.decode(taglist)
+            values.append(value)
+
+
 _sequence_of_map = {}
 _sequence_of_classes = {}
 
@@ -351,7 +552,6 @@ def SequenceOf(cls):
 
         def __init__(self, value=None):
             if DEBUG: _logger.debug("(%r)__init__ %r (subtype=%r)", self.__class__.__name__, value, self.subtype)
-            _logger.debug('_SequenceOf %r', value)
             if value is None:
                 self.value = []
             elif isinstance(value, list):
@@ -379,42 +579,11 @@ def SequenceOf(cls):
 
         def encode(self, taglist):
             if DEBUG: _logger.debug("(%r)encode %r", self.__class__.__name__, taglist)
-            for value in self.value:
-                if issubclass(self.subtype, (Atomic, AnyAtomic)):
-                    # a helper cooperates between the atomic value and the tag
-                    helper = self.subtype(value)
-                    # build a tag and encode the data into it
-                    tag = Tag()
-                    helper.encode(tag)
-                    # now encode the tag
-                    taglist.append(tag)
-                elif isinstance(value, self.subtype):
-                    # it must have its own encoder
-                    value.encode(taglist)
-                else:
-                    raise TypeError("%s must be a %s" % (value, self.subtype.__name__))
+            _encode_list_items(self.subtype, self._atomic, self.value, taglist)
 
         def decode(self, taglist):
             if DEBUG: _logger.debug("(%r)decode %r", self.__class__.__name__, taglist)
-            while len(taglist) != 0:
-                tag = taglist.Peek()
-                if tag.tagClass == Tag.closingTagClass:
-                    return
-                if issubclass(self.subtype, (Atomic, AnyAtomic)):
-                    if DEBUG: _logger.debug("    - building helper: %r %r", self.subtype, tag)
-                    taglist.Pop()
-                    # a helper cooperates between the atomic value and the tag
-                    helper = self.subtype(tag)
-                    # save the value
-                    self.value.append(helper.value)
-                else:
-                    if DEBUG: _logger.debug("    - building value: %r", self.subtype)
-                    # build an element
-                    value = self.subtype()
-                    # let it decode itself
-                    value.decode(taglist)
-                    # save what was built
-                    self.value.append(value)
+            _decode_list_items(self.subtype, self._atomic, self.value, taglist)
 
         def debug_contents(self, indent=1, file=sys.stdout, _ids=None):
             i = 0
@@ -445,6 +614,7 @@ def SequenceOf(cls):
 
     # constrain it to a list of a specific type of item
     setattr(_SequenceOf, 'subtype', cls)
+    _SequenceOf._atomic = issubclass(cls, (Atomic, AnyAtomic))
     _SequenceOf.__name__ = 'SequenceOf' + cls.__name__
     if DEBUG: _logger.debug("    - build this class: %r", _SequenceOf)
     # cache this type
@@ -514,50 +684,11 @@ def ListOf(cls):
 
         def encode(self, taglist):
             if DEBUG: _logger.debug("(%r)encode %r", self.__class__.__name__, taglist)
-            for value in self.value:
-                if issubclass(self.subtype, (Atomic, AnyAtomic)):
-                    # a helper cooperates between the atomic value and the tag
-                    helper = self.subtype(value)
-
-                    # build a tag and encode the data into it
-                    tag = Tag()
-                    helper.encode(tag)
-
-                    # now encode the tag
-                    taglist.append(tag)
-                elif isinstance(value, self.subtype):
-                    # it must have its own encoder
-                    value.encode(taglist)
-                else:
-                    raise TypeError("%s must be a %s" % (value, self.subtype.__name__))
+            _encode_list_items(self.subtype, self._atomic, self.value, taglist)
 
         def decode(self, taglist):
             if DEBUG: _logger.debug("(%r)decode %r", self.__class__.__name__, taglist)
-
-            while len(taglist) != 0:
-                tag = taglist.Peek()
-                if tag.tagClass == Tag.closingTagClass:
-                    return
-
-                if issubclass(self.subtype, (Atomic, AnyAtomic)):
-                    if DEBUG: _logger.debug("    - building helper: %r %r", self.subtype, tag)
-                    taglist.Pop()
-
-                    # a helper cooperates between the atomic value and the tag
-                    helper = self.subtype(tag)
-
-                    # save the value
-                    self.value.append(helper.value)
-                else:
-                    if DEBUG: _logger.debug("    - building value: %r", self.subtype)
-                    # build an element
-                    value = self.subtype()
-
-                    # let it decode itself
-                    value.decode(taglist)
-
-                    # save what was built
-                    self.value.append(value)
+            _decode_list_items(self.subtype, self._atomic, self.value, taglist)
 
         def debug_contents(self, indent=1, file=sys.stdout, _ids=None):
             i = 0
@@ -588,6 +719,7 @@ def ListOf(cls):
 
     # constrain it to a list of a specific type of item
     setattr(_ListOf, 'subtype', cls)
+    _ListOf._atomic = issubclass(cls, (Atomic, AnyAtomic))
     _ListOf.__name__ = 'ListOf' + cls.__name__
     if DEBUG: _logger.debug("    - build this class: %r", _ListOf)
 
@@ -714,48 +846,13 @@ def ArrayOf(cls):
 
         def encode(self, taglist):
             if DEBUG: _logger.debug("(%r)encode %r", self.__class__.__name__, taglist)
-
-            for value in self.value[1:]:
-                if issubclass(self.subtype, (Atomic, AnyAtomic)):
-                    # a helper cooperates between the atomic value and the tag
-                    helper = self.subtype(value)
-                    # build a tag and encode the data into it
-                    tag = Tag()
-                    helper.encode(tag)
-                    # now encode the tag
-                    taglist.append(tag)
-                elif isinstance(value, self.subtype):
-                    # it must have its own encoder
-                    value.encode(taglist)
-                else:
-                    raise TypeError("%s must be a %s" % (value, self.subtype.__name__))
+            _encode_list_items(self.subtype, self._atomic, self.value[1:], taglist)
 
         def decode(self, taglist):
             if DEBUG: _logger.debug("(%r)decode %r", self.__class__.__name__, taglist)
-
             # start with an empty array
             self.value = [0]
-
-            while len(taglist) != 0:
-                tag = taglist.Peek()
-                if tag.tagClass == Tag.closingTagClass:
-                    break
-                if issubclass(self.subtype, (Atomic, AnyAtomic)):
-                    if DEBUG: _logger.debug("    - building helper: %r %r", self.subtype, tag)
-                    taglist.Pop()
-                    # a helper cooperates between the atomic value and the tag
-                    helper = self.subtype(tag)
-                    # save the value
-                    self.value.append(helper.value)
-                else:
-                    if DEBUG: _logger.debug("    - building value: %r", self.subtype)
-                    # build an element
-                    value = self.subtype()
-                    # let it decode itself
-                    value.decode(taglist)
-                    # save what was built
-                    self.value.append(value)
-
+            _decode_list_items(self.subtype, self._atomic, self.value, taglist)
             # update the length
             self.value[0] = len(self.value) - 1
 
@@ -845,6 +942,7 @@ def ArrayOf(cls):
 
     # constrain it to a list of a specific type of item
     setattr(ArrayOf, 'subtype', cls)
+    ArrayOf._atomic = issubclass(cls, (Atomic, AnyAtomic))
     ArrayOf.__name__ = 'ArrayOf' + cls.__name__
 
     # cache this type
@@ -857,6 +955,8 @@ def ArrayOf(cls):
 
 class Choice(object):
     choiceElements = []
+    # (choiceElements, encoders, decoders) built by _compile_choice_plan()
+    _choice_plan = (None, None, None)
 
     def __init__(self, **kwargs):
         """
@@ -882,119 +982,46 @@ class Choice(object):
         for element in self.choiceElements:
             setattr(self, element.name, my_kwargs.get(element.name, None))
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _compile_choice_plan(cls)
+
     def encode(self, taglist):
         if DEBUG: _logger.debug("(%r)encode %r", self.__class__.__name__, taglist)
-        for element in self.choiceElements:
-            value = getattr(self, element.name, None)
+        elements, encoders, decoders = self._choice_plan
+        if elements is not self.choiceElements:
+            elements, encoders, decoders = _compile_choice_plan(self.__class__)
+        for name, encoder in encoders:
+            value = getattr(self, name, None)
             if value is None:
                 continue
-            if issubclass(element.cls, (Atomic, AnyAtomic)):
-                # a helper cooperates between the atomic value and the tag
-                helper = element.cls(value)
-                # build a tag and encode the data into it
-                tag = Tag()
-                helper.encode(tag)
-                # convert it to context encoding
-                if element.context is not None:
-                    tag = tag.app_to_context(element.context)
-                # now encode the tag
-                taglist.append(tag)
-                break
-            elif isinstance(value, element.cls):
-                # encode an opening tag
-                if element.context is not None:
-                    taglist.append(OpeningTag(element.context))
-                # encode the value
-                value.encode(taglist)
-                # encode a closing tag
-                if element.context is not None:
-                    taglist.append(ClosingTag(element.context))
-                break
-            else:
-                raise TypeError("%s must be a %s" % (element.name, element.cls.__name__))
+            encoder(value, taglist)
+            break
         else:
             raise AttributeError("missing choice of %s" % (self.__class__.__name__,))
 
     def decode(self, taglist):
         if DEBUG: _logger.debug("(%r)decode %r", self.__class__.__name__, taglist)
-        global _sequence_of_classes, _list_of_classes
+        elements, encoders, decoders = self._choice_plan
+        if elements is not self.choiceElements:
+            elements, encoders, decoders = _compile_choice_plan(self.__class__)
         # peek at the element
         tag = taglist.Peek()
         if tag is None:
             raise AttributeError("missing choice of %s" % (self.__class__.__name__,))
         if tag.tagClass == Tag.closingTagClass:
             raise AttributeError("missing choice of %s" % (self.__class__.__name__,))
-        # keep track of which one was found
-        found_element = {}
         # figure out which choice it is
-        for element in self.choiceElements:
-            if DEBUG: _logger.debug("    - checking choice: %s", element.name)
-            # check for a sequence element
-            if (element.cls in _sequence_of_classes) or (element.cls in _list_of_classes):
-                # check for context encoding
-                if element.context is None:
-                    raise NotImplementedError("choice of a SequenceOf must be context encoded")
-                # match the context tag number
-                if tag.tagClass != Tag.contextTagClass or tag.tagNumber != element.context:
-                    continue
-                taglist.Pop()
-                # a helper cooperates between the atomic value and the tag
-                helper = element.cls()
-                helper.decode(taglist)
-                # now save the value
-                found_element[element.name] = helper.value
-                # check for context closing tag
-                tag = taglist.Pop()
-                if tag.tagClass != Tag.closingTagClass or tag.tagNumber != element.context:
-                    raise InvalidTag("%s expected closing tag %d" % (element.name, element.context))
-                # done
-                if DEBUG: _logger.debug("    - found choice (sequence)")
-                break
-
-            # check for an atomic element
-            elif issubclass(element.cls, (Atomic, AnyAtomic)):
-                # convert it to application encoding
-                if element.context is not None:
-                    if tag.tagClass != Tag.contextTagClass or tag.tagNumber != element.context:
-                        continue
-                    tag = tag.context_to_app(element.cls._app_tag)
-                else:
-                    if tag.tagClass != Tag.applicationTagClass or tag.tagNumber != element.cls._app_tag:
-                        continue
-                # consume the tag
-                taglist.Pop()
-                # a helper cooperates between the atomic value and the tag
-                helper = element.cls(tag)
-                # now save the value
-                found_element[element.name] = helper.value
-                # done
-                if DEBUG: _logger.debug("    - found choice (atomic)")
-                break
-            # some kind of structure
-            else:
-                # check for context encoding
-                if element.context is None:
-                    raise NotImplementedError("choice of non-atomic data must be context encoded")
-                if tag.tagClass != Tag.openingTagClass or tag.tagNumber != element.context:
-                    continue
-                taglist.Pop()
-                # build a value and decode it
-                value = element.cls()
-                value.decode(taglist)
-                # now save the value
-                found_element[element.name] = value
-                # check for the correct closing tag
-                tag = taglist.Pop()
-                if tag.tagClass != Tag.closingTagClass or tag.tagNumber != element.context:
-                    raise InvalidTag("%s expected closing tag %d" % (element.name, element.context))
-                # done
-                if DEBUG: _logger.debug("    - found choice (structure)")
+        for found_name, decoder in decoders:
+            if DEBUG: _logger.debug("    - checking choice: %s", found_name)
+            found_value = decoder(tag, taglist)
+            if found_value is not _no_match:
                 break
         else:
             raise AttributeError("missing choice of %s" % (self.__class__.__name__,))
         # now save the value and None everywhere else
-        for element in self.choiceElements:
-            setattr(self, element.name, found_element.get(element.name, None))
+        for name, decoder in decoders:
+            setattr(self, name, found_value if name == found_name else None)
 
     def debug_contents(self, indent=1, file=sys.stdout, _ids=None):
         for element in self.choiceElements:
@@ -1050,18 +1077,10 @@ class Any:
 
     def decode(self, taglist):
         if DEBUG: _logger.debug("decode %r", taglist)
-        lvl = 0
-        while len(taglist) != 0:
-            tag = taglist.Peek()
-            if tag.tagClass == Tag.openingTagClass:
-                lvl += 1
-            elif tag.tagClass == Tag.closingTagClass:
-                lvl -= 1
-                if lvl < 0:
-                    break
-            self.tagList.append(taglist.Pop())
-        # make sure everything balances
-        if lvl > 0:
+        try:
+            self.tagList.extend(taglist.pop_group())
+        except InvalidTag:
+            # make sure everything balances
             raise DecodingError("mismatched open/close tags")
 
     def cast_in(self, element):
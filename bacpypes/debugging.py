@@ -2,15 +2,21 @@
 
 """
 Debugging
+
+The debug logging of the stack is switched on and off by DEBUG, every module
+imports it from here so it is evaluated once, when bacpypes is imported, and
+the log calls in the packet paths cost a global lookup when it is off.  Set
+the BACPYPES_DEBUG environment variable to 1 to switch it on.
 """
 
+import os
 import sys
 import re
 import logging
 import binascii
 from io import StringIO
 
-DEBUG = False
+DEBUG = os.environ.get('BACPYPES_DEBUG', '').lower() in ('1', 'true', 'yes', 'on')
 _logger = logging.getLogger(__name__)
 
 
@@ -62,6 +68,8 @@ class DebugContents(object):
     """
     DebugContents
     """
+    __slots__ = ()
+
     def debug_contents(self, indent=1, stream=sys.stdout, _ids=None):
         """Debug the contents of an object."""
         classes = list(self.__class__.__mro__)
@@ -3,21 +3,29 @@ import re
 import socket
 import struct
 import logging
+from collections import OrderedDict
 
 try:
     import netifaces
 except ImportError:
     netifaces = None
 
-from ..debugging import btox, xtob
+from ..debugging import DEBUG, btox, xtob
 
 # pack/unpack constants
 _short_mask = 0xFFFF
 _long_mask = 0xFFFFFFFF
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
-__all__ = ['Address', 'pack_ip_addr', 'unpack_ip_addr']
+__all__ = ['Address', 'intern_address', 'clear_address_cache', 'pack_ip_addr', 'unpack_ip_addr']
+
+# addresses are immutable, the attributes are only set while constructing
+_set = object.__setattr__
+
+# interned addresses, keyed by the (host, port) tuple, the octets or the
+# string, in least recently used order
+_address_cache = OrderedDict()
+ADDRESS_CACHE_SIZE = 4096
 
 #
 #   Address
@@ -46,7 +54,18 @@ def unpack_ip_addr(addr):
 class Address:
     """
     Address
+
+    An address is immutable, once it has been constructed its attributes
+    cannot be changed, so the same instance can be shared by any number of
+    PDUs, dictionaries and caches.  The IP related attributes are only set for
+    addresses that have them.
     """
+    __slots__ = (
+        'addrType', 'addrNet', 'addrLen', 'addrAddr',
+        'addrIP', 'addrMask', 'addrHost', 'addrSubnet', 'addrPort', 'addrTuple', 'addrBroadcastTuple',
+        '_hash',
+    )
+
     nullAddr = 0
     localBroadcastAddr = 1
     localStationAddr = 2
@@ -56,63 +75,97 @@ class Address:
 
     def __init__(self, *args):
         if DEBUG: _logger.debug(f'__init__ {args!r}')
-        self.addrType = Address.nullAddr
-        self.addrNet = None
-        self.addrLen = 0
-        self.addrAddr = b''
+        _set(self, 'addrType', Address.nullAddr)
+        _set(self, 'addrNet', None)
+        _set(self, 'addrLen', 0)
+        _set(self, 'addrAddr', b'')
         if len(args) == 1:
             self.decode_address(args[0])
         elif len(args) == 2:
             self.decode_address(args[1])
             if self.addrType == Address.localStationAddr:
-                self.addrType = Address.remoteStationAddr
-                self.addrNet = args[0]
+                _set(self, 'addrType', Address.remoteStationAddr)
+                _set(self, 'addrNet', args[0])
             elif self.addrType == Address.localBroadcastAddr:
-                self.addrType = Address.remoteBroadcastAddr
-                self.addrNet = args[0]
+                _set(self, 'addrType', Address.remoteBroadcastAddr)
+                _set(self, 'addrNet', args[0])
             else:
                 raise ValueError('unrecognized address ctor form')
+        self._freeze()
+
+    def _freeze(self):
+        """Called at the end of construction, compute the hash once."""
+        _set(self, '_hash', hash((self.addrType, self.addrNet, self.addrAddr)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in Address.__slots__ if hasattr(self, name)}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            _set(self, name, value)
+
+    def with_mask(self, mask):
+        """
+        Return a copy of this IP address with a different subnet mask, like
+        the entries of a broadcast distribution table.
+        """
+        addr = object.__new__(self.__class__)
+        addr.__setstate__(self.__getstate__())
+        _set(addr, 'addrMask', mask)
+        return addr
 
     def decode_address(self, addr):
         """Initialize the address from a string.  Lots of different forms are supported."""
         if DEBUG: _logger.debug('decode_address %r (%s)', addr, type(addr))
         # start out assuming this is a local station
-        self.addrType = Address.localStationAddr
-        self.addrNet = None
+        _set(self, 'addrType', Address.localStationAddr)
+        _set(self, 'addrNet', None)
         if addr == '*':
             if DEBUG: _logger.debug('    - localBroadcast')
-            self.addrType = Address.localBroadcastAddr
-            self.addrNet = None
-            self.addrAddr = None
-            self.addrLen = None
+            _set(self, 'addrType', Address.localBroadcastAddr)
+            _set(self, 'addrNet', None)
+            _set(self, 'addrAddr', None)
+            _set(self, 'addrLen', None)
 
         elif addr == '*:*':
             if DEBUG: _logger.debug('   - globalBroadcast')
-            self.addrType = Address.globalBroadcastAddr
-            self.addrNet = None
-            self.addrAddr = None
-            self.addrLen = None
+            _set(self, 'addrType', Address.globalBroadcastAddr)
+            _set(self, 'addrNet', None)
+            _set(self, 'addrAddr', None)
+            _set(self, 'addrLen', None)
 
         elif isinstance(addr, int):
             if DEBUG: _logger.debug('    - int')
             if (addr < 0) or (addr >= 256):
                 raise ValueError('address out of range')
-            self.addrAddr = struct.pack('B', addr)
-            self.addrLen = 1
+            _set(self, 'addrAddr', struct.pack('B', addr))
+            _set(self, 'addrLen', 1)
 
         elif isinstance(addr, (bytes, bytearray)):
             if DEBUG: _logger.debug('    - bytes or bytearray')
-            self.addrAddr = bytes(addr)
-            self.addrLen = len(addr)
+            _set(self, 'addrAddr', bytes(addr))
+            _set(self, 'addrLen', len(addr))
 
             if self.addrLen == 6:
-                self.addrIP = struct.unpack('!L', addr[:4])[0]
-                self.addrMask = (1 << 32) - 1
-                self.addrHost = (self.addrIP & ~self.addrMask)
-                self.addrSubnet = (self.addrIP & self.addrMask)
-                self.addrPort = struct.unpack('>H', addr[4:])[0]
-                self.addrTuple = (socket.inet_ntoa(addr[:4]), self.addrPort)
-                self.addrBroadcastTuple = ('255.255.255.255', self.addrPort)
+                _set(self, 'addrIP', struct.unpack('!L', addr[:4])[0])
+                _set(self, 'addrMask', (1 << 32) - 1)
+                _set(self, 'addrHost', (self.addrIP & ~self.addrMask))
+                _set(self, 'addrSubnet', (self.addrIP & self.addrMask))
+                _set(self, 'addrPort', struct.unpack('>H', addr[4:])[0])
+                _set(self, 'addrTuple', (socket.inet_ntoa(addr[:4]), self.addrPort))
+                _set(self, 'addrBroadcastTuple', ('255.255.255.255', self.addrPort))
 
         elif isinstance(addr, str):
             if DEBUG: _logger.debug('    - str')
@@ -129,43 +182,43 @@ class Address:
                     net = int(net)
                     if net >= 65535:
                         raise ValueError('network out of range')
-                    self.addrType = Address.remoteStationAddr
-                    self.addrNet = net
-                self.addrPort = int(port)
-                self.addrTuple = (addr, self.addrPort)
+                    _set(self, 'addrType', Address.remoteStationAddr)
+                    _set(self, 'addrNet', net)
+                _set(self, 'addrPort', int(port))
+                _set(self, 'addrTuple', (addr, self.addrPort))
 
                 addr_str = socket.inet_aton(addr)
-                self.addrIP = struct.unpack('!L', addr_str)[0]
-                self.addrMask = (_long_mask << (32 - int(mask))) & _long_mask
-                self.addrHost = (self.addrIP & ~self.addrMask)
-                self.addrSubnet = (self.addrIP & self.addrMask)
+                _set(self, 'addrIP', struct.unpack('!L', addr_str)[0])
+                _set(self, 'addrMask', (_long_mask << (32 - int(mask))) & _long_mask)
+                _set(self, 'addrHost', (self.addrIP & ~self.addrMask))
+                _set(self, 'addrSubnet', (self.addrIP & self.addrMask))
                 bcast = (self.addrSubnet | ~self.addrMask)
-                self.addrBroadcastTuple = (socket.inet_ntoa(struct.pack('!L', bcast & _long_mask)), self.addrPort)
-                self.addrAddr = addr_str + struct.pack('!H', self.addrPort & _short_mask)
-                self.addrLen = 6
+                _set(self, 'addrBroadcastTuple', (socket.inet_ntoa(struct.pack('!L', bcast & _long_mask)), self.addrPort))
+                _set(self, 'addrAddr', addr_str + struct.pack('!H', self.addrPort & _short_mask))
+                _set(self, 'addrLen', 6)
 
             elif ethernet_re.match(addr):
                 if DEBUG: _logger.debug('    - ethernet')
-                self.addrAddr = xtob(addr, ':')
-                self.addrLen = len(self.addrAddr)
+                _set(self, 'addrAddr', xtob(addr, ':'))
+                _set(self, 'addrLen', len(self.addrAddr))
 
             elif re.match(r'^\d+$', addr):
                 if DEBUG: _logger.debug('    - int')
                 addr = int(addr)
                 if addr > 255:
                     raise ValueError('address out of range')
-                self.addrAddr = struct.pack('B', addr)
-                self.addrLen = 1
+                _set(self, 'addrAddr', struct.pack('B', addr))
+                _set(self, 'addrLen', 1)
 
             elif re.match(r'^\d+:[*]$', addr):
                 if DEBUG: _logger.debug('    - remote broadcast')
                 addr = int(addr[:-2])
                 if addr >= 65535:
                     raise ValueError('network out of range')
-                self.addrType = Address.remoteBroadcastAddr
-                self.addrNet = addr
-                self.addrAddr = None
-                self.addrLen = None
+                _set(self, 'addrType', Address.remoteBroadcastAddr)
+                _set(self, 'addrNet', addr)
+                _set(self, 'addrAddr', None)
+                _set(self, 'addrLen', None)
 
             elif re.match(r'^\d+:\d+$', addr):
                 if DEBUG: _logger.debug('    - remote station')
@@ -176,21 +229,21 @@ class Address:
                     raise ValueError('network out of range')
                 if addr > 255:
                     raise ValueError('address out of range')
-                self.addrType = Address.remoteStationAddr
-                self.addrNet = net
-                self.addrAddr = struct.pack('B', addr)
-                self.addrLen = 1
+                _set(self, 'addrType', Address.remoteStationAddr)
+                _set(self, 'addrNet', net)
+                _set(self, 'addrAddr', struct.pack('B', addr))
+                _set(self, 'addrLen', 1)
 
             elif re.match(r'^0x([0-9A-Fa-f][0-9A-Fa-f])+$', addr):
                 if DEBUG: _logger.debug('    - modern hex string')
-                self.addrAddr = xtob(addr[2:])
-                self.addrLen = len(self.addrAddr)
+                _set(self, 'addrAddr', xtob(addr[2:]))
+                _set(self, 'addrLen', len(self.addrAddr))
 
             elif re.match(r"^X'([0-9A-Fa-f][0-9A-Fa-f])+'$", addr):
                 if DEBUG: _logger.debug('    - old school hex string')
 
-                self.addrAddr = xtob(addr[2:-1])
-                self.addrLen = len(self.addrAddr)
+                _set(self, 'addrAddr', xtob(addr[2:-1]))
+                _set(self, 'addrLen', len(self.addrAddr))
 
             elif re.match(r'^\d+:0x([0-9A-Fa-f][0-9A-Fa-f])+$', addr):
                 if DEBUG: _logger.debug('    - remote station with modern hex string')
@@ -198,10 +251,10 @@ class Address:
                 net = int(net)
                 if net >= 65535:
                     raise ValueError('network out of range')
-                self.addrType = Address.remoteStationAddr
-                self.addrNet = net
-                self.addrAddr = xtob(addr[2:])
-                self.addrLen = len(self.addrAddr)
+                _set(self, 'addrType', Address.remoteStationAddr)
+                _set(self, 'addrNet', net)
+                _set(self, 'addrAddr', xtob(addr[2:]))
+                _set(self, 'addrLen', len(self.addrAddr))
 
             elif re.match(r"^\d+:X'([0-9A-Fa-f][0-9A-Fa-f])+'$", addr):
                 if DEBUG: _logger.debug('    - remote station with old school hex string')
@@ -210,18 +263,18 @@ class Address:
                 if net >= 65535:
                     raise ValueError('network out of range')
 
-                self.addrType = Address.remoteStationAddr
-                self.addrNet = net
-                self.addrAddr = xtob(addr[2:-1])
-                self.addrLen = len(self.addrAddr)
+                _set(self, 'addrType', Address.remoteStationAddr)
+                _set(self, 'addrNet', net)
+                _set(self, 'addrAddr', xtob(addr[2:-1]))
+                _set(self, 'addrLen', len(self.addrAddr))
 
             elif netifaces and interface_re.match(addr):
                 if DEBUG: _logger.debug('    - interface name with optional port')
                 interface, port = interface_re.match(addr).groups()
                 if port is not None:
-                    self.addrPort = int(port)
+                    _set(self, 'addrPort', int(port))
                 else:
-                    self.addrPort = 47808
+                    _set(self, 'addrPort', 47808)
                 interfaces = netifaces.interfaces()
                 if interface not in interfaces:
                     raise ValueError(f'not an interface: {interface}')
@@ -235,30 +288,30 @@ class Address:
                 ifaddress = ipv4addresses[0]
                 if DEBUG: _logger.debug('    - ifaddress: %r', ifaddress)
                 addr = ifaddress['addr']
-                self.addrTuple = (addr, self.addrPort)
+                _set(self, 'addrTuple', (addr, self.addrPort))
                 if DEBUG: _logger.debug('    - addrTuple: %r', self.addrTuple)
                 addr_str = socket.inet_aton(addr)
-                self.addrIP = struct.unpack('!L', addr_str)[0]
+                _set(self, 'addrIP', struct.unpack('!L', addr_str)[0])
                 if 'netmask' in ifaddress:
                     maskstr = socket.inet_aton(ifaddress['netmask'])
-                    self.addrMask = struct.unpack('!L', maskstr)[0]
+                    _set(self, 'addrMask', struct.unpack('!L', maskstr)[0])
                 else:
-                    self.addrMask = _long_mask
-                self.addrHost = (self.addrIP & ~self.addrMask)
-                self.addrSubnet = (self.addrIP & self.addrMask)
+                    _set(self, 'addrMask', _long_mask)
+                _set(self, 'addrHost', (self.addrIP & ~self.addrMask))
+                _set(self, 'addrSubnet', (self.addrIP & self.addrMask))
                 if 'broadcast' in ifaddress:
-                    self.addrBroadcastTuple = (ifaddress['broadcast'], self.addrPort)
+                    _set(self, 'addrBroadcastTuple', (ifaddress['broadcast'], self.addrPort))
                 else:
-                    self.addrBroadcastTuple = None
+                    _set(self, 'addrBroadcastTuple', None)
                 if DEBUG: _logger.debug('    - addrBroadcastTuple: %r', self.addrBroadcastTuple)
-                self.addrAddr = addr_str + struct.pack('!H', self.addrPort & _short_mask)
-                self.addrLen = 6
+                _set(self, 'addrAddr', addr_str + struct.pack('!H', self.addrPort & _short_mask))
+                _set(self, 'addrLen', 6)
             else:
                 raise ValueError('unrecognized format')
 
         elif isinstance(addr, tuple):
             addr, port = addr
-            self.addrPort = int(port)
+            _set(self, 'addrPort', int(port))
             if isinstance(addr, str):
                 if not addr:
                     # when ('', n) is passed it is the local host address, but that
@@ -267,20 +320,20 @@ class Address:
                     addr_str = b'\0\0\0\0'
                 else:
                     addr_str = socket.inet_aton(addr)
-                self.addrTuple = (addr, self.addrPort)
+                _set(self, 'addrTuple', (addr, self.addrPort))
             elif isinstance(addr, int):
                 addr_str = struct.pack('!L', addr & _long_mask)
-                self.addrTuple = (socket.inet_ntoa(addr_str), self.addrPort)
+                _set(self, 'addrTuple', (socket.inet_ntoa(addr_str), self.addrPort))
             else:
                 raise TypeError('tuple must be (string, port) or (long, port)')
             if DEBUG: _logger.debug('    - addr_str: %r', addr_str)
-            self.addrIP = struct.unpack('!L', addr_str)[0]
-            self.addrMask = _long_mask
-            self.addrHost = None
-            self.addrSubnet = None
-            self.addrBroadcastTuple = self.addrTuple
-            self.addrAddr = addr_str + struct.pack('!H', self.addrPort & _short_mask)
-            self.addrLen = 6
+            _set(self, 'addrIP', struct.unpack('!L', addr_str)[0])
+            _set(self, 'addrMask', _long_mask)
+            _set(self, 'addrHost', None)
+            _set(self, 'addrSubnet', None)
+            _set(self, 'addrBroadcastTuple', self.addrTuple)
+            _set(self, 'addrAddr', addr_str + struct.pack('!H', self.addrPort & _short_mask))
+            _set(self, 'addrLen', 6)
         else:
             raise TypeError('integer, string or tuple required')
 
@@ -326,14 +379,17 @@ class Address:
         return '<%s %s>' % (self.__class__.__name__, self.__str__())
 
     def __hash__(self):
-        return hash((self.addrType, self.addrNet, self.addrAddr))
+        return self._hash
 
     def __eq__(self, arg):
-        # try an coerce it into an address
+        if arg is self:
+            return True
+        # try an coerce it into an address, repeat values come from the cache
         if not isinstance(arg, Address):
-            arg = Address(arg)
+            arg = intern_address(arg)
         # all of the components must match
-        return (self.addrType == arg.addrType) and (self.addrNet == arg.addrNet) and (self.addrAddr == arg.addrAddr)
+        return (self._hash == arg._hash) and (self.addrType == arg.addrType) \
+            and (self.addrNet == arg.addrNet) and (self.addrAddr == arg.addrAddr)
 
     def __ne__(self, arg):
         return not self.__eq__(arg)
@@ -343,3 +399,37 @@ class Address:
         if DEBUG: _logger.debug('dict_contents use_dict=%r} as_class=%r', use_dict, as_class)
         # exception to the rule of returning a dict
         return str(self)
+
+
+def intern_address(addr):
+    """
+    Return an Address for addr, which may be anything the Address constructor
+    accepts with one argument.  Repeat values return the same instance, like
+    the (host, port) tuples of the peers that keep sending datagrams.  The
+    cache is bounded by ADDRESS_CACHE_SIZE, the least recently used entries
+    go first.
+    """
+    if isinstance(addr, Address):
+        return addr
+    if isinstance(addr, bytearray):
+        addr = bytes(addr)
+    try:
+        address = _address_cache[addr]
+    except KeyError:
+        pass
+    except TypeError:
+        # not hashable, let the constructor complain about it
+        return Address(addr)
+    else:
+        _address_cache.move_to_end(addr)
+        return address
+    address = Address(addr)
+    if len(_address_cache) >= ADDRESS_CACHE_SIZE:
+        _address_cache.popitem(last=False)
+    _address_cache[addr] = address
+    return address
+
+
+def clear_address_cache():
+    """Forget the interned addresses."""
+    _address_cache.clear()
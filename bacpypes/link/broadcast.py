@@ -1,5 +1,5 @@
 
-from .address import Address
+from .address import Address, _set
 
 __all__ = ['LocalBroadcast', 'RemoteBroadcast', 'GlobalBroadcast']
 
@@ -8,34 +8,43 @@ class LocalBroadcast(Address):
     """
     LocalBroadcast
     """
+    __slots__ = ()
+
     def __init__(self):
-        self.addrType = Address.localBroadcastAddr
-        self.addrNet = None
-        self.addrAddr = None
-        self.addrLen = None
+        _set(self, 'addrType', Address.localBroadcastAddr)
+        _set(self, 'addrNet', None)
+        _set(self, 'addrAddr', None)
+        _set(self, 'addrLen', None)
+        self._freeze()
 
 
 class RemoteBroadcast(Address):
     """
     RemoteBroadcast
     """
+    __slots__ = ()
+
     def __init__(self, net):
         if not isinstance(net, int):
             raise TypeError('integer network required')
         if (net < 0) or (net >= 65535):
             raise ValueError('network out of range')
-        self.addrType = Address.remoteBroadcastAddr
-        self.addrNet = net
-        self.addrAddr = None
-        self.addrLen = None
+        _set(self, 'addrType', Address.remoteBroadcastAddr)
+        _set(self, 'addrNet', net)
+        _set(self, 'addrAddr', None)
+        _set(self, 'addrLen', None)
+        self._freeze()
 
 
 class GlobalBroadcast(Address):
     """
     GlobalBroadcast
     """
+    __slots__ = ()
+
     def __init__(self):
-        self.addrType = Address.globalBroadcastAddr
-        self.addrNet = None
-        self.addrAddr = None
-        self.addrLen = None
+        _set(self, 'addrType', Address.globalBroadcastAddr)
+        _set(self, 'addrNet', None)
+        _set(self, 'addrAddr', None)
+        _set(self, 'addrLen', None)
+        self._freeze()
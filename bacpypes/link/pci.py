@@ -1,9 +1,9 @@
 
 import logging
 from ..comm import PCI as _PCI
+from ..debugging import DEBUG
 
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['PCI']
 
@@ -15,24 +15,14 @@ class PCI(_PCI):
     """
     _debug_contents = ('pduExpectingReply', 'pduNetworkPriority')
 
-    def __init__(self, *args, **kwargs):
-        if DEBUG: _logger.debug('PCI.__init__ %r %r', args, kwargs)
-        # split out the keyword arguments that belong to this class
-        my_kwargs = {}
-        other_kwargs = {}
-        for element in ('expectingReply', 'networkPriority'):
-            if element in kwargs:
-                my_kwargs[element] = kwargs[element]
-        for kw in kwargs:
-            if kw not in my_kwargs:
-                other_kwargs[kw] = kwargs[kw]
-        if DEBUG: _logger.debug('    - my_kwargs: %r', my_kwargs)
-        if DEBUG: _logger.debug('    - other_kwargs: %r', other_kwargs)
-        # call some superclass, if there is one
-        super(PCI, self).__init__(*args, **other_kwargs)
+    def __init__(self, *args, expectingReply=0, networkPriority=0, **kwargs):
+        if DEBUG: _logger.debug('PCI.__init__ %r expectingReply=%r networkPriority=%r %r', args, expectingReply, networkPriority, kwargs)
+        # call some superclass, if there is one, with the keyword arguments
+        # that do not belong to this class
+        super(PCI, self).__init__(*args, **kwargs)
         # set the attribute/property values for the ones provided
-        self.pduExpectingReply = my_kwargs.get('expectingReply', 0)  # see 6.2.2 (1 or 0)
-        self.pduNetworkPriority = my_kwargs.get('networkPriority', 0)  # see 6.2.2 (0..3)
+        self.pduExpectingReply = expectingReply  # see 6.2.2 (1 or 0)
+        self.pduNetworkPriority = networkPriority  # see 6.2.2 (0..3)
 
     def update(self, pci):
         """Copy the PCI fields."""
@@ -9,7 +9,7 @@ try:
 except ImportError:
     netifaces = None
 
-from ..debugging import btox
+from ..debugging import DEBUG, btox
 from ..comm import PDUData
 from .pci import PCI
 
@@ -17,7 +17,6 @@ from .pci import PCI
 _short_mask = 0xFFFF
 _long_mask = 0xFFFFFFFF
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['PDU']
 
@@ -1,6 +1,6 @@
 
 import struct
-from .address import Address
+from .address import Address, _set
 
 __all__ = ['LocalStation', 'RemoteStation']
 
@@ -9,39 +9,45 @@ class LocalStation(Address):
     """
     LocalStation
     """
+    __slots__ = ()
+
     def __init__(self, addr):
-        self.addrType = Address.localStationAddr
-        self.addrNet = None
+        _set(self, 'addrType', Address.localStationAddr)
+        _set(self, 'addrNet', None)
         if isinstance(addr, int):
             if (addr < 0) or (addr >= 256):
                 raise ValueError('address out of range')
-            self.addrAddr = struct.pack('B', addr)
-            self.addrLen = 1
+            _set(self, 'addrAddr', struct.pack('B', addr))
+            _set(self, 'addrLen', 1)
         elif isinstance(addr, (bytes, bytearray)):
-            self.addrAddr = bytes(addr)
-            self.addrLen = len(addr)
+            _set(self, 'addrAddr', bytes(addr))
+            _set(self, 'addrLen', len(addr))
         else:
             raise TypeError('integer, bytes or bytearray required')
+        self._freeze()
 
 
 class RemoteStation(Address):
     """
     RemoteStation
     """
+    __slots__ = ()
+
     def __init__(self, net, addr):
         if not isinstance(net, int):
             raise TypeError('integer network required')
         if (net < 0) or (net >= 65535):
             raise ValueError('network out of range')
-        self.addrType = Address.remoteStationAddr
-        self.addrNet = net
+        _set(self, 'addrType', Address.remoteStationAddr)
+        _set(self, 'addrNet', net)
         if isinstance(addr, int):
             if (addr < 0) or (addr >= 256):
                 raise ValueError('address out of range')
-            self.addrAddr = struct.pack('B', addr)
-            self.addrLen = 1
+            _set(self, 'addrAddr', struct.pack('B', addr))
+            _set(self, 'addrLen', 1)
         elif isinstance(addr, (bytes, bytearray)):
-            self.addrAddr = bytes(addr)
-            self.addrLen = len(addr)
+            _set(self, 'addrAddr', bytes(addr))
+            _set(self, 'addrLen', len(addr))
         else:
-            raise TypeError('integer, bytes or bytearray required')
\ No newline at end of file
+            raise TypeError('integer, bytes or bytearray required')
+        self._freeze()
@@ -14,13 +14,14 @@ from ..errors import ConfigurationError
 from ..link import Address
 from ..comm import Client, Server, bind
 from ..task import call_soon
+from ..debugging import DEBUG
 
 _logger = logging.getLogger(__name__)
 
 
 class Network:
     def __init__(self, name='', broadcast_address=None, drop_percent=0.0):
-        _logger.debug('__init__ name=%r broadcast_address=%r drop_percent=%r', name, broadcast_address, drop_percent)
+        if DEBUG: _logger.debug('__init__ name=%r broadcast_address=%r drop_percent=%r', name, broadcast_address, drop_percent)
         self.name = name
         self.nodes = []
         self.broadcast_address = broadcast_address
@@ -30,7 +31,7 @@ class Network:
 
     def add_node(self, node):
         """ Add a node to this network, let the node know which network it's on."""
-        _logger.debug('add_node %r', node)
+        if DEBUG: _logger.debug('add_node %r', node)
         self.nodes.append(node)
         node.lan = self
         # update the node name
@@ -39,7 +40,7 @@ class Network:
 
     def remove_node(self, node):
         """ Remove a node from this network. """
-        _logger.debug('remove_node %r', node)
+        if DEBUG: _logger.debug('remove_node %r', node)
         self.nodes.remove(node)
         node.lan = None
 
@@ -47,26 +48,26 @@ class Network:
         """
         Process a PDU by sending a copy to each node as dictated by the addressing and if a node is promiscuous.
         """
-        _logger.debug('process_pdu(%s) %r', self.name, pdu)
+        if DEBUG: _logger.debug('process_pdu(%s) %r', self.name, pdu)
         # if there is a traffic log, call it with the network name and pdu
         if self.traffic_log:
             self.traffic_log(self.name, pdu)
         # randomly drop a packet
         if self.drop_percent != 0.0:
             if (random.random() * 100.0) < self.drop_percent:
-                _logger.debug('    - packet dropped')
+                if DEBUG: _logger.debug('    - packet dropped')
                 return
         if pdu.pduDestination == self.broadcast_address:
-            _logger.debug('    - broadcast')
+            if DEBUG: _logger.debug('    - broadcast')
             for node in self.nodes:
                 if (pdu.pduSource != node.address):
-                    _logger.debug('    - match: %r', node)
+                    if DEBUG: _logger.debug('    - match: %r', node)
                     node.response(deepcopy(pdu))
         else:
-            _logger.debug('    - unicast')
+            if DEBUG: _logger.debug('    - unicast')
             for node in self.nodes:
                 if node.promiscuous or (pdu.pduDestination == node.address):
-                    _logger.debug('    - match: %r', node)
+                    if DEBUG: _logger.debug('    - match: %r', node)
                     node.response(deepcopy(pdu))
 
     def __len__(self):
@@ -77,7 +78,7 @@ class Network:
 class Node(Server):
 
     def __init__(self, addr, lan=None, name='', promiscuous=False, spoofing=False, sid=None):
-        _logger.debug('__init__ %r lan=%r name=%r, promiscuous=%r spoofing=%r sid=%r',
+        if DEBUG: _logger.debug('__init__ %r lan=%r name=%r, promiscuous=%r spoofing=%r sid=%r',
                 addr, lan, name, promiscuous, spoofing, sid)
         Server.__init__(self, sid)
         self.lan = None
@@ -92,12 +93,12 @@ class Node(Server):
 
     def bind(self, lan):
         """bind to a LAN."""
-        _logger.debug('bind %r', lan)
+        if DEBUG: _logger.debug('bind %r', lan)
         lan.add_node(self)
 
     def indication(self, pdu):
         """Send a message."""
-        _logger.debug('indication(%s) %r', self.name, pdu)
+        if DEBUG: _logger.debug('indication(%s) %r', self.name, pdu)
         # make sure we're connected
         if not self.lan:
             raise ConfigurationError('unbound node')
@@ -123,11 +124,11 @@ class IPNetwork(Network):
     """
 
     def __init__(self, name=''):
-        _logger.debug('__init__')
+        if DEBUG: _logger.debug('__init__')
         Network.__init__(self, name=name)
 
     def add_node(self, node):
-        _logger.debug('add_node %r', node)
+        if DEBUG: _logger.debug('add_node %r', node)
         # first node sets the broadcast tuple, other nodes much match
         if not self.nodes:
             self.broadcast_address = node.addrBroadcastTuple
@@ -144,7 +145,7 @@ class IPNode(Node):
     """
 
     def __init__(self, addr, lan=None, promiscuous=False, spoofing=False, sid=None):
-        _logger.debug('__init__ %r lan=%r', addr, lan)
+        if DEBUG: _logger.debug('__init__ %r lan=%r', addr, lan)
         # make sure it's an Address that has appropriate pieces
         if not isinstance(addr, Address) or (not hasattr(addr, 'addrTuple')) \
             or (not hasattr(addr, 'addrBroadcastTuple')):
@@ -159,7 +160,7 @@ class IPNode(Node):
 class IPRouterNode(Client):
 
     def __init__(self, router, addr, lan):
-        _logger.debug('__init__ %r %r lan=%r', router, addr, lan)
+        if DEBUG: _logger.debug('__init__ %r %r lan=%r', router, addr, lan)
         # save the references to the router for packets and the lan for debugging
         self.lan = lan
         # make ourselves an IPNode and bind to it
@@ -170,11 +171,11 @@ class IPRouterNode(Client):
         self.addrSubnet = addr.addrSubnet
 
     def confirmation(self, pdu):
-        _logger.debug('confirmation %r', pdu)
+        if DEBUG: _logger.debug('confirmation %r', pdu)
         self.router.process_pdu(self, pdu)
 
     def process_pdu(self, pdu):
-        _logger.debug('process_pdu %r', pdu)
+        if DEBUG: _logger.debug('process_pdu %r', pdu)
         # pass it downstream
         self.request(pdu)
 
@@ -185,26 +186,26 @@ class IPRouterNode(Client):
 class IPRouter:
 
     def __init__(self):
-        _logger.debug('__init__')
+        if DEBUG: _logger.debug('__init__')
         # connected network nodes
         self.nodes = []
 
     def add_network(self, addr, lan):
-        _logger.debug('add_network %r %r', addr, lan)
+        if DEBUG: _logger.debug('add_network %r %r', addr, lan)
         node = IPRouterNode(self, addr, lan)
-        _logger.debug('    - node: %r', node)
+        if DEBUG: _logger.debug('    - node: %r', node)
         self.nodes.append(node)
 
     def process_pdu(self, node, pdu):
-        _logger.debug('process_pdu %r %r', node, pdu)
+        if DEBUG: _logger.debug('process_pdu %r %r', node, pdu)
         # unpack the address part of the destination
         addrstr = socket.inet_aton(pdu.pduDestination[0])
         ipaddr = struct.unpack('!L', addrstr)[0]
-        _logger.debug('    - ipaddr: %r', ipaddr)
+        if DEBUG: _logger.debug('    - ipaddr: %r', ipaddr)
         # loop through the other nodes
         for inode in self.nodes:
             if inode is not node:
                 if (ipaddr & inode.addrMask) == inode.addrSubnet:
-                    _logger.debug('    - inode: %r', inode)
+                    if DEBUG: _logger.debug('    - inode: %r', inode)
                     inode.process_pdu(pdu)
 
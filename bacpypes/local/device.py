@@ -11,9 +11,9 @@ from ..object import register_object_type, registered_object_types, \
     Property, DeviceObject
 
 from .object import CurrentPropertyListMixIn
+from ..debugging import DEBUG
 
 # some debugging
-DEBUG = 0
 _log = logging.getLogger(__name__)
 __all__ = ['LocalDeviceObject']
 
@@ -1,7 +1,8 @@
 from .netservice import *
 from .network_sap import *
+from .pending_routes import *
 from .npci import *
 from .npdu import *
 from .service_element import *
 
-__all__ = netservice.__all__ + network_sap.__all__ + npci.__all__ + npdu.__all__ + service_element.__all__
+__all__ = netservice.__all__ + network_sap.__all__ + pending_routes.__all__ + npci.__all__ + npdu.__all__ + service_element.__all__
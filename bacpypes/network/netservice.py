@@ -3,14 +3,15 @@
 """
 Network Service
 """
+import time
 import logging
-from ..debugging import DebugContents
+from ..debugging import DEBUG, DebugContents
 from ..comm import Client
 from ..link import PDU
+from ..task import call_later_coarse
 from .npdu import NPDU
 
 # some debugging
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['RouterInfo', 'RouterInfoCache', 'NetworkAdapter']
 
@@ -25,123 +26,198 @@ class RouterInfo(DebugContents):
     """These objects are routing information records that map router
     addresses with destination networks."""
 
-    _debug_contents = ('snet', 'address', 'dnets', 'status')
+    _debug_contents = ('snet', 'address', 'dnets', 'status', 'last_seen')
 
     def __init__(self, snet, address, dnets, status=ROUTER_AVAILABLE):
         self.snet = snet        # source network
         self.address = address  # address of the router
-        self.dnets = dnets      # list of reachable networks through this router
+        self.dnets = set(dnets)  # reachable networks through this router
         self.status = status    # router status
+        self.last_seen = time.monotonic()
 
 
 class RouterInfoCache:
+    """
+    The routers on the directly connected networks and the networks that can
+    be reached through them.  Routers are indexed by source network and by
+    address as well as by (snet, address).
 
-    def __init__(self):
-        if DEBUG: _logger.debug("__init__")
+    A router that has not been heard from in max_age seconds, either by an
+    I-Am-Router-To-Network or by routing a message from one of its networks,
+    is dropped along with its networks.  A max_age of None keeps them until
+    they are deleted.
+    """
+
+    def __init__(self, max_age=900.0):
+        if DEBUG: _logger.debug("__init__ max_age=%r", max_age)
+        self.max_age = max_age
 
         self.routers = {}           # (snet, address) -> RouterInfo
         self.networks = {}          # network -> RouterInfo
+        self.snets = {}             # snet -> {address: RouterInfo}
+        self.addresses = {}         # address -> {snet: RouterInfo}
+        self._aging_handle = None
 
     def get_router_info(self, dnet):
         if DEBUG: _logger.debug("get_router_info %r", dnet)
 
         # check to see if we know about it
-        if dnet not in self.networks:
+        router_info = self.networks.get(dnet)
+        if router_info is None:
             if DEBUG: _logger.debug("   - no route")
             return None
-
-        # return the network and address
-        router_info = self.networks[dnet]
         if DEBUG: _logger.debug("   - router_info: %r", router_info)
 
         # return the network, address, and status
         return (router_info.snet, router_info.address, router_info.status)
 
+    def get_routers(self, snet):
+        """Return the RouterInfo records of the routers on a directly connected network."""
+        return list(self.snets.get(snet, {}).values())
+
+    def get_router_networks(self, address):
+        """Return the RouterInfo records of a router, one for each network it is on."""
+        return list(self.addresses.get(address, {}).values())
+
+    def refresh_router_info(self, snet, address):
+        """The router has been heard from, return False if it is not known."""
+        router_info = self.routers.get((snet, address))
+        if router_info is None:
+            return False
+        router_info.last_seen = time.monotonic()
+        return True
+
     def update_router_info(self, snet, address, dnets):
         if DEBUG: _logger.debug("update_router_info %r %r %r", snet, address, dnets)
 
         # look up the router reference, make a new record if necessary
         key = (snet, address)
-        if key not in self.routers:
+        router_info = self.routers.get(key)
+        if router_info is None:
             if DEBUG: _logger.debug("   - new router")
-            router_info = self.routers[key] = RouterInfo(snet, address, list())
+            router_info = self.routers[key] = RouterInfo(snet, address, ())
+            self.snets.setdefault(snet, {})[address] = router_info
+            self.addresses.setdefault(address, {})[snet] = router_info
+            self._schedule_aging()
         else:
-            router_info = self.routers[key]
+            router_info.last_seen = time.monotonic()
+
+        # nothing new, the usual case for a router announcing its networks again
+        dnets = set(dnets)
+        dnets -= router_info.dnets
+        if not dnets:
+            if DEBUG: _logger.debug("   - existing router, match")
+            return
 
-        # add (or move) the destination networks
+        # take the networks away from the routers that had them
+        networks = self.networks
+        moved = {}
         for dnet in dnets:
-            if dnet in self.networks:
-                other_router = self.networks[dnet]
-                if other_router is router_info:
-                    if DEBUG: _logger.debug("   - existing router, match")
-                    continue
-                elif dnet not in other_router.dnets:
-                    if DEBUG: _logger.debug("   - where did it go?")
-                else:
-                    other_router.dnets.remove(dnet)
-                    if not other_router.dnets:
-                        if DEBUG: _logger.debug("    - no longer care about this router")
-                        del self.routers[(snet, other_router.address)]
-
-            # add a reference to the router
-            self.networks[dnet] = router_info
-            if DEBUG: _logger.debug("   - reference added")
-
-            # maybe update the list of networks for this router
-            if dnet not in router_info.dnets:
-                router_info.dnets.append(dnet)
-                if DEBUG: _logger.debug("   - dnet added, now: %r", router_info.dnets)
+            other_router = networks.get(dnet)
+            if other_router is not None:
+                moved.setdefault(id(other_router), (other_router, []))[1].append(dnet)
+            networks[dnet] = router_info
+        for other_router, other_dnets in moved.values():
+            if DEBUG: _logger.debug("   - moved from %r: %r", other_router.address, other_dnets)
+            other_router.dnets.difference_update(other_dnets)
+            if not other_router.dnets:
+                if DEBUG: _logger.debug("    - no longer care about this router")
+                self._remove_router(other_router)
+
+        router_info.dnets |= dnets
+        if DEBUG: _logger.debug("   - dnets added, now: %r", router_info.dnets)
 
     def update_router_status(self, snet, address, status):
         if DEBUG: _logger.debug("update_router_status %r %r %r", snet, address, status)
 
-        key = (snet, address)
-        if key not in self.routers:
+        router_info = self.routers.get((snet, address))
+        if router_info is None:
             if DEBUG: _logger.debug("   - not a router we care about")
             return
 
-        router_info = self.routers[key]
         router_info.status = status
         if DEBUG: _logger.debug("   - status updated")
 
     def delete_router_info(self, snet, address=None, dnets=None):
-        if DEBUG: _logger.debug("delete_router_info %r %r %r", dnets)
+        """Delete networks from a router, all of them if dnets is None.  If
+        address is None do this for all the routers on snet, if snet is None
+        do it for the router on every network it is on."""
+        if DEBUG: _logger.debug("delete_router_info %r %r %r", snet, address, dnets)
 
         # if address is None, remove all the routers for the network
         if address is None:
-            for rnet, raddress in self.routers.keys():
-                if snet == rnet:
-                    if DEBUG: _logger.debug("   - going down")
-                    self.delete_router_info(snet, raddress)
+            for router_info in self.get_routers(snet):
+                if DEBUG: _logger.debug("   - going down")
+                self.delete_router_info(snet, router_info.address, dnets)
             if DEBUG: _logger.debug("   - back topside")
             return
 
+        # if snet is None, remove the router from every network
+        if snet is None:
+            for router_info in self.get_router_networks(address):
+                self.delete_router_info(router_info.snet, address, dnets)
+            return
+
         # look up the router reference
-        key = (snet, address)
-        if key not in self.routers:
+        router_info = self.routers.get((snet, address))
+        if router_info is None:
             if DEBUG: _logger.debug("   - unknown router")
             return
-
-        router_info = self.routers[key]
         if DEBUG: _logger.debug("   - router_info: %r", router_info)
 
         # if dnets is None, remove all the networks for the router
         if dnets is None:
-            dnets = router_info.dnets
+            self._remove_router(router_info)
+            return
 
-        # loop through the list of networks to be deleted
+        # remove the networks this router has from both sides
+        dnets = router_info.dnets.intersection(dnets)
+        router_info.dnets -= dnets
         for dnet in dnets:
-            if dnet in self.networks:
-                del self.networks[dnet]
-                if DEBUG: _logger.debug("   - removed from networks: %r", dnet)
-            if dnet in router_info.dnets:
-                router_info.dnets.remove(dnet)
-                if DEBUG: _logger.debug("   - removed from router_info: %r", dnet)
+            del self.networks[dnet]
+        if DEBUG: _logger.debug("   - removed: %r", dnets)
 
         # see if we still care
         if not router_info.dnets:
             if DEBUG: _logger.debug("    - no longer care about this router")
-            del self.routers[key]
+            self._remove_router(router_info)
+
+    def clear(self):
+        """Forget all the routers."""
+        for router_info in list(self.routers.values()):
+            self._remove_router(router_info)
+
+    def _remove_router(self, router_info):
+        """Remove a router and the networks that are still reached through it."""
+        snet, address = router_info.snet, router_info.address
+        del self.routers[(snet, address)]
+        for dnet in router_info.dnets:
+            if self.networks.get(dnet) is router_info:
+                del self.networks[dnet]
+        router_info.dnets.clear()
+        for index, key, subkey in ((self.snets, snet, address), (self.addresses, address, snet)):
+            entries = index[key]
+            del entries[subkey]
+            if not entries:
+                del index[key]
+        if not self.routers and self._aging_handle:
+            self._aging_handle.cancel()
+            self._aging_handle = None
+
+    def _schedule_aging(self):
+        if self.max_age is None or self._aging_handle:
+            return
+        self._aging_handle = call_later_coarse(self.max_age / 4, self._age_routers)
+
+    def _age_routers(self):
+        """Drop the routers that have not been heard from for max_age seconds."""
+        self._aging_handle = None
+        cutoff = time.monotonic() - self.max_age
+        for router_info in [r for r in self.routers.values() if r.last_seen < cutoff]:
+            if DEBUG: _logger.debug("_age_routers %r %r expired", router_info.snet, router_info.address)
+            self._remove_router(router_info)
+        if self.routers:
+            self._schedule_aging()
 
 
 class NetworkAdapter(Client, DebugContents):
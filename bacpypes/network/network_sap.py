@@ -1,25 +1,38 @@
 
 import logging
-from copy import deepcopy as _deepcopy
+from copy import copy as _copy
 
 from .netservice import NetworkAdapter, RouterInfo, RouterInfoCache
-from ..debugging import DebugContents
+from ..core import deferred
+from ..debugging import DEBUG, DebugContents
 from ..errors import ConfigurationError
 from ..comm import Server, bind, ServiceAccessPoint
 from ..link import Address, LocalBroadcast, LocalStation, RemoteStation
 from .npdu import NPDU, WhoIsRouterToNetwork, npdu_types
-from ..apdu import APDU as _APDU
+from .pending_routes import PendingRoutes
+from ..apdu import APDU as _APDU, AbortPDU, AbortReason
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['NetworkServiceAccessPoint']
 
 
+def _forward_copy(npdu):
+    """
+    Return a copy of an NPDU for forwarding.  Only the NPCI fields are
+    rewritten on the way through a router and the addresses are immutable, so
+    a shallow copy that shares the payload buffer is enough.  A mutable
+    payload is frozen into bytes first so the copies cannot disturb each other.
+    """
+    if not isinstance(npdu._pdu_data, bytes):
+        npdu.pduData = bytes(npdu.pduData)
+    return _copy(npdu)
+
+
 class NetworkServiceAccessPoint(ServiceAccessPoint, Server, DebugContents):
 
     DEBUG_contents = ('adapters++', 'routers++', 'networks+', 'localAdapter-', 'localAddress')
 
-    def __init__(self, routerInfoCache=None, sap=None, sid=None):
+    def __init__(self, routerInfoCache=None, sap=None, sid=None, pending_routes=None):
         if DEBUG: _logger.debug("__init__ sap=%r sid=%r", sap, sid)
         ServiceAccessPoint.__init__(self, sap)
         Server.__init__(self, sid)
@@ -30,8 +43,9 @@ class NetworkServiceAccessPoint(ServiceAccessPoint, Server, DebugContents):
         # use the provided cache or make a default one
         self.router_info_cache = routerInfoCache or RouterInfoCache()
 
-        # map to a list of application layer packets waiting for a path
-        self.pending_nets = {}
+        # packets waiting for a path, the keyword arguments of PendingRoutes
+        # can be given to change the limits
+        self.pending_routes = PendingRoutes(self.who_is_router, self.drop_npdu, **(pending_routes or {}))
 
         # these are set when bind() is called
         self.local_adapter = None
@@ -80,8 +94,8 @@ class NetworkServiceAccessPoint(ServiceAccessPoint, Server, DebugContents):
         """Delete references to routers/networks."""
         if DEBUG: _logger.debug("delete_router_references %r %r %r", snet, address, dnets)
 
-        # see if we have an adapter for the snet
-        if snet not in self.adapters:
+        # see if we have an adapter for the snet, None is the router on all of them
+        if (snet is not None) and (snet not in self.adapters):
             raise RuntimeError("no adapter for network: %d" % (snet,))
 
         # pass this along to the cache
@@ -155,9 +169,9 @@ class NetworkServiceAccessPoint(ServiceAccessPoint, Server, DebugContents):
         npdu.npduDADR = apdu.pduDestination
 
         # we might already be waiting for a path for this network
-        if dnet in self.pending_nets:
+        if dnet in self.pending_routes:
             if DEBUG: _logger.debug("    - already waiting for path")
-            self.pending_nets[dnet].append(npdu)
+            self.pending_routes.append(dnet, npdu)
             return
 
         # check cache for an available path
@@ -183,20 +197,49 @@ class NetworkServiceAccessPoint(ServiceAccessPoint, Server, DebugContents):
 
         if DEBUG: _logger.debug("    - no known path to network")
 
-        # add it to the list of packets waiting for the network
-        net_list = self.pending_nets.get(dnet, None)
-        if net_list is None:
-            net_list = self.pending_nets[dnet] = []
-        net_list.append(npdu)
+        # wait for the network, this looks for it or fails right away if
+        # it was recently found to be unreachable
+        self.pending_routes.append(dnet, npdu)
+
+    def who_is_router(self, dnet, adapter=None):
+        """Send a Who-Is-Router-To-Network request to all of the adapters except the given one."""
+        if DEBUG: _logger.debug("who_is_router %r adapter=%r", dnet, adapter)
 
-        # build a request for the network and send it to all of the adapters
         xnpdu = WhoIsRouterToNetwork(dnet)
         xnpdu.pduDestination = LocalBroadcast()
 
         # send it to all of the connected adapters
-        for adapter in self.adapters.values():
+        for xadapter in self.adapters.values():
+            # skip the horse it rode in on
+            if xadapter is adapter:
+                continue
             ### make sure the adapter is OK
-            self.sap_indication(adapter, xnpdu)
+            self.sap_indication(xadapter, xnpdu)
+
+    def drop_npdu(self, npdu):
+        """
+        A packet waiting for a path is dropped.  If it is a confirmed request
+        from this device an abort is passed up so the transaction fails now
+        rather than when it runs out of retries.
+        """
+        if DEBUG: _logger.debug("drop_npdu %r", npdu)
+
+        # forwarded packets have a source network, application layer only
+        if npdu.npduSADR or (npdu.npduNetMessage is not None) or (not npdu.remaining()):
+            return
+        data = npdu.pduData
+        if ((data[0] >> 4) != 0) or (len(data) < 3):
+            return
+
+        # build the abort as if the server sent it
+        abort = AbortPDU(True, data[2], AbortReason.other)
+        apdu = _APDU(user_data=npdu.pduUserData)
+        abort.encode(apdu)
+        apdu.pduSource = npdu.npduDADR
+        apdu.pduDestination = self.local_address
+
+        # not in the middle of the request
+        deferred(self.response, apdu)
 
     def process_npdu(self, adapter, npdu):
         if DEBUG: _logger.debug("process_npdu %r %r", adapter, npdu)
@@ -227,6 +270,9 @@ class NetworkServiceAccessPoint(ServiceAccessPoint, Server, DebugContents):
 
                     # pass this new path along to the cache
                     self.router_info_cache.update_router_info(adapter.adapterNet, npdu.pduSource, [snet])
+                else:
+                    # the router is still there
+                    self.router_info_cache.refresh_router_info(router_snet, router_address)
             else:
                 if DEBUG: _logger.debug("    - new path")
 
@@ -284,9 +330,10 @@ class NetworkServiceAccessPoint(ServiceAccessPoint, Server, DebugContents):
             if processLocally and self.serverPeer:
                 if DEBUG: _logger.debug("    - processing APDU locally")
 
-                # decode as a generic APDU
+                # decode as a generic APDU, a shallow copy is enough because
+                # decoding only moves the read cursor of the copy
                 apdu = _APDU(user_data=npdu.pduUserData)
-                apdu.decode(_deepcopy(npdu))
+                apdu.decode(_copy(npdu))
                 if DEBUG: _logger.debug("    - apdu: %r", apdu)
 
                 # see if it needs to look routed
@@ -337,7 +384,7 @@ class NetworkServiceAccessPoint(ServiceAccessPoint, Server, DebugContents):
 
                 # do a deeper decode of the NPDU
                 xpdu = npdu_types[npdu.npduNetMessage](user_data=npdu.pduUserData)
-                xpdu.decode(_deepcopy(npdu))
+                xpdu.decode(_copy(npdu))
 
                 # pass to the service element
                 self.sap_request(adapter, xpdu)
@@ -357,8 +404,9 @@ class NetworkServiceAccessPoint(ServiceAccessPoint, Server, DebugContents):
             if DEBUG: _logger.debug("    - no more hops")
             return
 
-        # build a new NPDU to send to other adapters
-        newpdu = _deepcopy(npdu)
+        # build a new NPDU to send to other adapters, the adapters only
+        # encode it so the same one can go to each of them
+        newpdu = _forward_copy(npdu)
 
         # clear out the source and destination
         newpdu.pduSource = None
@@ -380,7 +428,7 @@ class NetworkServiceAccessPoint(ServiceAccessPoint, Server, DebugContents):
 
             for xadapter in self.adapters.values():
                 if (xadapter is not adapter):
-                    xadapter.process_npdu(_deepcopy(newpdu))
+                    xadapter.process_npdu(newpdu)
             return
 
         if (npdu.npduDADR.addrType == Address.remoteBroadcastAddr) \
@@ -406,7 +454,7 @@ class NetworkServiceAccessPoint(ServiceAccessPoint, Server, DebugContents):
                 newpdu.npduDADR = None
 
                 # send the packet downstream
-                xadapter.process_npdu(_deepcopy(newpdu))
+                xadapter.process_npdu(newpdu)
                 return
 
             # see if there is routing information for this destination network
@@ -429,26 +477,14 @@ class NetworkServiceAccessPoint(ServiceAccessPoint, Server, DebugContents):
                 newpdu.pduDestination = router_address
 
                 # send the packet downstream
-                xadapter.process_npdu(_deepcopy(newpdu))
+                xadapter.process_npdu(newpdu)
                 return
 
             if DEBUG: _logger.debug("    - no router info found")
 
-            ### queue this message for reprocessing when the response comes back
-
-            # try to find a path to the network
-            xnpdu = WhoIsRouterToNetwork(dnet)
-            xnpdu.pduDestination = LocalBroadcast()
-
-            # send it to all of the connected adapters
-            for xadapter in self.adapters.values():
-                # skip the horse it rode in on
-                if (xadapter is adapter):
-                    continue
-
-                # pass this along as if it came from the NSE
-                self.sap_indication(xadapter, xnpdu)
-
+            # wait for a path to the network
+            newpdu.pduDestination = None
+            self.pending_routes.append(dnet, newpdu, adapter)
             return
 
         if DEBUG: _logger.debug("    - bad DADR: %r", npdu.npduDADR)
@@ -1,9 +1,8 @@
 import logging
 from ..errors import DecodingError
-from ..debugging import DebugContents, btox
+from ..debugging import DEBUG, DebugContents, btox
 from ..link import Address, PCI, GlobalBroadcast, RemoteBroadcast, RemoteStation
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['NPCI']
 
@@ -114,7 +113,7 @@ class NPCI(PCI, DebugContents):
         if DEBUG: _logger.debug('decode %r', pdu)
         PCI.update(self, pdu)
         # check the length
-        if len(pdu.pduData) < 2:
+        if pdu.remaining() < 2:
             raise DecodingError('invalid length')
         # only version 1 messages supported
         self.npduVersion = pdu.get()
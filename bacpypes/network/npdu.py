@@ -1,7 +1,7 @@
 #!/usr/bin/python
 
 import logging
-from ..debugging import DebugContents
+from ..debugging import DEBUG, DebugContents
 from .npci import NPCI
 from ..comm import PDUData
 
@@ -30,14 +30,14 @@ class NPDU(NPCI, PDUData):
 
     def decode(self, pdu):
         NPCI.decode(self, pdu)
-        self.pduData = pdu.get_data(len(pdu.pduData))
+        self.share_data(pdu)
 
     def npdu_contents(self, use_dict=None, as_class=dict):
         return PDUData.pdudata_contents(self, use_dict=use_dict, as_class=as_class)
 
     def dict_contents(self, use_dict=None, as_class=dict):
         """Return the contents of an object as a dict."""
-        _logger.debug('dict_contents use_dict=%r as_class=%r', use_dict, as_class)
+        if DEBUG: _logger.debug('dict_contents use_dict=%r as_class=%r', use_dict, as_class)
         # make/extend the dictionary of content
         if use_dict is None:
             use_dict = as_class()
@@ -50,7 +50,7 @@ class NPDU(NPCI, PDUData):
 
 def key_value_contents(use_dict=None, as_class=dict, key_values=()):
     """Return the contents of an object as a dict."""
-    _logger.debug('key_value_contents use_dict=%r as_class=%r key_values=%r', use_dict, as_class, key_values)
+    if DEBUG: _logger.debug('key_value_contents use_dict=%r as_class=%r key_values=%r', use_dict, as_class, key_values)
     # make/extend the dictionary of content
     if use_dict is None:
         use_dict = as_class()
@@ -81,7 +81,7 @@ class WhoIsRouterToNetwork(NPDU):
 
     def decode(self, npdu):
         NPCI.update(self, npdu)
-        if npdu.pduData:
+        if npdu.remaining():
             self.wirtnNetwork = npdu.get_short()
         else:
             self.wirtnNetwork = None
@@ -117,7 +117,7 @@ class IAmRouterToNetwork(NPDU):
     def decode(self, npdu):
         NPCI.update(self, npdu)
         self.iartnNetworkList = []
-        while npdu.pduData:
+        while npdu.remaining():
             self.iartnNetworkList.append(npdu.get_short())
 
     def npdu_contents(self, use_dict=None, as_class=dict):
@@ -221,7 +221,7 @@ class RouterBusyToNetwork(NPDU):
     def decode(self, npdu):
         NPCI.update(self, npdu)
         self.rbtnNetworkList = []
-        while npdu.pduData:
+        while npdu.remaining():
             self.rbtnNetworkList.append(npdu.get_short())
 
     def npdu_contents(self, use_dict=None, as_class=dict):
@@ -255,7 +255,7 @@ class RouterAvailableToNetwork(NPDU):
     def decode(self, npdu):
         NPCI.update(self, npdu)
         self.ratnNetworkList = []
-        while npdu.pduData:
+        while npdu.remaining():
             self.ratnNetworkList.append(npdu.get_short())
 
     def npdu_contents(self, use_dict=None, as_class=dict):
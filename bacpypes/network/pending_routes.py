@@ -0,0 +1,156 @@
+#!/usr/bin/python
+
+"""
+Pending Routes
+"""
+
+import time
+import logging
+from collections import deque
+
+from ..debugging import DEBUG
+from ..task import call_later_coarse
+
+_logger = logging.getLogger(__name__)
+__all__ = ['PendingRoutes']
+
+
+class _PendingNetwork:
+    """The NPDUs waiting for a path to one network and the discovery timer."""
+
+    __slots__ = ('npdus', 'next_request', 'timer', 'adapter')
+
+    def __init__(self, adapter=None):
+        self.npdus = deque()        # (time queued, npdu)
+        self.next_request = None    # time of the next Who-Is-Router-To-Network
+        self.timer = None
+        self.adapter = adapter      # the NPDUs came in on this adapter, None if asked on all
+
+
+class PendingRoutes:
+    """
+    NPDUs waiting for a path to their destination network.
+
+    Each network has a queue of at most queue_limit NPDUs, the oldest one is
+    dropped to make room.  When the oldest one has waited max_age seconds no
+    path has turned up, the network is considered unreachable for
+    unreachable_time seconds and everything waiting for it is dropped, as is
+    anything sent to it in the meantime.  The default max_age is less than the
+    default APDU timeout so a request fails before it would be sent again.
+    Every dropped NPDU is passed to the drop function, which the network
+    service access point uses to abort the transaction that sent it.
+
+    While there is something waiting the Who-Is-Router-To-Network requests are
+    repeated with an interval that starts at retry_interval and doubles up to
+    max_retry_interval.  The interval carries over to the next time the same
+    network is looked for and goes back to the start when a path is found.
+    The requests are not sent on the adapter the waiting NPDUs arrived on, the
+    same as a router looking for a network on behalf of another one.
+    """
+
+    def __init__(self, who_is_router, drop, queue_limit=16, max_age=2.0, unreachable_time=10.0,
+                 retry_interval=1.0, max_retry_interval=60.0):
+        if DEBUG: _logger.debug("__init__ queue_limit=%r max_age=%r unreachable_time=%r", queue_limit, max_age, unreachable_time)
+        self.who_is_router = who_is_router
+        self.drop = drop
+        self.queue_limit = queue_limit
+        self.max_age = max_age
+        self.unreachable_time = unreachable_time
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+
+        self.networks = {}          # dnet -> _PendingNetwork
+        self.intervals = {}         # dnet -> current Who-Is-Router-To-Network interval
+        self.unreachable = {}       # dnet -> time it can be tried again
+
+    def __contains__(self, dnet):
+        return dnet in self.networks
+
+    def is_unreachable(self, dnet):
+        """Return True if a recent search for the network came up empty."""
+        until = self.unreachable.get(dnet)
+        if until is None:
+            return False
+        if time.monotonic() < until:
+            return True
+        del self.unreachable[dnet]
+        return False
+
+    def append(self, dnet, npdu, adapter=None):
+        """
+        Queue an NPDU until there is a path to dnet, start looking if this is
+        the first one.  The adapter is the one a forwarded NPDU arrived on.
+        """
+        if DEBUG: _logger.debug("append %r %r adapter=%r", dnet, npdu, adapter)
+        if self.is_unreachable(dnet):
+            if DEBUG: _logger.debug("    - unreachable")
+            self.drop(npdu)
+            return
+
+        now = time.monotonic()
+        pending = self.networks.get(dnet)
+        if pending is None:
+            pending = self.networks[dnet] = _PendingNetwork(adapter)
+            pending.next_request = now
+        else:
+            # waiting for NPDUs from more than one place, ask everywhere
+            if pending.adapter is not adapter:
+                pending.adapter = None
+            if len(pending.npdus) >= self.queue_limit:
+                if DEBUG: _logger.debug("    - queue full")
+                self.drop(pending.npdus.popleft()[1])
+        pending.npdus.append((now, npdu))
+
+        if pending.next_request <= now:
+            self._request(dnet, pending, now)
+        if pending.timer is None:
+            self._schedule(dnet, pending)
+
+    def pop(self, dnet):
+        """A path to dnet has been found, return the NPDUs that were waiting for it."""
+        self.intervals.pop(dnet, None)
+        self.unreachable.pop(dnet, None)
+        pending = self.networks.pop(dnet, None)
+        if pending is None:
+            return []
+        if pending.timer:
+            pending.timer.cancel()
+        return [npdu for _, npdu in pending.npdus]
+
+    def clear(self):
+        """Drop everything, stop looking."""
+        for dnet in list(self.networks):
+            for npdu in self.pop(dnet):
+                self.drop(npdu)
+        self.unreachable.clear()
+
+    def _request(self, dnet, pending, now):
+        interval = self.intervals.get(dnet, self.retry_interval)
+        self.intervals[dnet] = min(interval * 2, self.max_retry_interval)
+        pending.next_request = now + interval
+        if DEBUG: _logger.debug("    - who is router to %r, next in %r", dnet, interval)
+        self.who_is_router(dnet, pending.adapter)
+
+    def _schedule(self, dnet, pending):
+        when = min(pending.next_request, pending.npdus[0][0] + self.max_age)
+        pending.timer = call_later_coarse(max(when - time.monotonic(), 0), self._check, dnet)
+
+    def _check(self, dnet):
+        if DEBUG: _logger.debug("_check %r", dnet)
+        pending = self.networks[dnet]
+        pending.timer = None
+        now = time.monotonic()
+
+        # waited long enough, no path was found
+        npdus = pending.npdus
+        if now - npdus[0][0] >= self.max_age:
+            if DEBUG: _logger.debug("    - %r unreachable", dnet)
+            del self.networks[dnet]
+            self.unreachable[dnet] = now + self.unreachable_time
+            for _, npdu in npdus:
+                self.drop(npdu)
+            return
+
+        if pending.next_request <= now:
+            self._request(dnet, pending, now)
+        self._schedule(dnet, pending)
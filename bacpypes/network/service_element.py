@@ -4,8 +4,8 @@ import logging
 from ..comm import ApplicationServiceElement
 from ..link import LocalBroadcast, RemoteStation
 from .npdu import IAmRouterToNetwork, NPDU, WhoIsRouterToNetwork, npdu_types
+from ..debugging import DEBUG
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['NetworkServiceElement']
 
@@ -158,13 +158,10 @@ class NetworkServiceElement(ApplicationServiceElement):
 
         # look for pending NPDUs for the networks
         for dnet in npdu.iartnNetworkList:
-            pending_npdus = sap.pending_nets.get(dnet, None)
-            if pending_npdus is not None:
+            pending_npdus = sap.pending_routes.pop(dnet)
+            if pending_npdus:
                 if DEBUG: _logger.debug("    - %d pending to %r", len(pending_npdus), dnet)
 
-                # delete the references
-                del sap.pending_nets[dnet]
-
                 # now reprocess them
                 for pending_npdu in pending_npdus:
                     if DEBUG: _logger.debug("    - sending %s", repr(pending_npdu))
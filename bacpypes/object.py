@@ -42,9 +42,9 @@ from .basetypes import AccessCredentialDisable, AccessCredentialDisableReason, \
     StatusFlags, TimeStamp, VTClass, VTSession, WriteStatus
 from .apdu import EventNotificationParameters, ReadAccessSpecification, \
     ReadAccessResult
+from .debugging import DEBUG
 
 # some debugging
-DEBUG = True
 _logger = logging.getLogger(__name__)
 
 
@@ -17,6 +17,46 @@ from .comm import PDUData
 _debug = 0
 _log = logging.getLogger(__name__)
 
+_short_struct = struct.Struct('>H')
+_long_struct = struct.Struct('>L')
+
+
+_tag_class_bits = {
+    1: 0x08,    # Tag.contextTagClass
+    2: 0x0E,    # Tag.openingTagClass
+    3: 0x0F,    # Tag.closingTagClass
+}
+
+
+def _tag_header(tclass, tnum, lvt):
+    """Return the encoded tag octets that come before the tag data."""
+    # check for special encoding
+    data = _tag_class_bits.get(tclass, 0x00)
+    # encode the tag number part
+    if tnum < 15:
+        data += (tnum << 4)
+    else:
+        data += 0xF0
+    # encode the length/value/type part
+    if lvt < 5:
+        header = bytearray((data + lvt,))
+    else:
+        header = bytearray((data + 0x05,))
+    # the extended tag number
+    if tnum >= 15:
+        header.append(tnum)
+    # really short lengths are already done
+    if lvt >= 5:
+        if lvt <= 253:
+            header.append(lvt)
+        elif lvt <= 65535:
+            header.append(254)
+            header += _short_struct.pack(lvt)
+        else:
+            header.append(255)
+            header += _long_struct.pack(lvt)
+    return header
+
 
 class Tag(object):
     applicationTagClass = 0
@@ -88,42 +128,8 @@ class Tag(object):
 
     def encode(self, pdu):
         """Encode a tag on the end of the PDU."""
-        # check for special encoding
-        if self.tagClass == Tag.contextTagClass:
-            data = 0x08
-        elif self.tagClass == Tag.openingTagClass:
-            data = 0x0E
-        elif self.tagClass == Tag.closingTagClass:
-            data = 0x0F
-        else:
-            data = 0x00
-        # encode the tag number part
-        if (self.tagNumber < 15):
-            data += (self.tagNumber << 4)
-        else:
-            data += 0xF0
-        # encode the length/value/type part
-        if self.tagLVT < 5:
-            data += self.tagLVT
-        else:
-            data += 0x05
-        # save this and the extended tag value
-        pdu.put(data)
-        if self.tagNumber >= 15:
-            pdu.put(self.tagNumber)
-        # really short lengths are already done
-        if self.tagLVT >= 5:
-            if self.tagLVT <= 253:
-                pdu.put(self.tagLVT)
-            elif self.tagLVT <= 65535:
-                pdu.put(254)
-                pdu.put_short(self.tagLVT)
-            else:
-                pdu.put(255)
-                pdu.put_long(self.tagLVT)
-
-        # now put the data
-        pdu.put_data(self.tagData)
+        # build the header and the data, then put it all at once
+        pdu.put_data(_tag_header(self.tagClass, self.tagNumber, self.tagLVT) + self.tagData)
 
     def decode(self, pdu):
         """Decode a tag from the PDU."""
@@ -304,56 +310,141 @@ class ClosingTag(Tag):
 
 
 class TagList(object):
+    """
+    A list of tags that is read from the front.  The tags stay where they are
+    and a cursor marks the next one to read so Peek, Pop and push take the
+    same time no matter how long the list is.  The position of the matching
+    closing tag of each opening tag is found once, when it is first needed,
+    so a context group can be stepped over without looking at its contents.
+    """
 
     def __init__(self, arg=None):
-        self.tagList = []
+        self._tags = []
+        self._index = 0
+        # opening tag position -> closing tag position, built on demand
+        self._matches = None
         if isinstance(arg, list):
-            self.tagList = arg
+            self._tags = arg
         elif isinstance(arg, TagList):
-            self.tagList = arg.tagList[:]
+            self._tags = arg._tags[arg._index:]
         elif isinstance(arg, PDUData):
             self.decode(arg)
 
+    @property
+    def tagList(self):
+        """The tags that have not been read, a copy once reading has started."""
+        if self._index:
+            return self._tags[self._index:]
+        return self._tags
+
+    @tagList.setter
+    def tagList(self, tags):
+        self._tags = tags
+        self._index = 0
+        self._matches = None
+
     def append(self, tag):
-        self.tagList.append(tag)
+        self._tags.append(tag)
+        self._matches = None
 
     def extend(self, taglist):
-        self.tagList.extend(taglist)
+        self._tags.extend(taglist)
+        self._matches = None
 
     def __getitem__(self, item):
-        return self.tagList[item]
+        if isinstance(item, slice):
+            return self._tags[self._index:][item]
+        if item >= 0:
+            item += self._index
+            if item >= len(self._tags):
+                raise IndexError("tag index out of range")
+            return self._tags[item]
+        if -item > len(self._tags) - self._index:
+            raise IndexError("tag index out of range")
+        return self._tags[item]
+
+    def __iter__(self):
+        return iter(self._tags[self._index:])
 
     def __len__(self):
-        return len(self.tagList)
+        return len(self._tags) - self._index
 
     def Peek(self):
         """Return the tag at the front of the list."""
-        if self.tagList:
-            tag = self.tagList[0]
-        else:
-            tag = None
-        return tag
+        if self._index < len(self._tags):
+            return self._tags[self._index]
+        return None
 
     def push(self, tag):
         """Return a tag back to the front of the list."""
-        self.tagList = [tag] + self.tagList
+        if self._index and (self._tags[self._index - 1] is tag):
+            self._index -= 1
+        else:
+            self._tags.insert(self._index, tag)
+            self._matches = None
 
     def Pop(self):
         """Remove the tag from the front of the list and return it."""
-        if self.tagList:
-            tag = self.tagList[0]
-            del self.tagList[0]
-        else:
-            tag = None
+        if self._index < len(self._tags):
+            tag = self._tags[self._index]
+            self._index += 1
+            return tag
+        return None
 
-        return tag
+    def mark(self):
+        """Return the read position, to give to reset() to read the tags
+        again after a failed attempt to decode them."""
+        return self._index
+
+    def reset(self, mark):
+        """Go back to a read position returned by mark()."""
+        self._index = mark
+
+    def _get_matches(self):
+        """Return the position of the closing tag for each opening tag, an
+        opening tag without one is not included."""
+        if self._matches is None:
+            matches = {}
+            stack = []
+            for i, tag in enumerate(self._tags):
+                if tag.tagClass == Tag.openingTagClass:
+                    stack.append(i)
+                elif (tag.tagClass == Tag.closingTagClass) and stack:
+                    matches[stack.pop()] = i
+            self._matches = matches
+        return self._matches
+
+    def pop_group(self):
+        """Remove and return the list of tags up to the closing tag of the
+        group being read, or up to the end if there isn't one, nested groups
+        are taken whole."""
+        tags = self._tags
+        start = i = self._index
+        end = len(tags)
+        matches = None
+        while i < end:
+            tag_class = tags[i].tagClass
+            if tag_class == Tag.openingTagClass:
+                if matches is None:
+                    matches = self._get_matches()
+                close = matches.get(i, None)
+                if close is None:
+                    raise InvalidTag("mismatched open/close tags")
+                i = close + 1
+            elif tag_class == Tag.closingTagClass:
+                break
+            else:
+                i += 1
+        self._index = i
+        return tags[start:i]
 
     def get_context(self, context):
         """Return a tag or a list of tags context encoded."""
-        # forward pass
-        i = 0
-        while i < len(self.tagList):
-            tag = self.tagList[i]
+        tags = self._tags
+        i = self._index
+        end = len(tags)
+        while i < end:
+            tag = tags[i]
             # skip application stuff
             if tag.tagClass == Tag.applicationTagClass:
                 pass
@@ -363,26 +454,14 @@ class TagList(object):
                     return tag
             # check for context encoded group
             elif tag.tagClass == Tag.openingTagClass:
-                keeper = tag.tagNumber == context
-                rslt = []
-                i += 1
-                lvl = 0
-                while i < len(self.tagList):
-                    tag = self.tagList[i]
-                    if tag.tagClass == Tag.openingTagClass:
-                        lvl += 1
-                    elif tag.tagClass == Tag.closingTagClass:
-                        lvl -= 1
-                        if lvl < 0:
-                            break
-                    rslt.append(tag)
-                    i += 1
-                # make sure everything balances
-                if lvl >= 0:
+                close = self._get_matches().get(i, None)
+                if close is None:
                     raise InvalidTag("mismatched open/close tags")
                 # get everything we need?
-                if keeper:
-                    return TagList(rslt)
+                if tag.tagNumber == context:
+                    return TagList(tags[i + 1:close])
+                # skip over the group
+                i = close
             else:
                 raise InvalidTag("unexpected tag")
             # try the next tag
@@ -392,16 +471,22 @@ class TagList(object):
 
     def encode(self, pdu):
         """encode the tag list into a PDU."""
-        for tag in self.tagList:
+        for tag in self._tags[self._index:]:
             tag.encode(pdu)
 
     def decode(self, pdu):
         """decode the tags from a PDU."""
-        while pdu.pduData:
-            self.tagList.append(Tag(pdu))
+        data = pdu.get_remaining()
+        end = len(data)
+        offset = 0
+        append = self._tags.append
+        while offset < end:
+            tag, offset = _decode_tag(data, offset)
+            append(tag)
+        self._matches = None
 
     def debug_contents(self, indent=1, file=sys.stdout, _ids=None):
-        for tag in self.tagList:
+        for tag in self._tags[self._index:]:
             tag.debug_contents(indent + 1, file, _ids)
 
 
@@ -1588,3 +1673,290 @@ Tag._app_tag_class = \
         , BitString, Enumerated, Date, Time
         , ObjectIdentifier, None, None, None
      ]
+
+
+#
+#   Direct Codecs
+#
+#   The atomic classes above cooperate with a Tag to encode and decode a
+#   value, which means building a helper object and a tag for every value.
+#   For the common datatypes these functions go straight between a plain
+#   Python value and the tag data.  They produce exactly the same octets as
+#   the encode() and decode() methods, and raise the same exceptions for
+#   invalid tag data.  An encoder returns None when it is given a value it
+#   does not handle, like an instance of the class, and the caller falls back
+#   to the helper.
+#
+
+def _xlate_table(cls):
+    """Return the translate table of an enumeration class."""
+    table = cls.__dict__.get('_xlate_table')
+    if table is None:
+        table = expand_enumerations(cls)._xlate_table
+    return table
+
+
+def _boolean_encode(cls, value):
+    if type(value) is not bool:
+        return None
+    # context booleans have value in data
+    return b'\x01' if value else b'\x00'
+
+
+def _boolean_decode(cls, tag):
+    if tag.tagClass == Tag.applicationTagClass:
+        value = tag.tagLVT
+    elif len(tag.tagData) == 1:
+        value = tag.tagData[0]
+    else:
+        return Boolean(tag.context_to_app(Tag.booleanAppTag)).value
+    if value > 1:
+        raise InvalidTag("invalid tag value")
+    return bool(value)
+
+
+def _unsigned_encode(cls, value):
+    if (type(value) is not int) or (value < 0) or (value > 0xFFFFFFFF):
+        return None
+    return value.to_bytes(((value.bit_length() + 7) >> 3) or 1, 'big')
+
+
+def _unsigned_decode(cls, tag):
+    if len(tag.tagData) == 0:
+        raise InvalidTag("invalid tag length")
+    return int.from_bytes(tag.tagData, 'big')
+
+
+def _integer_encode(cls, value):
+    if (type(value) is not int) or (value < -0x80000000) or (value > 0x7FFFFFFF):
+        return None
+    # the smallest number of octets, including the sign bit
+    return value.to_bytes(((value + (value < 0)).bit_length() >> 3) + 1, 'big', signed=True)
+
+
+def _integer_decode(cls, tag):
+    if len(tag.tagData) == 0:
+        raise InvalidTag("invalid tag length")
+    return int.from_bytes(tag.tagData, 'big', signed=True)
+
+
+_real_struct = struct.Struct('>f')
+
+
+def _real_encode(cls, value):
+    if type(value) is float:
+        return _real_struct.pack(value)
+    elif type(value) is int:
+        return _real_struct.pack(float(value))
+    return None
+
+
+def _real_decode(cls, tag):
+    if len(tag.tagData) != 4:
+        raise InvalidTag("invalid tag length")
+    return _real_struct.unpack(tag.tagData)[0]
+
+
+def _character_string_encode(cls, value):
+    if type(value) is not str:
+        return None
+    return b'\x00' + value.encode('utf-8')
+
+
+def _character_string_decode(cls, tag):
+    tag_data = tag.tagData
+    if len(tag_data) == 0:
+        raise InvalidTag("invalid tag length")
+    if tag_data[0] == 0:
+        return tag_data[1:].decode('utf-8')
+    # let the class sort out the other encodings
+    return CharacterString(ApplicationTag(Tag.characterStringAppTag, tag_data)).value
+
+
+def _enumerated_encode(cls, value):
+    if type(value) is str:
+        value = _xlate_table(cls).get(value)
+        if type(value) is not int:
+            return None
+    elif type(value) is not int:
+        return None
+    if (value < 0) or (value > 0xFFFFFFFF):
+        return None
+    return value.to_bytes(((value.bit_length() + 7) >> 3) or 1, 'big')
+
+
+def _enumerated_decode(cls, tag):
+    if len(tag.tagData) == 0:
+        raise InvalidTag("invalid tag length")
+    value = int.from_bytes(tag.tagData, 'big')
+    # translate to a string if possible
+    return _xlate_table(cls).get(value, value)
+
+
+def _object_identifier_encode(cls, value):
+    if (type(value) is not tuple) or (len(value) != 2):
+        return None
+    obj_type, obj_instance = value
+    if type(obj_type) is str:
+        obj_type = _xlate_table(cls.objectTypeClass).get(obj_type)
+    if (type(obj_type) is not int) or (obj_type < 0) or (obj_type > 0x03FF):
+        return None
+    if (type(obj_instance) is not int) or (obj_instance < 0) \
+            or (obj_instance > ObjectIdentifier.maximum_instance_number):
+        return None
+    return _long_struct.pack((obj_type << 22) + obj_instance)
+
+
+def _object_identifier_decode(cls, tag):
+    if len(tag.tagData) != 4:
+        raise InvalidTag("invalid tag length")
+    value = _long_struct.unpack(tag.tagData)[0]
+    # try and make the type pretty
+    obj_type = (value >> 22) & 0x03FF
+    obj_type = _xlate_table(cls.objectTypeClass).get(obj_type) or obj_type
+    return (obj_type, value & 0x003FFFFF)
+
+
+_direct_codecs = (
+    (Boolean, _boolean_encode, _boolean_decode),
+    (Unsigned, _unsigned_encode, _unsigned_decode),
+    (Integer, _integer_encode, _integer_decode),
+    (Real, _real_encode, _real_decode),
+    (CharacterString, _character_string_encode, _character_string_decode),
+    (Enumerated, _enumerated_encode, _enumerated_decode),
+    (ObjectIdentifier, _object_identifier_encode, _object_identifier_decode),
+)
+
+# classes that have been checked and their codec, or None
+_direct_codec_cache = {}
+
+
+def direct_codec(cls):
+    """Return an (encode, decode) pair of functions for an atomic class, or
+    None if the class has no direct codec.  The encoder is called with the
+    class and a value and returns the tag data or None, the decoder is called
+    with the class and an application or context tag for the class and
+    returns the value.  Subclasses that change how values are constructed,
+    encoded or decoded do not get one."""
+    try:
+        return _direct_codec_cache[cls]
+    except KeyError:
+        pass
+    codec = None
+    for base, encode, decode in _direct_codecs:
+        if issubclass(cls, base):
+            if (cls.__init__ is base.__init__) and (cls.encode is base.encode) and (cls.decode is base.decode):
+                codec = (encode, decode)
+            break
+    _direct_codec_cache[cls] = codec
+    return codec
+
+
+def _new_tag(tclass, tnum, tlvt, tdata):
+    """Return a new tag without the argument checks done by the constructor."""
+    tag = Tag.__new__(Tag)
+    tag.tagClass = tclass
+    tag.tagNumber = tnum
+    tag.tagLVT = tlvt
+    tag.tagData = tdata
+    return tag
+
+
+def direct_tag(tclass, tnum, tdata):
+    """Return a new application or context tag for the tag data returned by
+    a direct encoder."""
+    if (tclass == Tag.applicationTagClass) and (tnum == Tag.booleanAppTag):
+        # application tagged boolean has its value in the LVT
+        return _new_tag(tclass, tnum, tdata[0], b'')
+    return _new_tag(tclass, tnum, len(tdata), tdata)
+
+
+def decode_tag_header(data, offset):
+    """Decode the header of a tag from a buffer at an offset and return the
+    tag class, tag number, LVT and the offset of the tag data.  The tag data
+    is LVT octets long except for an application tagged boolean, which has
+    its value in the LVT and no data."""
+    try:
+        octet = data[offset]
+        offset += 1
+        # extract the type and the tag number
+        tclass = (octet >> 3) & 0x01
+        tnum = octet >> 4
+        if tnum == 0x0F:
+            tnum = data[offset]
+            offset += 1
+        # extract the length
+        tlvt = octet & 0x07
+        if tlvt == 5:
+            tlvt = data[offset]
+            offset += 1
+            if tlvt == 254:
+                tlvt = _short_struct.unpack_from(data, offset)[0]
+                offset += 2
+            elif tlvt == 255:
+                tlvt = _long_struct.unpack_from(data, offset)[0]
+                offset += 4
+        elif tlvt == 6:
+            tclass = Tag.openingTagClass
+            tlvt = 0
+        elif tlvt == 7:
+            tclass = Tag.closingTagClass
+            tlvt = 0
+    except (IndexError, struct.error):
+        raise InvalidTag("invalid tag encoding")
+    return tclass, tnum, tlvt, offset
+
+
+def _decode_tag(data, offset):
+    """Decode a tag from a buffer at an offset, return the tag and the offset
+    of the octet following it."""
+    tclass, tnum, tlvt, offset = decode_tag_header(data, offset)
+    # application tagged boolean has no more data
+    if (tclass == Tag.applicationTagClass) and (tnum == Tag.booleanAppTag):
+        tdata = b''
+    else:
+        tdata = bytes(data[offset:offset + tlvt])
+        if len(tdata) != tlvt:
+            raise InvalidTag("invalid tag encoding")
+        offset += tlvt
+    return _new_tag(tclass, tnum, tlvt, tdata), offset
+
+
+def encode_tagged(buff, cls, value, context=None):
+    """Append the encoding of a value of an atomic class to a bytearray,
+    application tagged or context tagged when a context is given.  This
+    goes through the helper for classes without a direct codec."""
+    codec = direct_codec(cls)
+    tdata = codec[0](cls, value) if codec else None
+    if tdata is None:
+        tag = Tag()
+        cls(value).encode(tag)
+        if context is not None:
+            tag = tag.app_to_context(context)
+    elif context is None:
+        tag = direct_tag(Tag.applicationTagClass, cls._app_tag, tdata)
+    else:
+        tag = direct_tag(Tag.contextTagClass, context, tdata)
+    buff += _tag_header(tag.tagClass, tag.tagNumber, tag.tagLVT)
+    buff += tag.tagData
+    return buff
+
+
+def decode_tagged(data, offset, cls, context=None):
+    """Decode the value of an atomic class that is application tagged, or
+    context tagged when a context is given, from a buffer at an offset and
+    return the value and the offset of the next tag."""
+    tag, offset = _decode_tag(data, offset)
+    if context is None:
+        if (tag.tagClass != Tag.applicationTagClass) or (tag.tagNumber != cls._app_tag):
+            raise InvalidTag("%s application tag required" % (Tag._app_tag_name[cls._app_tag],))
+    elif (tag.tagClass != Tag.contextTagClass) or (tag.tagNumber != context):
+        raise InvalidTag("context tag %d required" % (context,))
+    codec = direct_codec(cls)
+    if codec:
+        value = codec[1](cls, tag)
+    elif context is None:
+        value = cls(tag).value
+    else:
+        value = cls(tag.context_to_app(cls._app_tag)).value
+    return value, offset
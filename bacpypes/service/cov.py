@@ -5,9 +5,9 @@ Change Of Value Service
 """
 import time
 import logging
-from ..debugging import DebugContents
+from ..debugging import DEBUG, DebugContents
 from ..comm import Capability, IOCB
-from ..task import call_later
+from ..task import call_later_coarse
 from ..basetypes import DeviceAddress, COVSubscription, PropertyValue, \
     Recipient, RecipientProcess, ObjectPropertyReference
 from ..constructeddata import Any, ListOf
@@ -29,34 +29,34 @@ __all__ = [
 class SubscriptionList:
 
     def __init__(self):
-        _logger.debug('__init__')
+        if DEBUG: _logger.debug('__init__')
         self.cov_subscriptions = []
 
     def append(self, cov):
-        _logger.debug('append %r', cov)
+        if DEBUG: _logger.debug('append %r', cov)
         self.cov_subscriptions.append(cov)
 
     def remove(self, cov):
-        _logger.debug('remove %r', cov)
+        if DEBUG: _logger.debug('remove %r', cov)
         self.cov_subscriptions.remove(cov)
 
     def find(self, client_addr, proc_id, obj_id):
-        _logger.debug('find %r %r %r', client_addr, proc_id, obj_id)
+        if DEBUG: _logger.debug('find %r %r %r', client_addr, proc_id, obj_id)
         for cov in self.cov_subscriptions:
             all_equal = (cov.client_addr == client_addr) and \
                         (cov.proc_id == proc_id) and \
                         (cov.obj_id == obj_id)
-            _logger.debug('    - cov, all_equal: %r %r', cov, all_equal)
+            if DEBUG: _logger.debug('    - cov, all_equal: %r %r', cov, all_equal)
             if all_equal:
                 return cov
         return None
 
     def __len__(self):
-        _logger.debug('__len__')
+        if DEBUG: _logger.debug('__len__')
         return len(self.cov_subscriptions)
 
     def __iter__(self):
-        _logger.debug('__iter__')
+        if DEBUG: _logger.debug('__iter__')
         for cov in self.cov_subscriptions:
             yield cov
 
@@ -72,7 +72,7 @@ class Subscription(DebugContents):
     )
 
     def __init__(self, obj_ref, client_addr, proc_id, obj_id, confirmed, lifetime):
-        _logger.debug("__init__ %r %r %r %r %r %r", obj_ref, client_addr, proc_id, obj_id, confirmed, lifetime)
+        if DEBUG: _logger.debug("__init__ %r %r %r %r %r %r", obj_ref, client_addr, proc_id, obj_id, confirmed, lifetime)
         # save the reference to the related object
         self.obj_ref = obj_ref
         # save the parameters
@@ -84,10 +84,10 @@ class Subscription(DebugContents):
         self.timeout_handle = None
         # if lifetime is non-zero, schedule the subscription to expire
         if lifetime != 0:
-            self.timeout_handle = call_later(self.lifetime, self.process_task)
+            self.timeout_handle = call_later_coarse(self.lifetime, self.process_task)
 
     def cancel_subscription(self):
-        _logger.debug("cancel_subscription")
+        if DEBUG: _logger.debug("cancel_subscription")
         # suspend the task
         self.suspend_task()
         # tell the application to cancel us
@@ -96,16 +96,16 @@ class Subscription(DebugContents):
         self.obj_ref = None
 
     def renew_subscription(self, lifetime):
-        _logger.debug("renew_subscription")
+        if DEBUG: _logger.debug("renew_subscription")
         # suspend if scheduled
         if self.timeout_handle:
             self.timeout_handle.cancel()
         # reschedule the task if its not infinite
         if lifetime != 0:
-            self.timeout_handle = call_later(lifetime, self.process_task)
+            self.timeout_handle = call_later_coarse(lifetime, self.process_task)
 
     def process_task(self):
-        _logger.debug("process_task")
+        if DEBUG: _logger.debug("process_task")
         # subscription is canceled
         self.cancel_subscription()
 
@@ -116,7 +116,7 @@ class COVDetection(DetectionAlgorithm):
     monitored_property_reference = None
 
     def __init__(self, obj):
-        _logger.debug("__init__ %r", obj)
+        if DEBUG: _logger.debug("__init__ %r", obj)
         DetectionAlgorithm.__init__(self)
         # keep track of the object
         self.obj = obj
@@ -131,28 +131,28 @@ class COVDetection(DetectionAlgorithm):
         self.cov_subscriptions = SubscriptionList()
 
     def execute(self):
-        _logger.debug("execute")
+        if DEBUG: _logger.debug("execute")
         # something changed, send out the notifications
         self.send_cov_notifications()
 
     def send_cov_notifications(self):
-        _logger.debug("send_cov_notifications")
+        if DEBUG: _logger.debug("send_cov_notifications")
         # check for subscriptions
         if not len(self.cov_subscriptions):
             return
         # get the current time from the task manager
         current_time = time.time()
-        _logger.debug("    - current_time: %r", current_time)
+        if DEBUG: _logger.debug("    - current_time: %r", current_time)
         # create a list of values
         list_of_values = []
         for property_name in self.properties_reported:
-            _logger.debug("    - property_name: %r", property_name)
+            if DEBUG: _logger.debug("    - property_name: %r", property_name)
             # get the class
             property_datatype = self.obj.get_datatype(property_name)
-            _logger.debug("        - property_datatype: %r", property_datatype)
+            if DEBUG: _logger.debug("        - property_datatype: %r", property_datatype)
             # build the value
             bundle_value = property_datatype(self.obj._values[property_name])
-            _logger.debug("        - bundle_value: %r", bundle_value)
+            if DEBUG: _logger.debug("        - bundle_value: %r", bundle_value)
             # bundle it into a sequence
             property_value = PropertyValue(
                 propertyIdentifier=property_name,
@@ -160,10 +160,10 @@ class COVDetection(DetectionAlgorithm):
             )
             # add it to the list
             list_of_values.append(property_value)
-        _logger.debug("    - list_of_values: %r", list_of_values)
+        if DEBUG: _logger.debug("    - list_of_values: %r", list_of_values)
         # loop through the subscriptions and send out notifications
         for cov in self.cov_subscriptions:
-            _logger.debug("    - cov: %s", repr(cov))
+            if DEBUG: _logger.debug("    - cov: %s", repr(cov))
             # calculate time remaining
             if not cov.lifetime:
                 time_remaining = 0
@@ -184,7 +184,7 @@ class COVDetection(DetectionAlgorithm):
             request.monitoredObjectIdentifier = cov.obj_id
             request.timeRemaining = time_remaining
             request.listOfValues = list_of_values
-            _logger.debug("    - request: %s", repr(request))
+            if DEBUG: _logger.debug("    - request: %s", repr(request))
             # let the application send it
             self.obj._app.cov_notification(cov, request)
 
@@ -217,26 +217,26 @@ class COVIncrementCriteria(COVDetection):
     monitored_property_reference = 'presentValue'
 
     def __init__(self, obj):
-        _logger.debug("__init__ %r", obj)
+        if DEBUG: _logger.debug("__init__ %r", obj)
         COVDetection.__init__(self, obj)
         # previous reported value
         self.previous_reported_value = None
 
     @monitor_filter('presentValue')
     def present_value_filter(self, old_value, new_value):
-        _logger.debug("present_value_filter %r %r", old_value, new_value)
+        if DEBUG: _logger.debug("present_value_filter %r %r", old_value, new_value)
         # first time around initialize to the old value
         if self.previous_reported_value is None:
-            _logger.debug("    - first value: %r", old_value)
+            if DEBUG: _logger.debug("    - first value: %r", old_value)
             self.previous_reported_value = old_value
         # see if it changed enough to trigger reporting
         value_changed = (new_value <= (self.previous_reported_value - self.covIncrement)) \
                         or (new_value >= (self.previous_reported_value + self.covIncrement))
-        _logger.debug("    - value significantly changed: %r", value_changed)
+        if DEBUG: _logger.debug("    - value significantly changed: %r", value_changed)
         return value_changed
 
     def send_cov_notifications(self):
-        _logger.debug("send_cov_notifications")
+        if DEBUG: _logger.debug("send_cov_notifications")
         # when sending out notifications, keep the current value
         self.previous_reported_value = self.presentValue
         # continue
@@ -355,10 +355,10 @@ class ActiveCOVSubscriptions(Property):
         )
 
     def ReadProperty(self, obj, arrayIndex=None):
-        _logger.debug("ReadProperty %s arrayIndex=%r", obj, arrayIndex)
+        if DEBUG: _logger.debug("ReadProperty %s arrayIndex=%r", obj, arrayIndex)
         # get the current time from the task manager
         current_time = time.time()
-        _logger.debug("    - current_time: %r", current_time)
+        if DEBUG: _logger.debug("    - current_time: %r", current_time)
         # start with an empty sequence
         cov_subscriptions = ListOf(COVSubscription)()
         # loop through the object and detection list
@@ -378,13 +378,13 @@ class ActiveCOVSubscriptions(Property):
                         macAddress=cov.client_addr.addrAddr,
                     ),
                 )
-                _logger.debug("    - recipient: %r", recipient)
-                _logger.debug("    - client MAC address: %r", cov.client_addr.addrAddr)
+                if DEBUG: _logger.debug("    - recipient: %r", recipient)
+                if DEBUG: _logger.debug("    - client MAC address: %r", cov.client_addr.addrAddr)
                 recipient_process = RecipientProcess(
                     recipient=recipient,
                     processIdentifier=cov.proc_id,
                 )
-                _logger.debug("    - recipient_process: %r", recipient_process)
+                if DEBUG: _logger.debug("    - recipient_process: %r", recipient_process)
                 cov_subscription = COVSubscription(
                     recipient=recipient_process,
                     monitoredPropertyReference=ObjectPropertyReference(
@@ -396,7 +396,7 @@ class ActiveCOVSubscriptions(Property):
                 )
                 if hasattr(cov_detection, 'covIncrement'):
                     cov_subscription.covIncrement = cov_detection.covIncrement
-                _logger.debug("    - cov_subscription: %r", cov_subscription)
+                if DEBUG: _logger.debug("    - cov_subscription: %r", cov_subscription)
                 # add the list
                 cov_subscriptions.append(cov_subscription)
         return cov_subscriptions
@@ -408,7 +408,7 @@ class ActiveCOVSubscriptions(Property):
 class ChangeOfValueServices(Capability):
 
     def __init__(self):
-        _logger.debug("__init__")
+        if DEBUG: _logger.debug("__init__")
         Capability.__init__(self)
         # map from an object to its detection algorithm
         self.cov_detections = {}
@@ -418,71 +418,70 @@ class ChangeOfValueServices(Capability):
             self.localDevice.add_property(ActiveCOVSubscriptions())
 
     def add_subscription(self, cov):
-        _logger.debug("add_subscription %r", cov)
+        if DEBUG: _logger.debug("add_subscription %r", cov)
         # add it to the subscription list for its object
         self.cov_detections[cov.obj_ref].cov_subscriptions.append(cov)
 
     def cancel_subscription(self, cov):
-        _logger.debug("cancel_subscription %r", cov)
+        if DEBUG: _logger.debug("cancel_subscription %r", cov)
         # cancel the subscription timeout
         if cov.isScheduled:
             cov.suspend_task()
-            _logger.debug("    - task suspended")
+            if DEBUG: _logger.debug("    - task suspended")
         # get the detection algorithm object
         cov_detection = self.cov_detections[cov.obj_ref]
         # remove it from the subscription list for its object
         cov_detection.cov_subscriptions.remove(cov)
         # if the detection algorithm doesn't have any subscriptions, remove it
         if not len(cov_detection.cov_subscriptions):
-            _logger.debug("    - no more subscriptions")
+            if DEBUG: _logger.debug("    - no more subscriptions")
             # unbind all the hooks into the object
             cov_detection.unbind()
             # delete it from the object map
             del self.cov_detections[cov.obj_ref]
 
     def cov_notification(self, cov, request):
-        _logger.debug("cov_notification %s %s", str(cov), str(request))
+        if DEBUG: _logger.debug("cov_notification %s %s", str(cov), str(request))
         # create an IOCB with the request
         iocb = IOCB(request)
-        _logger.debug("    - iocb: %r", iocb)
+        if DEBUG: _logger.debug("    - iocb: %r", iocb)
         # add a callback for the response, even if it was unconfirmed
-        iocb.cov = cov
-        iocb.add_callback(self.cov_confirmation)
+        iocb.add_callback(self.cov_confirmation, cov)
         # send the request via the ApplicationIOController
         self.request_io(iocb)
 
-    def cov_confirmation(self, iocb):
-        _logger.debug("cov_confirmation %r", iocb)
+    def cov_confirmation(self, iocb, cov):
+        if DEBUG: _logger.debug("cov_confirmation %r", iocb)
         # do something for success
         if iocb.io_response:
-            _logger.debug("    - ack")
-            self.cov_ack(iocb.cov, iocb.args[0], iocb.io_response)
+            if DEBUG: _logger.debug("    - ack")
+            self.cov_ack(cov, iocb.request, iocb.io_response)
         elif isinstance(iocb.io_error, Error):
-            _logger.debug("    - error: %r", iocb.io_error.errorCode)
-            self.cov_error(iocb.cov, iocb.args[0], iocb.io_error)
+            if DEBUG: _logger.debug("    - error: %r", iocb.io_error.errorCode)
+            self.cov_error(cov, iocb.request, iocb.io_error)
         elif isinstance(iocb.io_error, RejectPDU):
-            _logger.debug("    - reject: %r", iocb.io_error.apduAbortRejectReason)
-            self.cov_reject(iocb.cov, iocb.args[0], iocb.io_error)
+            if DEBUG: _logger.debug("    - reject: %r", iocb.io_error.apduAbortRejectReason)
+            self.cov_reject(cov, iocb.request, iocb.io_error)
         elif isinstance(iocb.io_error, AbortPDU):
-            _logger.debug("    - abort: %r", iocb.io_error.apduAbortRejectReason)
-            self.cov_abort(iocb.cov, iocb.args[0], iocb.io_error)
+            if DEBUG: _logger.debug("    - abort: %r", iocb.io_error.apduAbortRejectReason)
+            self.cov_abort(cov, iocb.request, iocb.io_error)
 
     def cov_ack(self, cov, request, response):
-        _logger.debug("cov_ack %r %r %r", cov, request, response)
+        if DEBUG: _logger.debug("cov_ack %r %r %r", cov, request, response)
 
     def cov_error(self, cov, request, response):
-        _logger.debug("cov_error %r %r %r", cov, request, response)
+        if DEBUG: _logger.debug("cov_error %r %r %r", cov, request, response)
 
     def cov_reject(self, cov, request, response):
-        _logger.debug("cov_reject %r %r %r", cov, request, response)
+        if DEBUG: _logger.debug("cov_reject %r %r %r", cov, request, response)
 
     def cov_abort(self, cov, request, response):
-        _logger.debug("cov_abort %r %r %r", cov, request, response)
+        if DEBUG: _logger.debug("cov_abort %r %r %r", cov, request, response)
 
         ### delete the rest of the pending requests for this client
 
     def do_SubscribeCOVRequest(self, apdu):
-        _logger.debug("do_SubscribeCOVRequest %r", apdu)
+        if DEBUG: _logger.debug("do_SubscribeCOVRequest %r", apdu)
         # extract the pieces
         client_addr = apdu.pduSource
         proc_id = apdu.subscriberProcessIdentifier
@@ -493,7 +492,7 @@ class ChangeOfValueServices(Capability):
         cancel_subscription = (confirmed is None) and (lifetime is None)
         # find the object
         obj = self.get_object_id(obj_id)
-        _logger.debug("    - object: %r", obj)
+        if DEBUG: _logger.debug("    - object: %r", obj)
         if not obj:
             raise ExecutionError(errorClass='object', errorCode='unknownObject')
         # look for an algorithm already associated with this object
@@ -508,26 +507,26 @@ class ChangeOfValueServices(Capability):
             cov_detection = criteria_class(obj)
             # keep track of it for other subscriptions
             self.cov_detections[obj] = cov_detection
-        _logger.debug("    - cov_detection: %r", cov_detection)
+        if DEBUG: _logger.debug("    - cov_detection: %r", cov_detection)
         # can a match be found?
         cov = cov_detection.cov_subscriptions.find(client_addr, proc_id, obj_id)
-        _logger.debug("    - cov: %r", cov)
+        if DEBUG: _logger.debug("    - cov: %r", cov)
         # if a match was found, update the subscription
         if cov:
             if cancel_subscription:
-                _logger.debug("    - cancel the subscription")
+                if DEBUG: _logger.debug("    - cancel the subscription")
                 self.cancel_subscription(cov)
             else:
-                _logger.debug("    - renew the subscription")
+                if DEBUG: _logger.debug("    - renew the subscription")
                 cov.renew_subscription(lifetime)
         else:
             if cancel_subscription:
-                _logger.debug("    - cancel a subscription that doesn't exist")
+                if DEBUG: _logger.debug("    - cancel a subscription that doesn't exist")
             else:
-                _logger.debug("    - create a subscription")
+                if DEBUG: _logger.debug("    - create a subscription")
                 # make a subscription
                 cov = Subscription(obj, client_addr, proc_id, obj_id, confirmed, lifetime)
-                _logger.debug("    - cov: %r", cov)
+                if DEBUG: _logger.debug("    - cov: %r", cov)
                 # add it to our subscriptions lists
                 self.add_subscription(cov)
         # success
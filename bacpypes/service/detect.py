@@ -6,6 +6,7 @@ Detection
 
 import logging
 from bacpypes.core import deferred
+from ..debugging import DEBUG
 
 _logger = logging.getLogger(__name__)
 __all__ = ['DetectionMonitor', 'DetectionAlgorithm', 'monitor_filter']
@@ -14,7 +15,7 @@ __all__ = ['DetectionMonitor', 'DetectionAlgorithm', 'monitor_filter']
 class DetectionMonitor:
 
     def __init__(self, algorithm, parameter, obj, prop, filter=None):
-        _logger.debug("__init__ ...")
+        if DEBUG: _logger.debug("__init__ ...")
         # keep track of the parameter values
         self.algorithm = algorithm
         self.parameter = parameter
@@ -23,23 +24,23 @@ class DetectionMonitor:
         self.filter = None
 
     def property_change(self, old_value, new_value):
-        _logger.debug("property_change %r %r", old_value, new_value)
+        if DEBUG: _logger.debug("property_change %r %r", old_value, new_value)
         # set the parameter value
         setattr(self.algorithm, self.parameter, new_value)
         # if the algorithm is already triggered, don't bother checking for more
         if self.algorithm._triggered:
-            _logger.debug("    - already triggered")
+            if DEBUG: _logger.debug("    - already triggered")
             return
         # if there is a special filter, use it, otherwise use !=
         if self.filter:
             trigger = self.filter(old_value, new_value)
         else:
             trigger = (old_value != new_value)
-        _logger.debug("    - trigger: %r", trigger)
+        if DEBUG: _logger.debug("    - trigger: %r", trigger)
         # trigger it
         if trigger:
             deferred(self.algorithm._execute)
-            _logger.debug("    - deferred: %r", self.algorithm._execute)
+            if DEBUG: _logger.debug("    - deferred: %r", self.algorithm._execute)
             self.algorithm._triggered = True
 
 
@@ -54,7 +55,7 @@ def monitor_filter(parameter):
 class DetectionAlgorithm:
 
     def __init__(self):
-        _logger.debug("__init__")
+        if DEBUG: _logger.debug("__init__")
         # monitor objects
         self._monitors = []
         # triggered flag, set when a parameter changed and the monitor
@@ -62,7 +63,7 @@ class DetectionAlgorithm:
         self._triggered = False
 
     def bind(self, **kwargs):
-        _logger.debug("bind %r", kwargs)
+        if DEBUG: _logger.debug("bind %r", kwargs)
         # build a map of methods that are filters.  These have been decorated
         # with monitor_filter, but they are unbound methods (or simply
         # functions in Python3) at the time they are decorated but by looking
@@ -72,13 +73,13 @@ class DetectionAlgorithm:
             attr = getattr(self, attr_name)
             if hasattr(attr, "_monitor_filter"):
                 monitor_filters[attr._monitor_filter] = attr
-        _logger.debug("    - monitor_filters: %r", monitor_filters)
+        if DEBUG: _logger.debug("    - monitor_filters: %r", monitor_filters)
         for parameter, (obj, prop) in kwargs.items():
             if not hasattr(self, parameter):
-                _logger.debug("    - no matching parameter: %r", parameter)
+                if DEBUG: _logger.debug("    - no matching parameter: %r", parameter)
             # make a detection monitor
             monitor = DetectionMonitor(self, parameter, obj, prop)
-            _logger.debug("    - monitor: %r", monitor)
+            if DEBUG: _logger.debug("    - monitor: %r", monitor)
             # check to see if there is a custom filter for it
             if parameter in monitor_filters:
                 monitor.filter = monitor_filters[parameter]
@@ -89,20 +90,20 @@ class DetectionAlgorithm:
             # set the parameter value to the property value if it's not None
             property_value = obj._values[prop]
             if property_value is not None:
-                _logger.debug("    - %s: %r", parameter, property_value)
+                if DEBUG: _logger.debug("    - %s: %r", parameter, property_value)
                 setattr(self, parameter, property_value)
 
     def unbind(self):
-        _logger.debug("unbind")
+        if DEBUG: _logger.debug("unbind")
         # remove the property value monitor functions
         for monitor in self._monitors:
-            _logger.debug("    - monitor: %r", monitor)
+            if DEBUG: _logger.debug("    - monitor: %r", monitor)
             monitor.obj._property_monitors[monitor.prop].remove(monitor.property_change)
         # abandon the array
         self._monitors = []
 
     def _execute(self):
-        _logger.debug("_execute")
+        if DEBUG: _logger.debug("_execute")
         # provided by the derived class
         self.execute()
         # turn the trigger off
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 
+import asyncio
 import logging
 from ..comm import Capability
 from ..link import GlobalBroadcast
@@ -7,6 +8,7 @@ from ..apdu import WhoIsRequest, IAmRequest, IHaveRequest, SimpleAckPDU
 from ..errors import ExecutionError, InconsistentParameters, \
     MissingRequiredParameter, ParameterOutOfRange
 from ..task import call_later
+from ..debugging import DEBUG
 
 _logger = logging.getLogger(__name__)
 __all__ = ['WhoIsIAmServices', 'WhoHasIHaveServices', 'DeviceCommunicationControlServices']
@@ -14,12 +16,19 @@ __all__ = ['WhoIsIAmServices', 'WhoHasIHaveServices', 'DeviceCommunicationContro
 
 class WhoIsIAmServices(Capability):
 
+    # instance numbers asked for by each Who-Is of a discovery
+    discover_range_size = 250
+    # seconds between the Who-Is requests of a discovery
+    discover_interval = 0.25
+
     def __init__(self):
-        _logger.debug("__init__")
+        if DEBUG: _logger.debug("__init__")
         Capability.__init__(self)
+        # (low_limit, high_limit, queue) of the discoveries in progress
+        self._discoveries = []
 
     def who_is(self, low_limit=None, high_limit=None, address=None):
-        _logger.debug("who_is")
+        if DEBUG: _logger.debug("who_is")
         # build a request
         who_is = WhoIsRequest()
         # defaults to a global broadcast
@@ -42,18 +51,94 @@ class WhoIsIAmServices(Capability):
                 raise ParameterOutOfRange("high_limit out of range")
             # high limit is fine
             who_is.deviceInstanceRangeHighLimit = high_limit
-        _logger.debug("    - who_is: %r", who_is)
-        ### put the parameters someplace where they can be matched when the
-        ### appropriate I-Am comes in
-        # away it goes
+        if DEBUG: _logger.debug("    - who_is: %r", who_is)
+        # away it goes, the I-Am responses are only collected by discover()
         self.request(who_is)
 
+    async def discover(self, low_limit=None, high_limit=None, timeout=3.0, address=None):
+        """
+        Send Who-Is requests and yield the DeviceInfo of every device that
+        answers with an I-Am as it arrives, the information is also put in the
+        device information cache.  A large range of instance numbers is asked
+        for in pieces of `discover_range_size` instances, `discover_interval`
+        seconds apart, so the devices don't all answer at once.  This stops
+        when every instance in the range has answered, or when there has
+        been no answer for `timeout` seconds after the last Who-Is was sent.
+
+            async for device_info in app.discover(0, 9999, timeout=5):
+                ...
+
+        When leaving the loop early wrap the call in contextlib.aclosing() so
+        the discovery is cleaned up right away.
+
+        :param low_limit: lowest device instance number, None for all devices
+        :param high_limit: highest device instance number
+        :param timeout: seconds to wait for the answers after the last Who-Is
+        :param address: where to send the Who-Is, defaults to a global broadcast
+        """
+        if DEBUG: _logger.debug("discover %r %r timeout=%r address=%r", low_limit, high_limit, timeout, address)
+        if (low_limit is None) != (high_limit is None):
+            raise MissingRequiredParameter("low_limit and high_limit required together")
+        if low_limit is None:
+            ranges = [(None, None)]
+            expected = None
+        else:
+            if (low_limit < 0) or (high_limit > 4194303) or (low_limit > high_limit):
+                raise ParameterOutOfRange("device instance range out of range")
+            ranges = [
+                (low, min(low + self.discover_range_size - 1, high_limit))
+                for low in range(low_limit, high_limit + 1, self.discover_range_size)
+            ]
+            expected = high_limit - low_limit + 1
+
+        loop = asyncio.get_event_loop()
+        queue = asyncio.Queue()
+        discovery = (low_limit, high_limit, queue)
+        self._discoveries.append(discovery)
+
+        async def send_requests():
+            for i, (low, high) in enumerate(ranges):
+                if i:
+                    await asyncio.sleep(self.discover_interval)
+                self.who_is(low, high, address)
+
+        sender = loop.create_task(send_requests())
+        getter = None
+        found = set()
+        try:
+            while (expected is None) or (len(found) < expected):
+                if sender.done():
+                    # raise any problem sending the requests
+                    sender.result()
+                    try:
+                        device_info = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    # wait for an answer or the last request to go out
+                    getter = loop.create_task(queue.get())
+                    await asyncio.wait((getter, sender), return_when=asyncio.FIRST_COMPLETED)
+                    if not getter.done():
+                        getter.cancel()
+                        continue
+                    device_info = getter.result()
+                if device_info.deviceIdentifier in found:
+                    continue
+                found.add(device_info.deviceIdentifier)
+                yield device_info
+        finally:
+            self._discoveries.remove(discovery)
+            sender.cancel()
+            # the consumer may have been cancelled while waiting for an answer
+            if getter is not None:
+                getter.cancel()
+
     def do_WhoIsRequest(self, apdu):
         """Respond to a Who-Is request."""
-        _logger.debug("do_WhoIsRequest %r", apdu)
+        if DEBUG: _logger.debug("do_WhoIsRequest %r", apdu)
         # ignore this if there's no local device
         if not self.localDevice:
-            _logger.debug("    - no local device")
+            if DEBUG: _logger.debug("    - no local device")
             return
         # extract the parameters
         low_limit = apdu.deviceInstanceRangeLowLimit
@@ -80,10 +165,10 @@ class WhoIsIAmServices(Capability):
         self.i_am(address=apdu.pduSource)
 
     def i_am(self, address=None):
-        _logger.debug("i_am")
+        if DEBUG: _logger.debug("i_am")
         # this requires a local device
         if not self.localDevice:
-            _logger.debug("    - no local device")
+            if DEBUG: _logger.debug("    - no local device")
             return
         # create a I-Am "response" back to the source
         i_am = IAmRequest(
@@ -96,13 +181,13 @@ class WhoIsIAmServices(Capability):
         if not address:
             address = GlobalBroadcast()
         i_am.pduDestination = address
-        _logger.debug("    - i_am: %r", i_am)
+        if DEBUG: _logger.debug("    - i_am: %r", i_am)
         # away it goes
         self.request(i_am)
 
     def do_IAmRequest(self, apdu):
         """Respond to an I-Am request."""
-        _logger.debug("do_IAmRequest %r", apdu)
+        if DEBUG: _logger.debug("do_IAmRequest %r", apdu)
         # check for required parameters
         if apdu.iAmDeviceIdentifier is None:
             raise MissingRequiredParameter("iAmDeviceIdentifier required")
@@ -114,30 +199,39 @@ class WhoIsIAmServices(Capability):
             raise MissingRequiredParameter("vendorID required")
         # extract the device instance number
         device_instance = apdu.iAmDeviceIdentifier[1]
-        _logger.debug("    - device_instance: %r", device_instance)
+        if DEBUG: _logger.debug("    - device_instance: %r", device_instance)
         # extract the source address
         device_address = apdu.pduSource
-        _logger.debug("    - device_address: %r", device_address)
-        ### check to see if the application is looking for this device
-        ### and update the device info cache if it is
+        if DEBUG: _logger.debug("    - device_address: %r", device_address)
+        # check to see if the application is looking for this device
+        discoveries = [
+            queue for low_limit, high_limit, queue in self._discoveries
+            if (low_limit is None) or (low_limit <= device_instance <= high_limit)
+        ]
+        # update the device info cache if it is, or if the device is known
+        if discoveries or self.deviceInfoCache.has_device_info(device_instance):
+            self.deviceInfoCache.iam_device_info(apdu)
+            device_info = self.deviceInfoCache.get_device_info(device_instance)
+            for queue in discoveries:
+                queue.put_nowait(device_info)
 
 
 class WhoHasIHaveServices(Capability):
 
     def __init__(self):
-        _logger.debug("__init__")
+        if DEBUG: _logger.debug("__init__")
         Capability.__init__(self)
 
     def who_has(self, thing, address=None):
-        _logger.debug("who_has %r address=%r", thing, address)
+        if DEBUG: _logger.debug("who_has %r address=%r", thing, address)
         raise NotImplementedError("who_has")
 
     def do_WhoHasRequest(self, apdu):
         """Respond to a Who-Has request."""
-        _logger.debug("do_WhoHasRequest, %r", apdu)
+        if DEBUG: _logger.debug("do_WhoHasRequest, %r", apdu)
         # ignore this if there's no local device
         if not self.localDevice:
-            _logger.debug("    - no local device")
+            if DEBUG: _logger.debug("    - no local device")
             return
         # if this has limits, check them like Who-Is
         if apdu.limits is not None:
@@ -172,10 +266,10 @@ class WhoHasIHaveServices(Capability):
         self.i_have(obj, address=apdu.pduSource)
 
     def i_have(self, thing, address=None):
-        _logger.debug("i_have %r address=%r", thing, address)
+        if DEBUG: _logger.debug("i_have %r address=%r", thing, address)
         # ignore this if there's no local device
         if not self.localDevice:
-            _logger.debug("    - no local device")
+            if DEBUG: _logger.debug("    - no local device")
             return
         # build the request
         i_have = IHaveRequest(
@@ -187,13 +281,13 @@ class WhoHasIHaveServices(Capability):
         if not address:
             address = GlobalBroadcast()
         i_have.pduDestination = address
-        _logger.debug("    - i_have: %r", i_have)
+        if DEBUG: _logger.debug("    - i_have: %r", i_have)
         # send it along
         self.request(i_have)
 
     def do_IHaveRequest(self, apdu):
         """Respond to a I-Have request."""
-        _logger.debug("do_IHaveRequest %r", apdu)
+        if DEBUG: _logger.debug("do_IHaveRequest %r", apdu)
         # check for required parameters
         if apdu.deviceIdentifier is None:
             raise MissingRequiredParameter("deviceIdentifier required")
@@ -207,13 +301,13 @@ class WhoHasIHaveServices(Capability):
 class DeviceCommunicationControlServices(Capability):
 
     def __init__(self):
-        _logger.debug("__init__")
+        if DEBUG: _logger.debug("__init__")
         Capability.__init__(self)
         # task to run if there is a time duration
         self._dcc_enable_handle = None
 
     def do_DeviceCommunicationControlRequest(self, apdu):
-        _logger.debug("do_CommunicationControlRequest, %r", apdu)
+        if DEBUG: _logger.debug("do_CommunicationControlRequest, %r", apdu)
         if getattr(self.localDevice, "_dcc_password", None):
             if not apdu.password or apdu.password != getattr(self.localDevice, "_dcc_password"):
                 raise ExecutionError(errorClass="security", errorCode="passwordFailure")
@@ -225,12 +319,12 @@ class DeviceCommunicationControlServices(Capability):
             # if there is a time duration, it's in minutes
             if apdu.timeDuration:
                 self._dcc_enable_handle = call_later(apdu.timeDuration * 60, self.enable_communications)
-                _logger.debug("    - enable scheduled")
+                if DEBUG: _logger.debug("    - enable scheduled")
         # respond with a simple ack
         self.response(SimpleAckPDU(context=apdu))
 
     def enable_communications(self):
-        _logger.debug("enable_communications")
+        if DEBUG: _logger.debug("enable_communications")
         # tell the State Machine Access Point
         self.smap.dccEnableDisable = 'enable'
         # if an enable task was scheduled, cancel it
@@ -239,7 +333,7 @@ class DeviceCommunicationControlServices(Capability):
             self._dcc_enable_handle = None
 
     def disable_communications(self, enable_disable):
-        _logger.debug("disable_communications %r", enable_disable)
+        if DEBUG: _logger.debug("disable_communications %r", enable_disable)
         # tell the State Machine Access Point
         self.smap.dccEnableDisable = enable_disable
         # if an enable task was scheduled, cancel it
@@ -9,6 +9,7 @@ from ..apdu import AtomicReadFileACK, AtomicReadFileACKAccessMethodChoice, \
     AtomicReadFileACKAccessMethodStreamAccess, \
     AtomicWriteFileACK
 from ..errors import ExecutionError, MissingRequiredParameter
+from ..debugging import DEBUG
 
 _logger = logging.getLogger(__name__)
 __all__ = [
@@ -20,7 +21,7 @@ class LocalRecordAccessFileObject(FileObject):
 
     def __init__(self, **kwargs):
         """ Initialize a record accessed file object. """
-        _logger.debug("__init__ %r", kwargs,)
+        if DEBUG: _logger.debug("__init__ %r", kwargs,)
         # verify the file access method or provide it
         if 'fileAccessMethod' in kwargs:
             if kwargs['fileAccessMethod'] != 'recordAccess':
@@ -47,7 +48,7 @@ class LocalStreamAccessFileObject(FileObject):
 
     def __init__(self, **kwargs):
         """ Initialize a stream accessed file object. """
-        _logger.debug("__init__ %r", kwargs)
+        if DEBUG: _logger.debug("__init__ %r", kwargs)
         # verify the file access method or provide it
         if 'fileAccessMethod' in kwargs:
             if kwargs['fileAccessMethod'] != 'streamAccess':
@@ -73,17 +74,17 @@ class LocalStreamAccessFileObject(FileObject):
 class FileServices(Capability):
 
     def __init__(self):
-        _logger.debug("__init__")
+        if DEBUG: _logger.debug("__init__")
         Capability.__init__(self)
 
     def do_AtomicReadFileRequest(self, apdu):
         """Return one of our records."""
-        _logger.debug("do_AtomicReadFileRequest %r", apdu)
+        if DEBUG: _logger.debug("do_AtomicReadFileRequest %r", apdu)
         if apdu.fileIdentifier[0] != 'file':
             raise ExecutionError('services', 'inconsistentObjectType')
         # get the object
         obj = self.get_object_id(apdu.fileIdentifier)
-        _logger.debug("    - object: %r", obj)
+        if DEBUG: _logger.debug("    - object: %r", obj)
         if not obj:
             raise ExecutionError('object', 'unknownObject')
         if apdu.accessMethod.recordAccess:
@@ -106,7 +107,7 @@ class FileServices(Capability):
                 record_access.fileStartRecord,
                 record_access.requestedRecordCount,
                 )
-            _logger.debug("    - record_data: %r", record_data)
+            if DEBUG: _logger.debug("    - record_data: %r", record_data)
             # this is an ack
             resp = AtomicReadFileACK(context=apdu,
                 endOfFile=end_of_file,
@@ -138,7 +139,7 @@ class FileServices(Capability):
                 stream_access.fileStartPosition,
                 stream_access.requestedOctetCount,
                 )
-            _logger.debug("    - record_data: %r", record_data)
+            if DEBUG: _logger.debug("    - record_data: %r", record_data)
             # this is an ack
             resp = AtomicReadFileACK(context=apdu,
                 endOfFile=end_of_file,
@@ -149,18 +150,18 @@ class FileServices(Capability):
                         ),
                     ),
                 )
-        _logger.debug("    - resp: %r", resp)
+        if DEBUG: _logger.debug("    - resp: %r", resp)
         # return the result
         self.response(resp)
 
     def do_AtomicWriteFileRequest(self, apdu):
         """Return one of our records."""
-        _logger.debug("do_AtomicWriteFileRequest %r", apdu)
+        if DEBUG: _logger.debug("do_AtomicWriteFileRequest %r", apdu)
         if apdu.fileIdentifier[0] != 'file':
             raise ExecutionError('services', 'inconsistentObjectType')
         # get the object
         obj = self.get_object_id(apdu.fileIdentifier)
-        _logger.debug("    - object: %r", obj)
+        if DEBUG: _logger.debug("    - object: %r", obj)
         if not obj:
             raise ExecutionError('object', 'unknownObject')
         if apdu.accessMethod.recordAccess:
@@ -185,7 +186,7 @@ class FileServices(Capability):
                 record_access.recordCount,
                 record_access.fileRecordData,
                 )
-            _logger.debug("    - start_record: %r", start_record)
+            if DEBUG: _logger.debug("    - start_record: %r", start_record)
             # this is an ack
             resp = AtomicWriteFileACK(context=apdu,
                 fileStartRecord=start_record,
@@ -209,12 +210,12 @@ class FileServices(Capability):
                 stream_access.fileStartPosition,
                 stream_access.fileData,
                 )
-            _logger.debug("    - start_position: %r", start_position)
+            if DEBUG: _logger.debug("    - start_position: %r", start_position)
             # this is an ack
             resp = AtomicWriteFileACK(context=apdu,
                 fileStartPosition=start_position,
                 )
-        _logger.debug("    - resp: %r", resp)
+        if DEBUG: _logger.debug("    - resp: %r", resp)
         # return the result
         self.response(resp)
 
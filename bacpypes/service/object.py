@@ -11,8 +11,8 @@ from ..apdu import SimpleAckPDU, ReadPropertyACK, ReadPropertyMultipleACK, \
     ReadAccessResult, ReadAccessResultElement, ReadAccessResultElementChoice
 from ..errors import ExecutionError
 from ..object import Property, Object, PropertyError
+from ..debugging import DEBUG
 
-DEBUG = True
 _logger = logging.getLogger(__name__)
 __all__ = [
     'ReadWritePropertyServices', 'read_property_to_any', 'read_property_to_result_element',
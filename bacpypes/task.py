@@ -8,10 +8,16 @@ import time
 import math
 import asyncio
 import logging
+import weakref
 import functools
 
 _logger = logging.getLogger(__name__)
 
+# the shared timer wheel ticks this often (in seconds), its timers fire up to
+# one tick late but never early
+TIMER_WHEEL_RESOLUTION = 0.05
+TIMER_WHEEL_SLOTS = 512
+
 
 def call_later(delay, fn, *args, **kwargs) -> asyncio.Handle:
     """
@@ -32,6 +38,144 @@ def call_soon(fn, *args, **kwargs):
     loop.call_soon(callback)
 
 
+class WheelTimer:
+    """
+    A timer in a TimerWheel, it quacks like the asyncio.TimerHandle that
+    call_later() returns.
+    """
+    __slots__ = ('_wheel', '_when', '_tick', '_callback', '_cancelled')
+
+    def __init__(self, wheel, when, tick, callback):
+        self._wheel = wheel
+        self._when = when
+        self._tick = tick
+        self._callback = callback
+        self._cancelled = False
+
+    def when(self):
+        return self._when
+
+    def cancel(self):
+        if not self._cancelled:
+            self._cancelled = True
+            self._wheel._remove(self)
+
+    def cancelled(self):
+        return self._cancelled
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} when={self._when:.3f} {self._callback!r}>'
+
+
+class TimerWheel:
+    """
+    A hashed timer wheel.  Timers are kept in one of a fixed number of slots
+    by the tick they expire in, so starting and cancelling one is a dict
+    operation rather than a push onto the event loop heap.  The wheel itself
+    has at most one event loop timer, scheduled for the next slot that has
+    something in it, and none at all when it is empty.  Timers further away
+    than one turn of the wheel stay in their slot until their turn comes up.
+    """
+
+    def __init__(self, resolution=TIMER_WHEEL_RESOLUTION, slots=TIMER_WHEEL_SLOTS, loop=None):
+        self.resolution = resolution
+        self.slots = [{} for _ in range(slots)]
+        self.loop = loop or asyncio.get_event_loop()
+        self._count = 0
+        self._tick = math.floor(self.loop.time() / resolution)
+        self._handle = None
+        self._handle_tick = None
+        self._running = False
+
+    def __len__(self):
+        return self._count
+
+    def call_later(self, delay, fn, *args, **kwargs):
+        """Call a function after a delay (in seconds), return a WheelTimer."""
+        return self.call_at(self.loop.time() + delay, fn, *args, **kwargs)
+
+    def call_at(self, when, fn, *args, **kwargs):
+        """Call a function at a loop time, return a WheelTimer."""
+        if not self._count:
+            # the wheel has been idle, catch up
+            self._tick = math.floor(self.loop.time() / self.resolution)
+        tick = max(math.ceil(when / self.resolution), self._tick + 1)
+        callback = functools.partial(fn, *args, **kwargs) if (args or kwargs) else fn
+        timer = WheelTimer(self, when, tick, callback)
+        self.slots[tick % len(self.slots)][timer] = None
+        self._count += 1
+        if not self._running and (self._handle is None or tick < self._handle_tick):
+            self._schedule(tick)
+        return timer
+
+    def _remove(self, timer):
+        if self.slots[timer._tick % len(self.slots)].pop(timer, 0) is None:
+            self._count -= 1
+            if not self._count and self._handle is not None:
+                self._handle.cancel()
+                self._handle = None
+
+    def _schedule(self, tick):
+        if self._handle is not None:
+            self._handle.cancel()
+        self._handle_tick = tick
+        self._handle = self.loop.call_at(tick * self.resolution, self._run)
+
+    def _run(self):
+        self._handle = None
+        self._running = True
+        try:
+            current = math.floor(self.loop.time() / self.resolution)
+            slots = self.slots
+            nslots = len(slots)
+            for tick in range(self._tick + 1, min(current, self._tick + nslots) + 1):
+                slot = slots[tick % nslots]
+                if not slot:
+                    continue
+                for timer in [timer for timer in slot if timer._tick <= current]:
+                    if timer._cancelled:
+                        continue
+                    del slot[timer]
+                    self._count -= 1
+                    try:
+                        timer._callback()
+                    except Exception as err:
+                        self.loop.call_exception_handler({
+                            'message': 'exception in timer wheel callback',
+                            'exception': err,
+                            'handle': timer,
+                        })
+            self._tick = current
+        finally:
+            self._running = False
+        # look for the next slot with something in it
+        if self._count:
+            for tick in range(current + 1, current + nslots + 1):
+                if slots[tick % nslots]:
+                    self._schedule(tick)
+                    break
+
+
+_timer_wheels = weakref.WeakKeyDictionary()
+
+
+def get_timer_wheel():
+    """Return the shared timer wheel of the event loop."""
+    loop = asyncio.get_event_loop()
+    wheel = _timer_wheels.get(loop)
+    if wheel is None:
+        wheel = _timer_wheels[loop] = TimerWheel(loop=loop)
+    return wheel
+
+
+def call_later_coarse(delay, fn, *args, **kwargs) -> WheelTimer:
+    """
+    Call a function after a delay (in seconds) on the shared timer wheel,
+    for timers that are restarted or cancelled far more often than they fire.
+    """
+    return get_timer_wheel().call_later(delay, fn, *args, **kwargs)
+
+
 class RecurringTask:
     """
     Cyclically scheduled function calls.
@@ -1,5 +1,6 @@
 from .stream_to_packet import *
 from .udp_director import *
+from .udp_batch_director import *
 from .udp_actor import *
 from .tcp_client import *
 from .tcp_client_actor import *
@@ -8,4 +9,4 @@ from .tcp_server import *
 from .tcp_server_actor import *
 from .tcp_server_director import *
 
-__all__ = udp_director.__all__ + udp_actor.__all__
+__all__ = udp_director.__all__ + udp_batch_director.__all__ + udp_actor.__all__
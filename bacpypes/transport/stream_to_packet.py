@@ -7,6 +7,7 @@ TCP Communications Module
 import logging
 from ..comm import PDU, Client, Server
 from ..comm import ServiceAccessPoint, ApplicationServiceElement
+from ..debugging import DEBUG
 
 # some debugging
 _logger = logging.getLogger(__name__)
@@ -16,7 +17,7 @@ __all__ = ['StreamToPacket', 'StreamToPacketSAP']
 class StreamToPacket(Client, Server):
 
     def __init__(self, fn, cid=None, sid=None):
-        _logger.debug("__init__ %r cid=%r, sid=%r", fn, cid, sid)
+        if DEBUG: _logger.debug("__init__ %r cid=%r, sid=%r", fn, cid, sid)
         Client.__init__(self, cid)
         Server.__init__(self, sid)
         # save the packet function
@@ -26,17 +27,17 @@ class StreamToPacket(Client, Server):
         self.downstreamBuffer = {}
 
     def packetize(self, pdu, streamBuffer):
-        _logger.debug("packetize %r ...", pdu)
+        if DEBUG: _logger.debug("packetize %r ...", pdu)
 
         def chop(addr):
-            _logger.debug("chop %r", addr)
+            if DEBUG: _logger.debug("chop %r", addr)
             # get the current downstream buffer
             buff = streamBuffer.get(addr, b'') + pdu.pduData
-            _logger.debug("    - buff: %r", buff)
+            if DEBUG: _logger.debug("    - buff: %r", buff)
             # look for a packet
             while 1:
                 packet = self.packetFn(buff)
-                _logger.debug("    - packet: %r", packet)
+                if DEBUG: _logger.debug("    - packet: %r", packet)
                 if packet is None:
                     break
                 yield PDU(packet[0],
@@ -57,14 +58,14 @@ class StreamToPacket(Client, Server):
 
     def indication(self, pdu):
         """Message going downstream."""
-        _logger.debug("indication %r", pdu)
+        if DEBUG: _logger.debug("indication %r", pdu)
         # hack it up into chunks
         for packet in self.packetize(pdu, self.downstreamBuffer):
             self.request(packet)
 
     def confirmation(self, pdu):
         """Message going upstream."""
-        _logger.debug("StreamToPacket.confirmation %r", pdu)
+        if DEBUG: _logger.debug("StreamToPacket.confirmation %r", pdu)
         # hack it up into chunks
         for packet in self.packetize(pdu, self.upstreamBuffer):
             self.response(packet)
@@ -73,14 +74,14 @@ class StreamToPacket(Client, Server):
 class StreamToPacketSAP(ApplicationServiceElement, ServiceAccessPoint):
 
     def __init__(self, stp, aseID=None, sapID=None):
-        _logger.debug("__init__ %r aseID=%r, sapID=%r", stp, aseID, sapID)
+        if DEBUG: _logger.debug("__init__ %r aseID=%r, sapID=%r", stp, aseID, sapID)
         ApplicationServiceElement.__init__(self, aseID)
         ServiceAccessPoint.__init__(self, sapID)
         # save a reference to the StreamToPacket object
         self.stp = stp
 
     def indication(self, add_actor=None, del_actor=None, actor_error=None, error=None):
-        _logger.debug("indication add_actor=%r del_actor=%r", add_actor, del_actor)
+        if DEBUG: _logger.debug("indication add_actor=%r del_actor=%r", add_actor, del_actor)
         if add_actor:
             # create empty buffers associated with the peer
             self.stp.upstreamBuffer[add_actor.peer] = b''
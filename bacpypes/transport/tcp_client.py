@@ -6,8 +6,8 @@ import logging
 
 from ..core import deferred
 from ..comm import PDU
+from ..debugging import DEBUG
 
-DEBUG = True
 _logger = logging.getLogger(__name__)
 __all__ = ['TCPClient']
 
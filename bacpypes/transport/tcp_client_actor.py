@@ -4,8 +4,8 @@ import logging
 from .tcp_client import TCPClient
 from .pickle_actor_mixin import PickleActorMixIn
 from ..task import call_later
+from ..debugging import DEBUG
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['TCPClientActor', 'TCPPickleClientActor']
 
@@ -1,11 +1,10 @@
 
 import logging
-from ..debugging import DebugContents
+from ..debugging import DEBUG, DebugContents
 from ..task import call_later
 from ..comm import Server, ServiceAccessPoint
 from .tcp_client_actor import TCPClientActor
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['TCPClientDirector']
 
@@ -5,8 +5,8 @@ import socket
 import errno
 from ..core import deferred
 from ..comm import PDU
+from ..debugging import DEBUG
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['TCPServer']
 
@@ -3,8 +3,8 @@ import logging
 from .tcp_server import TCPServer
 from .pickle_actor_mixin import PickleActorMixIn
 from ..task import call_later
+from ..debugging import DEBUG
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['TCPServerActor', 'TCPPickleServerActor']
 
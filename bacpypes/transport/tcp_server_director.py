@@ -2,11 +2,10 @@
 import logging
 import asyncore
 import socket
-from ..debugging import DebugContents
+from ..debugging import DEBUG, DebugContents
 from ..comm import Server, ServiceAccessPoint
 from .tcp_server_actor import TCPServerActor
 
-DEBUG = False
 _logger = logging.getLogger(__name__)
 __all__ = ['TCPServerDirector']
 
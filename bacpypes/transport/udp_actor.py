@@ -1,11 +1,12 @@
 
+import time
 import pickle
 import logging
 
-from ..task import call_later
+from ..task import call_later_coarse
+from ..debugging import DEBUG
 
 
-DEBUG = True
 _logger = logging.getLogger(__name__)
 __all__ = ['UDPActor', 'UDPPickleActor']
 
@@ -15,15 +16,20 @@ class UDPActor:
     UDPActor
     Actors are helper objects for a director.
     There is one actor for each peer.
+
+    Traffic only updates the time of the last activity, the idle timer runs
+    on the shared timer wheel and when it goes off it checks that time and
+    starts itself again for whatever is left.
     """
     def __init__(self, director, peer):
         if DEBUG: _logger.debug("__init__ %r %r", director, peer)
         self.director = director
         self.peer = peer
+        self.last_activity = time.monotonic()
         # add a timer
         self.timeout = director.timeout
         if self.timeout > 0:
-            self.timeout_handle = call_later(self.timeout, self.idle_timeout)
+            self.timeout_handle = call_later_coarse(self.timeout, self.idle_timeout)
         else:
             self.timeout_handle = None
         # tell the director this is a new actor
@@ -31,24 +37,30 @@ class UDPActor:
 
     def idle_timeout(self):
         if DEBUG: _logger.debug("idle_timeout")
+        # check for traffic since the timer was started
+        idle = time.monotonic() - self.last_activity
+        if idle < self.timeout:
+            self.timeout_handle = call_later_coarse(self.timeout - idle, self.idle_timeout)
+            return
+        self.timeout_handle = None
         # tell the director this is gone
         self.director.del_actor(self)
 
-    def indication(self, pdu):
-        if DEBUG: _logger.debug("indication %r", pdu)
-        # reschedule the timer
+    def close(self):
+        """Stop the idle timer, called when the director drops this actor."""
         if self.timeout_handle:
             self.timeout_handle.cancel()
-            self.timeout_handle = call_later(self.timeout, self.idle_timeout)
+            self.timeout_handle = None
+
+    def indication(self, pdu):
+        if DEBUG: _logger.debug("indication %r", pdu)
+        self.last_activity = time.monotonic()
         # put it in the outbound queue for the director
         self.director.send_request(pdu)
 
     def response(self, pdu):
         if DEBUG: _logger.debug("response %r", pdu)
-        # reschedule the timer
-        if self.timeout_handle:
-            self.timeout_handle.cancel()
-            self.timeout_handle = call_later(self.timeout, self.idle_timeout)
+        self.last_activity = time.monotonic()
         # process this as a response from the director
         self.director.response(pdu)
 
@@ -0,0 +1,162 @@
+#!/usr/bin/python
+
+"""
+Batched UDP Communications Module
+"""
+
+import socket
+import asyncio
+import logging
+from collections import deque
+from itertools import repeat
+
+from ..comm import PDU
+from .udp_director import UDPDirector
+from ..debugging import DEBUG
+
+_logger = logging.getLogger(__name__)
+__all__ = ['UDPBatchDirector']
+
+# largest datagram that is read, a BACnet/IP packet is at most 1497 octets
+# but a full UDP payload is allowed for
+_max_datagram = 65535
+
+
+class UDPBatchDirector(UDPDirector):
+    """
+    A UDPDirector that does its own socket I/O rather than going through an
+    asyncio datagram transport.  When the socket is readable it reads up to
+    batch_size datagrams into the same receive buffer before handing them up
+    one after the other, and the datagrams sent while the loop is busy are
+    written out together the next time around.
+
+    The default selector transport reads one datagram for each time the
+    socket is found readable, so under load this saves a selector call and a
+    callback for every datagram.  Each datagram is still copied out of the
+    receive buffer, the PDUs share that copy all the way up the stack.
+
+    Create it with create_endpoint(), or pass it as the director_class of
+    UDPMultiplexer.create_endpoint().
+    """
+
+    def __init__(self, timeout=0, batch_size=64, **kwargs):
+        if DEBUG: _logger.debug('__init__ timeout=%s batch_size=%r kwargs=%r', timeout, batch_size, kwargs)
+        UDPDirector.__init__(self, timeout=timeout, **kwargs)
+        self.batch_size = batch_size
+        self.socket = None
+        self.loop = None
+        # one receive buffer, reused for every read
+        self._buffer = bytearray(_max_datagram)
+        self._view = memoryview(self._buffer)
+        # datagrams waiting to be sent
+        self._send_queue = deque()
+        self._send_scheduled = False
+        self._writing = False
+
+    @classmethod
+    async def create_endpoint(cls, local_addr=None, remote_addr=None, allow_broadcast=False, reuse_address=False,
+                              **kwargs):
+        """Create the socket and the director, like loop.create_datagram_endpoint() does."""
+        loop = asyncio.get_event_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.setblocking(False)
+            if reuse_address:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if allow_broadcast:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            if local_addr:
+                sock.bind(local_addr)
+            if remote_addr:
+                sock.connect(remote_addr)
+        except OSError:
+            sock.close()
+            raise
+        director = cls(**kwargs)
+        director.connect_socket(sock, loop)
+        return director
+
+    def connect_socket(self, sock, loop=None):
+        """Start reading from a bound, non-blocking socket."""
+        if DEBUG: _logger.debug("connect_socket %r", sock)
+        self.socket = sock
+        self.loop = loop or asyncio.get_event_loop()
+        self.loop.add_reader(sock.fileno(), self._read_ready)
+
+    def close_socket(self):
+        """Close the socket."""
+        if DEBUG: _logger.debug("close_socket")
+        if self.socket is None:
+            return
+        self.loop.remove_reader(self.socket.fileno())
+        if self._writing:
+            self.loop.remove_writer(self.socket.fileno())
+            self._writing = False
+        self._send_queue.clear()
+        self.socket.close()
+        self.socket = None
+        self.connection_lost(None)
+
+    def _read_ready(self):
+        """Called by the event loop when the socket is readable."""
+        recvfrom_into = self.socket.recvfrom_into
+        buffer = self._buffer
+        view = self._view
+        batch = []
+        for _ in range(self.batch_size):
+            try:
+                nbytes, addr = recvfrom_into(buffer)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as err:
+                self.error_received(err)
+                break
+            batch.append((bytes(view[:nbytes]), addr))
+        if DEBUG: _logger.debug("    - received a batch of %d", len(batch))
+        # send the PDUs up to the client, one that cannot be handled does not
+        # take the rest of the batch with it
+        for data, addr in batch:
+            try:
+                self._response(PDU(data, source=addr))
+            except Exception as err:
+                self.loop.call_exception_handler({
+                    'message': 'exception handling a datagram from %r' % (addr,),
+                    'exception': err,
+                })
+
+    def send_request(self, pdu):
+        self._send_queue.append((pdu.pduData, pdu.pduDestination))
+        if not (self._send_scheduled or self._writing):
+            self._send_scheduled = True
+            self.loop.call_soon(self._write_ready)
+
+    def fan_out(self, data, destinations):
+        """Queue the same datagram for each of the socket addresses, they are sent together."""
+        if DEBUG: _logger.debug("fan_out %d octets to %d destinations", len(data), len(destinations))
+        self._send_queue.extend(zip(repeat(data), destinations))
+        if not (self._send_scheduled or self._writing):
+            self._send_scheduled = True
+            self.loop.call_soon(self._write_ready)
+
+    def _write_ready(self):
+        """Send what is queued, wait for the socket to be writable if it fills up."""
+        self._send_scheduled = False
+        if self.socket is None:
+            return
+        queue = self._send_queue
+        sendto = self.socket.sendto
+        while queue:
+            data, addr = queue[0]
+            try:
+                sendto(data, addr)
+            except (BlockingIOError, InterruptedError):
+                if not self._writing:
+                    self._writing = True
+                    self.loop.add_writer(self.socket.fileno(), self._write_ready)
+                return
+            except OSError as err:
+                self.error_received(err)
+            queue.popleft()
+        if self._writing:
+            self._writing = False
+            self.loop.remove_writer(self.socket.fileno())
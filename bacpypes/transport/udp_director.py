@@ -10,8 +10,8 @@ import logging
 from ..core import deferred
 from ..comm import PDU, Server, ServiceAccessPoint
 from .udp_actor import UDPActor
+from ..debugging import DEBUG
 
-DEBUG = True
 _logger = logging.getLogger(__name__)
 __all__ = ['UDPDirector']
 
@@ -19,9 +19,13 @@ __all__ = ['UDPDirector']
 class UDPDirector(asyncio.DatagramProtocol, Server, ServiceAccessPoint):
     """
     Network protocol for use with the AbstractEventLoop.create_datagram_endpoint() method.
+
+    There is an actor for each peer, they are dropped when they have been
+    idle for timeout seconds (if it is not zero) and the least recently
+    active quarter of them are dropped when there are more than max_peers.
     """
-    def __init__(self, timeout=0, actor_class=UDPActor, sid=None, sapID=None, **kwargs):
-        if DEBUG: _logger.debug('__init__ timeout=%s actorClass=%r sid=%s sapID=%s kwargs=%r', timeout, actor_class, sid, sapID, kwargs)
+    def __init__(self, timeout=0, actor_class=UDPActor, sid=None, sapID=None, max_peers=4096, **kwargs):
+        if DEBUG: _logger.debug('__init__ timeout=%s actorClass=%r sid=%s sapID=%s max_peers=%r kwargs=%r', timeout, actor_class, sid, sapID, max_peers, kwargs)
         Server.__init__(self, sid)
         ServiceAccessPoint.__init__(self, sapID)
         # check the actor class
@@ -30,9 +34,17 @@ class UDPDirector(asyncio.DatagramProtocol, Server, ServiceAccessPoint):
         self.actorClass = actor_class
         # start with an empty peer pool
         self.peers = {}
+        self.max_peers = max_peers
         self.transport = None
         self.timeout = timeout
 
+    @classmethod
+    async def create_endpoint(cls, **kwargs):
+        """Create a datagram endpoint with this class as the protocol and return the protocol."""
+        loop = asyncio.get_event_loop()
+        transport, protocol = await loop.create_datagram_endpoint(cls, **kwargs)
+        return protocol
+
     def connection_made(self, transport):
         """Called by the event loop."""
         self.transport = transport
@@ -68,6 +80,8 @@ class UDPDirector(asyncio.DatagramProtocol, Server, ServiceAccessPoint):
     def add_actor(self, actor):
         """Add an actor when a new one is connected."""
         if DEBUG: _logger.debug("add_actor %r", actor)
+        if self.max_peers and len(self.peers) >= self.max_peers:
+            self.trim_peers(self.max_peers * 3 // 4)
         self.peers[actor.peer] = actor
         # tell the ASE there is a new client
         if self.serviceElement:
@@ -81,6 +95,14 @@ class UDPDirector(asyncio.DatagramProtocol, Server, ServiceAccessPoint):
         if self.serviceElement:
             self.sap_request(del_actor=actor)
 
+    def trim_peers(self, count):
+        """Drop the least recently active actors until there are count left."""
+        if DEBUG: _logger.debug("trim_peers %r", count)
+        actors = sorted(self.peers.values(), key=lambda actor: actor.last_activity)
+        for actor in actors[:len(actors) - count]:
+            actor.close()
+            self.del_actor(actor)
+
     def actor_error(self, actor, error):
         if DEBUG: _logger.debug("actor_error %r %r", actor, error)
         # tell the ASE the actor had an error
@@ -98,6 +120,16 @@ class UDPDirector(asyncio.DatagramProtocol, Server, ServiceAccessPoint):
     def send_request(self, pdu):
         self.transport.sendto(pdu.pduData, addr=pdu.pduDestination)
 
+    def fan_out(self, data, destinations):
+        """
+        Send the same datagram to each of the socket addresses, these do not
+        go through the peer actors.
+        """
+        if DEBUG: _logger.debug("fan_out %d octets to %d destinations", len(data), len(destinations))
+        sendto = self.transport.sendto
+        for addr in destinations:
+            sendto(data, addr)
+
     def indication(self, pdu):
         """Client requests are queued for delivery."""
         if DEBUG: _logger.debug("indication %r", pdu)
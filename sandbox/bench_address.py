@@ -0,0 +1,47 @@
+#!/usr/bin/python
+
+"""
+bench_address
+
+Time what the UDP multiplexer does with the source of every datagram, turn
+the (host, port) tuple into an Address and compare it with a tuple, for a
+number of peers that each send a number of datagrams.  The first column
+builds a new Address every time, the second uses the interned addresses.
+
+    python sandbox/bench_address.py [--peers N] [--repeat N]
+"""
+
+import argparse
+import time
+
+from bacpypes.link import Address, intern_address, clear_address_cache
+
+
+def run(peers, repeat, make):
+    sources = [('10.%d.%d.%d' % (i >> 16 & 255, i >> 8 & 255, i & 255), 47808) for i in range(peers)]
+    ours = ('192.168.0.1', 47808)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for source in sources:
+            address = make(source)
+            if address == ours:
+                raise RuntimeError('from us')
+    return peers * repeat / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--peers', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    clear_address_cache()
+    fresh = run(args.peers, args.repeat, Address)
+    interned = run(args.peers, args.repeat, intern_address)
+    print(f'new Address  {fresh:10.0f} datagrams/s')
+    print(f'interned     {interned:10.0f} datagrams/s')
+    print(f'delta        {(interned / fresh - 1) * 100:+.1f} %')
+
+
+if __name__ == '__main__':
+    main()
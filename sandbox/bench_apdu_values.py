@@ -0,0 +1,101 @@
+#!/usr/bin/python
+
+"""
+bench_apdu_values
+
+Convert a decoded ReadPropertyMultiple-ACK to Python values with
+get_apdu_value() and with get_apdu_values(), as nested dicts and as columns,
+for a complete and for a lazy ACK, and report the time per value.  Every
+run starts from the encoded ACK so the decoding is part of the time.
+
+    python sandbox/bench_apdu_values.py [--results N]
+"""
+
+import argparse
+import timeit
+
+from bacpypes.link import PDU
+from bacpypes.primitivedata import CharacterString, Real, Unsigned
+from bacpypes.constructeddata import Any
+from bacpypes.basetypes import BinaryPV, StatusFlags
+from bacpypes.apdu import (
+    APDU, ReadPropertyMultipleACK, ReadAccessResult, ReadAccessResultElement, ReadAccessResultElementChoice,
+    ComplexAckPDU,
+)
+from bacpypes.apdu.lazy import LazyReadPropertyMultipleACK
+from bacpypes.apdu.util import get_apdu_value, get_apdu_values
+
+# the properties of each kind of object
+_objects = (
+    ('analogValue', (
+        ('presentValue', lambda i: Any(Real(float(i)))),
+        ('statusFlags', lambda i: Any(StatusFlags([0, 0, 0, 0]))),
+        ('objectName', lambda i: Any(CharacterString(f'av-{i}'))),
+    )),
+    ('binaryValue', (
+        ('presentValue', lambda i: Any(BinaryPV('active'))),
+        ('objectName', lambda i: Any(CharacterString(f'bv-{i}'))),
+    )),
+    ('multiStateValue', (
+        ('presentValue', lambda i: Any(Unsigned(i % 4 + 1))),
+        ('objectName', lambda i: Any(CharacterString(f'msv-{i}'))),
+    )),
+)
+
+
+def build_ack(result_count):
+    """Return the encoded ReadPropertyMultiple-ACK."""
+    results = []
+    for i in range(result_count):
+        object_type, properties = _objects[i % len(_objects)]
+        results.append(ReadAccessResult(
+            objectIdentifier=(object_type, i),
+            listOfResults=[
+                ReadAccessResultElement(
+                    propertyIdentifier=name,
+                    readResult=ReadAccessResultElementChoice(propertyValue=value(i)),
+                )
+                for name, value in properties
+            ],
+        ))
+    ack = ReadPropertyMultipleACK(listOfReadAccessResults=results)
+    ack.apduInvokeID = 1
+    apdu = APDU()
+    ack.encode(apdu)
+    pdu = PDU()
+    apdu.encode(pdu)
+    return bytes(pdu.pduData)
+
+
+def decode_ack(data, cls):
+    apdu = APDU()
+    apdu.decode(PDU(data))
+    xpdu = ComplexAckPDU()
+    xpdu.decode(apdu)
+    ack = cls()
+    ack.decode(xpdu)
+    return ack
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--results', type=int, default=600, help='results in the ACK')
+    args = parser.parse_args()
+
+    data = build_ack(args.results)
+    value_count = len(get_apdu_values(decode_ack(data, ReadPropertyMultipleACK), columns=True))
+
+    print(f'{value_count} values')
+    for label, func in (
+            ('get_apdu_value', lambda: get_apdu_value(decode_ack(data, ReadPropertyMultipleACK))),
+            ('values, dict', lambda: get_apdu_values(decode_ack(data, ReadPropertyMultipleACK))),
+            ('values, columns', lambda: get_apdu_values(decode_ack(data, ReadPropertyMultipleACK), columns=True)),
+            ('lazy, dict', lambda: get_apdu_values(decode_ack(data, LazyReadPropertyMultipleACK))),
+            ('lazy, columns', lambda: get_apdu_values(decode_ack(data, LazyReadPropertyMultipleACK), columns=True)),
+    ):
+        elapsed = min(timeit.repeat(func, number=5, repeat=5)) / 5
+        print(f'{label:18} {elapsed * 1e3:10.2f} ms {elapsed / value_count * 1e6:10.2f} us/value')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/python
+
+"""
+bench_atomic_codec
+
+Encode and decode the atomic values found in a typical ReadPropertyMultiple
+payload, once through the class helper and a Tag and once through the
+direct codec, and report the values per second.
+
+    python sandbox/bench_atomic_codec.py [--count N]
+"""
+
+import argparse
+import timeit
+
+from bacpypes.comm import PDUData
+from bacpypes.primitivedata import Tag, Boolean, CharacterString, Integer, ObjectIdentifier, Real, \
+    Unsigned, direct_codec, encode_tagged, decode_tagged
+from bacpypes.basetypes import EngineeringUnits, PropertyIdentifier
+
+# a value of each type with the context it has in a read access result, or
+# None when it is application tagged
+payload = [
+    (ObjectIdentifier, ('analogInput', 1), 0),
+    (PropertyIdentifier, 'presentValue', 2),
+    (Real, 72.5, None),
+    (PropertyIdentifier, 'units', 2),
+    (EngineeringUnits, 'degreesFahrenheit', None),
+    (PropertyIdentifier, 'objectName', 2),
+    (CharacterString, 'Zone Temperature', None),
+    (Unsigned, 1200, 3),
+    (Integer, -40, None),
+    (Boolean, True, None),
+]
+
+
+def helper_encode():
+    pdu = PDUData()
+    for cls, value, context in payload:
+        tag = Tag()
+        cls(value).encode(tag)
+        if context is not None:
+            tag = tag.app_to_context(context)
+        tag.encode(pdu)
+    return pdu.pduData
+
+
+def helper_decode(data):
+    pdu = PDUData(data)
+    values = []
+    for cls, value, context in payload:
+        tag = Tag(pdu)
+        if context is not None:
+            tag = tag.context_to_app(cls._app_tag)
+        values.append(cls(tag).value)
+    return values
+
+
+def direct_encode():
+    buff = bytearray()
+    for cls, value, context in payload:
+        encode_tagged(buff, cls, value, context)
+    return buff
+
+
+def direct_decode(data):
+    offset = 0
+    values = []
+    for cls, value, context in payload:
+        value, offset = decode_tagged(data, offset, cls, context)
+        values.append(value)
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=20000, help='payloads per run')
+    args = parser.parse_args()
+
+    for cls, value, context in payload:
+        assert direct_codec(cls), cls
+
+    data = bytes(direct_encode())
+    assert data == bytes(helper_encode())
+    assert direct_decode(data) == helper_decode(data)
+
+    for name, fn in (
+            ('helper encode', helper_encode),
+            ('direct encode', direct_encode),
+            ('helper decode', lambda: helper_decode(data)),
+            ('direct decode', lambda: direct_decode(data)),
+    ):
+        best = min(timeit.repeat(fn, number=args.count, repeat=5))
+        rate = args.count * len(payload) / best
+        print(f'{name:>14}: {rate:10.1f} values per second  {best / args.count / len(payload) * 1e6:6.2f} us each')
+
+
+if __name__ == '__main__':
+    main()
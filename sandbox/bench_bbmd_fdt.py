@@ -0,0 +1,96 @@
+#!/usr/bin/python
+
+"""
+bench_bbmd_fdt
+
+A BBMD with a few peers and hundreds of foreign devices, the way VPN
+connected sites register.  Times the foreign devices registering again,
+deleting and adding an entry, answering a Read-Foreign-Device-Table and
+forwarding a local broadcast, and the once a second housekeeping if there is
+any.  The BBMD is bound to a codec and a multiplexer whose director counts
+the datagrams instead of sending them.
+
+    python sandbox/bench_bbmd_fdt.py [--devices N] [--peers N]
+"""
+
+import argparse
+import asyncio
+import timeit
+
+from bacpypes.comm import PDU, bind
+from bacpypes.link import Address, LocalBroadcast
+from bacpypes.bvll import BIPBBMD, AnnexJCodec, UDPMultiplexer
+from bacpypes.bvll.bvlpdu import ReadForeignDeviceTable
+
+
+class Counter:
+    """Stand in for the UDPDirector under the multiplexer, count the datagrams."""
+
+    def __init__(self):
+        self.count = 0
+
+    def indication(self, pdu):
+        self.count += 1
+
+    def fan_out(self, data, destinations):
+        self.count += len(destinations)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, default=500)
+    parser.add_argument('--peers', type=int, default=8)
+    parser.add_argument('--count', type=int, default=100)
+    args = parser.parse_args()
+
+    bbmd = BIPBBMD(Address('10.0.0.1'))
+    mux = UDPMultiplexer(Address('10.0.0.1/24'))
+    counter = mux.protocol = Counter()
+    bind(bbmd, AnnexJCodec(), mux.annexJ)
+    bbmd.add_peer(Address('10.0.0.1'))
+    for i in range(args.peers):
+        bbmd.add_peer(Address(f'10.{i + 1}.0.1/24'))
+    devices = [Address(f'172.16.{i // 250}.{i % 250 + 1}') for i in range(args.devices)]
+    for addr in devices:
+        bbmd.register_foreign_device(addr, 300)
+
+    def register():
+        for addr in devices:
+            bbmd.register_foreign_device(addr, 300)
+
+    best = min(timeit.repeat(register, number=args.count // 10, repeat=5))
+    print(f'register again       {best / (args.count // 10) / len(devices) * 1e6:8.2f} us per device')
+
+    def churn():
+        # the devices in the middle of the table come and go
+        for addr in devices[len(devices) // 2:len(devices) // 2 + 50]:
+            bbmd.delete_foreign_device_table_entry(addr)
+            bbmd.register_foreign_device(addr, 300)
+
+    best = min(timeit.repeat(churn, number=args.count // 10, repeat=5))
+    print(f'delete and register  {best / (args.count // 10) / 50 * 1e6:8.2f} us per device')
+
+    request = ReadForeignDeviceTable()
+    request.pduSource = Address('10.0.0.99')
+    bbmd.confirmation(request)
+
+    best = min(timeit.repeat(lambda: bbmd.confirmation(request), number=args.count, repeat=5))
+    print(f'read FDT             {best / args.count * 1e6:8.1f} us')
+
+    pdu = PDU(b'\x01\x20\xff\xff\x00\xff\x10\x08', destination=LocalBroadcast())
+    counter.count = 0
+    bbmd.indication(pdu)
+    sent = counter.count
+
+    best = min(timeit.repeat(lambda: bbmd.indication(pdu), number=args.count, repeat=5))
+    print(f'local broadcast      {best / args.count * 1e6:8.1f} us, {sent} datagrams')
+
+    if hasattr(bbmd, 'process_task'):
+        best = min(timeit.repeat(bbmd.process_task, number=1, repeat=5))
+        print(f'housekeeping         {best * 1e6:8.1f} us every second')
+    else:
+        print(f'housekeeping         {"none":>8}, {len(bbmd._fd_timers)} timers on the wheel')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
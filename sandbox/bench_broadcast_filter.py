@@ -0,0 +1,91 @@
+#!/usr/bin/python
+
+"""
+bench_broadcast_filter
+
+A discovery storm seen by a BIPSimple node: every device on the site answers
+a global Who-Is with an I-Am, and each I-Am arrives three times, on the
+direct socket, on the broadcast socket and forwarded by a second BBMD.  A
+few chatty devices also send a stream of different ones.  The datagrams are
+pushed in at the bottom of the multiplexer with and without a
+BroadcastFilter and the NPDUs that reach the top of the BIP stack are
+counted.
+
+    python sandbox/bench_broadcast_filter.py [--devices N] [--repeat N]
+"""
+
+import argparse
+import time
+
+from bacpypes.comm import Client, PDU, bind
+from bacpypes.link import Address
+from bacpypes.bvll import BIPSimple, AnnexJCodec, UDPMultiplexer, BroadcastFilter
+
+
+class Counter(Client):
+    """Stand in for the network layer, count the NPDUs."""
+
+    def __init__(self):
+        Client.__init__(self)
+        self.count = 0
+
+    def confirmation(self, pdu):
+        self.count += 1
+
+
+def i_am(device, n=0):
+    """An unconfirmed I-Am NPDU, different for each device and each n."""
+    return bytes([0x01, 0x20, 0xFF, 0xFF, 0x00, 0xFF, 0x10, 0x00, 0xC4]) + \
+        (0x02000000 + device).to_bytes(4, 'big') + bytes([0x22, 0x05, 0xC4, 0x91, 0x03, 0x22]) + n.to_bytes(2, 'big')
+
+
+def storm(devices, repeat):
+    """Return (source, datagram, broadcast socket) triples in the order they arrive."""
+    peer = ('10.0.9.1', 47808)
+    packets = []
+    for i in range(devices):
+        source = (f'10.0.{i // 250}.{i % 250 + 2}', 47808)
+        # the chatty ones send something different a few times in a row
+        for n in range(repeat if i % 10 == 0 else 1):
+            npdu = i_am(i, n)
+            original = bytes([0x81, 0x0B]) + (len(npdu) + 4).to_bytes(2, 'big') + npdu
+            forwarded = bytes([0x81, 0x04]) + (len(npdu) + 10).to_bytes(2, 'big') + \
+                Address(source).addrAddr + npdu
+            packets.append((source, original, False))
+            packets.append((source, original, True))
+            packets.append((peer, forwarded, False))
+    return packets
+
+
+def run(packets, broadcast_filter):
+    mux = UDPMultiplexer(Address('10.0.0.1/16'))
+    mux.broadcast = object()
+    counter = Counter()
+    layers = [counter, BIPSimple(), AnnexJCodec()]
+    if broadcast_filter:
+        layers.append(broadcast_filter)
+    bind(*layers, mux.annexJ)
+    start = time.perf_counter()
+    for source, data, broadcast in packets:
+        mux.confirmation(mux.broadcast if broadcast else mux.direct, PDU(data, source=source))
+    return counter.count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    packets = storm(args.devices, args.repeat)
+    count, elapsed = run(packets, None)
+    print(f'no filter    {len(packets):6d} datagrams, {count:6d} NPDUs up, {elapsed * 1e3:7.1f} ms')
+    broadcast_filter = BroadcastFilter()
+    count, elapsed = run(packets, broadcast_filter)
+    print(f'with filter  {len(packets):6d} datagrams, {count:6d} NPDUs up, {elapsed * 1e3:7.1f} ms')
+    print(f'             passed {broadcast_filter.passed}, duplicates {broadcast_filter.duplicates}, '
+          f'rate limited {broadcast_filter.rate_limited}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/python
+
+"""
+bench_debug_logging
+
+Run ReadProperty requests between two BIPSimpleApplications on the loopback
+interface and report the packets per second, once with the debug logging
+switched off (the default) and once with it switched on but nothing listening,
+which is what the stack used to pay when modules shipped with DEBUG = True.
+The switch is read once when bacpypes is imported so each run is a separate
+process.
+
+    python sandbox/bench_debug_logging.py [--count N] [--window N]
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+
+async def run_child(count, window):
+    from bacpypes.app import BIPSimpleApplication
+    from bacpypes.apdu import ReadPropertyRequest
+    from bacpypes.link import Address
+    from bacpypes.local.device import LocalDeviceObject
+
+    def make_app(instance, address):
+        device = LocalDeviceObject(
+            objectName=f'bench-{instance}',
+            objectIdentifier=('device', instance),
+            maxApduLengthAccepted=1024,
+            segmentationSupported='noSegmentation',
+            vendorIdentifier=15,
+        )
+        return BIPSimpleApplication(device, Address(address))
+
+    server = make_app(1, '127.0.0.1:47820')
+    client = make_app(2, '127.0.0.1:47821')
+    client.window = window
+    await server.create_endoint()
+    await client.create_endoint()
+
+    server_address = Address('127.0.0.1:47820')
+
+    def make_request():
+        request = ReadPropertyRequest(objectIdentifier=('device', 1), propertyIdentifier='objectName')
+        request.pduDestination = server_address
+        return request
+
+    # warm up
+    await asyncio.gather(*(client.execute_request(make_request()) for _ in range(window)))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(client.execute_request(make_request()) for _ in range(count)))
+    elapsed = time.perf_counter() - start
+    assert all(result == 'bench-1' for result in results), results[:3]
+
+    client.close_socket()
+    server.close_socket()
+    # a request and an ack for each read
+    print(2 * count / elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=5000, help='requests per run')
+    parser.add_argument('--window', type=int, default=16, help='requests in flight')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per configuration, the best is reported')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(run_child(args.count, args.window))
+        return
+
+    rates = {}
+    for label, value in (('debug off', '0'), ('debug on', '1')):
+        env = dict(os.environ, BACPYPES_DEBUG=value)
+        best = 0.0
+        for _ in range(args.repeat):
+            output = subprocess.check_output(
+                [sys.executable, __file__, '--child', '--count', str(args.count), '--window', str(args.window)],
+                env=env,
+            )
+            best = max(best, float(output))
+        rates[label] = best
+        print(f'{label:10} {best:10.0f} packets/s')
+    delta = (rates['debug off'] - rates['debug on']) / rates['debug on'] * 100
+    print(f'{"delta":10} {delta:+10.1f} %')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/python
+
+"""
+bench_iocb
+
+One polling cycle of 100k reads.  First the IOCBs alone: how long it takes
+and how much memory it takes to make them, give them to a controller that
+completes them right away and wait for them.  Then the reads go to an
+ApplicationIOController whose network answers after a few milliseconds for
+most devices and after half a second for the slow ones, the results are
+collected with execute_requests() and, if there is one, with
+execute_requests_as_completed().  Reports when the first result was there
+and how long the results waited on average.
+
+    python sandbox/bench_iocb.py [--requests N] [--devices N] [--slow N]
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from bacpypes.link import Address
+from bacpypes.apdu import ReadPropertyRequest, ReadPropertyACK
+from bacpypes.constructeddata import Any
+from bacpypes.primitivedata import Real
+from bacpypes.comm import IOCB, IOController
+from bacpypes.app.app_io_controller import ApplicationIOController
+
+
+class Immediate(IOController):
+    """Complete every request right away."""
+
+    def _process_io(self, iocb):
+        self.complete_io(iocb, iocb.request)
+
+
+class Polling(ApplicationIOController):
+    """Stand in for the stack below the application, the devices answer after their delay."""
+
+    def __init__(self, delays):
+        ApplicationIOController.__init__(self)
+        self.delays = delays
+        self.invoke_ids = dict.fromkeys(delays, 0)
+        self.ack = ReadPropertyACK(
+            objectIdentifier=('analogValue', 1), propertyIdentifier='presentValue', propertyValue=Any(Real(1.5)),
+        )
+
+    def request(self, apdu):
+        destination = apdu.pduDestination
+        self.invoke_ids[destination] = apdu.apduInvokeID = (self.invoke_ids[destination] + 1) % 256
+        asyncio.get_running_loop().call_later(self.delays[apdu.pduDestination], self.answer, apdu)
+
+    def answer(self, apdu):
+        self.ack.apduInvokeID = apdu.apduInvokeID
+        self._app_complete(apdu.pduDestination, self.ack)
+
+
+def make_requests(addresses, count):
+    return [
+        ReadPropertyRequest(
+            objectIdentifier=('analogValue', i // len(addresses)), propertyIdentifier='presentValue',
+            destination=addresses[i % len(addresses)],
+        ) for i in range(count)
+    ]
+
+
+async def iocbs_alone(count):
+    controller = Immediate()
+    tracemalloc.start()
+    start = time.perf_counter()
+    iocbs = [IOCB(i) for i in range(count)]
+    for iocb in iocbs:
+        controller.request_io(iocb)
+    for iocb in iocbs:
+        await iocb.wait()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f'IOCBs alone          {elapsed * 1e3:7.1f} ms  {peak / count:6.0f} bytes each at the peak')
+
+
+async def polling(args, as_completed):
+    addresses = [Address(f'10.0.{i // 250}.{i % 250 + 1}') for i in range(args.devices)]
+    delays = {address: (0.5 if i < args.slow else 0.005) for i, address in enumerate(addresses)}
+    controller = Polling(delays)
+    controller.window = args.window
+    requests = make_requests(addresses, args.requests)
+    start = time.monotonic()
+    arrived = []
+    if as_completed:
+        async for index, result in controller.execute_requests_as_completed(requests, batch_reads=False):
+            arrived.append(time.monotonic() - start)
+    else:
+        await controller.execute_requests(requests, batch_reads=False)
+        arrived = [time.monotonic() - start] * len(requests)
+    name = 'as completed' if as_completed else 'in order'
+    print(f'{name:20} {arrived[-1]:7.2f} s  first result {arrived[0]:5.2f} s  '
+          f'mean wait {sum(arrived) / len(arrived):5.2f} s')
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100000)
+    parser.add_argument('--devices', type=int, default=1000)
+    parser.add_argument('--slow', type=int, default=100, help='devices that take half a second')
+    parser.add_argument('--window', type=int, default=4, help='requests in flight for each device')
+    args = parser.parse_args()
+
+    await iocbs_alone(args.requests)
+    await polling(args, False)
+    if hasattr(ApplicationIOController, 'execute_requests_as_completed'):
+        await polling(args, True)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
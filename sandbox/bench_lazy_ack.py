@@ -0,0 +1,107 @@
+#!/usr/bin/python
+
+"""
+bench_lazy_ack
+
+Decode a large ReadPropertyMultiple-ACK three ways and report the time of
+each: the complete decode followed by get_apdu_value(), the lazy ACK asked
+for a few values, and the lazy ACK iterated over all of its values.
+
+    python sandbox/bench_lazy_ack.py [--results N] [--lookups N]
+"""
+
+import argparse
+import timeit
+
+from bacpypes.link import PDU
+from bacpypes.primitivedata import CharacterString, Real
+from bacpypes.constructeddata import Any
+from bacpypes.basetypes import StatusFlags
+from bacpypes.apdu import (
+    APDU, ReadPropertyMultipleACK, ReadAccessResult, ReadAccessResultElement, ReadAccessResultElementChoice,
+    ComplexAckPDU,
+)
+from bacpypes.apdu.lazy import LazyReadPropertyMultipleACK
+from bacpypes.apdu.util import get_apdu_value
+
+_values = (
+    ('presentValue', lambda i: Any(Real(float(i)))),
+    ('statusFlags', lambda i: Any(StatusFlags([0, 0, 0, 0]))),
+    ('objectName', lambda i: Any(CharacterString(f'point-{i}'))),
+)
+
+
+def build_ack(result_count):
+    """Return the encoded ReadPropertyMultiple-ACK."""
+    results = [
+        ReadAccessResult(
+            objectIdentifier=('analogValue', i),
+            listOfResults=[
+                ReadAccessResultElement(
+                    propertyIdentifier=name,
+                    readResult=ReadAccessResultElementChoice(propertyValue=value(i)),
+                )
+                for name, value in _values
+            ],
+        )
+        for i in range(result_count)
+    ]
+    ack = ReadPropertyMultipleACK(listOfReadAccessResults=results)
+    ack.apduInvokeID = 1
+    apdu = APDU()
+    ack.encode(apdu)
+    pdu = PDU()
+    apdu.encode(pdu)
+    return bytes(pdu.pduData)
+
+
+def _decode(data, cls):
+    apdu = APDU()
+    apdu.decode(PDU(data))
+    xpdu = ComplexAckPDU()
+    xpdu.decode(apdu)
+    ack = cls()
+    ack.decode(xpdu)
+    return ack
+
+
+def full_decode(data):
+    return get_apdu_value(_decode(data, ReadPropertyMultipleACK))
+
+
+def lazy_lookup(data, keys):
+    ack = _decode(data, LazyReadPropertyMultipleACK)
+    return [ack.get_value(*key) for key in keys]
+
+
+def lazy_iterate(data):
+    return [value for _, _, _, value in _decode(data, LazyReadPropertyMultipleACK)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--results', type=int, default=500, help='results in the ACK')
+    parser.add_argument('--lookups', type=int, default=5, help='values asked for from the lazy ACK')
+    args = parser.parse_args()
+
+    data = build_ack(args.results)
+    step = max(1, args.results // args.lookups)
+    keys = [(('analogValue', i), 'presentValue', None) for i in range(0, args.results, step)][:args.lookups]
+
+    # the lazy values are the same as the complete ones
+    values = full_decode(data)
+    assert lazy_lookup(data, keys) == [values['%s%d' % key[0]][key[1]] for key in keys]
+    assert len(lazy_iterate(data)) == args.results * len(_values)
+
+    print(f'{len(data)} octets, {args.results} results of {len(_values)} properties')
+    for label, func in (
+            ('complete decode', lambda: full_decode(data)),
+            (f'lazy, {len(keys)} values', lambda: lazy_lookup(data, keys)),
+            ('lazy, all values', lambda: lazy_iterate(data)),
+    ):
+        elapsed = min(timeit.repeat(func, number=5, repeat=5)) / 5
+        print(f'{label:20} {elapsed * 1e3:10.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
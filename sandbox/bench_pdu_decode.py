@@ -0,0 +1,81 @@
+#!/usr/bin/python
+
+"""
+bench_pdu_decode
+
+Decode full size (1476 octet) ReadPropertyMultiple-ACK packets from raw
+octets, first to a tag list and then all the way to the sequence, and report
+the packets per second.  Useful for comparing PDUData read strategies.
+
+    python sandbox/bench_pdu_decode.py [--count N]
+"""
+
+import argparse
+import timeit
+
+from bacpypes.link import PDU
+from bacpypes.primitivedata import Real, TagList
+from bacpypes.constructeddata import Any
+from bacpypes.apdu import (
+    APDU, ReadPropertyMultipleACK, ReadAccessResult, ReadAccessResultElement, ReadAccessResultElementChoice,
+)
+
+MAX_APDU = 1476
+
+
+def build_rpm_ack():
+    """Build the largest ReadPropertyMultiple-ACK that fits in MAX_APDU."""
+    results = []
+    last = None
+    while True:
+        results.append(ReadAccessResult(
+            objectIdentifier=('analogValue', len(results)),
+            listOfResults=[
+                ReadAccessResultElement(
+                    propertyIdentifier='presentValue',
+                    readResult=ReadAccessResultElementChoice(propertyValue=Any(Real(float(len(results))))),
+                ),
+            ],
+        ))
+        request = ReadPropertyMultipleACK(listOfReadAccessResults=results)
+        request.apduInvokeID = 1
+        apdu = APDU()
+        request.encode(apdu)
+        pdu = PDU()
+        apdu.encode(pdu)
+        data = bytes(pdu.pduData)
+        if len(data) > MAX_APDU:
+            return last
+        last = data
+
+
+def decode_tags(data):
+    apdu = APDU()
+    apdu.decode(PDU(data))
+    return TagList(apdu)
+
+
+def decode_ack(data):
+    apdu = APDU()
+    apdu.decode(PDU(data))
+    ack = ReadPropertyMultipleACK()
+    ack.decode(apdu)
+    return ack
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=200, help='packets per run')
+    args = parser.parse_args()
+
+    data = build_rpm_ack()
+    ack = decode_ack(data)
+    print(f'packet: {len(data)} octets, {len(ack.listOfReadAccessResults)} results')
+
+    for name, fn in (('tag list', decode_tags), ('rpm ack', decode_ack)):
+        best = min(timeit.repeat(lambda: fn(data), number=args.count, repeat=5))
+        print(f'{name:>10}: {args.count / best:10.1f} packets/s  {best / args.count * 1e6:8.1f} us/packet')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/python
+
+"""
+bench_pending_routes
+
+Send ReadProperty requests to a device on a network nobody answers for, the
+way an application keeps polling a device behind a router that is down.  A
+request is sent every --period seconds for --seconds, through the state
+machine access point and the network service access point.  Reports how long
+each request took to fail, how many Who-Is-Router-To-Network requests were
+broadcast and how many NPDUs are still waiting at the end.
+
+    python sandbox/bench_pending_routes.py [--seconds N] [--period N]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from bacpypes.comm import ApplicationServiceElement, Server, bind
+from bacpypes.link import Address, RemoteStation
+from bacpypes.apdu import ConfirmedRequestPDU, ReadPropertyRequest, AbortPDU
+from bacpypes.app.deviceinfo import DeviceInfoCache
+from bacpypes.app.state_machine_ap import StateMachineAccessPoint
+from bacpypes.network import NetworkServiceAccessPoint
+
+
+class Link(Server):
+    """Stand in for the BIP stack, count the Who-Is-Router-To-Network requests."""
+
+    def __init__(self):
+        Server.__init__(self)
+        self.who_is_router = 0
+
+    def indication(self, pdu):
+        # network layer message type 0x00 after the version and control octets
+        if (pdu.pduData[1] & 0x80) and (pdu.pduData[-3] == 0x00):
+            self.who_is_router += 1
+
+
+class Element(ApplicationServiceElement):
+    """Stand in for the application, time the requests until they fail."""
+
+    def __init__(self):
+        ApplicationServiceElement.__init__(self)
+        self.started = {}
+        self.failed = []
+
+    def confirmation(self, apdu):
+        start = self.started.pop(apdu.apduInvokeID)
+        if isinstance(apdu, AbortPDU):
+            self.failed.append(time.monotonic() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=20.0)
+    parser.add_argument('--period', type=float, default=0.1)
+    args = parser.parse_args()
+
+    element = Element()
+    smap = StateMachineAccessPoint(device_info_cache=DeviceInfoCache())
+    nsap = NetworkServiceAccessPoint()
+    link = Link()
+    bind(element, smap, nsap)
+    nsap.bind(link, address=Address('10.0.0.1'))
+
+    destination = RemoteStation(5, 3)
+    end = time.monotonic() + args.seconds
+    while time.monotonic() < end:
+        request = ReadPropertyRequest(
+            objectIdentifier=('analogValue', 1), propertyIdentifier='presentValue', destination=destination,
+        )
+        request.apduMaxSegs = 0
+        request.apduMaxResp = 5
+        xpdu = ConfirmedRequestPDU()
+        request.encode(xpdu)
+        smap.sap_indication(xpdu)
+        element.started[xpdu.apduInvokeID] = time.monotonic()
+        await asyncio.sleep(args.period)
+    await asyncio.sleep(4)
+
+    print(f'requests          {len(element.failed) + len(element.started):8d}')
+    print(f'aborted           {len(element.failed):8d}')
+    if element.failed:
+        print(f'time to fail      {statistics.median(element.failed):8.3f} s median, {max(element.failed):.3f} s max')
+    print(f'who-is-router     {link.who_is_router:8d}')
+    print(f'still waiting     {sum(len(p.npdus) for p in nsap.pending_routes.networks.values()):8d}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
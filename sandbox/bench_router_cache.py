@@ -0,0 +1,91 @@
+#!/usr/bin/python
+
+"""
+bench_router_cache
+
+A campus sized routing table: routers on a few directly connected networks
+with 800 destination networks behind them, and one big router announcing 500
+networks at once.  Times the I-Am-Router-To-Network updates that announce
+networks the cache already has, the ones that move networks to another
+router, looking up a path, and dropping all of the routers on one network.
+
+    python sandbox/bench_router_cache.py [--routers N] [--networks N]
+"""
+
+import argparse
+import time
+import timeit
+
+from bacpypes.link import Address
+from bacpypes.network import RouterInfoCache
+
+
+def build_cache(routers, networks, snets=4):
+    """Return a filled cache and the (snet, address, dnets) of each router."""
+    cache = RouterInfoCache()
+    table = []
+    per_router = networks // routers
+    for i in range(routers):
+        address = Address(f'10.0.{i % snets}.{i + 10}')
+        dnets = list(range(1000 + i * per_router, 1000 + (i + 1) * per_router))
+        table.append((i % snets + 1, address, dnets))
+        cache.update_router_info(i % snets + 1, address, dnets)
+    big = (1, Address('10.0.0.250'), list(range(10000, 10500)))
+    table.append(big)
+    cache.update_router_info(*big)
+    return cache, table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--routers', type=int, default=40)
+    parser.add_argument('--networks', type=int, default=800)
+    parser.add_argument('--count', type=int, default=200)
+    args = parser.parse_args()
+
+    cache, table = build_cache(args.routers, args.networks)
+
+    def announce():
+        for snet, address, dnets in table:
+            cache.update_router_info(snet, address, dnets)
+
+    best = min(timeit.repeat(announce, number=args.count, repeat=5))
+    print(f'announce again     {best / args.count * 1e6:10.1f} us for all {len(table)} routers')
+
+    # two routers on the same network trade the big list back and forth
+    other = Address('10.0.0.251')
+
+    def move():
+        cache.update_router_info(1, other, table[-1][2])
+        cache.update_router_info(1, table[-1][1], table[-1][2])
+
+    best = min(timeit.repeat(move, number=args.count, repeat=5))
+    print(f'move 500 networks  {best / args.count / 2 * 1e6:10.1f} us')
+
+    dnets = [dnet for _, _, dnets in table for dnet in dnets]
+
+    def lookup():
+        for dnet in dnets:
+            cache.get_router_info(dnet)
+
+    best = min(timeit.repeat(lookup, number=args.count, repeat=5))
+    print(f'lookup             {best / args.count / len(dnets) * 1e9:10.1f} ns')
+
+    def delete():
+        """Return the seconds to drop the routers on network 1, the caches
+        are built before the clock starts."""
+        caches = [build_cache(args.routers, args.networks)[0] for _ in range(10)]
+        start = time.perf_counter()
+        for cache in caches:
+            cache.delete_router_info(1)
+        return (time.perf_counter() - start) / len(caches), len(caches[-1].networks)
+
+    try:
+        best, left = min(delete() for _ in range(3))
+        print(f'delete snet        {best * 1e6:10.1f} us, {left} networks left')
+    except RuntimeError as err:
+        print(f'delete snet        failed: {err}')
+
+
+if __name__ == '__main__':
+    main()
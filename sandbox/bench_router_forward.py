@@ -0,0 +1,87 @@
+#!/usr/bin/python
+
+"""
+bench_router_forward
+
+The samples/IP2IPRouter.py topology without the sockets: a network service
+access point bound to two BIP stacks, each on its own UDP multiplexer, with
+the directors replaced by counters.  Datagrams from a station on the first
+network addressed to a station on the second network, a remote broadcast
+and a global broadcast are pushed in at the bottom of the first stack and
+the forwarded datagrams are counted at the bottom of the second.  Reports
+forwarded packets per second for a few payload sizes.
+
+    python sandbox/bench_router_forward.py [--count N]
+"""
+
+import argparse
+import timeit
+
+from bacpypes.comm import PDU, bind
+from bacpypes.bvll import BIPSimple, AnnexJCodec, UDPMultiplexer
+from bacpypes.network import NetworkServiceAccessPoint, NetworkServiceElement
+
+SOURCE = ('10.0.1.2', 47808)
+
+
+class Director:
+    """Stand in for the UDPDirector under a multiplexer, count the datagrams."""
+
+    def __init__(self):
+        self.count = 0
+
+    def indication(self, pdu):
+        self.count += 1
+
+
+def build_router():
+    nsap = NetworkServiceAccessPoint()
+    nse = NetworkServiceElement()
+    bind(nse, nsap)
+    muxes = []
+    for net, addr in ((1, '10.0.1.1/24'), (2, '10.0.2.1/24')):
+        bip = BIPSimple()
+        annexj = AnnexJCodec()
+        mux = UDPMultiplexer(addr)
+        mux.protocol = Director()
+        bind(bip, annexj, mux.annexJ)
+        nsap.bind(bip, net, addr if net == 1 else None)
+        muxes.append(mux)
+    return muxes
+
+
+def build_datagram(dadr, payload_size):
+    """An NPDU with a DADR and an application layer payload in an Original-Unicast-NPDU."""
+    if dadr == 'station':
+        dest = bytes([0x00, 0x02, 0x06, 10, 0, 2, 9, 0xBA, 0xC0])
+    elif dadr == 'broadcast':
+        dest = bytes([0x00, 0x02, 0x00])
+    else:
+        dest = bytes([0xFF, 0xFF, 0x00])
+    npdu = bytes([0x01, 0x20]) + dest + bytes([0xFF]) + bytes(payload_size)
+    return bytes([0x81, 0x0A]) + (len(npdu) + 4).to_bytes(2, 'big') + npdu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=5000, help='packets per run')
+    args = parser.parse_args()
+
+    mux1, mux2 = build_router()
+    for dadr in ('station', 'broadcast', 'global'):
+        for payload_size in (20, 480):
+            data = build_datagram(dadr, payload_size)
+
+            def receive():
+                mux1.confirmation(mux1.direct, PDU(data, source=SOURCE))
+
+            mux2.protocol.count = 0
+            receive()
+            assert mux2.protocol.count == 1, 'packet was not forwarded'
+
+            best = min(timeit.repeat(receive, number=args.count, repeat=5))
+            print(f'{dadr:9} {payload_size:4d} octets: {args.count / best:10.1f} packets/s')
+
+
+if __name__ == '__main__':
+    main()
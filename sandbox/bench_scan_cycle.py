@@ -0,0 +1,108 @@
+#!/usr/bin/python
+
+"""
+bench_scan_cycle
+
+Scan a site where some devices are offline: every cycle reads a property
+from each device, a few at a time for each one like the IOQController
+does, and the cycle is over when every read has an answer or has failed.
+The fast devices answer after a few milliseconds, the ones behind MS/TP
+after a few hundred, and the offline ones never do.  Reports how long each
+cycle took and how many reads failed.
+
+    python sandbox/bench_scan_cycle.py [--devices N] [--offline N] [--cycles N]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from bacpypes.comm import ApplicationServiceElement, Server, bind
+from bacpypes.link import Address
+from bacpypes.apdu import ConfirmedRequestPDU, ReadPropertyRequest, SimpleAckPDU, AbortPDU
+from bacpypes.app.deviceinfo import DeviceInfoCache
+from bacpypes.app.state_machine_ap import StateMachineAccessPoint
+
+
+class Network(Server):
+    """Stand in for the network layer, the devices answer after their delay."""
+
+    def __init__(self, delays):
+        Server.__init__(self)
+        self.delays = delays
+
+    def indication(self, apdu):
+        delay = self.delays[apdu.pduDestination]
+        if delay is None:
+            return
+        ack = SimpleAckPDU(choice=apdu.apduService, invokeID=apdu.apduInvokeID)
+        ack.pduSource = apdu.pduDestination
+        asyncio.get_event_loop().call_later(delay * random.uniform(0.8, 1.2), self.response, ack)
+
+
+class Element(ApplicationServiceElement):
+    """Stand in for the application, wake up the read waiting for each answer."""
+
+    def __init__(self):
+        ApplicationServiceElement.__init__(self)
+        self.waiting = {}
+
+    def confirmation(self, apdu):
+        self.waiting.pop((apdu.pduSource, apdu.apduInvokeID)).set_result(apdu)
+
+
+async def read(element, smap, address, reads):
+    """Read from one device, one after the other."""
+    failed = 0
+    for _ in range(reads):
+        request = ReadPropertyRequest(
+            objectIdentifier=('analogValue', 1), propertyIdentifier='presentValue', destination=address,
+        )
+        request.apduMaxSegs = 0
+        request.apduMaxResp = 5
+        xpdu = ConfirmedRequestPDU()
+        request.encode(xpdu)
+        xpdu.apduInvokeID = smap.get_next_invoke_id(address)
+        future = element.waiting[(address, xpdu.apduInvokeID)] = asyncio.get_event_loop().create_future()
+        smap.sap_indication(xpdu)
+        if isinstance(await future, AbortPDU):
+            failed += 1
+    return failed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--devices', type=int, default=100)
+    parser.add_argument('--offline', type=int, default=10)
+    parser.add_argument('--reads', type=int, default=5, help='reads from each device each cycle')
+    parser.add_argument('--cycles', type=int, default=4)
+    parser.add_argument('--offline-after', type=int, default=2, help='failed transactions before a device is offline')
+    args = parser.parse_args()
+
+    delays = {}
+    for i in range(args.devices):
+        address = Address(f'10.0.0.{i + 1}')
+        if i < args.offline:
+            delays[address] = None
+        elif i % 4 == 0:
+            delays[address] = 0.4
+        else:
+            delays[address] = 0.01
+
+    element = Element()
+    if hasattr(DeviceInfoCache, 'get_timing'):
+        cache = DeviceInfoCache(offline_after=args.offline_after)
+    else:
+        cache = DeviceInfoCache()
+    smap = StateMachineAccessPoint(device_info_cache=cache)
+    bind(element, smap, Network(delays))
+
+    for cycle in range(args.cycles):
+        start = time.monotonic()
+        failed = await asyncio.gather(*(read(element, smap, address, args.reads) for address in delays))
+        print(f'cycle {cycle + 1}  {time.monotonic() - start:7.2f} s  {sum(failed):4d} reads failed')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/python
+
+"""
+bench_segmentation
+
+Read a large value, like an objectList or a logBuffer, that comes back as a
+segmented ComplexAck with hundreds of segments.  Two state machine access
+points are connected by a link with a one way delay that loses some of the
+packets, every APDU is encoded and decoded on the way.  Reports how long
+each read took and how many packets went over the link.
+
+    python sandbox/bench_segmentation.py [--segments N] [--delay S] [--loss P]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from bacpypes.comm import ApplicationServiceElement, Server, bind
+from bacpypes.link import Address, PDU
+from bacpypes.apdu import APDU, ConfirmedRequestPDU, ComplexAckPDU, AbortPDU
+from bacpypes.app.deviceinfo import DeviceInfoCache
+from bacpypes.app.state_machine_ap import StateMachineAccessPoint
+
+
+class Endpoint(Server):
+    """Stand in for the network layer, send the encoded APDUs to the peer."""
+
+    def __init__(self, address, delay, loss):
+        Server.__init__(self)
+        self.address = address
+        self.delay = delay
+        self.loss = loss
+        self.peer = None
+        self.sent = 0
+        self.lost = 0
+
+    def indication(self, apdu):
+        xpdu = APDU()
+        apdu.encode(xpdu)
+        wire = PDU()
+        xpdu.encode(wire)
+        self.sent += 1
+        if random.random() < self.loss:
+            self.lost += 1
+            return
+        asyncio.get_event_loop().call_later(self.delay, self.peer.receive, bytes(wire.pduData), self.address)
+
+    def receive(self, data, source):
+        apdu = APDU()
+        apdu.decode(PDU(data, source=source))
+        self.response(apdu)
+
+
+class Client(ApplicationServiceElement):
+    """Wake up the read waiting for the answer."""
+
+    def __init__(self):
+        ApplicationServiceElement.__init__(self)
+        self.future = None
+
+    def confirmation(self, apdu):
+        self.future.set_result(apdu)
+
+
+class Device(ApplicationServiceElement):
+    """Answer every request with a big ComplexAck."""
+
+    def __init__(self, size):
+        ApplicationServiceElement.__init__(self)
+        self.value = bytes(random.getrandbits(8) for _ in range(size))
+
+    def indication(self, apdu):
+        ack = ComplexAckPDU(apdu.apduService, apdu.apduInvokeID)
+        ack.put_data(self.value)
+        ack.pduDestination = apdu.pduSource
+        self.response(ack)
+
+
+def build(segments, delay, loss):
+    client_address, device_address = Address('10.0.0.1'), Address('10.0.0.2')
+    client_end = Endpoint(client_address, delay, loss)
+    device_end = Endpoint(device_address, delay, loss)
+    client_end.peer, device_end.peer = device_end, client_end
+
+    client = Client()
+    client_smap = StateMachineAccessPoint(device_info_cache=DeviceInfoCache())
+    client_smap.segmentationSupported = 'segmentedBoth'
+    client_smap.maxSegmentsAccepted = 64 if segments <= 64 else 1000
+    bind(client, client_smap, client_end)
+
+    device = Device(segments * client_smap.maxApduLengthAccepted - 100)
+    device_smap = StateMachineAccessPoint(device_info_cache=DeviceInfoCache())
+    device_smap.segmentationSupported = 'segmentedBoth'
+    bind(device, device_smap, device_end)
+    return client, client_smap, device, (client_end, device_end), device_address
+
+
+async def read(client, smap, address):
+    request = ConfirmedRequestPDU(12)
+    request.pduDestination = address
+    request.put_data(b'\x0c\x02\x00\x00\x01\x19\x4c')
+    client.future = asyncio.get_event_loop().create_future()
+    smap.sap_indication(request)
+    return await client.future
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--segments', type=int, default=400)
+    parser.add_argument('--delay', type=float, default=0.02, help='one way delay in seconds')
+    parser.add_argument('--loss', type=float, default=0.01, help='chance a packet is lost')
+    parser.add_argument('--reads', type=int, default=4)
+    args = parser.parse_args()
+    random.seed(1)
+
+    client, smap, device, ends, address = build(args.segments, args.delay, args.loss)
+    for n in range(args.reads):
+        for end in ends:
+            end.sent = end.lost = 0
+        start = time.monotonic()
+        apdu = await read(client, smap, address)
+        elapsed = time.monotonic() - start
+        if isinstance(apdu, AbortPDU):
+            result = f'aborted {apdu.apduAbortRejectReason}'
+        else:
+            result = 'ok' if bytes(apdu.pduData) == device.value else 'wrong value'
+        print(f'read {n + 1}  {elapsed:7.2f} s  {ends[1].sent:5d} segments sent  '
+              f'{ends[0].sent:4d} acks  {ends[0].lost + ends[1].lost:3d} lost  {result}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
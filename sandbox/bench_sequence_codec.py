@@ -0,0 +1,75 @@
+#!/usr/bin/python
+
+"""
+bench_sequence_codec
+
+Encode and decode ReadAccessResult and PropertyValue sequences to and from
+tag lists, the constructed data work that dominates a busy gateway, and
+report the sequences per second.
+
+    python sandbox/bench_sequence_codec.py [--count N]
+"""
+
+import argparse
+import timeit
+
+from bacpypes.primitivedata import Real, Unsigned, TagList
+from bacpypes.constructeddata import Any
+from bacpypes.basetypes import PropertyValue, StatusFlags
+from bacpypes.apdu import ReadAccessResult, ReadAccessResultElement, ReadAccessResultElementChoice
+
+
+def build_read_access_result():
+    return ReadAccessResult(
+        objectIdentifier=('analogValue', 1),
+        listOfResults=[
+            ReadAccessResultElement(
+                propertyIdentifier='presentValue',
+                readResult=ReadAccessResultElementChoice(propertyValue=Any(Real(72.5))),
+            ),
+            ReadAccessResultElement(
+                propertyIdentifier='statusFlags',
+                readResult=ReadAccessResultElementChoice(propertyValue=Any(StatusFlags([0, 0, 0, 0]))),
+            ),
+            ReadAccessResultElement(
+                propertyIdentifier='priorityArray',
+                propertyArrayIndex=8,
+                readResult=ReadAccessResultElementChoice(propertyValue=Any(Unsigned(3))),
+            ),
+        ],
+    )
+
+
+def build_property_value():
+    return PropertyValue(propertyIdentifier='presentValue', value=Any(Real(72.5)), priority=8)
+
+
+def encode(value):
+    tag_list = TagList()
+    value.encode(tag_list)
+    return tag_list
+
+
+def decode(cls, tags):
+    value = cls()
+    value.decode(TagList(list(tags)))
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=20000, help='sequences per run')
+    args = parser.parse_args()
+
+    for cls, build in ((ReadAccessResult, build_read_access_result), (PropertyValue, build_property_value)):
+        value = build()
+        tags = encode(value).tagList
+
+        for name, fn in (('encode', lambda: encode(value)), ('decode', lambda: decode(cls, tags))):
+            best = min(timeit.repeat(fn, number=args.count, repeat=5))
+            print(f'{cls.__name__:>16} {name}: {args.count / best:10.1f} per second  '
+                  f'{best / args.count * 1e6:6.2f} us each')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/python
+
+"""
+bench_stack_decode
+
+Push raw BACnet/IP datagrams up through the real receive path, starting at
+the UDP multiplexer and going through the Annex J codec, the BIP node and the
+network service access point, then decode the APDU the way the state machine
+and application service access points do.  Reports packets per second for a
+single core.
+
+    python sandbox/bench_stack_decode.py [--count N] [--results N]
+"""
+
+import argparse
+import timeit
+
+from bacpypes.comm import PDU, Client, bind
+from bacpypes.link import PDU as LinkPDU
+from bacpypes.primitivedata import Real
+from bacpypes.constructeddata import Any
+from bacpypes.bvll import BIPSimple, AnnexJCodec, UDPMultiplexer
+from bacpypes.network import NetworkServiceAccessPoint
+from bacpypes.apdu import (
+    APDU, ReadPropertyMultipleACK, ReadAccessResult, ReadAccessResultElement, ReadAccessResultElementChoice,
+    apdu_types, complex_ack_types,
+)
+
+SOURCE = ('10.0.0.2', 47808)
+
+
+class DecodingSink(Client):
+    """Stand in for the state machine and application service access points."""
+
+    def __init__(self):
+        Client.__init__(self)
+        self.count = 0
+
+    def confirmation(self, pdu):
+        apdu = apdu_types[pdu.apduType]()
+        apdu.decode(pdu)
+        xpdu = complex_ack_types[apdu.apduService]()
+        xpdu.decode(apdu)
+        self.count += 1
+
+
+def build_datagram(result_count):
+    """Build a ReadPropertyMultiple-ACK wrapped in an NPDU and BVLL header."""
+    results = [
+        ReadAccessResult(
+            objectIdentifier=('analogValue', i),
+            listOfResults=[
+                ReadAccessResultElement(
+                    propertyIdentifier='presentValue',
+                    readResult=ReadAccessResultElementChoice(propertyValue=Any(Real(float(i)))),
+                ),
+            ],
+        )
+        for i in range(result_count)
+    ]
+    ack = ReadPropertyMultipleACK(listOfReadAccessResults=results)
+    ack.apduInvokeID = 1
+    apdu = APDU()
+    ack.encode(apdu)
+    pdu = LinkPDU()
+    apdu.encode(pdu)
+    npdu = bytes([0x01, 0x00]) + bytes(pdu.pduData)
+    return bytes([0x81, 0x0A]) + (len(npdu) + 4).to_bytes(2, 'big') + npdu
+
+
+def build_stack():
+    sink = DecodingSink()
+    nsap = NetworkServiceAccessPoint()
+    bind(sink, nsap)
+    bip = BIPSimple()
+    annexj = AnnexJCodec()
+    mux = UDPMultiplexer('10.0.0.1/24')
+    bind(bip, annexj, mux.annexJ)
+    nsap.bind(bip)
+    return mux, sink
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=2000, help='packets per run')
+    args = parser.parse_args()
+
+    mux, sink = build_stack()
+
+    for result_count in (1, 20, 90):
+        data = build_datagram(result_count)
+
+        def receive():
+            # this is what UDPDirector.datagram_received does
+            mux.confirmation(mux.direct, PDU(data, source=SOURCE))
+
+        sink.count = 0
+        receive()
+        assert sink.count == 1, 'packet was not decoded'
+
+        count = max(args.count // result_count, 20)
+        best = min(timeit.repeat(receive, number=count, repeat=5))
+        print(f'{len(data):5d} octets, {result_count:3d} results: '
+              f'{count / best:10.1f} packets/s  {best / count * 1e6:8.1f} us/packet')
+
+
+if __name__ == '__main__':
+    main()
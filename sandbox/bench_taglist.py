@@ -0,0 +1,97 @@
+#!/usr/bin/python
+
+"""
+bench_taglist
+
+Decode ReadPropertyMultiple-ACKs with a growing number of results, each with
+a few properties, and report the time per result.  With a tag list that is
+read from the front in constant time the time per result stays flat as the
+ACK grows.
+
+    python sandbox/bench_taglist.py [--results N ...] [--properties N]
+"""
+
+import argparse
+import timeit
+
+from bacpypes.link import PDU
+from bacpypes.primitivedata import CharacterString, Real, TagList
+from bacpypes.constructeddata import Any
+from bacpypes.basetypes import StatusFlags
+from bacpypes.apdu import (
+    APDU, ReadPropertyMultipleACK, ReadAccessResult, ReadAccessResultElement, ReadAccessResultElementChoice,
+    ComplexAckPDU,
+)
+
+_values = (
+    ('presentValue', lambda i: Any(Real(float(i)))),
+    ('statusFlags', lambda i: Any(StatusFlags([0, 0, 0, 0]))),
+    ('objectName', lambda i: Any(CharacterString(f'point-{i}'))),
+    ('description', lambda i: Any(CharacterString('a description of the point'))),
+)
+
+
+def build_ack(result_count, property_count):
+    """Return the encoded ReadPropertyMultiple-ACK."""
+    results = [
+        ReadAccessResult(
+            objectIdentifier=('analogValue', i),
+            listOfResults=[
+                ReadAccessResultElement(
+                    propertyIdentifier=name,
+                    readResult=ReadAccessResultElementChoice(propertyValue=value(i)),
+                )
+                for name, value in _values[:property_count]
+            ],
+        )
+        for i in range(result_count)
+    ]
+    ack = ReadPropertyMultipleACK(listOfReadAccessResults=results)
+    ack.apduInvokeID = 1
+    apdu = APDU()
+    ack.encode(apdu)
+    pdu = PDU()
+    apdu.encode(pdu)
+    return bytes(pdu.pduData)
+
+
+def _complex_ack(data):
+    """Return the ComplexAckPDU of the encoded ACK."""
+    apdu = APDU()
+    apdu.decode(PDU(data))
+    xpdu = ComplexAckPDU()
+    xpdu.decode(apdu)
+    return xpdu
+
+
+def decode_ack(data):
+    apdu = _complex_ack(data)
+    ack = ReadPropertyMultipleACK()
+    ack.decode(apdu)
+    return ack
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--results', type=int, nargs='*', default=[200, 500, 1000, 2000], help='results per ACK')
+    parser.add_argument('--properties', type=int, default=3, help='properties per result, up to 4')
+    args = parser.parse_args()
+
+    print(f'{"results":>8} {"octets":>8} {"tags":>8} {"decode ms":>10} {"us/result":>10}')
+    for result_count in args.results:
+        data = build_ack(result_count, args.properties)
+        ack = decode_ack(data)
+        assert len(ack.listOfReadAccessResults) == result_count
+        tag_count = len(_tags_of(data))
+        number = max(1, 2000 // result_count)
+        elapsed = min(timeit.repeat(lambda: decode_ack(data), number=number, repeat=5)) / number
+        print(f'{result_count:8} {len(data):8} {tag_count:8} {elapsed * 1e3:10.2f} {elapsed / result_count * 1e6:10.2f}')
+
+
+def _tags_of(data):
+    """Return the tags of the service parameters of the ACK."""
+    return TagList(_complex_ack(data)).tagList
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/python
+
+"""
+bench_transactions
+
+Start a number of concurrent confirmed requests through the state machine
+access point, spread over a number of peers, then answer all of them with a
+simple ack.  Reports the transactions per second for both halves at a few
+scales so the growth with the number of transactions in flight shows up.
+
+    python sandbox/bench_transactions.py [--peers N] [--scale N ...]
+"""
+
+import argparse
+import asyncio
+import time
+
+from bacpypes.comm import ApplicationServiceElement, Server, bind
+from bacpypes.link import Address
+from bacpypes.apdu import ConfirmedRequestPDU, ReadPropertyRequest, SimpleAckPDU
+from bacpypes.app.deviceinfo import DeviceInfoCache
+from bacpypes.app.state_machine_ap import StateMachineAccessPoint
+
+
+class Sink(Server):
+    """Stand in for the network layer, count the requests going down."""
+
+    def __init__(self):
+        Server.__init__(self)
+        self.count = 0
+
+    def indication(self, apdu):
+        self.count += 1
+
+
+class Element(ApplicationServiceElement):
+    """Stand in for the application, count the acks coming up."""
+
+    def __init__(self):
+        ApplicationServiceElement.__init__(self)
+        self.count = 0
+
+    def confirmation(self, apdu):
+        self.count += 1
+
+
+def run(transactions, peer_count):
+    element = Element()
+    smap = StateMachineAccessPoint(device_info_cache=DeviceInfoCache())
+    sink = Sink()
+    bind(element, smap)
+    bind(smap, sink)
+
+    peers = [Address(f'10.0.{i // 250}.{i % 250 + 1}') for i in range(peer_count)]
+    requests = []
+    for i in range(transactions):
+        request = ReadPropertyRequest(
+            objectIdentifier=('analogValue', i), propertyIdentifier='presentValue',
+            destination=peers[i % peer_count],
+        )
+        request.apduMaxSegs = 0
+        request.apduMaxResp = 5
+        # encoded the way the application service access point does it
+        xpdu = ConfirmedRequestPDU()
+        request.encode(xpdu)
+        requests.append(xpdu)
+
+    start = time.perf_counter()
+    for request in requests:
+        smap.sap_indication(request)
+    started = time.perf_counter() - start
+    assert sink.count == transactions and len(smap.clientTransactions) == transactions
+
+    acks = []
+    for request in requests:
+        ack = SimpleAckPDU(choice=request.apduService, invokeID=request.apduInvokeID)
+        ack.pduSource = request.pduDestination
+        acks.append(ack)
+
+    start = time.perf_counter()
+    for ack in acks:
+        smap.confirmation(ack)
+    acked = time.perf_counter() - start
+    assert element.count == transactions and not smap.clientTransactions
+
+    return started, acked
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--peers', type=int, default=2000, help='number of devices')
+    parser.add_argument('--scale', type=int, nargs='*', default=[1000, 5000, 10000],
+                        help='concurrent transactions')
+    args = parser.parse_args()
+
+    for transactions in args.scale:
+        started, acked = run(transactions, min(args.peers, transactions))
+        print(f'{transactions:>6} in flight: start {transactions / started:10.1f} per second  '
+              f'ack {transactions / acked:10.1f} per second')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
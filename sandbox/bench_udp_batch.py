@@ -0,0 +1,129 @@
+#!/usr/bin/python
+
+"""
+bench_udp_batch
+
+Loopback throughput of the UDPDirector and the UDPBatchDirector.  A separate
+process offers datagrams to the director at a fixed rate (50k per second by
+default, 0 for as fast as it can), the director hands them up to a client that
+counts them.  Reports the datagrams that arrived and the CPU time the
+receiving process used for them.  Then the director sends the same number of
+datagrams to a socket in the other process, which counts what arrives.
+
+    python sandbox/bench_udp_batch.py [--rate N] [--seconds N] [--size N]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import time
+
+from bacpypes.comm import Client, PDU, bind
+from bacpypes.transport import UDPDirector, UDPBatchDirector
+
+
+class Counter(Client):
+
+    def __init__(self):
+        Client.__init__(self)
+        self.count = 0
+
+    def confirmation(self, pdu):
+        self.count += 1
+
+
+def blast(addr, rate, count, size):
+    """Send count datagrams to addr, rate per second in bursts every millisecond."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    data = b'\x81\x0a' + size.to_bytes(2, 'big') + bytes(size - 4)
+    start = time.perf_counter()
+    burst = max(rate // 1000, 1)
+    for i in range(0, count, burst if rate else count):
+        for _ in range(min(burst if rate else count, count - i)):
+            try:
+                sock.sendto(data, addr)
+            except BlockingIOError:
+                pass
+        if rate:
+            delay = start + (i + burst) / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    sock.close()
+
+
+def sink(port_queue, result_queue, seconds):
+    """Count the datagrams that arrive until nothing comes for a while."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 24)
+    sock.bind(('127.0.0.1', 0))
+    port_queue.put(sock.getsockname())
+    sock.settimeout(seconds + 2)
+    count = 0
+    try:
+        while True:
+            sock.recv(2048)
+            count += 1
+            sock.settimeout(0.5)
+    except socket.timeout:
+        pass
+    result_queue.put(count)
+
+
+async def receive(director_class, rate, seconds, size):
+    director = await director_class.create_endpoint(local_addr=('127.0.0.1', 0))
+    sock = director.socket if director_class is UDPBatchDirector else director.transport.get_extra_info('socket')
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 24)
+    addr = sock.getsockname()
+    counter = Counter()
+    bind(counter, director)
+    count = rate * seconds if rate else 200000
+    sender = multiprocessing.Process(target=blast, args=(addr, rate, count, size))
+    cpu = time.process_time()
+    sender.start()
+    while sender.is_alive():
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(0.2)
+    cpu = time.process_time() - cpu
+    director.close_socket()
+    return counter.count, count, cpu
+
+
+async def send(director_class, count, seconds, size):
+    port_queue, result_queue = multiprocessing.Queue(), multiprocessing.Queue()
+    receiver = multiprocessing.Process(target=sink, args=(port_queue, result_queue, seconds))
+    receiver.start()
+    addr = port_queue.get()
+    director = await director_class.create_endpoint(local_addr=('127.0.0.1', 0))
+    data = bytes(size)
+    cpu = time.process_time()
+    for i in range(count):
+        director.indication(PDU(data, destination=addr))
+        if i % 1000 == 999:
+            # let the loop run, like a real application would
+            await asyncio.sleep(0)
+    await asyncio.sleep(0.1)
+    cpu = time.process_time() - cpu
+    received = result_queue.get()
+    receiver.join()
+    director.close_socket()
+    return received, count, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rate', type=int, default=50000)
+    parser.add_argument('--seconds', type=int, default=2)
+    parser.add_argument('--size', type=int, default=50)
+    args = parser.parse_args()
+
+    for director_class in (UDPDirector, UDPBatchDirector):
+        name = director_class.__name__
+        received, offered, cpu = asyncio.run(receive(director_class, args.rate, args.seconds, args.size))
+        print(f'{name:17} receive {received:7d}/{offered:7d}  {cpu:6.3f} s CPU  {received / cpu:9.0f} datagrams/CPU s')
+        received, offered, cpu = asyncio.run(send(director_class, offered, args.seconds, args.size))
+        print(f'{name:17} send    {received:7d}/{offered:7d}  {cpu:6.3f} s CPU  {offered / cpu:9.0f} datagrams/CPU s')
+
+
+if __name__ == '__main__':
+    main()
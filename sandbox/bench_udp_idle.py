@@ -0,0 +1,62 @@
+#!/usr/bin/python
+
+"""
+bench_udp_idle
+
+Push datagrams from a number of peers through a UDPDirector that has an idle
+timeout, which used to cancel and restart an event loop timer for every
+datagram.  Reports the datagrams per second, the number of timers on the
+event loop heap and the size of the peer table, once with the timeout and
+once without it and a small max_peers.
+
+    python sandbox/bench_udp_idle.py [--peers N] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import time
+
+from bacpypes.comm import Client, bind
+from bacpypes.transport import UDPDirector
+
+
+class Sink(Client):
+
+    def confirmation(self, pdu):
+        pass
+
+
+class Transport:
+
+    def sendto(self, data, addr=None):
+        pass
+
+
+async def run(peers, repeat, timeout, max_peers):
+    director = UDPDirector(timeout=timeout, max_peers=max_peers)
+    director.connection_made(Transport())
+    bind(Sink(), director)
+    sources = [('10.0.%d.%d' % (i >> 8 & 255, i & 255), 47808) for i in range(peers)]
+    data = b'\x81\x0a\x00\x08\x01\x00\x10\x08'
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for source in sources:
+            director.datagram_received(data, source)
+    elapsed = time.perf_counter() - start
+    scheduled = len(asyncio.get_event_loop()._scheduled)
+    return peers * repeat / elapsed, scheduled, len(director.peers)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--peers', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    for label, timeout, max_peers in (('timeout 30s', 30, 0), ('no timeout', 0, 1000)):
+        rate, scheduled, size = asyncio.run(run(args.peers, args.repeat, timeout, max_peers))
+        print(f'{label:12} {rate:10.0f} datagrams/s  {scheduled:5d} loop timers  {size:5d} peers')
+
+
+if __name__ == '__main__':
+    main()
@@ -5,3 +5,5 @@ Test BACpypes APDU Module
 """
 
 from . import test_max_apdu_length_accepted, test_max_segments_accepted
+from . import test_lazy_acks
+from . import test_value_decoders
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test Lazy Complex Acks
+----------------------
+
+The lazy ReadPropertyMultiple-ACK and ReadRange-ACK are decoded from the same
+octets as the complete ones and must give the same values.
+"""
+
+import unittest
+
+from bacpypes.comm import PDUData
+from bacpypes.link import PDU
+from bacpypes.apdu import APDU, ReadPropertyMultipleACK, ReadAccessResult, ReadAccessResultElement, \
+    ReadAccessResultElementChoice, ReadPropertyMultipleRequest, apdu_types
+from bacpypes.apdu.apdu import ReadRangeACK
+from bacpypes.apdu.lazy import LazyReadPropertyMultipleACK, LazyReadRangeACK
+from bacpypes.apdu.util import iter_read_access_results, get_result_value
+from bacpypes.app.read_planner import ReadBatch, split_read_results
+from bacpypes.basetypes import DateTime, ErrorType, LogRecord, LogRecordLogDatum, PriorityValue, ResultFlags, \
+    StatusFlags
+from bacpypes.constructeddata import Any
+from bacpypes.errors import InvalidTag
+from bacpypes.primitivedata import Date, ObjectIdentifier, Real, Time, Unsigned
+
+
+def encode(ack):
+    """Return the octets of an ack."""
+    ack.apduInvokeID = 1
+    apdu = APDU()
+    ack.encode(apdu)
+    pdu = PDU()
+    apdu.encode(pdu)
+    return bytes(pdu.pduData)
+
+
+def decode(data, ack_class):
+    """Decode the octets of an ack as an ack class."""
+    apdu = APDU()
+    apdu.decode(PDU(data))
+    xpdu = apdu_types[apdu.apduType]()
+    xpdu.decode(apdu)
+    ack = ack_class()
+    ack.decode(xpdu)
+    return ack
+
+
+def octets(value):
+    """Return the encoded tags of a value that is not a Python value."""
+    any_value = Any()
+    any_value.cast_in(value)
+    data = PDUData()
+    any_value.tagList.encode(data)
+    return bytes(data.pduData)
+
+
+def element(property_identifier, value=None, array_index=None, error=None):
+    if error:
+        read_result = ReadAccessResultElementChoice(
+            propertyAccessError=ErrorType(errorClass='property', errorCode=error))
+    else:
+        read_result = ReadAccessResultElementChoice(propertyValue=Any(value))
+    return ReadAccessResultElement(
+        propertyIdentifier=property_identifier, propertyArrayIndex=array_index, readResult=read_result)
+
+
+def read_multiple_ack():
+    return ReadPropertyMultipleACK(listOfReadAccessResults=[
+        ReadAccessResult(objectIdentifier=('analogValue', 1), listOfResults=[
+            element('presentValue', Real(21.5)),
+            element('statusFlags', StatusFlags([0, 1, 0, 0])),
+            element('priorityArray', PriorityValue(real=3.25), 8),
+            element('description', error='readAccessDenied'),
+        ]),
+        ReadAccessResult(objectIdentifier=('device', 5), listOfResults=[
+            element('objectList', Unsigned(3), 0),
+            element('objectList', ObjectIdentifier(('analogValue', 1)), 2),
+        ]),
+    ])
+
+
+def log_record(value):
+    return LogRecord(
+        timestamp=DateTime(date=Date((120, 1, 2, 5)), time=Time((1, 2, 3, 4))),
+        logDatum=LogRecordLogDatum(realValue=value),
+        statusFlags=StatusFlags([0, 0, 0, 0]),
+    )
+
+
+def read_range_ack(count, first_sequence_number=None):
+    return ReadRangeACK(
+        objectIdentifier=('trendLog', 1), propertyIdentifier='logBuffer', resultFlags=ResultFlags([1, 1, 0]),
+        itemCount=count, itemData=[Any(log_record(float(i))) for i in range(count)],
+        firstSequenceNumber=first_sequence_number,
+    )
+
+
+class TestLazyReadPropertyMultipleACK(unittest.TestCase):
+
+    def setUp(self):
+        self.data = encode(read_multiple_ack())
+        self.full = decode(self.data, ReadPropertyMultipleACK)
+        self.lazy = decode(self.data, LazyReadPropertyMultipleACK)
+
+    def test_same_values(self):
+        """Every value is the one of the complete decode."""
+        full = [
+            (tuple(object_identifier), element.propertyIdentifier, element.propertyArrayIndex,
+             get_result_value(element, object_identifier[0]))
+            for object_identifier, element in iter_read_access_results(self.full)
+        ]
+        lazy = list(self.lazy)
+        assert len(lazy) == len(full) == len(self.lazy) == 6
+        for (f_key, f_value), (l_key, l_value) in zip(
+                ((row[:3], row[3]) for row in full), ((row[:3], row[3]) for row in lazy)):
+            assert f_key == l_key
+            if isinstance(f_value, (int, float, tuple, list)):
+                assert f_value == l_value
+            else:
+                assert type(f_value) is type(l_value)
+                assert octets(f_value) == octets(l_value)
+
+    def test_values(self):
+        """Values are found by key and position."""
+        lazy = self.lazy
+        assert lazy.keys() == [
+            (('analogValue', 1), 'presentValue', None),
+            (('analogValue', 1), 'statusFlags', None),
+            (('analogValue', 1), 'priorityArray', 8),
+            (('analogValue', 1), 'description', None),
+            (('device', 5), 'objectList', 0),
+            (('device', 5), 'objectList', 2),
+        ]
+        assert lazy.get_value(('analogValue', 1), 'presentValue') == 21.5
+        assert lazy.get_value(('analogValue', 1), 'statusFlags') == [0, 1, 0, 0]
+        assert lazy.get_value(['analogValue', 1], 'priorityArray', 8).real == 3.25
+        error = lazy.get_value(('analogValue', 1), 'description')
+        assert isinstance(error, ErrorType)
+        assert (error.errorClass, error.errorCode) == ('property', 'readAccessDenied')
+        assert lazy.get_value(('device', 5), 'objectList', 0) == 3
+        assert lazy.value_at(5) == ('analogValue', 1)
+        assert lazy.value_at(-6) == 21.5
+        with self.assertRaises(KeyError):
+            lazy.get_value(('device', 5), 'objectList', 1)
+
+    def test_encode(self):
+        """Encoding again gives the same octets."""
+        self.lazy.value_at(0)
+        assert encode(self.lazy) == self.data
+        assert encode(decode(self.data, LazyReadPropertyMultipleACK)) == self.data
+
+    def test_split_read_results(self):
+        """The read planner takes the values of a lazy ack."""
+        batch = ReadBatch(ReadPropertyMultipleRequest(), [5, 4, 3, 2, 1, 0])
+        results = split_read_results(batch, self.lazy)
+        assert [index for index, _ in results] == [5, 4, 3, 2, 1, 0]
+        assert results[0][1] == 21.5
+        assert isinstance(results[3][1], ErrorType)
+        assert results[5][1] == ('analogValue', 1)
+
+        with self.assertRaises(ValueError):
+            split_read_results(ReadBatch(ReadPropertyMultipleRequest(), [0, 1]), self.lazy)
+
+    def test_bad_closing_tag(self):
+        """A list of results closed with the wrong tag is an error."""
+        # the closing tag of the first list of results is 0x1F
+        position = self.data.index(b'\x1f\x0c')
+        data = self.data[:position] + b'\x2f' + self.data[position + 1:]
+        lazy = decode(data, LazyReadPropertyMultipleACK)
+        with self.assertRaises(InvalidTag):
+            len(lazy)
+        with self.assertRaises(ValueError):
+            split_read_results(ReadBatch(ReadPropertyMultipleRequest(), list(range(6))), lazy)
+
+
+class TestLazyReadRangeACK(unittest.TestCase):
+
+    def check(self, data, count):
+        full = decode(data, ReadRangeACK)
+        lazy = decode(data, LazyReadRangeACK)
+        assert (lazy.objectIdentifier, lazy.propertyIdentifier, lazy.itemCount) == (('trendLog', 1), 'logBuffer', count)
+        assert lazy.resultFlags == [1, 1, 0]
+        assert lazy.firstSequenceNumber == full.firstSequenceNumber
+        items = list(lazy)
+        assert len(items) == len(lazy) == count
+        for i, item in enumerate(items):
+            assert octets(item) == octets(log_record(float(i)))
+        assert encode(lazy) == data
+        return lazy
+
+    def test_first_sequence_number(self):
+        lazy = self.check(encode(read_range_ack(3, 7)), 3)
+        assert lazy.firstSequenceNumber == 7
+        assert lazy[-1].logDatum.realValue == 2.0
+
+    def test_no_first_sequence_number(self):
+        lazy = self.check(encode(read_range_ack(2)), 2)
+        assert lazy.firstSequenceNumber is None
+        assert lazy[1].logDatum.realValue == 1.0
+
+    def test_item_count(self):
+        """The length and negative indexes are the items that are there."""
+        ack = read_range_ack(3)
+        ack.itemCount = 5
+        lazy = decode(encode(ack), LazyReadRangeACK)
+        assert lazy.itemCount == 5
+        assert len(lazy) == 3
+        assert lazy[-1].logDatum.realValue == 2.0
+        with self.assertRaises(IndexError):
+            lazy[3]
+
+    def test_bad_closing_tag(self):
+        """Items closed with the wrong tag are an error."""
+        data = encode(read_range_ack(1))
+        assert data[-1] == 0x5F
+        with self.assertRaises(InvalidTag):
+            decode(data[:-1] + b'\x4f', LazyReadRangeACK)
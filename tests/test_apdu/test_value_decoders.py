@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test Value Decoders
+-------------------
+
+The converters of the atomic classes must return exactly what Any.cast_out()
+returns for the same octets, and get_apdu_values() must return the values of
+an ack one by one even when one of them cannot be decoded.
+"""
+
+import math
+import unittest
+
+from bacpypes.comm import PDUData
+from bacpypes.link import PDU
+from bacpypes.apdu import APDU, ReadPropertyMultipleACK, ReadAccessResult, ReadAccessResultElement, \
+    ReadAccessResultElementChoice, apdu_types
+from bacpypes.apdu.decoders import ValueDecoder, get_value_decoder
+from bacpypes.apdu.lazy import LazyReadPropertyMultipleACK
+from bacpypes.apdu.util import ValueColumns, get_apdu_values
+from bacpypes.basetypes import EngineeringUnits, ErrorType, StatusFlags
+from bacpypes.constructeddata import Any, AnyAtomic
+from bacpypes.errors import InvalidTag
+from bacpypes.primitivedata import Atomic, Boolean, CharacterString, Double, Enumerated, Integer, ObjectIdentifier, Real, \
+    TagList, Unsigned
+
+# samples of each class with a converter, and of one without
+samples = [
+    (Boolean, [False, True]),
+    (Unsigned, [0, 1, 255, 256, 65535, 2 ** 24, 2 ** 32 - 1]),
+    (Integer, [0, 1, -1, 127, -128, 128, -129, 2 ** 31 - 1, -2 ** 31]),
+    (Real, [0.0, -0.0, 1.5, -21.25, 3.4e38, float('inf'), float('-inf'), float('nan')]),
+    (Double, [0.0, 1.5, -1e300, float('nan')]),
+    (CharacterString, ['', 'analog value 1', '°C – température']),
+    (Enumerated, [0, 1, 300]),
+    (EngineeringUnits, ['degreesCelsius', 'percent', 60000]),
+    (ObjectIdentifier, [('analogValue', 1), ('device', 4194303), (700, 5)]),
+    (StatusFlags, [[0, 1, 0, 0]]),
+]
+
+
+def tags_of(value):
+    """Return the encoded tags of an atomic or constructed value."""
+    data = PDUData()
+    Any(value).tagList.encode(data)
+    return bytes(data.pduData)
+
+
+def cast_out(data, datatype, native=False):
+    """Return what Any.cast_out() returns for the octets, or the exception."""
+    value = Any()
+    value.tagList = TagList(PDUData(data))
+    try:
+        value = value.cast_out(datatype)
+    except Exception as err:
+        return type(err)
+    if native and issubclass(datatype, AnyAtomic):
+        value = value.value
+    return value
+
+
+def same(a, b):
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, Atomic):
+        return same(a.value, b.value)
+    if (type(a) is float) and math.isnan(a):
+        return math.isnan(b)
+    if type(a) is float:
+        return (a == b) and (math.copysign(1, a) == math.copysign(1, b))
+    return a == b
+
+
+class TestValueDecoder(unittest.TestCase):
+
+    def check(self, decoder, datatype, data, native=False):
+        expected = cast_out(data, datatype, native)
+        try:
+            value = decoder.decode(data, 0, len(data))
+        except Exception as err:
+            value = type(err)
+        assert same(value, expected), (datatype, data.hex(), value, expected)
+
+        any_value = Any()
+        any_value.tagList = TagList(PDUData(data))
+        try:
+            value = decoder.decode_any(any_value)
+        except Exception as err:
+            value = type(err)
+        assert same(value, expected), (datatype, data.hex(), value, expected)
+
+    def test_classes(self):
+        """Each converter gives what cast_out() gives."""
+        for datatype, values in samples:
+            decoder = ValueDecoder(datatype)
+            for value in values:
+                self.check(decoder, datatype, tags_of(datatype(value)))
+
+    def test_other_encodings(self):
+        """Values the converters do not take are left to cast_out()."""
+        # a character string that is not UTF-8, a real encoded as a double,
+        # an unsigned with no octets and a boolean with a bad value
+        odd = [
+            (CharacterString, bytes([0x75, 0x05, 0x04, 0x00, 0x41, 0x00, 0x42])),
+            (Real, tags_of(Double(1.5))),
+            (Unsigned, bytes([0x20])),
+            (Boolean, bytes([0x12])),
+            (Real, tags_of(Real(1.5)) + tags_of(Real(2.5))),
+        ]
+        for datatype, data in odd:
+            self.check(ValueDecoder(datatype), datatype, data)
+
+    def test_array_index(self):
+        """Index 0 of an array is its length, index n is an element."""
+        length = get_value_decoder('multiStateValue', 'stateText', 0)
+        element = get_value_decoder('multiStateValue', 'stateText', 3)
+        assert length.datatype is Unsigned
+        assert element.datatype is CharacterString
+        for value in (0, 3, 300):
+            self.check(length, Unsigned, tags_of(Unsigned(value)))
+        for value in ('', 'on', 'off'):
+            self.check(element, CharacterString, tags_of(CharacterString(value)))
+
+        element = get_value_decoder('device', 'objectList', 2)
+        for value in (('analogValue', 1), (700, 5)):
+            self.check(element, ObjectIdentifier, tags_of(ObjectIdentifier(value)))
+
+    def test_any_atomic(self):
+        """A native decoder of an AnyAtomic gives the value of the atomic object."""
+        decoder = get_value_decoder('schedule', 'presentValue', native=True)
+        plain = get_value_decoder('schedule', 'presentValue')
+        for datatype, values in samples:
+            if datatype is StatusFlags:
+                continue
+            for value in values:
+                data = tags_of(datatype(value))
+                self.check(decoder, AnyAtomic, data, native=True)
+                self.check(plain, AnyAtomic, data)
+
+
+def element(property_identifier, value=None, error=False):
+    if error:
+        read_result = ReadAccessResultElementChoice(
+            propertyAccessError=ErrorType(errorClass='property', errorCode='unknownProperty'))
+    else:
+        read_result = ReadAccessResultElementChoice(propertyValue=Any(value))
+    return ReadAccessResultElement(propertyIdentifier=property_identifier, readResult=read_result)
+
+
+def read_multiple_ack():
+    """An ack with a proprietary property of an unknown datatype in the middle."""
+    return ReadPropertyMultipleACK(listOfReadAccessResults=[
+        ReadAccessResult(objectIdentifier=('analogValue', 1), listOfResults=[
+            element('presentValue', Real(21.5)),
+            element(5012, Unsigned(7)),
+            element('statusFlags', StatusFlags([1, 0, 0, 0])),
+            element('description', error=True),
+        ]),
+        ReadAccessResult(objectIdentifier=('binaryValue', 2), listOfResults=[
+            element('presentValue', Enumerated(1)),
+        ]),
+    ])
+
+
+def lazy(ack):
+    ack.apduInvokeID = 1
+    apdu = APDU()
+    ack.encode(apdu)
+    pdu = PDU()
+    apdu.encode(pdu)
+    apdu = APDU()
+    apdu.decode(pdu)
+    xpdu = apdu_types[apdu.apduType]()
+    xpdu.decode(apdu)
+    ack = LazyReadPropertyMultipleACK()
+    ack.decode(xpdu)
+    return ack
+
+
+class TestGetAPDUValues(unittest.TestCase):
+
+    def check(self, ack):
+        values = get_apdu_values(ack)
+        analog = values[('analogValue', 1)]
+        assert analog['presentValue'] == 21.5
+        assert isinstance(analog[5012], TypeError)
+        assert analog['statusFlags'] == [1, 0, 0, 0]
+        assert isinstance(analog['description'], ErrorType)
+        assert values[('binaryValue', 2)]['presentValue'] == 'active'
+
+        columns = get_apdu_values(ack, columns=True)
+        assert isinstance(columns, ValueColumns)
+        assert len(columns) == 5
+        assert columns.property_identifiers == ['presentValue', 5012, 'statusFlags', 'description', 'presentValue']
+        assert columns.numeric[0] == 21.5
+        assert math.isnan(columns.numeric[1])
+        assert isinstance(columns.values[1], TypeError)
+
+    def test_unknown_property(self):
+        """A property without a known datatype is an error, the others are values."""
+        self.check(read_multiple_ack())
+
+    def test_unknown_property_lazy(self):
+        self.check(lazy(read_multiple_ack()))
+
+    def test_bad_value(self):
+        """A value that does not decode as its datatype is an error, the others are values."""
+        ack = read_multiple_ack()
+        # a character string where a status flags bit string should be
+        ack.listOfReadAccessResults[0].listOfResults[2].readResult.propertyValue = Any(CharacterString('x'))
+        for value in (get_apdu_values(ack), get_apdu_values(lazy(ack))):
+            analog = value[('analogValue', 1)]
+            assert isinstance(analog['statusFlags'], (TypeError, ValueError, InvalidTag))
+            assert analog['presentValue'] == 21.5
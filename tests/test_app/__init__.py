@@ -0,0 +1,13 @@
+#!/usr/bin/python
+
+"""
+Test Application Module
+"""
+
+from . import test_read_planner
+from . import test_app_io_controller
+from . import test_ssm
+from . import test_invoke_id
+from . import test_deviceinfo
+from . import test_device_timing
+from . import test_iocb_wait
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test Application IO Controller
+------------------------------
+
+Reads that are combined into a ReadPropertyMultipleRequest, a property that
+could not be read and a device that does not take them.  Results are given as
+they arrive, with no more than max_in_flight requests going at a time.
+"""
+
+import asyncio
+import unittest
+
+from bacpypes.link import Address
+from bacpypes.apdu import ReadPropertyRequest, ReadPropertyMultipleRequest, ReadPropertyACK, RejectPDU, AbortPDU
+from bacpypes.basetypes import ErrorType
+from bacpypes.constructeddata import Any
+from bacpypes.errors import ExecutionError
+from bacpypes.primitivedata import Real
+from bacpypes.app.app_io_controller import ApplicationIOController
+
+from .test_read_planner import read_multiple_ack
+
+device = Address('10.0.0.2')
+
+
+class Device(ApplicationIOController):
+    """Stand in for the stack below the application, answer the requests right away."""
+
+    def __init__(self, read_multiple=True, errors=()):
+        ApplicationIOController.__init__(self)
+        self.read_multiple = read_multiple
+        self.errors = errors
+        self.sent = []
+        self.invoke_id = 0
+
+    def request(self, apdu):
+        self.sent.append(apdu)
+        self.invoke_id = apdu.apduInvokeID = self.invoke_id + 1
+        asyncio.get_running_loop().call_soon(self.answer, apdu)
+
+    def answer(self, apdu):
+        if isinstance(apdu, ReadPropertyMultipleRequest):
+            if self.read_multiple is True:
+                instances = [spec.objectIdentifier[1] for spec in apdu.listOfReadAccessSpecs]
+                ack = read_multiple_ack([
+                    (instance, None if instance in self.errors else float(instance)) for instance in instances
+                ])
+            elif self.read_multiple == 'abort':
+                ack = AbortPDU(True, apdu.apduInvokeID, 4)
+            else:
+                ack = RejectPDU(apdu.apduInvokeID, 9)
+        else:
+            ack = ReadPropertyACK(
+                objectIdentifier=apdu.objectIdentifier, propertyIdentifier=apdu.propertyIdentifier,
+                propertyValue=Any(Real(float(apdu.objectIdentifier[1]))),
+            )
+        ack.pduSource = apdu.pduDestination
+        ack.apduInvokeID = apdu.apduInvokeID
+        self.confirmation(ack)
+
+
+class Devices(Device):
+    """Devices at different addresses that take their time, the ones in delays take longer."""
+
+    def __init__(self, delays=None):
+        Device.__init__(self)
+        self.delays = delays or {}
+        self.in_flight = 0
+        self.most_in_flight = 0
+
+    def request(self, apdu):
+        self.sent.append(apdu)
+        self.invoke_id = apdu.apduInvokeID = self.invoke_id + 1
+        self.in_flight += 1
+        self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        delay = self.delays.get(apdu.pduDestination, 0.01)
+        asyncio.get_running_loop().call_later(delay, self.answer, apdu)
+
+    def answer(self, apdu):
+        self.in_flight -= 1
+        Device.answer(self, apdu)
+
+
+def reads(count):
+    return [
+        ReadPropertyRequest(objectIdentifier=('analogValue', i), propertyIdentifier='presentValue', destination=device)
+        for i in range(1, count + 1)
+    ]
+
+
+def device_reads(count):
+    """One read for each of count devices."""
+    return [
+        ReadPropertyRequest(objectIdentifier=('analogValue', i), propertyIdentifier='presentValue',
+                            destination=Address('10.0.1.%d' % (i,)))
+        for i in range(1, count + 1)
+    ]
+
+
+class TestApplicationIOController(unittest.IsolatedAsyncioTestCase):
+
+    async def test_read_multiple(self):
+        """Three reads go out as one request."""
+        controller = Device()
+        results = await controller.execute_requests(reads(3))
+
+        assert results == [1.0, 2.0, 3.0]
+        assert len(controller.sent) == 1
+        assert isinstance(controller.sent[0], ReadPropertyMultipleRequest)
+
+    async def test_property_access_error(self):
+        """A property that cannot be read is an error, the others are values."""
+        controller = Device(errors=(2,))
+        results = await controller.execute_requests(reads(3))
+
+        assert results[0] == 1.0
+        assert isinstance(results[1], ErrorType)
+        assert results[2] == 3.0
+
+        with self.assertRaises(ExecutionError) as context:
+            await controller.execute_requests(reads(3), throw_on_error=True)
+        assert context.exception.errorCode == 'unknownProperty'
+
+        with self.assertRaises(ExecutionError):
+            async for _ in controller.execute_requests_as_completed(reads(3), throw_on_error=True):
+                pass
+
+    async def test_rejected(self):
+        """A device that rejects the request is read one property at a time from then on."""
+        controller = Device(read_multiple=False)
+        results = await controller.execute_requests(reads(3))
+
+        assert results == [1.0, 2.0, 3.0]
+        assert [type(apdu) for apdu in controller.sent] == [ReadPropertyMultipleRequest] + [ReadPropertyRequest] * 3
+        assert device in controller.read_multiple_unsupported
+
+        controller.sent = []
+        results = await controller.execute_requests(reads(2))
+        assert results == [1.0, 2.0]
+        assert [type(apdu) for apdu in controller.sent] == [ReadPropertyRequest] * 2
+
+    async def test_too_big(self):
+        """A response that turned out to be too big is read one property at a time this once."""
+        controller = Device(read_multiple='abort')
+        results = await controller.execute_requests(reads(3))
+
+        assert results == [1.0, 2.0, 3.0]
+        assert [type(apdu) for apdu in controller.sent] == [ReadPropertyMultipleRequest] + [ReadPropertyRequest] * 3
+        assert device not in controller.read_multiple_unsupported
+
+    async def test_not_batched(self):
+        """Reads are not combined when asked not to."""
+        controller = Device()
+        results = await controller.execute_requests(reads(3), batch_reads=False)
+
+        assert results == [1.0, 2.0, 3.0]
+        assert [type(apdu) for apdu in controller.sent] == [ReadPropertyRequest] * 3
+
+
+class TestAsCompleted(unittest.IsolatedAsyncioTestCase):
+
+    async def test_max_in_flight(self):
+        """No more than max_in_flight requests are given to the controller at a time."""
+        controller = Devices()
+        results = [result async for result in controller.execute_requests_as_completed(device_reads(20), max_in_flight=3)]
+
+        assert sorted(results) == [(i, float(i + 1)) for i in range(20)]
+        assert len(controller.sent) == 20
+        assert controller.most_in_flight == 3
+
+    async def test_no_limit(self):
+        """Without a limit they all go out at once."""
+        controller = Devices()
+        results = await controller.execute_requests(device_reads(20))
+
+        assert results == [float(i + 1) for i in range(20)]
+        assert controller.most_in_flight == 20
+
+    async def test_as_completed(self):
+        """A slow device does not hold up the results of the others."""
+        controller = Devices(delays={Address('10.0.1.1'): 0.3})
+        indexes = [index async for index, _ in controller.execute_requests_as_completed(device_reads(5), max_in_flight=2)]
+
+        assert indexes == [1, 2, 3, 4, 0]
+        assert controller.most_in_flight == 2
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test Device Timing
+------------------
+
+The APDU timeout of a client transaction comes from the round trip times of
+the device, and when it is asked for, a device that stops answering is taken
+offline and probed now and then until it is back.
+"""
+
+import asyncio
+import time
+import unittest
+
+from bacpypes.comm import bind
+from bacpypes.link import Address
+from bacpypes.apdu import ConfirmedRequestPDU, AbortPDU, AbortReason
+from bacpypes.app.client_ssm import ClientSSM
+from bacpypes.app.deviceinfo import DeviceTiming, DeviceInfoCache
+from bacpypes.app.state_machine_ap import StateMachineAccessPoint
+
+from .test_ssm import Endpoint, Client, Device, client_address, device_address
+
+
+class TestDeviceTiming(unittest.TestCase):
+
+    def test_no_estimate(self):
+        """The configured timeout is used until there is a sample."""
+        assert DeviceTiming().apdu_timeout(3000) == 3000
+        assert DeviceTiming().apdu_timeout(100) == 100
+
+    def test_estimate(self):
+        """The timeout is the smoothed time and four times its variation."""
+        timing = DeviceTiming()
+        timing.sample(2000)
+        assert (timing.srtt, timing.rttvar) == (2000, 1000)
+        assert timing.apdu_timeout(3000) == 6000
+
+        timing.sample(1000)
+        assert timing.rttvar == 0.75 * 1000 + 0.25 * 1000
+        assert timing.srtt == 0.875 * 2000 + 0.125 * 1000
+        assert timing.apdu_timeout(3000) == int(1875 + 4 * 1000)
+
+    def test_bounds(self):
+        """A fast device is given at least half of the configured time, a slow one no more than max_timeout."""
+        timing = DeviceTiming()
+        timing.sample(20)
+        assert timing.apdu_timeout(3000) == 1500
+        assert timing.apdu_timeout(500) == DeviceTiming.min_timeout
+
+        timing = DeviceTiming()
+        timing.sample(20000)
+        assert timing.apdu_timeout(3000) == DeviceTiming.max_timeout
+
+
+class TestOfflineBreaker(unittest.TestCase):
+
+    def test_off(self):
+        """By default requests are always sent."""
+        cache = DeviceInfoCache()
+        for _ in range(10):
+            cache.no_response(device_address)
+        assert not cache.is_offline(device_address)
+        assert cache.get_timing(device_address).failures == 10
+        assert cache.get_stats()['offline'] == 0
+
+    def test_offline(self):
+        """A device that stops answering is probed less and less often until it is back."""
+        cache = DeviceInfoCache(offline_after=2, probe_interval=30.0, max_probe_interval=100.0)
+        timing = cache.get_timing(device_address)
+        cache.no_response(device_address)
+        assert not cache.is_offline(device_address)
+        cache.no_response(device_address)
+        assert cache.is_offline(device_address)
+        assert cache.is_offline(device_address)
+        assert 29.0 < timing.offline_until - time.monotonic() <= 30.0
+        assert cache.get_stats()['offline'] == 1
+        assert cache.get_stats()['offline_failures'] == 2
+
+        # time for a probe, only one goes out
+        for interval in (60.0, 100.0, 100.0):
+            timing.offline_until = time.monotonic()
+            assert not cache.is_offline(device_address)
+            assert timing.probing
+            assert cache.is_offline(device_address)
+            # the probe gets no answer
+            cache.no_response(device_address)
+            assert not timing.probing
+            assert timing.probe_interval == interval
+            assert cache.is_offline(device_address)
+
+        # the next probe gets one
+        timing.offline_until = time.monotonic()
+        assert not cache.is_offline(device_address)
+        cache.response_received(device_address, 50.0)
+        assert not cache.is_offline(device_address)
+        assert (timing.failures, timing.offline_until, timing.probe_interval, timing.probing) == (0, None, None, False)
+        assert cache.get_stats()['offline'] == 0
+
+    def test_other_devices(self):
+        """Each address has its own timing, the last max_timings of them."""
+        cache = DeviceInfoCache(offline_after=1, max_timings=2)
+        cache.no_response(device_address)
+        assert cache.is_offline(device_address)
+        assert not cache.is_offline(client_address)
+        cache.get_timing(client_address)
+        cache.get_timing(Address('10.0.0.3'))
+        assert device_address not in cache.timings
+        assert not cache.is_offline(device_address)
+
+
+class TestClientTiming(unittest.IsolatedAsyncioTestCase):
+    """A client sending requests to a device that may not answer."""
+
+    def setUp(self):
+        self.client_end, self.device_end = Endpoint(client_address), Endpoint(device_address)
+        self.client_end.peer, self.device_end.peer = self.device_end, self.client_end
+        self.client = Client()
+        self.device = Device(b'\x3e\x3f')
+        self.device_smap = StateMachineAccessPoint(device_info_cache=DeviceInfoCache())
+        bind(self.device, self.device_smap, self.device_end)
+
+    def make_client(self, **kwargs):
+        self.client_smap = StateMachineAccessPoint(device_info_cache=DeviceInfoCache(**kwargs))
+        self.client_smap.apduTimeout = 100
+        self.client_smap.numberOfApduRetries = 2
+        bind(self.client, self.client_smap, self.client_end)
+        return self.client_smap.deviceInfoCache.get_timing(device_address)
+
+    async def confirmed_request(self):
+        request = ConfirmedRequestPDU(12)
+        request.pduDestination = device_address
+        request.put_data(b'\x0c\x02\x00\x00\x01\x19\x4c')
+        self.client.future = asyncio.get_running_loop().create_future()
+        self.client_smap.sap_indication(request)
+        return await asyncio.wait_for(self.client.future, 10)
+
+    def requests_sent(self):
+        return sum(1 for apdu, _ in self.client_end.sent if apdu.apduType == ConfirmedRequestPDU.pduType)
+
+    async def test_round_trip(self):
+        """An answer is a sample and the next transaction takes its timeout from the estimate."""
+        timing = self.make_client()
+        assert ClientSSM(self.client_smap, device_address).apduTimeout == 100
+
+        apdu = await self.confirmed_request()
+        assert not isinstance(apdu, AbortPDU)
+        assert 0 <= timing.srtt < 100
+        assert ClientSSM(self.client_smap, device_address).apduTimeout == DeviceTiming.min_timeout
+
+    async def test_retried(self):
+        """A request that was sent again is not a sample."""
+        timing = self.make_client()
+        lost = []
+        self.client_end.drop = lambda apdu: not lost and not lost.append(apdu)
+
+        apdu = await self.confirmed_request()
+        assert not isinstance(apdu, AbortPDU)
+        assert self.requests_sent() == 2
+        assert timing.srtt is None
+        assert timing.failures == 0
+
+    async def test_breaker_off(self):
+        """Without offline_after every request goes out."""
+        timing = self.make_client()
+        self.client_end.drop = lambda apdu: True
+        for _ in range(3):
+            apdu = await self.confirmed_request()
+            assert isinstance(apdu, AbortPDU)
+            assert apdu.apduAbortRejectReason == AbortReason.noResponse
+        assert self.requests_sent() == 9
+        assert timing.failures == 3
+
+    async def test_breaker(self):
+        """An offline device fails right away until a probe gets an answer."""
+        timing = self.make_client(offline_after=2, probe_interval=0.2)
+        self.client_end.drop = lambda apdu: True
+        for _ in range(2):
+            await self.confirmed_request()
+        assert self.requests_sent() == 6
+        assert timing.offline_until is not None
+
+        # nothing is sent and there is no transaction
+        apdu = await self.confirmed_request()
+        assert isinstance(apdu, AbortPDU)
+        assert apdu.apduAbortRejectReason == AbortReason.noResponse
+        assert self.requests_sent() == 6
+        assert self.client_smap.clientTransactions == {}
+        assert self.client_smap.deviceInfoCache.offline_failures == 1
+
+        # the probe is sent once
+        await asyncio.sleep(0.25)
+        apdu = await self.confirmed_request()
+        assert isinstance(apdu, AbortPDU)
+        assert self.requests_sent() == 7
+        assert timing.probe_interval == 0.4
+
+        # the device is back
+        timing.offline_until = time.monotonic()
+        self.client_end.drop = None
+        apdu = await self.confirmed_request()
+        assert not isinstance(apdu, AbortPDU)
+        assert self.requests_sent() == 8
+        assert timing.offline_until is None
+        apdu = await self.confirmed_request()
+        assert not isinstance(apdu, AbortPDU)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test Device Info Cache
+----------------------
+
+The cache is bounded by max_size in least recently used order, records expire
+after ttl seconds unless they are in use, and a snapshot saved to a file loads
+back into the same records.
+"""
+
+import os
+import tempfile
+import unittest
+
+from bacpypes.link import Address, RemoteStation
+from bacpypes.apdu import IAmRequest
+from bacpypes.app.deviceinfo import DeviceInfo, DeviceInfoCache
+
+
+def address(i):
+    return Address('10.0.0.%d' % (i + 1,))
+
+
+def i_am(instance, source, vendor_id=15):
+    apdu = IAmRequest(
+        iAmDeviceIdentifier=('device', instance),
+        maxAPDULengthAccepted=480,
+        segmentationSupported='segmentedBoth',
+        vendorID=vendor_id,
+    )
+    apdu.pduSource = source
+    return apdu
+
+
+def age(cache, key, seconds):
+    """Make a record look like it was updated seconds earlier."""
+    cache.cache[key]._updated -= seconds
+
+
+class TestDeviceInfoCache(unittest.TestCase):
+
+    def test_iam(self):
+        """An I-Am makes a record found by instance and by address."""
+        cache = DeviceInfoCache()
+        cache.iam_device_info(i_am(1, address(1)))
+        device_info = cache.get_device_info(1)
+        assert cache.get_device_info(address(1)) is device_info
+        assert (device_info.maxApduLengthAccepted, device_info.segmentationSupported, device_info.vendorID) == \
+            (480, 'segmentedBoth', 15)
+
+        # the device moves, the old address is forgotten
+        cache.iam_device_info(i_am(1, address(2)))
+        assert cache.get_device_info(address(2)) is device_info
+        assert cache.get_device_info(address(1)) is None
+        assert len(cache) == 1
+
+        with self.assertRaises(ValueError):
+            cache.iam_device_info(DeviceInfo(1, address(1)))
+
+    def test_lru(self):
+        """The least recently used records are evicted to stay within max_size."""
+        cache = DeviceInfoCache(max_size=3)
+        for i in range(3):
+            cache.iam_device_info(i_am(i, address(i)))
+        # looking it up makes it recently used
+        assert cache.get_device_info(0) is not None
+
+        cache.iam_device_info(i_am(3, address(3)))
+        assert len(cache) == 3
+        assert list(cache.cache) == [2, 0, 3]
+        assert cache.get_device_info(1) is None
+        assert cache.get_device_info(address(1)) is None
+        assert address(1) not in cache.address_index
+
+        # an update is a use too
+        cache.iam_device_info(i_am(2, address(2)))
+        cache.iam_device_info(i_am(4, address(4)))
+        assert list(cache.cache) == [3, 2, 4]
+        assert cache.evictions == 2
+
+    def test_ttl(self):
+        """A record not updated for ttl seconds is dropped when it is looked up."""
+        cache = DeviceInfoCache(ttl=60)
+        cache.iam_device_info(i_am(1, address(1)))
+        cache.iam_device_info(i_am(2, address(2)))
+        age(cache, 1, 30)
+        age(cache, 2, 61)
+
+        assert cache.has_device_info(1)
+        assert not cache.has_device_info(address(2))
+        assert cache.get_device_info(2) is None
+        assert list(cache.cache) == [1]
+        assert cache.address_index == {address(1): 1}
+        assert cache.expirations == 1
+
+        # an update starts it again
+        age(cache, 1, 60)
+        cache.iam_device_info(i_am(1, address(1)))
+        assert cache.get_device_info(1) is not None
+
+    def test_purge_expired(self):
+        """Expired records are removed all at once."""
+        cache = DeviceInfoCache(ttl=60)
+        for i in range(5):
+            cache.iam_device_info(i_am(i, address(i)))
+        for i in (0, 2, 4):
+            age(cache, i, 100)
+
+        assert cache.purge_expired() == 3
+        assert list(cache.cache) == [1, 3]
+        assert set(cache.address_index) == {address(1), address(3)}
+        assert cache.purge_expired() == 0
+        assert cache.expirations == 3
+
+        assert DeviceInfoCache().purge_expired() == 0
+
+    def test_in_use(self):
+        """A record in use is neither evicted nor expired, it goes when it is released."""
+        cache = DeviceInfoCache(max_size=2, ttl=60)
+        cache.iam_device_info(i_am(0, address(0)))
+        device_info = cache.acquire(address(0))
+        assert device_info is cache.acquire(0)
+        assert device_info._ref_count == 2
+
+        cache.iam_device_info(i_am(1, address(1)))
+        cache.iam_device_info(i_am(2, address(2)))
+        assert list(cache.cache) == [0, 2]
+
+        age(cache, 0, 100)
+        assert cache.get_device_info(0) is device_info
+        assert cache.purge_expired() == 0
+
+        # everything else is in use, the new record is the one to go
+        cache.acquire(2)
+        cache.iam_device_info(i_am(3, address(3)))
+        assert list(cache.cache) == [2, 0]
+
+        # over the limit, caught up when the record is no longer in use
+        cache.max_size = 1
+        cache.release(device_info)
+        assert list(cache.cache) == [2, 0]
+        cache.release(device_info)
+        assert list(cache.cache) == [2]
+        with self.assertRaises(RuntimeError):
+            cache.release(device_info)
+
+    def test_acquire(self):
+        """Only device instances and station addresses are keys."""
+        cache = DeviceInfoCache()
+        assert cache.acquire(address(0)) is None
+        assert cache.acquire(5) is None
+        with self.assertRaises(TypeError):
+            cache.acquire('10.0.0.1')
+        with self.assertRaises(TypeError):
+            cache.acquire(Address('*'))
+
+    def test_stats(self):
+        """Hits, misses and evictions are counted."""
+        cache = DeviceInfoCache(max_size=2)
+        for i in range(4):
+            cache.iam_device_info(i_am(i, address(i)))
+        cache.get_device_info(3)
+        cache.get_device_info(address(2))
+        cache.get_device_info(0)
+        cache.get_device_info(address(9))
+        cache.get_device_info(9)
+
+        stats = cache.get_stats()
+        assert (stats['size'], stats['hits'], stats['misses'], stats['evictions'], stats['expirations']) == \
+            (2, 2, 3, 2, 0)
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'devices.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        """The records load back with their addresses, fields, ages and order."""
+        addresses = [address(0), Address('2:10.0.0.9'), RemoteStation(3, 7), Address('4:0x0102')]
+        cache = DeviceInfoCache(ttl=3600)
+        for i, addr in enumerate(addresses):
+            cache.iam_device_info(i_am(i, addr, vendor_id=i + 10))
+            age(cache, i, 100 - i)
+        # a record with no instance is kept by its address
+        unknown = DeviceInfo(None, RemoteStation(5, 1))
+        cache.update_device_info(unknown)
+        cache.cache[unknown.address].maxNpduLength = 206
+        cache.save(self.path)
+        assert not os.path.exists(self.path + '.tmp')
+
+        other = DeviceInfoCache(ttl=3600)
+        assert other.load(self.path) == 5
+        assert list(other.cache) == list(cache.cache)
+        assert other.address_index == cache.address_index
+        for key, device_info in cache.cache.items():
+            loaded = other.cache[key]
+            assert loaded is not device_info
+            assert loaded.address == device_info.address
+            assert loaded.address.addrType == device_info.address.addrType
+            assert loaded.address.addrNet == device_info.address.addrNet
+            for attr in DeviceInfo._snapshot_contents:
+                assert getattr(loaded, attr) == getattr(device_info, attr)
+            assert abs(loaded._updated - device_info._updated) < 1.0
+        assert other.get_device_info(RemoteStation(3, 7)).deviceIdentifier == 2
+        assert other.get_device_info(Address('2:10.0.0.9')).vendorID == 11
+
+    def test_expired(self):
+        """Records that expired since the snapshot was saved are skipped."""
+        cache = DeviceInfoCache()
+        for i in range(3):
+            cache.iam_device_info(i_am(i, address(i)))
+        age(cache, 1, 120)
+        cache.save(self.path)
+
+        other = DeviceInfoCache(ttl=60)
+        assert other.load(self.path) == 2
+        assert list(other.cache) == [0, 2]
+
+    def test_version(self):
+        with open(self.path, 'w') as f:
+            f.write('{"version": 2, "devices": []}')
+        with self.assertRaises(ValueError):
+            DeviceInfoCache().load(self.path)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test Invoke IDs
+---------------
+
+Each peer has its own next invoke ID, only the most recently used peers are
+remembered and the IDs of open transactions are never handed out again.
+"""
+
+import unittest
+
+from bacpypes.link import Address
+from bacpypes.app.deviceinfo import DeviceInfoCache
+from bacpypes.app.state_machine_ap import StateMachineAccessPoint
+
+
+def peer(i):
+    return Address('10.0.0.%d' % (i + 1,))
+
+
+class TestInvokeID(unittest.TestCase):
+
+    def setUp(self):
+        self.smap = StateMachineAccessPoint(device_info_cache=DeviceInfoCache())
+
+    def test_per_peer(self):
+        """Each peer counts on its own."""
+        assert [self.smap.get_next_invoke_id(peer(0)) for _ in range(3)] == [1, 2, 3]
+        assert self.smap.get_next_invoke_id(peer(1)) == 1
+        assert self.smap.get_next_invoke_id(peer(0)) == 4
+
+    def test_in_use(self):
+        """An ID with an open transaction is skipped, all of them in use is an error."""
+        self.smap.clientTransactions[(peer(0), 1)] = None
+        self.smap.clientTransactions[(peer(0), 2)] = None
+        assert self.smap.get_next_invoke_id(peer(0)) == 3
+
+        for invoke_id in range(256):
+            self.smap.clientTransactions[(peer(1), invoke_id)] = None
+        with self.assertRaises(RuntimeError):
+            self.smap.get_next_invoke_id(peer(1))
+
+    def test_bounded(self):
+        """Only the last maxInvokeIDPeers peers are remembered."""
+        self.smap.maxInvokeIDPeers = 4
+        for i in range(10):
+            self.smap.get_next_invoke_id(peer(i))
+            self.smap.get_next_invoke_id(peer(0))
+        assert len(self.smap.nextInvokeID) == 4
+        assert list(self.smap.nextInvokeID) == [peer(7), peer(8), peer(9), peer(0)]
+        # a busy peer keeps counting
+        assert self.smap.get_next_invoke_id(peer(0)) == 12
+
+    def test_forgotten(self):
+        """A forgotten peer starts again but not with an ID that is still open."""
+        self.smap.maxInvokeIDPeers = 2
+        assert self.smap.get_next_invoke_id(peer(0)) == 1
+        self.smap.clientTransactions[(peer(0), 1)] = None
+        self.smap.get_next_invoke_id(peer(1))
+        self.smap.get_next_invoke_id(peer(2))
+        assert peer(0) not in self.smap.nextInvokeID
+
+        assert self.smap.get_next_invoke_id(peer(0)) == 2
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test IOCB Wait
+--------------
+
+The completion of an IOCB is a future made when something waits for it, a
+wait with a timeout gives up without taking the others waiting with it, and
+the time limit of the block is a timer on the shared timer wheel.
+"""
+
+import asyncio
+import unittest
+
+from bacpypes.comm import IOCB
+from bacpypes.comm.iocb_states import IDLE, COMPLETED, ABORTED
+from bacpypes.task import WheelTimer
+
+
+class TestIOCBWait(unittest.IsolatedAsyncioTestCase):
+
+    async def test_slots(self):
+        """A block has no dictionary and no future until it is waited for."""
+        iocb = IOCB('request')
+        assert not hasattr(iocb, '__dict__')
+        assert (iocb.io_state, iocb.io_future, iocb.io_timeout, iocb.io_id) == (IDLE, None, None, None)
+
+        iocb.complete('response')
+        assert iocb.io_future is None
+        assert await iocb.wait() is iocb
+
+    async def test_wait(self):
+        """Everything waiting is woken with the block, after the callbacks are added in order."""
+        iocb = IOCB('request')
+        called = []
+        iocb.add_callback(lambda block, tag: called.append((block, tag)), 'first')
+        iocb.add_callback(lambda block, tag: called.append((block, tag)), 'second')
+        waiters = [asyncio.ensure_future(iocb.wait()) for _ in range(2)]
+        assert iocb.wait() is iocb.io_future
+        await asyncio.sleep(0)
+        assert not any(waiter.done() for waiter in waiters)
+
+        asyncio.get_running_loop().call_soon(iocb.complete, 'response')
+        assert await asyncio.gather(*waiters) == [iocb, iocb]
+        assert (iocb.io_state, iocb.io_response) == (COMPLETED, 'response')
+        assert called == [(iocb, 'first'), (iocb, 'second')]
+
+        # a callback added now is called right away
+        iocb.add_callback(lambda block: called.append(block))
+        assert called[-1] is iocb
+
+    async def test_abort(self):
+        """An aborted block is done with its error, a completed one is not aborted after that."""
+        iocb = IOCB('request')
+        waiter = iocb.wait()
+        iocb.abort(ValueError('no'))
+        assert await waiter is iocb
+        assert iocb.io_state == ABORTED
+        assert isinstance(iocb.io_error, ValueError)
+        assert iocb.io_response is None
+
+        iocb = IOCB('request')
+        iocb.complete('response')
+        iocb.abort(ValueError('no'))
+        assert (iocb.io_state, iocb.io_response, iocb.io_error) == (COMPLETED, 'response', None)
+
+    async def test_wait_timeout(self):
+        """A wait that times out does not cancel the others waiting."""
+        iocb = IOCB('request')
+        other = iocb.wait()
+        with self.assertRaises(asyncio.TimeoutError):
+            await iocb.wait(timeout=0.05)
+        assert not other.done()
+        assert iocb.io_state == IDLE
+
+        iocb.complete('response')
+        assert await other is iocb
+        assert await iocb.wait(timeout=0.05) is iocb
+
+    async def test_set_timeout(self):
+        """A block that takes too long is aborted by a timer on the wheel."""
+        iocb = IOCB('request')
+        iocb.set_timeout(0.1, err=ValueError)
+        assert isinstance(iocb.io_timeout, WheelTimer)
+
+        # setting it again replaces it
+        first = iocb.io_timeout
+        iocb.set_timeout(0.1)
+        assert first.cancelled()
+
+        await asyncio.wait_for(iocb.wait(), 1)
+        assert iocb.io_state == ABORTED
+        assert iocb.io_error is TimeoutError
+        assert iocb.io_timeout is None
+
+    async def test_timeout_cancelled(self):
+        """Completing a block stops its timer."""
+        iocb = IOCB('request')
+        iocb.set_timeout(0.1)
+        timer = iocb.io_timeout
+        iocb.complete('response')
+        assert timer.cancelled()
+        assert iocb.io_timeout is None
+
+        await asyncio.sleep(0.2)
+        assert (iocb.io_state, iocb.io_error) == (COMPLETED, None)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test Read Planner
+-----------------
+"""
+
+import unittest
+
+from bacpypes.link import Address
+from bacpypes.apdu import ReadPropertyRequest, ReadPropertyMultipleRequest, WhoIsRequest, ReadPropertyMultipleACK, \
+    ReadAccessResult, ReadAccessResultElement, ReadAccessResultElementChoice
+from bacpypes.basetypes import ErrorType
+from bacpypes.constructeddata import Any
+from bacpypes.primitivedata import Real
+from bacpypes.app.read_planner import ReadBatch, plan_reads, split_read_results
+
+device_1 = Address('10.0.0.1')
+device_2 = Address('10.0.0.2')
+
+
+def read(destination, instance, property_identifier='presentValue', array_index=None):
+    return ReadPropertyRequest(
+        objectIdentifier=('analogValue', instance), propertyIdentifier=property_identifier,
+        propertyArrayIndex=array_index, destination=destination,
+    )
+
+
+def budget(destination):
+    return 480, 480
+
+
+def read_multiple_ack(results):
+    """A ReadPropertyMultipleACK for analog value presentValues, None for an error."""
+    read_access_results = []
+    for instance, value in results:
+        if value is None:
+            read_result = ReadAccessResultElementChoice(
+                propertyAccessError=ErrorType(errorClass='property', errorCode='unknownProperty'))
+        else:
+            read_result = ReadAccessResultElementChoice(propertyValue=Any(Real(value)))
+        read_access_results.append(ReadAccessResult(
+            objectIdentifier=('analogValue', instance),
+            listOfResults=[ReadAccessResultElement(propertyIdentifier='presentValue', readResult=read_result)],
+        ))
+    return ReadPropertyMultipleACK(listOfReadAccessResults=read_access_results)
+
+
+class TestPlanReads(unittest.TestCase):
+
+    def test_combine(self):
+        """Reads for the same device go together, in the order they were given."""
+        requests = [read(device_1, 1), read(device_2, 1), read(device_1, 2), read(device_1, 3)]
+        batches = plan_reads(requests, budget)
+
+        assert len(batches) == 2
+        multiple = [batch for batch in batches if batch.is_multiple]
+        assert len(multiple) == 1
+        assert multiple[0].indexes == [0, 2, 3]
+        assert isinstance(multiple[0].request, ReadPropertyMultipleRequest)
+        assert multiple[0].request.pduDestination == device_1
+
+        single = [batch for batch in batches if not batch.is_multiple]
+        assert single[0].indexes == [1]
+        assert single[0].request is requests[1]
+
+    def test_grouped_by_object(self):
+        """Properties of the same object share a read access specification."""
+        requests = [read(device_1, 1), read(device_1, 2), read(device_1, 1, 'statusFlags')]
+        batch, = plan_reads(requests, budget)
+
+        assert batch.indexes == [0, 2, 1]
+        specs = batch.request.listOfReadAccessSpecs
+        assert [spec.objectIdentifier for spec in specs] == [('analogValue', 1), ('analogValue', 2)]
+        assert len(specs[0].listOfPropertyReferences) == 2
+
+    def test_budget(self):
+        """A small budget splits the reads, every one of them is still there."""
+        requests = [read(device_1, i) for i in range(100)]
+        batches = plan_reads(requests, lambda destination: (100, 480))
+
+        assert len(batches) > 1
+        assert sorted(index for batch in batches for index in batch.indexes) == list(range(100))
+        for batch in batches:
+            request_size = 4 + sum(
+                7 + 4 * len(spec.listOfPropertyReferences) for spec in batch.request.listOfReadAccessSpecs
+            )
+            assert request_size <= 100
+
+    def test_not_combined(self):
+        """Other requests, large values and devices that cannot are read on their own."""
+        requests = [
+            WhoIsRequest(),
+            read(device_1, 1),
+            read(device_1, 2, 'priorityArray'),
+            read(device_1, 3, 'all'),
+            read(device_2, 1),
+            read(device_2, 2),
+        ]
+        batches = plan_reads(requests, budget, lambda destination: destination != device_2)
+
+        assert sorted(batch.indexes for batch in batches) == [[0], [1], [2], [3], [4], [5]]
+        assert not any(batch.is_multiple for batch in batches)
+
+    def test_priority_array_element(self):
+        """One element of an array is small enough to combine."""
+        requests = [read(device_1, 1), read(device_1, 1, 'priorityArray', 8)]
+        batch, = plan_reads(requests, budget)
+        assert batch.is_multiple
+
+
+class TestSplitReadResults(unittest.TestCase):
+
+    def test_split(self):
+        """The results go back to the requests, an error stays an ErrorType."""
+        batch = ReadBatch(ReadPropertyMultipleRequest(), [4, 0, 2])
+        results = split_read_results(batch, read_multiple_ack([(1, 1.5), (2, None), (3, 3.5)]))
+
+        assert [index for index, _ in results] == [4, 0, 2]
+        assert results[0][1] == 1.5
+        assert isinstance(results[1][1], ErrorType)
+        assert results[1][1].errorCode == 'unknownProperty'
+        assert results[2][1] == 3.5
+
+    def test_count_mismatch(self):
+        """An ack with the wrong number of results is not trusted."""
+        batch = ReadBatch(ReadPropertyMultipleRequest(), [0, 1])
+        with self.assertRaises(ValueError):
+            split_read_results(batch, read_multiple_ack([(1, 1.5)]))
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test Segmentation State Machines
+--------------------------------
+
+A client and a device, each with a state machine access point, connected by
+a link that can lose or repeat particular packets.  Every APDU is encoded and
+decoded on the way like it would be on a network.
+"""
+
+import asyncio
+import unittest
+
+from bacpypes.comm import ApplicationServiceElement, Server, bind
+from bacpypes.link import Address, PDU
+from bacpypes.apdu import APDU, ConfirmedRequestPDU, ComplexAckPDU, SegmentAckPDU, AbortPDU
+from bacpypes.app.deviceinfo import DeviceInfoCache
+from bacpypes.app.state_machine_ap import StateMachineAccessPoint
+
+client_address = Address('10.0.0.1')
+device_address = Address('10.0.0.2')
+
+
+class Endpoint(Server):
+    """Stand in for the network layer, send the encoded APDUs to the peer."""
+
+    def __init__(self, address):
+        Server.__init__(self)
+        self.address = address
+        self.peer = None
+        self.sent = []      # (apdu, delivered)
+        self.drop = None    # function of the APDU, True if it is lost
+        self.repeat = None  # function of the APDU, True if it arrives twice
+
+    def indication(self, apdu):
+        xpdu = APDU()
+        apdu.encode(xpdu)
+        wire = PDU()
+        xpdu.encode(wire)
+        lost = bool(self.drop and self.drop(apdu))
+        self.sent.append((apdu, not lost))
+        if lost:
+            return
+        loop = asyncio.get_running_loop()
+        loop.call_soon(self.peer.receive, bytes(wire.pduData), self.address)
+        if self.repeat and self.repeat(apdu):
+            loop.call_soon(self.peer.receive, bytes(wire.pduData), self.address)
+
+    def receive(self, data, source):
+        apdu = APDU()
+        apdu.decode(PDU(data, source=source))
+        self.response(apdu)
+
+    def segments(self):
+        return [apdu for apdu, _ in self.sent if apdu.apduType == ComplexAckPDU.pduType
+                or apdu.apduType == ConfirmedRequestPDU.pduType]
+
+    def segment_acks(self):
+        return [apdu for apdu, _ in self.sent if apdu.apduType == SegmentAckPDU.pduType]
+
+
+class Client(ApplicationServiceElement):
+
+    def __init__(self):
+        ApplicationServiceElement.__init__(self)
+        self.future = None
+
+    def confirmation(self, apdu):
+        self.future.set_result(apdu)
+
+
+class Device(ApplicationServiceElement):
+    """Answer a short request with a long value, a long one with a short value."""
+
+    def __init__(self, value):
+        ApplicationServiceElement.__init__(self)
+        self.value = value
+        self.received = None
+
+    def indication(self, apdu):
+        self.received = bytes(apdu.pduData)
+        ack = ComplexAckPDU(apdu.apduService, apdu.apduInvokeID)
+        ack.put_data(self.value if len(apdu.pduData) < 100 else b'\x3e\x3f')
+        ack.pduDestination = apdu.pduSource
+        self.response(ack)
+
+
+def segment_number(apdu):
+    if apdu.apduType == SegmentAckPDU.pduType or not apdu.apduSeg:
+        return None
+    return apdu.apduSeq
+
+
+class TestSegmentation(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.client_end, self.device_end = Endpoint(client_address), Endpoint(device_address)
+        self.client_end.peer, self.device_end.peer = self.device_end, self.client_end
+
+        self.client = Client()
+        self.client_smap = StateMachineAccessPoint(device_info_cache=DeviceInfoCache())
+        self.client_smap.segmentationSupported = 'segmentedBoth'
+        self.client_smap.maxSegmentsAccepted = 64
+        self.client_smap.segmentTimeout = 200
+        bind(self.client, self.client_smap, self.client_end)
+
+        self.device = Device(bytes(range(256)) * 100)
+        self.device_smap = StateMachineAccessPoint(device_info_cache=DeviceInfoCache())
+        self.device_smap.segmentationSupported = 'segmentedBoth'
+        self.device_smap.segmentTimeout = 200
+        bind(self.device, self.device_smap, self.device_end)
+
+    async def confirmed_request(self, data=b'\x0c\x02\x00\x00\x01\x19\x4c'):
+        request = ConfirmedRequestPDU(12)
+        request.pduDestination = device_address
+        request.put_data(data)
+        self.client.future = asyncio.get_running_loop().create_future()
+        self.client_smap.sap_indication(request)
+        apdu = await asyncio.wait_for(self.client.future, 10)
+        assert not isinstance(apdu, AbortPDU), apdu
+        return apdu
+
+    def client_timing(self):
+        return self.client_smap.deviceInfoCache.get_timing(device_address)
+
+    def device_timing(self):
+        return self.device_smap.deviceInfoCache.get_timing(client_address)
+
+    async def test_window_grows(self):
+        """The receiving side doubles the window after every whole window."""
+        apdu = await self.confirmed_request()
+        assert bytes(apdu.pduData) == self.device.value
+
+        windows = [ack.apduWin for ack in self.client_end.segment_acks()]
+        assert windows[0] == self.client_smap.initialWindowSize
+        assert windows[1] == 2 * self.client_smap.initialWindowSize
+        assert not any(ack.apduNak for ack in self.client_end.segment_acks())
+
+        # each side remembers the window for its own direction only
+        assert self.client_timing().receive_window == windows[-1]
+        assert self.client_timing().send_window is None
+        assert self.device_timing().send_window == windows[-1]
+        assert self.device_timing().receive_window is None
+
+        # the next time starts where this one ended and the device
+        # proposes twice that
+        self.client_end.sent, self.device_end.sent = [], []
+        apdu = await self.confirmed_request()
+        assert bytes(apdu.pduData) == self.device.value
+        assert self.device_end.segments()[0].apduWin == 2 * windows[-1]
+        assert self.client_end.segment_acks()[0].apduWin == windows[-1]
+
+    async def test_missed_segment(self):
+        """A lost segment is asked for with a negative ack and the window shrinks."""
+        lost = []
+        self.device_end.drop = lambda apdu: segment_number(apdu) == 20 and not lost and not lost.append(apdu)
+
+        apdu = await self.confirmed_request()
+        assert bytes(apdu.pduData) == self.device.value
+        assert len(lost) == 1
+
+        acks = self.client_end.segment_acks()
+        naks = [ack for ack in acks if ack.apduNak]
+        assert len(naks) == 1
+        assert naks[0].apduSeq == 19
+        assert naks[0].apduWin == acks[acks.index(naks[0]) - 1].apduWin // 2
+
+        # the segments from the missing one on are sent again
+        numbers = [segment_number(apdu) for apdu in self.device_end.segments()]
+        assert numbers.count(20) == 2
+        assert numbers.count(19) == 1
+
+        # the window that worked is remembered for the next time
+        assert self.client_timing().receive_window == acks[-1].apduWin
+        assert self.client_timing().receive_window <= naks[0].apduWin + 1
+
+    async def test_duplicate_segment(self):
+        """A segment that arrives again is acknowledged again, not asked for."""
+        self.device_end.repeat = lambda apdu: segment_number(apdu) == 5
+
+        apdu = await self.confirmed_request()
+        assert bytes(apdu.pduData) == self.device.value
+
+        acks = self.client_end.segment_acks()
+        assert not any(ack.apduNak for ack in acks)
+        assert [ack.apduSeq for ack in acks].count(5) == 1
+
+    async def test_lost_ack(self):
+        """A window that is not acknowledged is sent again and half of it is remembered."""
+        lost = []
+        self.client_end.drop = lambda apdu: apdu.apduType == SegmentAckPDU.pduType and apdu.apduSeq == 8 \
+            and not lost and not lost.append(apdu)
+
+        apdu = await self.confirmed_request()
+        assert bytes(apdu.pduData) == self.device.value
+        assert len(lost) == 1
+
+        # the window after the first segment went out twice
+        numbers = [segment_number(apdu) for apdu in self.device_end.segments()]
+        assert numbers.count(1) == 2
+        assert numbers.count(8) == 2
+        assert numbers.count(9) == 1
+        send_window = self.device_timing().send_window
+        assert send_window == self.client_smap.initialWindowSize // 2
+
+        # the next message proposes twice that, the receiver stays within it
+        self.client_end.sent, self.device_end.sent = [], []
+        apdu = await self.confirmed_request()
+        assert bytes(apdu.pduData) == self.device.value
+        assert self.device_end.segments()[0].apduWin == 2 * send_window
+        assert max(ack.apduWin for ack in self.client_end.segment_acks()) == 2 * send_window
+        assert self.device_timing().send_window == 2 * send_window
+
+    async def test_segmented_request(self):
+        """The client sends segments, the windows are kept for that direction."""
+        data = bytes(range(256)) * 30
+        apdu = await self.confirmed_request(data)
+        assert bytes(apdu.pduData) == b'\x3e\x3f'
+        assert self.device.received == data
+
+        acks = self.device_end.segment_acks()
+        assert acks[-1].apduWin == self.device_timing().receive_window
+        assert self.client_timing().send_window == acks[-1].apduWin
+        assert self.client_timing().receive_window is None
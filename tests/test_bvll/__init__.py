@@ -9,3 +9,6 @@ from . import test_simple
 from . import test_foreign
 from . import test_bbmd
 
+from . import test_bbmd_forwarding
+from . import test_broadcast_filter
+from . import test_bbmd_fdt
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test BBMD Foreign Device Table
+------------------------------
+
+Foreign devices register, register again, are deleted and expire, the BVLL
+requests go through a codec and the answers are checked as octets.
+"""
+
+import asyncio
+import unittest
+
+from bacpypes.comm import Server, bind
+from bacpypes.link import Address, LocalBroadcast, PDU
+from bacpypes.bvll import BIPBBMD, AnnexJCodec
+from bacpypes.bvll import bip_bbmd
+
+# an NPDU, version 1 and no control flags, followed by a Who-Is
+npdu = b'\x01\x00\x10\x08'
+
+foreign_device = Address('172.16.0.1')
+
+
+class Recorder(Server):
+    """Stand in for the layer under the codec, keep the datagrams."""
+
+    def __init__(self):
+        Server.__init__(self)
+        self.sent = []
+
+    def indication(self, pdu):
+        self.sent.append((pdu.pduDestination, bytes(pdu.pduData)))
+
+
+def bvll(function, data=b''):
+    return bytes([0x81, function]) + (4 + len(data)).to_bytes(2, 'big') + data
+
+
+def register(ttl):
+    return bvll(0x05, ttl.to_bytes(2, 'big'))
+
+
+def result_code(data):
+    assert data[1] == 0x00
+    return int.from_bytes(data[4:6], 'big')
+
+
+class TestForeignDeviceTable(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.bbmd = BIPBBMD(Address('10.0.0.1'))
+        self.bbmd.add_peer(Address('10.0.0.1'))
+        self.codec, self.recorder = AnnexJCodec(), Recorder()
+        bind(self.bbmd, self.codec, self.recorder)
+
+    def tearDown(self):
+        for addr in list(self.bbmd.bbmdFDT):
+            self.bbmd.delete_foreign_device_table_entry(addr)
+
+    def receive(self, data, source=foreign_device):
+        self.recorder.sent = []
+        self.codec.confirmation(PDU(data, source=source))
+        assert len(self.recorder.sent) == 1
+        destination, data = self.recorder.sent[0]
+        assert destination == source
+        return data
+
+    def read_fdt(self):
+        """Return (address, ttl, remaining) of each entry in a Read-FDT-Ack."""
+        data = self.receive(bvll(0x06), Address('10.0.0.9'))
+        assert data[1] == 0x07
+        entries = []
+        for offset in range(4, len(data), 10):
+            entry = data[offset:offset + 10]
+            entries.append((
+                Address(entry[:6]),
+                int.from_bytes(entry[6:8], 'big'),
+                int.from_bytes(entry[8:10], 'big'),
+            ))
+        return entries
+
+    def forwarded_to(self):
+        """Return the socket addresses a local broadcast is forwarded to."""
+        self.recorder.sent = []
+        self.bbmd.indication(PDU(npdu, destination=LocalBroadcast()))
+        return {destination.addrTuple for destination, data in self.recorder.sent if data[1] == 0x04}
+
+    async def test_register(self):
+        """A registration is in the table and gets broadcasts."""
+        assert result_code(self.receive(register(30))) == 0
+        assert self.read_fdt() == [(foreign_device, 30, 35)]
+        assert self.forwarded_to() == {foreign_device.addrTuple}
+
+    async def test_register_again(self):
+        """Registering again takes the new time-to-live and restarts the timer."""
+        self.receive(register(30))
+        first = self.bbmd._fd_timers[foreign_device]
+
+        assert result_code(self.receive(register(600))) == 0
+        assert len(self.bbmd.bbmdFDT) == 1
+        assert self.read_fdt() == [(foreign_device, 600, 605)]
+        assert first.cancelled()
+        assert self.bbmd._fd_timers[foreign_device] is not first
+        assert len(self.bbmd._fd_timers) == 1
+        assert self.forwarded_to() == {foreign_device.addrTuple}
+
+    async def test_remaining(self):
+        """The remaining time counts down from the time-to-live and the grace period."""
+        self.bbmd.register_foreign_device(foreign_device, 10)
+        await asyncio.sleep(1.1)
+        (_, ttl, remaining), = self.read_fdt()
+        assert ttl == 10
+        assert remaining == 14
+
+    async def test_expired(self):
+        """A registration that is not renewed goes away after its time and the grace period."""
+        grace_period, bip_bbmd.FD_GRACE_PERIOD = bip_bbmd.FD_GRACE_PERIOD, 0.1
+        try:
+            self.bbmd.register_foreign_device(foreign_device, 0.1)
+            await asyncio.sleep(0.15)
+            assert foreign_device in self.bbmd.bbmdFDT
+
+            # renewed before it expires
+            self.bbmd.register_foreign_device(foreign_device, 0.1)
+            await asyncio.sleep(0.15)
+            assert foreign_device in self.bbmd.bbmdFDT
+
+            await asyncio.sleep(0.2)
+        finally:
+            bip_bbmd.FD_GRACE_PERIOD = grace_period
+
+        assert self.bbmd.bbmdFDT == {}
+        assert self.bbmd._fd_timers == {}
+        assert self.read_fdt() == []
+        assert self.forwarded_to() == set()
+
+    async def test_delete(self):
+        """Deleting an entry stops its timer and its broadcasts."""
+        self.receive(register(30))
+        timer = self.bbmd._fd_timers[foreign_device]
+
+        delete = bvll(0x08, foreign_device.addrAddr)
+        assert result_code(self.receive(delete, Address('10.0.0.9'))) == 0
+        assert timer.cancelled()
+        assert self.read_fdt() == []
+        assert self.forwarded_to() == set()
+
+    async def test_delete_missing(self):
+        """Deleting an entry that is not there is an error."""
+        self.receive(register(30))
+
+        delete = bvll(0x08, Address('172.16.0.2').addrAddr)
+        assert result_code(self.receive(delete, Address('10.0.0.9'))) == 99
+        assert self.bbmd.delete_foreign_device_table_entry(Address('172.16.0.3')) == 99
+        assert [entry[0] for entry in self.read_fdt()] == [foreign_device]
+
+    async def test_peer_is_foreign_device(self):
+        """A peer whose broadcast address is a foreign device keeps getting broadcasts."""
+        # a peer with a /32 mask is sent broadcasts at its own address
+        peer = Address('10.2.0.1')
+        self.bbmd.add_peer(peer)
+        self.bbmd.register_foreign_device(Address('10.2.0.1'), 30)
+        assert self.forwarded_to() == {('10.2.0.1', 47808)}
+
+        # the foreign device goes away, the peer does not
+        assert self.bbmd.delete_foreign_device_table_entry(Address('10.2.0.1')) == 0
+        assert self.forwarded_to() == {('10.2.0.1', 47808)}
+
+        # the other way around
+        self.bbmd.register_foreign_device(Address('10.2.0.1'), 30)
+        self.bbmd.delete_peer(peer)
+        assert self.forwarded_to() == {('10.2.0.1', 47808)}
+        assert self.bbmd.delete_foreign_device_table_entry(Address('10.2.0.1')) == 0
+        assert self.forwarded_to() == set()
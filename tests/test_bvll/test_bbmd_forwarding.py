@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test BBMD Forwarding
+--------------------
+
+A BBMD with a peer and two foreign devices forwards broadcasts.  Under a
+UDPMultiplexer the Forwarded-NPDU is sent once to all of them, under anything
+else it is sent to each of them in turn.
+"""
+
+import unittest
+
+from bacpypes.comm import Client, Server, bind
+from bacpypes.link import Address, LocalBroadcast, PDU
+from bacpypes.bvll import BIPBBMD, AnnexJCodec, UDPMultiplexer
+
+# an NPDU, version 1 and no control flags, followed by a Who-Is
+npdu = b'\x01\x00\x10\x08'
+
+# function codes
+forwarded_npdu = 0x04
+original_broadcast_npdu = 0x0B
+
+
+class Recorder(Server):
+    """Stand in for the layer under the codec, keep the datagrams."""
+
+    def __init__(self):
+        Server.__init__(self)
+        self.sent = []
+
+    def indication(self, pdu):
+        self.sent.append((pdu.pduDestination, bytes(pdu.pduData)))
+
+
+class Application(Client):
+    """Stand in for the layer above the BBMD, keep what comes up."""
+
+    def __init__(self):
+        Client.__init__(self)
+        self.received = []
+
+    def confirmation(self, pdu):
+        self.received.append(pdu)
+
+
+class Director:
+    """Stand in for the UDPDirector under the multiplexer, keep the datagrams."""
+
+    def __init__(self):
+        self.sent = []
+        self.fanned_out = []
+
+    def indication(self, pdu):
+        self.sent.append((pdu.pduDestination, bytes(pdu.pduData)))
+
+    def fan_out(self, data, destinations):
+        self.fanned_out.append((bytes(data), set(destinations)))
+
+
+class TestBBMDForwarding(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.bbmd = BIPBBMD(Address('10.0.0.1'))
+        self.bbmd.add_peer(Address('10.0.0.1'))
+        self.bbmd.add_peer(Address('10.1.0.1/24'))
+        self.foreign_devices = [Address('172.16.0.1'), Address('172.16.0.2')]
+        for addr in self.foreign_devices:
+            self.bbmd.register_foreign_device(addr, 30)
+
+    def tearDown(self):
+        for addr in self.foreign_devices:
+            self.bbmd.delete_foreign_device_table_entry(addr)
+
+    def everyone(self):
+        return {('10.1.0.255', 47808), ('172.16.0.1', 47808), ('172.16.0.2', 47808)}
+
+    def test_without_multiplexer(self):
+        """Each destination gets its own request."""
+        recorder = Recorder()
+        bind(self.bbmd, AnnexJCodec(), recorder)
+
+        self.bbmd.indication(PDU(npdu, destination=LocalBroadcast()))
+
+        destination, data = recorder.sent[0]
+        assert destination.addrType == Address.localBroadcastAddr
+        assert data[1] == original_broadcast_npdu
+
+        forwarded = recorder.sent[1:]
+        assert {destination.addrTuple for destination, _ in forwarded} == self.everyone()
+        for destination, data in forwarded:
+            assert destination.addrType == Address.localStationAddr
+            assert data[1] == forwarded_npdu
+            assert data[-len(npdu):] == npdu
+
+    def test_with_multiplexer(self):
+        """One request for everyone, the same datagram as the one at a time version."""
+        mux = UDPMultiplexer(Address('10.0.0.1/24'))
+        director = mux.protocol = Director()
+        bind(self.bbmd, AnnexJCodec(), mux.annexJ)
+
+        self.bbmd.indication(PDU(npdu, destination=LocalBroadcast()))
+
+        assert len(director.sent) == 1
+        assert director.sent[0][0] == ('10.0.0.255', 47808)
+        assert len(director.fanned_out) == 1
+        data, destinations = director.fanned_out[0]
+        assert destinations == self.everyone()
+        assert data[1] == forwarded_npdu
+
+        # the same octets as sending them one at a time
+        recorder = Recorder()
+        bbmd = BIPBBMD(Address('10.0.0.1'))
+        bbmd.add_peer(Address('10.0.0.1'))
+        bbmd.add_peer(Address('10.1.0.1/24'))
+        bind(bbmd, AnnexJCodec(), recorder)
+        bbmd.indication(PDU(npdu, destination=LocalBroadcast()))
+        assert recorder.sent[1][1] == data
+
+    def test_distribute_broadcast(self):
+        """A Distribute-Broadcast-To-Network is not sent back to the foreign device."""
+        application, codec, recorder = Application(), AnnexJCodec(), Recorder()
+        bind(application, self.bbmd, codec, recorder)
+
+        request = b'\x81\x09' + (4 + len(npdu)).to_bytes(2, 'big') + npdu
+        codec.confirmation(PDU(request, source=self.foreign_devices[0]))
+
+        assert len(application.received) == 1
+        forwarded = [destination for destination, data in recorder.sent if data[1] == forwarded_npdu]
+        assert forwarded[0].addrType == Address.localBroadcastAddr
+        assert {destination.addrTuple for destination in forwarded[1:]} == self.everyone() - {('172.16.0.1', 47808)}
+
+    def test_no_destinations(self):
+        """Nothing is sent when there is nobody to forward to."""
+        recorder = Recorder()
+        bbmd = BIPBBMD(Address('10.0.0.1'))
+        bbmd.add_peer(Address('10.0.0.1'))
+        bind(bbmd, AnnexJCodec(), recorder)
+
+        bbmd.indication(PDU(npdu, destination=LocalBroadcast()))
+        assert [data[1] for _, data in recorder.sent] == [original_broadcast_npdu]
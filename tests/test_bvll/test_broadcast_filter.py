@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test Broadcast Filter
+---------------------
+"""
+
+import unittest
+
+from bacpypes.comm import Client, Server, bind
+from bacpypes.link import Address, PDU
+from bacpypes.bvll import broadcast_filter
+from bacpypes.bvll.broadcast_filter import BroadcastFilter
+
+source = Address('10.0.0.2')
+router = Address('10.0.0.3')
+
+
+class Clock:
+    """Stand in for the time module, the time only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class Application(Client):
+
+    def __init__(self):
+        Client.__init__(self)
+        self.received = []
+
+    def confirmation(self, pdu):
+        self.received.append(bytes(pdu.pduData))
+
+
+class Sink(Server):
+
+    def indication(self, pdu):
+        pass
+
+
+def npdu(n=0, snet=None, sadr=None):
+    """An unconfirmed request NPDU, with a source network and address if given."""
+    if snet is None:
+        return bytes([0x01, 0x00, 0x10, 0x08]) + n.to_bytes(2, 'big')
+    return bytes([0x01, 0x08]) + snet.to_bytes(2, 'big') + bytes([len(sadr)]) + sadr + \
+        bytes([0x10, 0x08]) + n.to_bytes(2, 'big')
+
+
+def original_broadcast(data, pdu_source=source):
+    return PDU(bytes([0x81, 0x0B]) + (len(data) + 4).to_bytes(2, 'big') + data, source=pdu_source)
+
+
+def forwarded(data, origin=source, pdu_source=router):
+    return PDU(bytes([0x81, 0x04]) + (len(data) + 10).to_bytes(2, 'big') + origin.addrAddr + data,
+               source=pdu_source)
+
+
+class TestBroadcastFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.time, broadcast_filter.time = broadcast_filter.time, self.clock
+        self.application = Application()
+
+    def tearDown(self):
+        broadcast_filter.time = self.time
+
+    def filter(self, **kwargs):
+        bfilter = BroadcastFilter(**kwargs)
+        bind(self.application, bfilter, Sink())
+        return bfilter
+
+    def test_duplicates(self):
+        """The same broadcast from the same origin goes up once."""
+        bfilter = self.filter(rate=None)
+        bfilter.confirmation(original_broadcast(npdu(1)))
+        bfilter.confirmation(original_broadcast(npdu(1)))
+        bfilter.confirmation(forwarded(npdu(1)))
+        assert len(self.application.received) == 1
+        assert bfilter.duplicates == 2
+
+        # different contents or a different origin are not duplicates
+        bfilter.confirmation(original_broadcast(npdu(2)))
+        bfilter.confirmation(original_broadcast(npdu(1), Address('10.0.0.4')))
+        assert len(self.application.received) == 3
+        assert bfilter.passed == 3
+
+    def test_octets(self):
+        """Duplicates are the same octets, not the same hash."""
+        bfilter = self.filter(rate=None)
+        bfilter.confirmation(original_broadcast(npdu(1)))
+        bfilter.confirmation(forwarded(npdu(2), Address('10.0.0.4')))
+        assert list(bfilter._seen) == [source.addrAddr + npdu(1), Address('10.0.0.4').addrAddr + npdu(2)]
+
+    def test_window(self):
+        """A broadcast seen again after the window goes up again."""
+        bfilter = self.filter(window=0.5, rate=None)
+        bfilter.confirmation(original_broadcast(npdu(1)))
+        self.clock.now += 0.4
+        bfilter.confirmation(original_broadcast(npdu(1)))
+        assert len(self.application.received) == 1
+
+        self.clock.now += 0.2
+        bfilter.confirmation(original_broadcast(npdu(1)))
+        assert len(self.application.received) == 2
+
+    def test_history(self):
+        """Only the last history broadcasts are remembered."""
+        bfilter = self.filter(history=4, rate=None)
+        for n in range(5):
+            bfilter.confirmation(original_broadcast(npdu(n)))
+        bfilter.confirmation(original_broadcast(npdu(4)))
+        assert bfilter.duplicates == 1
+        bfilter.confirmation(original_broadcast(npdu(0)))
+        assert bfilter.duplicates == 1
+        assert len(bfilter._seen) == 4
+
+    def test_not_broadcasts(self):
+        """Other BVLL messages are not looked at."""
+        bfilter = self.filter(rate=1.0, burst=1)
+        unicast = PDU(bytes([0x81, 0x0A, 0x00, 0x08]) + npdu(1), source=source)
+        for _ in range(3):
+            bfilter.confirmation(unicast)
+        assert len(self.application.received) == 3
+        assert bfilter.passed == 0
+
+    def test_bucket(self):
+        """An origin sends a burst, then rate a second."""
+        bfilter = self.filter(window=None, rate=2.0, burst=3)
+        for n in range(5):
+            bfilter.confirmation(original_broadcast(npdu(n)))
+        assert len(self.application.received) == 3
+        assert bfilter.rate_limited == 2
+
+        self.clock.now += 1.0
+        for n in range(5):
+            bfilter.confirmation(original_broadcast(npdu(n)))
+        assert len(self.application.received) == 5
+
+        # another origin has its own bucket
+        bfilter.confirmation(original_broadcast(npdu(0), Address('10.0.0.4')))
+        assert len(self.application.received) == 6
+
+    def test_bucket_behind_router(self):
+        """Broadcasts a router forwards for different devices do not share a bucket."""
+        bfilter = self.filter(window=None, rate=1.0, burst=2)
+        for device in range(10):
+            for n in range(2):
+                bfilter.confirmation(original_broadcast(npdu(n, 5, bytes([device])), router))
+        assert len(self.application.received) == 20
+        assert bfilter.rate_limited == 0
+
+        # but each of them is still limited
+        bfilter.confirmation(original_broadcast(npdu(3, 5, bytes([0])), router))
+        assert bfilter.rate_limited == 1
+
+        # the same device forwarded by a BBMD is the same source
+        bfilter.confirmation(forwarded(npdu(4, 5, bytes([1])), router, Address('10.0.9.1')))
+        assert bfilter.rate_limited == 2
+
+    def test_max_sources(self):
+        """Only the last max_sources buckets are remembered."""
+        bfilter = self.filter(window=None, rate=1.0, burst=1, max_sources=4)
+        for i in range(6):
+            bfilter.confirmation(original_broadcast(npdu(0), Address('10.0.1.%d' % (i + 1,))))
+        assert len(bfilter._buckets) == 4
+        # the first one was forgotten, so it has a full bucket again
+        bfilter.confirmation(original_broadcast(npdu(1), Address('10.0.1.1')))
+        assert bfilter.rate_limited == 0
+        bfilter.confirmation(original_broadcast(npdu(1), Address('10.0.1.6')))
+        assert bfilter.rate_limited == 1
+
+    def test_source_with_destination(self):
+        """The source is found after a destination network and address."""
+        data = bytes([0x01, 0x28, 0xFF, 0xFF, 0x00, 0x00, 0x05, 0x01, 0x07, 0xFF, 0x10, 0x08])
+        assert broadcast_filter._npdu_source(data) == (5, b'\x07')
+        assert broadcast_filter._npdu_source(npdu(1)) is None
+        assert broadcast_filter._npdu_source(b'\x01\x08\x00') is None
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test Pending Routes
+-------------------
+
+A router with two adapters forwards an NPDU to a network it has no path to,
+the Who-Is-Router-To-Network goes out on the other adapter only.
+"""
+
+import unittest
+
+from bacpypes.comm import Server
+from bacpypes.link import Address, PDU, RemoteStation
+from bacpypes.network.npdu import NPDU, WhoIsRouterToNetwork
+from bacpypes.network.network_sap import NetworkServiceAccessPoint
+
+
+class Recorder(Server):
+
+    def __init__(self):
+        Server.__init__(self)
+        self.sent = []
+
+    def indication(self, pdu):
+        npdu = NPDU()
+        npdu.decode(pdu)
+        self.sent.append(npdu)
+
+
+def forwarded_pdu(dnet, source):
+    """An application layer NPDU for a station on dnet as it comes off the wire."""
+    npdu = NPDU(b'\x10\x08')
+    npdu.npduDADR = RemoteStation(dnet, 5)
+    npdu.npduHopCount = 255
+    pdu = PDU()
+    npdu.encode(pdu)
+    pdu.pduSource = source
+    return pdu
+
+
+class TestPendingRoutes(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.nsap = NetworkServiceAccessPoint()
+        self.net1, self.net2 = Recorder(), Recorder()
+        self.nsap.bind(self.net1, 1, Address('10.0.1.1'))
+        self.nsap.bind(self.net2, 2)
+
+    def who_is_router(self, server):
+        return [npdu for npdu in server.sent if npdu.npduNetMessage == WhoIsRouterToNetwork.messageType]
+
+    async def test_not_on_arrival_adapter(self):
+        """Who-Is-Router-To-Network is not sent back where the NPDU came from."""
+        self.nsap.adapters[1].confirmation(forwarded_pdu(3, Address('10.0.1.5')))
+
+        assert 3 in self.nsap.pending_routes
+        assert self.who_is_router(self.net1) == []
+        assert len(self.who_is_router(self.net2)) == 1
+
+        self.nsap.pending_routes.clear()
+
+    async def test_arrived_on_both(self):
+        """NPDUs waiting for the same network from both sides, ask both."""
+        pending_routes = self.nsap.pending_routes
+        pending_routes.append(3, NPDU(), self.nsap.adapters[1])
+        assert pending_routes.networks[3].adapter is self.nsap.adapters[1]
+
+        pending_routes.append(3, NPDU(), self.nsap.adapters[2])
+        assert pending_routes.networks[3].adapter is None
+
+        pending_routes.networks[3].next_request = 0
+        pending_routes._check(3)
+        assert len(self.who_is_router(self.net1)) == 1
+        assert len(self.who_is_router(self.net2)) == 2
+
+        pending_routes.clear()
+
+    async def test_local(self):
+        """A request from this device looks everywhere."""
+        self.nsap.pending_routes.append(3, NPDU())
+        assert len(self.who_is_router(self.net1)) == 1
+        assert len(self.who_is_router(self.net2)) == 1
+
+        self.nsap.pending_routes.clear()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test Router Info Cache
+----------------------
+
+Routers are indexed by (snet, address), by source network and by address,
+networks move from one router to another and routers that are not heard
+from are aged out.
+"""
+
+import asyncio
+import unittest
+
+from bacpypes.link import Address
+from bacpypes.network.netservice import RouterInfoCache, ROUTER_AVAILABLE, ROUTER_BUSY
+
+router_1 = Address('10.0.0.1')
+router_2 = Address('10.0.0.2')
+
+
+class TestRouterInfoCache(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.cache = RouterInfoCache()
+
+    def tearDown(self):
+        self.cache.clear()
+
+    def check_indexes(self):
+        """The indexes hold the same routers as the table."""
+        cache = self.cache
+        routers = set(cache.routers.values())
+        assert {r for entries in cache.snets.values() for r in entries.values()} == routers
+        assert {r for entries in cache.addresses.values() for r in entries.values()} == routers
+        for (snet, address), router_info in cache.routers.items():
+            assert cache.snets[snet][address] is router_info
+            assert cache.addresses[address][snet] is router_info
+        for dnet, router_info in cache.networks.items():
+            assert dnet in router_info.dnets
+            assert router_info in routers
+        assert {dnet for r in routers for dnet in r.dnets} == set(cache.networks)
+        assert all(r.dnets for r in routers)
+        assert (cache._aging_handle is not None) == bool(routers)
+
+    def test_update(self):
+        """Routers are found by network, by source network and by address."""
+        cache = self.cache
+        cache.update_router_info(1, router_1, [10, 11])
+        cache.update_router_info(1, router_2, [12])
+        cache.update_router_info(2, router_1, [20])
+        self.check_indexes()
+
+        assert cache.get_router_info(10) == (1, router_1, ROUTER_AVAILABLE)
+        assert cache.get_router_info(20) == (2, router_1, ROUTER_AVAILABLE)
+        assert cache.get_router_info(30) is None
+        assert {r.address for r in cache.get_routers(1)} == {router_1, router_2}
+        assert cache.get_routers(3) == []
+        assert {r.snet for r in cache.get_router_networks(router_1)} == {1, 2}
+        assert cache.get_router_networks(Address('10.0.0.3')) == []
+
+        # announcing the networks again changes nothing
+        cache.update_router_info(1, router_1, [11, 10])
+        assert cache.routers[(1, router_1)].dnets == {10, 11}
+        self.check_indexes()
+
+        cache.update_router_status(1, router_2, ROUTER_BUSY)
+        assert cache.get_router_info(12) == (1, router_2, ROUTER_BUSY)
+
+    def test_move(self):
+        """A network reached through another router is taken from the first."""
+        cache = self.cache
+        cache.update_router_info(1, router_1, [10, 11])
+        cache.update_router_info(1, router_2, [11, 12])
+        assert cache.routers[(1, router_1)].dnets == {10}
+        assert cache.get_router_info(11) == (1, router_2, ROUTER_AVAILABLE)
+        self.check_indexes()
+
+        # the last network moves, the router goes away
+        cache.update_router_info(2, router_2, [10])
+        assert (1, router_1) not in cache.routers
+        assert router_1 not in cache.addresses
+        assert cache.get_routers(1) == [cache.routers[(1, router_2)]]
+        assert cache.get_router_info(10) == (2, router_2, ROUTER_AVAILABLE)
+        self.check_indexes()
+
+    def test_delete(self):
+        """Networks are deleted from a router, a router with none left goes away."""
+        cache = self.cache
+        cache.update_router_info(1, router_1, [10, 11])
+        cache.update_router_info(1, router_2, [12])
+        cache.update_router_info(2, router_1, [20])
+
+        cache.delete_router_info(1, router_1, [10, 30])
+        assert cache.routers[(1, router_1)].dnets == {11}
+        assert cache.get_router_info(10) is None
+        self.check_indexes()
+
+        cache.delete_router_info(1, router_1, [11])
+        assert (1, router_1) not in cache.routers
+        assert list(cache.addresses[router_1]) == [2]
+        self.check_indexes()
+
+        # an unknown router is not an error
+        cache.delete_router_info(3, router_1)
+        cache.delete_router_info(1)
+        assert 1 not in cache.snets
+        assert set(cache.networks) == {20}
+        self.check_indexes()
+
+    def test_delete_address(self):
+        """A router is deleted from every network it is on."""
+        cache = self.cache
+        cache.update_router_info(1, router_1, [10])
+        cache.update_router_info(2, router_1, [20, 21])
+        cache.update_router_info(1, router_2, [12])
+
+        cache.delete_router_info(None, router_1, [21])
+        assert cache.routers[(2, router_1)].dnets == {20}
+        self.check_indexes()
+
+        cache.delete_router_info(None, router_1)
+        assert router_1 not in cache.addresses
+        assert list(cache.routers) == [(1, router_2)]
+        assert set(cache.networks) == {12}
+        self.check_indexes()
+
+        cache.delete_router_info(None, router_2)
+        assert cache.routers == cache.networks == cache.snets == cache.addresses == {}
+        self.check_indexes()
+
+    def test_refresh(self):
+        """Hearing from a router moves its last seen time."""
+        cache = self.cache
+        assert cache.refresh_router_info(1, router_1) is False
+        cache.update_router_info(1, router_1, [10])
+        router_info = cache.routers[(1, router_1)]
+        router_info.last_seen -= 100.0
+        last_seen = router_info.last_seen
+
+        assert cache.refresh_router_info(1, router_1) is True
+        assert router_info.last_seen > last_seen + 99.0
+        assert cache.refresh_router_info(2, router_1) is False
+
+        # announcing its networks again does too
+        router_info.last_seen -= 100.0
+        cache.update_router_info(1, router_1, [10])
+        assert router_info.last_seen > last_seen + 99.0
+
+    def test_age(self):
+        """Routers not heard from for max_age seconds are dropped by the sweep."""
+        cache = self.cache
+        cache.update_router_info(1, router_1, [10])
+        cache.update_router_info(1, router_2, [12])
+        cache.routers[(1, router_1)].last_seen -= cache.max_age + 1.0
+        handle = cache._aging_handle
+
+        cache._age_routers()
+        assert list(cache.routers) == [(1, router_2)]
+        assert cache.get_router_info(10) is None
+        assert cache._aging_handle is not None and cache._aging_handle is not handle
+        self.check_indexes()
+
+        # the last router goes, the sweep stops
+        cache.routers[(1, router_2)].last_seen -= cache.max_age + 1.0
+        cache._age_routers()
+        assert cache.routers == {}
+        assert cache._aging_handle is None
+        self.check_indexes()
+
+    async def test_age_timer(self):
+        """The sweep runs on its own and keeps the routers that are heard from."""
+        self.cache = cache = RouterInfoCache(max_age=0.4)
+        cache.update_router_info(1, router_1, [10])
+        cache.update_router_info(1, router_2, [12])
+        for _ in range(6):
+            await asyncio.sleep(0.1)
+            cache.refresh_router_info(1, router_2)
+        assert list(cache.routers) == [(1, router_2)]
+        self.check_indexes()
+
+        await asyncio.sleep(0.7)
+        assert cache.routers == {}
+        assert cache._aging_handle is None
+
+    def test_no_aging(self):
+        """A max_age of None keeps the routers until they are deleted."""
+        self.cache = cache = RouterInfoCache(max_age=None)
+        cache.update_router_info(1, router_1, [10])
+        assert cache._aging_handle is None
+        cache.clear()
+        assert cache.routers == {}
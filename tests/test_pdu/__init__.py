@@ -7,3 +7,4 @@ Test BACpypes PDU Module
 from . import test_address
 from . import test_pci
 from . import test_pdu
+from . import test_immutable_address
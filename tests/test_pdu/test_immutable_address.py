@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test Immutable Address
+----------------------
+
+Addresses cannot be changed after they are built, copies are the same
+instance, and repeat values are interned in a bounded cache.
+"""
+
+import copy
+import pickle
+import unittest
+
+from bacpypes.comm import Client, bind
+from bacpypes.link import Address, LocalStation, RemoteStation, LocalBroadcast, RemoteBroadcast, GlobalBroadcast, \
+    PDU, intern_address, clear_address_cache
+from bacpypes.link import address as address_module
+from bacpypes.bvll import AnnexJCodec
+
+
+class Application(Client):
+
+    def __init__(self):
+        Client.__init__(self)
+        self.received = []
+
+    def confirmation(self, pdu):
+        self.received.append(pdu)
+
+
+def addresses():
+    return [
+        Address('10.0.0.1'),
+        Address('10.0.0.1/24:47809'),
+        Address(('10.0.0.2', 47808)),
+        Address(b'\x0a\x00\x00\x03\xba\xc0'),
+        Address('2:10.0.0.4'),
+        Address('0x0102'),
+        LocalStation(5),
+        RemoteStation(3, 7),
+        LocalBroadcast(),
+        RemoteBroadcast(3),
+        GlobalBroadcast(),
+    ]
+
+
+class TestImmutableAddress(unittest.TestCase):
+
+    def test_immutable(self):
+        """No attribute can be set or deleted, old or new."""
+        for addr in addresses():
+            for name in ('addrType', 'addrNet', 'addrAddr', 'addrLen', 'addrMask', 'something'):
+                with self.assertRaises(AttributeError):
+                    setattr(addr, name, None)
+            with self.assertRaises(AttributeError):
+                del addr.addrAddr
+
+    def test_hash(self):
+        """The hash does not change and equal addresses hash the same."""
+        for addr in addresses():
+            assert hash(addr) == hash(addr)
+        assert hash(Address('10.0.0.1')) == hash(Address(('10.0.0.1', 47808)))
+        assert hash(RemoteStation(3, 7)) == hash(Address('3:7'))
+        assert len({Address('10.0.0.1'), Address(('10.0.0.1', 47808)), Address('10.0.0.1/24')}) == 1
+
+    def test_equal(self):
+        """Addresses compare equal to the values they are built from."""
+        addr = Address('10.0.0.1')
+        assert addr == ('10.0.0.1', 47808)
+        assert addr == '10.0.0.1'
+        assert addr == b'\x0a\x00\x00\x01\xba\xc0'
+        assert addr != ('10.0.0.1', 47809)
+        assert addr != Address('1:10.0.0.1')
+        assert LocalStation(5) == Address(5)
+        assert RemoteBroadcast(3) == Address('3:*')
+
+    def test_copy(self):
+        """A copy is the same instance."""
+        for addr in addresses():
+            assert copy.copy(addr) is addr
+            assert copy.deepcopy(addr) is addr
+            assert copy.deepcopy([addr])[0] is addr
+
+    def test_pickle(self):
+        """Pickling keeps the class, the attributes and the hash."""
+        for addr in addresses():
+            other = pickle.loads(pickle.dumps(addr))
+            assert type(other) is type(addr)
+            assert other == addr
+            assert hash(other) == hash(addr)
+            assert str(other) == str(addr)
+            for name in Address.__slots__:
+                assert hasattr(other, name) == hasattr(addr, name)
+                if hasattr(addr, name):
+                    assert getattr(other, name) == getattr(addr, name)
+            with self.assertRaises(AttributeError):
+                other.addrNet = 1
+
+    def test_with_mask(self):
+        """A copy with a different mask, the original does not change."""
+        addr = Address('10.0.0.1')
+        masked = addr.with_mask(0xFFFFFF00)
+        assert masked is not addr
+        assert masked.addrMask == 0xFFFFFF00
+        assert addr.addrMask == 0xFFFFFFFF
+        assert masked == addr
+        assert hash(masked) == hash(addr)
+        assert masked.addrTuple == addr.addrTuple
+        with self.assertRaises(AttributeError):
+            masked.addrMask = 0
+
+    def test_bdt_decode(self):
+        """The entries of a decoded broadcast distribution table have their masks."""
+        application, codec = Application(), AnnexJCodec()
+        bind(application, codec)
+        entries = b'\x0a\x00\x00\x01\xba\xc0\xff\xff\xff\x00' + b'\x0a\x01\x00\x01\xba\xc0\xff\xff\xff\xff'
+        data = b'\x81\x03' + (4 + len(entries)).to_bytes(2, 'big') + entries
+        codec.confirmation(PDU(data, source=Address('10.0.0.9')))
+
+        bdt = application.received[0].bvlciBDT
+        assert [entry.addrTuple for entry in bdt] == [('10.0.0.1', 47808), ('10.1.0.1', 47808)]
+        assert [entry.addrMask for entry in bdt] == [0xFFFFFF00, 0xFFFFFFFF]
+
+
+class TestInternAddress(unittest.TestCase):
+
+    def setUp(self):
+        clear_address_cache()
+        self.cache_size = address_module.ADDRESS_CACHE_SIZE
+
+    def tearDown(self):
+        address_module.ADDRESS_CACHE_SIZE = self.cache_size
+        clear_address_cache()
+
+    def test_intern(self):
+        """Repeat values give the same instance."""
+        for value in (('10.0.0.1', 47808), b'\x0a\x00\x00\x02\xba\xc0', bytearray(b'\x0a\x00\x00\x03\xba\xc0'),
+                      '10.0.0.4', '2:5', 7):
+            addr = intern_address(value)
+            assert intern_address(value) is addr
+            assert addr == Address(value)
+
+        addr = Address('10.0.0.5')
+        assert intern_address(addr) is addr
+
+        # equal values of a different kind are different entries
+        assert intern_address('10.0.0.1') is not intern_address(('10.0.0.1', 47808))
+        assert intern_address('10.0.0.1') == intern_address(('10.0.0.1', 47808))
+
+    def test_not_hashable(self):
+        with self.assertRaises(TypeError):
+            intern_address(['10.0.0.1', 47808])
+
+    def test_eviction(self):
+        """The cache holds ADDRESS_CACHE_SIZE entries, the least recently used go first."""
+        address_module.ADDRESS_CACHE_SIZE = 4
+        first = intern_address(('10.0.0.1', 47808))
+        busy = intern_address(('10.0.0.2', 47808))
+        for i in range(3, 8):
+            intern_address(('10.0.0.%d' % (i,), 47808))
+            # a peer that keeps sending stays
+            assert intern_address(('10.0.0.2', 47808)) is busy
+        assert len(address_module._address_cache) == 4
+        assert intern_address(('10.0.0.2', 47808)) is busy
+        assert intern_address(('10.0.0.1', 47808)) is not first
+        assert intern_address(('10.0.0.1', 47808)) == first
+
+    def test_clear(self):
+        addr = intern_address(('10.0.0.1', 47808))
+        clear_address_cache()
+        assert intern_address(('10.0.0.1', 47808)) is not addr
@@ -9,3 +9,4 @@ from . import test_device
 from . import test_file
 from . import test_object
 
+from . import test_discover
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test Discover
+-------------
+
+The Who-Is requests of a discovery ask for the range in pieces, the I-Am
+answers come back through do_IAmRequest() once per device, and the discovery
+stops when every device has answered or when the answers stop coming.
+"""
+
+import asyncio
+import contextlib
+import time
+import unittest
+
+from bacpypes.link import Address
+from bacpypes.apdu import IAmRequest
+from bacpypes.app.deviceinfo import DeviceInfoCache
+from bacpypes.service.device import WhoIsIAmServices
+
+
+class Discoverer(WhoIsIAmServices):
+    """Keep the Who-Is requests, the devices in answers answer each one."""
+
+    discover_range_size = 10
+    discover_interval = 0.01
+
+    def __init__(self, answers=()):
+        WhoIsIAmServices.__init__(self)
+        self.localDevice = None
+        self.deviceInfoCache = DeviceInfoCache()
+        self.answers = answers
+        self.sent = []
+
+    def request(self, apdu):
+        low, high = apdu.deviceInstanceRangeLowLimit, apdu.deviceInstanceRangeHighLimit
+        self.sent.append((low, high))
+        loop = asyncio.get_running_loop()
+        for instance in self.answers:
+            if (low is None) or (low <= instance <= high):
+                loop.call_soon(self.do_IAmRequest, i_am(instance))
+
+
+def i_am(instance):
+    apdu = IAmRequest(
+        iAmDeviceIdentifier=('device', instance),
+        maxAPDULengthAccepted=1476,
+        segmentationSupported='noSegmentation',
+        vendorID=15,
+    )
+    apdu.pduSource = Address('10.0.%d.%d' % (instance // 250, instance % 250 + 1))
+    return apdu
+
+
+async def discover(app, *args, **kwargs):
+    return [device_info.deviceIdentifier async for device_info in app.discover(*args, **kwargs)]
+
+
+class TestDiscover(unittest.IsolatedAsyncioTestCase):
+
+    def other_tasks(self):
+        current = asyncio.current_task()
+        return [task for task in asyncio.all_tasks() if task is not current]
+
+    async def test_ranges(self):
+        """The range is asked for in pieces of discover_range_size."""
+        app = Discoverer()
+        assert await discover(app, 0, 24, timeout=0.05) == []
+        assert app.sent == [(0, 9), (10, 19), (20, 24)]
+
+        app.sent = []
+        assert await discover(app, 7, 7, timeout=0.05) == []
+        assert app.sent == [(7, 7)]
+
+    async def test_once(self):
+        """A device that answers again, or more than once, is found once."""
+        app = Discoverer(answers=[3, 12, 12, 25, 40])
+        start = time.monotonic()
+        assert await discover(app, 0, 29, timeout=0.2) == [3, 12, 25]
+        assert time.monotonic() - start >= 0.2
+
+        # in the cache, the device outside the range is not
+        assert app.deviceInfoCache.get_device_info(12).address == Address('10.0.0.13')
+        assert app.deviceInfoCache.get_device_info(40) is None
+
+    async def test_all_found(self):
+        """The discovery stops when every instance in the range has answered."""
+        app = Discoverer(answers=[5, 6, 7])
+        start = time.monotonic()
+        assert sorted(await discover(app, 5, 7, timeout=10)) == [5, 6, 7]
+        assert time.monotonic() - start < 1.0
+
+        # before the last Who-Is is sent
+        app = Discoverer(answers=[1, 2])
+        assert sorted(await discover(app, 1, 2, timeout=10)) == [1, 2]
+        app.discover_range_size = 1
+        app.sent = []
+        assert sorted(await discover(app, 1, 2, timeout=10)) == [1, 2]
+        assert app.sent == [(1, 1), (2, 2)]
+
+    async def test_timeout(self):
+        """Without all the answers it stops timeout seconds after the last one."""
+        app = Discoverer(answers=[4])
+        start = time.monotonic()
+        assert await discover(app, timeout=0.1) == [4]
+        assert app.sent == [(None, None)]
+        assert 0.1 <= time.monotonic() - start < 1.0
+        assert app._discoveries == []
+
+    async def test_leave_early(self):
+        """Leaving the loop early stops the Who-Is requests."""
+        app = Discoverer(answers=[0])
+        async with contextlib.aclosing(app.discover(0, 99, timeout=10)) as devices:
+            async for device_info in devices:
+                assert device_info.deviceIdentifier == 0
+                break
+        await asyncio.sleep(0.05)
+        assert app.sent == [(0, 9)]
+        assert app._discoveries == []
+        assert self.other_tasks() == []
+
+    async def test_cancelled(self):
+        """A consumer cancelled while it waits leaves no tasks behind."""
+        app = Discoverer()
+        app.discover_interval = 10
+        task = asyncio.get_running_loop().create_task(discover(app, 0, 99, timeout=10))
+        await asyncio.sleep(0.05)
+        assert app.sent == [(0, 9)]
+
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+        assert app._discoveries == []
+        assert self.other_tasks() == []
@@ -15,3 +15,7 @@ from . import test_client_state_machine
 from . import test_server_state_machine
 
 from . import test_service_access_point
+
+from . import test_timer_wheel
+from . import test_udp_peers
+from . import test_udp_batch
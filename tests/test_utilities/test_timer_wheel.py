@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test Utilities Timer Wheel
+--------------------------
+"""
+
+import asyncio
+import random
+import unittest
+
+from bacpypes.task import TimerWheel, call_later_coarse, get_timer_wheel
+
+# a fine wheel with few slots so a test goes around it a few times
+resolution = 0.01
+slots = 8
+
+# how late the event loop itself may be, on top of the tick
+slack = 0.02
+
+
+class TestTimerWheel(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.loop = asyncio.get_running_loop()
+        self.wheel = TimerWheel(resolution=resolution, slots=slots, loop=self.loop)
+        self.fired = []
+
+    def fire(self, name):
+        self.fired.append((name, self.loop.time()))
+
+    async def wait_for_wheel(self, limit=2.0):
+        """Wait until every timer on the wheel has fired."""
+        deadline = self.loop.time() + limit
+        while len(self.wheel) and (self.loop.time() < deadline):
+            await asyncio.sleep(resolution)
+        assert len(self.wheel) == 0
+        assert self.wheel._handle is None
+
+    async def test_never_early(self):
+        """Timers fire at or after their time and no more than a tick late."""
+        random.seed(15)
+        timers = {}
+        for i in range(200):
+            timers[i] = self.wheel.call_later(random.uniform(0, 0.2), self.fire, i)
+        await self.wait_for_wheel()
+
+        assert sorted(name for name, _ in self.fired) == list(range(200))
+        for name, fired in self.fired:
+            when = timers[name].when()
+            assert fired >= when, (name, fired, when)
+            assert fired - when < resolution + slack, (name, fired - when)
+
+    async def test_in_order(self):
+        """Timers in different ticks fire in the order of their ticks."""
+        for i in range(10):
+            self.wheel.call_later((10 - i) * resolution * 1.5, self.fire, 10 - i)
+        await self.wait_for_wheel()
+        assert [name for name, _ in self.fired] == list(range(1, 11))
+
+    async def test_cancel(self):
+        """A cancelled timer does not fire and the wheel stops when it is empty."""
+        timer = self.wheel.call_later(0.05, self.fire, 'cancelled')
+        assert len(self.wheel) == 1
+        timer.cancel()
+        timer.cancel()
+        assert timer.cancelled()
+        assert len(self.wheel) == 0
+        assert self.wheel._handle is None
+
+        await asyncio.sleep(0.1)
+        assert self.fired == []
+
+    async def test_cancel_from_callback(self):
+        """A callback can cancel a timer in the same tick or a later one."""
+        later = self.wheel.call_later(0.05, self.fire, 'later')
+        same = []
+
+        def cancel_others():
+            self.fire('first')
+            same[0].cancel()
+            later.cancel()
+
+        when = self.loop.time() + 0.02
+        self.wheel.call_at(when, cancel_others)
+        same.append(self.wheel.call_at(when, self.fire, 'same tick'))
+
+        await asyncio.sleep(0.1)
+        assert [name for name, _ in self.fired] == ['first']
+        assert len(self.wheel) == 0
+
+    async def test_cancel_self(self):
+        """Cancelling a timer from its own callback does nothing."""
+        timers = []
+
+        def cancel_self():
+            self.fire('self')
+            timers[0].cancel()
+
+        timers.append(self.wheel.call_later(0.01, cancel_self))
+        await self.wait_for_wheel()
+        assert [name for name, _ in self.fired] == ['self']
+
+    async def test_schedule_from_callback(self):
+        """A timer started by a callback fires in a later tick, even with no delay."""
+        def chain(count):
+            self.fire(count)
+            if count:
+                self.wheel.call_later(0, chain, count - 1)
+
+        start = self.loop.time()
+        self.wheel.call_later(0, chain, 5)
+        await self.wait_for_wheel()
+
+        assert [name for name, _ in self.fired] == [5, 4, 3, 2, 1, 0]
+        ticks = [int(fired // resolution) for _, fired in self.fired]
+        assert ticks == sorted(set(ticks))
+        assert self.fired[-1][1] - start < 6 * resolution + slack
+
+    async def test_longer_than_a_revolution(self):
+        """A timer further away than one turn of the wheel waits for its turn."""
+        long = self.wheel.call_later(slots * resolution * 3.5, self.fire, 'long')
+        # something in the same slot each time around before it
+        for turn in range(3):
+            self.wheel.call_at(long.when() - (3 - turn) * slots * resolution, self.fire, turn)
+        await self.wait_for_wheel()
+
+        assert [name for name, _ in self.fired] == [0, 1, 2, 'long']
+        fired = self.fired[-1][1]
+        assert long.when() <= fired < long.when() + resolution + slack
+
+    async def test_idle(self):
+        """After the wheel has been idle a new timer is not early or late."""
+        self.wheel.call_later(0.01, self.fire, 'first')
+        await self.wait_for_wheel()
+        await asyncio.sleep(slots * resolution * 2)
+
+        timer = self.wheel.call_later(0.03, self.fire, 'second')
+        await self.wait_for_wheel()
+        fired = self.fired[-1][1]
+        assert timer.when() <= fired < timer.when() + resolution + slack
+
+    async def test_exception(self):
+        """An exception in a callback goes to the exception handler, the others still fire."""
+        errors = []
+        self.loop.set_exception_handler(lambda loop, context: errors.append(context))
+
+        def fail():
+            raise ValueError('oops')
+
+        when = self.loop.time() + 0.02
+        self.wheel.call_at(when, fail)
+        self.wheel.call_at(when, self.fire, 'after')
+        await self.wait_for_wheel()
+
+        assert [name for name, _ in self.fired] == ['after']
+        assert isinstance(errors[0]['exception'], ValueError)
+
+    async def test_shared_wheel(self):
+        """call_later_coarse uses the wheel of the running loop."""
+        assert get_timer_wheel() is get_timer_wheel()
+        timer = call_later_coarse(0.01, self.fire, 'coarse')
+        assert len(get_timer_wheel()) >= 1
+
+        await asyncio.sleep(0.1)
+        assert [name for name, _ in self.fired] == ['coarse']
+        assert self.fired[0][1] >= timer.when()
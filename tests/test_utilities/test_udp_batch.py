@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test Utilities UDP Batch
+------------------------
+
+A UDPBatchDirector on the loopback interface reads a burst of datagrams in
+batches, sends the same datagram to several destinations and keeps going when
+one datagram of a batch cannot be handled.
+"""
+
+import asyncio
+import socket
+import unittest
+
+from bacpypes.comm import Client, bind
+from bacpypes.transport import UDPBatchDirector
+
+
+class Application(Client):
+
+    def __init__(self):
+        Client.__init__(self)
+        self.received = []
+
+    def confirmation(self, pdu):
+        if pdu.pduData == b'bad':
+            raise ValueError('bad datagram')
+        self.received.append((bytes(pdu.pduData), pdu.pduSource))
+
+
+class BatchCounter(UDPBatchDirector):
+    """Count the times the socket is read."""
+
+    def __init__(self, **kwargs):
+        UDPBatchDirector.__init__(self, **kwargs)
+        self.reads = 0
+
+    def _read_ready(self):
+        self.reads += 1
+        UDPBatchDirector._read_ready(self)
+
+
+def peer_socket():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.setblocking(False)
+    return sock
+
+
+class TestUDPBatchDirector(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.director = await BatchCounter.create_endpoint(local_addr=('127.0.0.1', 0), batch_size=4)
+        self.addr = self.director.socket.getsockname()
+        self.application = Application()
+        bind(self.application, self.director)
+        self.sockets = []
+
+        self.errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: self.errors.append(context))
+
+    async def asyncTearDown(self):
+        self.director.close_socket()
+        for sock in self.sockets:
+            sock.close()
+
+    def peer(self):
+        sock = peer_socket()
+        self.sockets.append(sock)
+        return sock
+
+    async def wait_for(self, count):
+        for _ in range(100):
+            if len(self.application.received) >= count:
+                break
+            await asyncio.sleep(0.01)
+        return self.application.received
+
+    async def test_burst(self):
+        """More datagrams than batch_size are read in batches, in order."""
+        sock = self.peer()
+        source = sock.getsockname()
+        for i in range(13):
+            sock.sendto(b'datagram %d' % (i,), self.addr)
+
+        received = await self.wait_for(13)
+        assert received == [(b'datagram %d' % (i,), source) for i in range(13)]
+        # four reads of four, three and an empty one at most
+        assert self.director.reads <= 5
+        assert self.errors == []
+
+    async def test_fan_out(self):
+        """The same datagram goes to each destination."""
+        socks = [self.peer() for _ in range(3)]
+        self.director.fan_out(b'broadcast', [sock.getsockname() for sock in socks])
+        # queued, not sent until the loop comes around
+        assert len(self.director._send_queue) == 3
+
+        await asyncio.sleep(0.05)
+        assert len(self.director._send_queue) == 0
+        for sock in socks:
+            assert sock.recvfrom(100) == (b'broadcast', self.addr)
+            with self.assertRaises(BlockingIOError):
+                sock.recvfrom(100)
+
+    async def test_exception(self):
+        """An exception for one datagram does not drop the rest of the batch."""
+        sock = self.peer()
+        for data in (b'one', b'bad', b'two', b'bad', b'three'):
+            sock.sendto(data, self.addr)
+
+        received = await self.wait_for(3)
+        await asyncio.sleep(0.02)
+        assert [data for data, _ in received] == [b'one', b'two', b'three']
+        assert len(self.errors) == 2
+        assert all(isinstance(context['exception'], ValueError) for context in self.errors)
+        assert self.director.reads <= 3
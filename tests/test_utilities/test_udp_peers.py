@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Test Utilities UDP Peers
+------------------------
+
+The peer table of a UDPDirector, trimmed when it is full and emptied by the
+idle timers.
+"""
+
+import asyncio
+import time
+import unittest
+
+from bacpypes.comm import Client, bind
+from bacpypes.link import PDU
+from bacpypes.transport import UDPDirector
+from bacpypes.transport.udp_actor import UDPActor
+
+
+class Application(Client):
+
+    def __init__(self):
+        Client.__init__(self)
+        self.received = []
+
+    def confirmation(self, pdu):
+        self.received.append(pdu)
+
+
+def peer(i):
+    return ('10.0.0.%d' % (i + 1,), 47808)
+
+
+class TestUDPPeers(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.application = Application()
+
+    def director(self, **kwargs):
+        director = UDPDirector(**kwargs)
+        bind(self.application, director)
+        return director
+
+    async def test_trim(self):
+        """A full table drops the least recently active quarter."""
+        director = self.director(max_peers=8, timeout=60)
+        now = time.monotonic()
+        actors = []
+        for i in range(8):
+            actor = UDPActor(director, peer(i))
+            actors.append(actor)
+        # the odd ones have been busy lately
+        for i, actor in enumerate(actors):
+            actor.last_activity = now - 100 + i + (50 if i % 2 else 0)
+        assert len(director.peers) == 8
+
+        UDPActor(director, peer(8))
+        assert len(director.peers) == 7
+        assert peer(8) in director.peers
+        # the oldest two are gone and their idle timers stopped
+        for i in (0, 2):
+            assert peer(i) not in director.peers
+            assert actors[i].timeout_handle is None
+        for i in (1, 3, 4, 5, 6, 7):
+            assert director.get_actor(peer(i)) is actors[i]
+            assert actors[i].timeout_handle is not None
+
+        for actor in list(director.peers.values()):
+            actor.close()
+
+    async def test_trim_count(self):
+        """trim_peers leaves the most recently active ones."""
+        director = self.director(max_peers=0)
+        for i in range(20):
+            UDPActor(director, peer(i)).last_activity = i
+        assert len(director.peers) == 20
+
+        director.trim_peers(5)
+        assert sorted(director.peers) == sorted(peer(i) for i in range(15, 20))
+        director.trim_peers(10)
+        assert len(director.peers) == 5
+
+    async def test_traffic(self):
+        """Datagrams create actors and keep them active."""
+        director = self.director(max_peers=4)
+        for i in range(10):
+            director._response(PDU(b'\x01', source=peer(i % 5)))
+        assert len(self.application.received) == 10
+        assert len(director.peers) <= 4
+        # the most recent ones are still there
+        assert peer(4) in director.peers
+        assert peer(3) in director.peers
+
+    async def test_idle(self):
+        """An idle actor goes away, one with traffic stays."""
+        director = self.director(timeout=0.1)
+        director._response(PDU(b'\x01', source=peer(0)))
+        director._response(PDU(b'\x01', source=peer(1)))
+        assert len(director.peers) == 2
+
+        for _ in range(4):
+            await asyncio.sleep(0.05)
+            director._response(PDU(b'\x01', source=peer(1)))
+        assert list(director.peers) == [peer(1)]
+
+        await asyncio.sleep(0.25)
+        assert director.peers == {}